@@ -15,6 +15,10 @@ function wsUrl(path: string): string {
 
 export interface WsSubscription {
   close: () => void;
+  /** /ws/live only: the signal_ids this page displays (null = everything).
+   *  Re-sent after every reconnect; the server forwards the union of its
+   *  clients' selections to the parser (parser/subscriptions.py). */
+  setSignals: (signalIds: number[] | null) => void;
 }
 
 export function subscribeLive(onEvent: (ev: ParserEvent) => void): WsSubscription {
@@ -29,10 +33,14 @@ function openWs(path: string, onEvent: (ev: ParserEvent) => void): WsSubscriptio
   let closed = false;
   let ws: WebSocket | null = null;
   let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+  let command: string | null = null;
 
   const connect = () => {
     if (closed) return;
     ws = new WebSocket(wsUrl(path));
+    ws.onopen = () => {
+      if (command) ws?.send(command);
+    };
     ws.onmessage = (msg) => {
       try {
         onEvent(JSON.parse(String(msg.data)));
@@ -57,5 +65,9 @@ function openWs(path: string, onEvent: (ev: ParserEvent) => void): WsSubscriptio
       if (reconnectTimer) clearTimeout(reconnectTimer);
       ws?.close();
     },
+    setSignals: (signalIds) => {
+      command = JSON.stringify({ type: 'subscribe', signal_ids: signalIds });
+      if (ws?.readyState === WebSocket.OPEN) ws.send(command);
+    },
   };
 }
@@ -3,7 +3,7 @@ import { renderHook, act } from '@testing-library/react';
 import { useLiveTodayFrames } from './useLiveTodayFrames.ts';
 
 vi.mock('../api/ws.ts', () => ({
-  subscribeLive: vi.fn(() => ({ close: () => {} })),
+  subscribeLive: vi.fn(() => ({ close: () => {}, setSignals: vi.fn() })),
 }));
 vi.mock('../api/client.ts', () => ({
   apiGet: vi.fn(async () => []),
@@ -32,4 +32,12 @@ describe('useLiveTodayFrames', () => {
     expect(url).toMatch(/\/api\/live\/window/);
     expect(url).toMatch(/ids=1,2,3/);
   });
+
+  it('forwards the live selection to the WS subscription', async () => {
+    const { subscribeLive } = await import('../api/ws.ts');
+    const { result } = renderHook(() => useLiveTodayFrames());
+    const sub = (subscribeLive as any).mock.results.at(-1).value;
+    act(() => result.current.setLiveSignals([4, 9]));
+    expect(sub.setSignals).toHaveBeenCalledWith([4, 9]);
+  });
 });
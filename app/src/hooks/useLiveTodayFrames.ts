@@ -1,5 +1,5 @@
-import { useEffect, useRef, useState, useSyncExternalStore } from 'react';
-import { subscribeLive } from '../api/ws.ts';
+import { useCallback, useEffect, useRef, useState, useSyncExternalStore } from 'react';
+import { subscribeLive, type WsSubscription } from '../api/ws.ts';
 import { apiGet } from '../api/client.ts';
 import type { ParserEvent, SignalWindowRow } from '../api/types.ts';
 import type { FramesStore as IFramesStore, FrameRow } from '@nfr/widgets';
@@ -105,6 +105,8 @@ const TARGET_BUCKETS = 800;
 export interface UseLiveTodayFramesResult {
   store: TodayFramesStore;
   ensureWindow: (start: string, end: string, signalIds: number[]) => Promise<void>;
+  /** Limit the WS push to these signal_ids (null = everything). */
+  setLiveSignals: (signalIds: number[] | null) => void;
   status: 'idle' | 'loading' | 'ready' | 'error';
 }
 
@@ -115,15 +117,28 @@ export function useLiveTodayFrames(): UseLiveTodayFramesResult {
   // Per-signal fetched ranges so scroll-back doesn't re-hit the API for
   // ranges already in the store.
   const fetchedRef = useRef<Map<number, Array<[string, string]>>>(new Map());
+  const subRef = useRef<WsSubscription | null>(null);
+  // Last selection, so a remount's new socket subscribes the same way.
+  const signalsRef = useRef<number[] | null>(null);
 
   // Real-time edge: WS push.
   useEffect(() => {
     const sub = subscribeLive((ev: ParserEvent) => {
       if (ev.type === 'frames') store.push(ev.rows);
     });
-    return () => sub.close();
+    if (signalsRef.current) sub.setSignals(signalsRef.current);
+    subRef.current = sub;
+    return () => {
+      subRef.current = null;
+      sub.close();
+    };
   }, [store]);
 
+  const setLiveSignals = useCallback((signalIds: number[] | null): void => {
+    signalsRef.current = signalIds;
+    subRef.current?.setSignals(signalIds);
+  }, []);
+
   useSyncExternalStore(
     (cb) => store.subscribe(cb),
     () => store.getVersion(),
@@ -173,5 +188,5 @@ export function useLiveTodayFrames(): UseLiveTodayFramesResult {
     }
   };
 
-  return { store, ensureWindow, status };
+  return { store, ensureWindow, setLiveSignals, status };
 }
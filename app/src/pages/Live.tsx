@@ -377,7 +377,7 @@ interface LiveInnerProps {
 
 function LiveInner({ navigate }: LiveInnerProps) {
   const catalog = useCatalog();
-  const { store, ensureWindow } = useLiveTodayFrames();
+  const { store, ensureWindow, setLiveSignals } = useLiveTodayFrames();
   const [t, setT] = useState(1);
   const [mode, setMode] = useState<'live' | 'replay'>('live');
   const rafRef = useRef<number | null>(null);
@@ -403,9 +403,11 @@ function LiveInner({ navigate }: LiveInnerProps) {
 
   // Resolve widget-layout signal entries through the catalog and extract numeric
   // ids. Polls localStorage because the dock has no callback API for layout
-  // changes. Same approach as Replay.tsx.
+  // changes. Same approach as Replay.tsx. The same ids are the live
+  // subscription, so the parser only streams what the widgets show;
+  // a widget added later is caught up by the ensureWindow fetch below.
   const [signalIds, setSignalIds] = useState<number[]>([]);
-  const lastIdsRef = useRef<string>('');
+  const lastIdsRef = useRef<string | null>(null);
   useEffect(() => {
     if (!catalog) return;
     const tick = () => {
@@ -427,6 +429,7 @@ function LiveInner({ navigate }: LiveInnerProps) {
         if (key !== lastIdsRef.current) {
           lastIdsRef.current = key;
           setSignalIds(sorted);
+          setLiveSignals(sorted);
         }
       } catch {
         /* ignore */
@@ -435,7 +438,7 @@ function LiveInner({ navigate }: LiveInnerProps) {
     tick();
     const iv = setInterval(tick, 500);
     return () => clearInterval(iv);
-  }, [catalog]);
+  }, [catalog, setLiveSignals]);
 
   // At the live edge AND not zoomed AND not paused, advance visEnd on
   // every animation frame so the dock follows the streaming front
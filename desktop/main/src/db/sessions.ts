@@ -18,6 +18,8 @@ export interface Session {
   uploaded_by_machine: string | null;
   uploaded_at: string | null;
   local_deleted_at: string | null;
+  row_count: string | null;            // BIGINT → string via pg default
+  signal_count: number | null;
 }
 
 export interface SessionDetail extends Session {
@@ -39,8 +41,10 @@ export async function listSessions(pool: pg.Pool): Promise<Session[]> {
     `SELECT id, date::text, started_at, ended_at, track, driver, car, notes,
             source, source_file, synced_at,
             content_hash, manifest_key, total_bytes::text, uploaded_by_machine,
-            uploaded_at, local_deleted_at
-     FROM sessions
+            uploaded_at, local_deleted_at, row_count::text, signal_count
+     FROM sessions s
+     -- Unfinished batch imports (parser/batch.py resumes them) stay hidden.
+     WHERE NOT EXISTS (SELECT 1 FROM import_resume r WHERE r.session_id = s.id)
      ORDER BY started_at DESC`,
   );
   return rows;
@@ -54,7 +58,7 @@ export async function getSession(
     `SELECT id, date::text, started_at, ended_at, track, driver, car, notes,
             source, source_file, synced_at,
             content_hash, manifest_key, total_bytes::text, uploaded_by_machine,
-            uploaded_at, local_deleted_at
+            uploaded_at, local_deleted_at, row_count::text, signal_count
      FROM sessions WHERE id = $1`,
     [id],
   );
@@ -60,6 +60,59 @@ export async function getSessionSignalIds(
   return rows.map((r) => r.signal_id);
 }
 
+export interface SignalStatsRow {
+  signal_id: number;
+  source: string;
+  signal_name: string;
+  unit: string | null;
+  sample_n: number;
+  value_min: number;
+  value_max: number;
+  value_mean: number;
+  first_ts: string;    // ISO
+  last_ts: string;     // ISO
+  /** 32 equal-width bins over [value_min, value_max]. */
+  histogram: number[];
+}
+
+/** Per-signal summary stats for one session, read from
+ *  session_signal_stats (written at import / live flush). Sessions imported
+ *  before the table existed are summarised once on first request. */
+export async function getSessionSignalStats(
+  pool: pg.Pool,
+  sessionId: string
+): Promise<SignalStatsRow[]> {
+  const query = () => pool.query<{
+    signal_id: number;
+    source: string;
+    signal_name: string;
+    unit: string | null;
+    sample_n: string;
+    value_min: number;
+    value_max: number;
+    value_mean: number;
+    first_ts: Date;
+    last_ts: Date;
+    histogram: number[];
+  }>(
+    `SELECT signal_id, source, signal_name, unit, sample_n, value_min,
+            value_max, value_mean, first_ts, last_ts, histogram
+     FROM get_session_signal_stats($1)`,
+    [sessionId]
+  );
+  let { rows } = await query();
+  if (rows.length === 0) {
+    await pool.query(`SELECT populate_session_signal_stats($1)`, [sessionId]);
+    ({ rows } = await query());
+  }
+  return rows.map((r) => ({
+    ...r,
+    sample_n: Number(r.sample_n),
+    first_ts: r.first_ts.toISOString(),
+    last_ts: r.last_ts.toISOString(),
+  }));
+}
+
 /** Ensure the 1-second rollup is populated for this session. No-op if it
  *  already has rows. Used for sessions imported before v0.7.4 (the rollup
  *  is built at import time for new ones). Slow on the first call for a
@@ -106,6 +159,83 @@ export async function explainSignalsWindow(
   return rows.map((r) => r['QUERY PLAN']).join('\n');
 }
 
+export interface SessionEventRow {
+  ts: string;          // ISO
+  signal_id: number;
+  source: string;
+  signal_name: string;
+  /** Rule label: 'below:0.2', 'above:95', 'change' or 'bit:3'. */
+  kind: string;
+  value: number;
+}
+
+/** Indexed events of one session (session_events, written at import from
+ *  the `<dbc>.events.csv` rules), in time order. `kind` filters by the full
+ *  label or just the rule type ('below'). */
+export async function listSessionEvents(
+  pool: pg.Pool,
+  sessionId: string,
+  signalIds: number[] | null,
+  kind: string | null,
+  limit: number
+): Promise<SessionEventRow[]> {
+  const { rows } = await pool.query<{
+    ts: Date;
+    signal_id: number;
+    source: string;
+    signal_name: string;
+    kind: string;
+    value: number;
+  }>(
+    `SELECT ts, signal_id, source, signal_name, kind, value
+     FROM list_session_events($1, $2::integer[], $3, $4)`,
+    [sessionId, signalIds, kind, limit]
+  );
+  return rows.map((r) => ({ ...r, ts: r.ts.toISOString() }));
+}
+
+/** LTTB overview points (sd_lttb, written at import) in the same row shape
+ *  as get_signals_window. Each point is a one-sample bucket. Signals
+ *  without an overview (live sessions, pre-0022 imports) return no rows. */
+export async function getSignalsOverview(
+  pool: pg.Pool,
+  sessionId: string,
+  signalIds: number[],
+  points: number,
+): Promise<SignalWindowRow[]> {
+  if (signalIds.length === 0) return [];
+  const { rows } = await pool.query<{
+    ts: Date;
+    signal_id: number;
+    signal_name: string;
+    unit: string | null;
+    value_min: number;
+    value_max: number;
+    value_avg: number;
+    sample_n: number;
+  }>(
+    `SELECT ts, signal_id, signal_name, unit, value_min, value_max, value_avg, sample_n
+     FROM get_signals_overview($1, $2::integer[], $3::integer)`,
+    [sessionId, signalIds, Math.max(1, Math.ceil(points))],
+  );
+  return rows.map((r) => ({ ...r, ts: r.ts.toISOString() }));
+}
+
+/** True when [start, end) spans the whole session — the replay "ALL" view. */
+async function coversWholeSession(
+  pool: pg.Pool,
+  sessionId: string,
+  start: string,
+  end: string,
+): Promise<boolean> {
+  const { rows } = await pool.query<{ covers: boolean }>(
+    `SELECT ($2::timestamptz <= started_at AND $3::timestamptz >= ended_at) AS covers
+     FROM sessions WHERE id = $1`,
+    [sessionId, start, end],
+  );
+  return rows[0]?.covers === true;
+}
+
 export async function getSignalsWindow(
   pool: pg.Pool,
   sessionId: string,
@@ -115,6 +245,18 @@ export async function getSignalsWindow(
   bucketSecs: number
 ): Promise<SignalWindowRow[]> {
   if (signalIds.length === 0) return [];
+  // Whole-session views are served from the LTTB overview, whose size is
+  // fixed per signal, so open latency doesn't grow with session length.
+  // The replay hook asks for ~800 buckets, which picks the 800-point budget.
+  // Signals without an overview fall through to the rollup/raw path.
+  let overview: SignalWindowRow[] = [];
+  if (await coversWholeSession(pool, sessionId, start, end)) {
+    const points = (Date.parse(end) - Date.parse(start)) / 1000 / bucketSecs;
+    overview = await getSignalsOverview(pool, sessionId, signalIds, points);
+    const covered = new Set(overview.map((r) => r.signal_id));
+    signalIds = signalIds.filter((id) => !covered.has(id));
+    if (signalIds.length === 0) return overview;
+  }
   // Only the rollup path benefits from backfill. Sub-second buckets hit
   // raw sd_readings anyway, so don't pay the existence check for them.
   if (bucketSecs >= 1.0) await ensureRollup(pool, sessionId);
@@ -155,5 +297,21 @@ export async function getSignalsWindow(
     `bucket=${bucketSecs.toFixed(3)}s rows=${rows.length} ` +
     `query=${queryMs.toFixed(0)}ms map=${mapMs.toFixed(0)}ms`,
   );
-  return out;
+  return overview.length > 0 ? mergeByTs(overview, out) : out;
+}
+
+/** Merge two row lists that are each in ts order, as get_signals_overview
+ *  and get_signals_window return them, into one ts-ordered list, so a mixed
+ *  overview/rollup response has the same order as a plain one. */
+function mergeByTs(a: SignalWindowRow[], b: SignalWindowRow[]): SignalWindowRow[] {
+  const merged: SignalWindowRow[] = new Array(a.length + b.length);
+  let i = 0;
+  let j = 0;
+  let k = 0;
+  while (i < a.length && j < b.length) {
+    merged[k++] = a[i].ts <= b[j].ts ? a[i++] : b[j++];
+  }
+  while (i < a.length) merged[k++] = a[i++];
+  while (j < b.length) merged[k++] = b[j++];
+  return merged;
 }
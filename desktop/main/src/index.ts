@@ -8,6 +8,7 @@ import { createPool } from './db/pool.ts';
 import { getAppConfig } from './db/config.ts';
 import { buildApp } from './server/app.ts';
 import { ParserManager } from './parser/manager.ts';
+import { createLiveHistoryClient } from './parser/history-client.ts';
 import { FolderWatcher } from './watcher/watcher.ts';
 import { PostgresManager, postgresBinDir } from './db/postgres-manager.ts';
 import { loadCatalog } from './db/catalog.ts';
@@ -33,6 +34,13 @@ const PARSER_VENV_PY = process.platform === 'win32'
 // always writable and good enough — files are ingested into Postgres
 // immediately and the temp copy is no longer needed.
 const NFR_UPLOADS_DIR = join(tmpdir(), 'nfr-uploads');
+// Unix socket on which the live parser serves its in-memory recent history
+// (parser/history.py), so short live-graph windows skip Postgres. Not on
+// Windows, where /api/live/window keeps reading live_today.
+const LIVE_HISTORY_SOCKET = process.platform === 'win32'
+  ? null
+  : join(tmpdir(), `nfr-live-history-${process.pid}.sock`);
+const LIVE_HISTORY_ARGS = LIVE_HISTORY_SOCKET ? ['--history-socket', LIVE_HISTORY_SOCKET] : [];
 
 const EMBEDDED_PG_PORT = 5499;
 const EMBEDDED_PG_USER = 'nfr';
@@ -162,8 +170,8 @@ export async function run(opts: {
       const subcommandArgs = replayFile
         ? ['replay', '--dbc', effectiveDbc, '--file', replayFile, '--speed', String(replaySpeed)]
         : serialPort
-          ? ['live', '--dbc', effectiveDbc, '--port', serialPort]
-          : ['live', '--dbc', effectiveDbc, '--port', '/dev/null-no-port-configured'];
+          ? ['live', '--dbc', effectiveDbc, '--port', serialPort, ...LIVE_HISTORY_ARGS]
+          : ['live', '--dbc', effectiveDbc, '--port', '/dev/null-no-port-configured', ...LIVE_HISTORY_ARGS];
 
       const parserArgs = parserIsPython
         ? [PARSER_PY, ...subcommandArgs]
@@ -303,8 +311,8 @@ export async function run(opts: {
     const newSubArgs = replayFileNow
       ? ['replay', '--dbc', newDbc, '--file', replayFileNow, '--speed', String(replaySpeedNow)]
       : serialPortNow
-        ? ['live', '--dbc', newDbc, '--port', serialPortNow]
-        : ['live', '--dbc', newDbc, '--port', '/dev/null-no-port-configured'];
+        ? ['live', '--dbc', newDbc, '--port', serialPortNow, ...LIVE_HISTORY_ARGS]
+        : ['live', '--dbc', newDbc, '--port', '/dev/null-no-port-configured', ...LIVE_HISTORY_ARGS];
 
     const newArgs = parserIsPython ? [PARSER_PY, ...newSubArgs] : newSubArgs;
 
@@ -344,7 +352,8 @@ export async function run(opts: {
 
     // Content-hash dedup: skip re-parsing if this exact file was already imported.
     // When `reparse` is set, skip the short-circuit so the parser re-decodes the
-    // bytes with the current DBC and overwrites prior rows (deterministic UUID).
+    // bytes with the current DBC and overwrites the changed signals' rows
+    // (deterministic UUID).
     const sourceFileHash = createHash('sha256').update(body).digest('hex');
     if (!reparse) {
       const existing = await pool.query<{ id: string }>(
@@ -364,6 +373,9 @@ export async function run(opts: {
     const cfgNow = await getAppConfig(pool);
     const importDbc = typeof cfgNow.dbcPath === 'string' ? cfgNow.dbcPath : dbcCsv;
     const subArgs = ['batch', '--dbc', importDbc, '--file', target];
+    // A re-decode diffs the DBC snapshot stored at import against the
+    // current DBC and rewrites only the signals that changed.
+    if (reparse) subArgs.push('--redecode');
     const args = parserIsPython ? [PARSER_PY, ...subArgs] : subArgs;
     const importDsn = dsn;
     const localPool = pool;
@@ -484,6 +496,8 @@ export async function run(opts: {
     catalogDeps,
     broadcastDeps,
     cloudDefaults,
+    liveHistory: LIVE_HISTORY_SOCKET ? createLiveHistoryClient(LIVE_HISTORY_SOCKET) : undefined,
+    onLiveSubscription: (ids) => parser?.subscribe(ids),
     uninstallDeps: {
       catalogPath,
       userDataDir,
@@ -41,7 +41,7 @@ export async function writeSessionParquet(opts: {
 
       await d.run(
         `COPY (
-           SELECT r.ts AS timestamp, r.signal_id::SMALLINT AS signal_id, r.value
+           SELECT r.ts AS timestamp, r.signal_id::INTEGER AS signal_id, r.value
            FROM pg.sd_readings r
            JOIN pg.signal_definitions sd ON sd.id = r.signal_id
            WHERE r.session_id = '${escSid}'::UUID AND sd.source = '${escSource}'
@@ -0,0 +1,60 @@
+import { createConnection } from 'net';
+
+/** One /api/live/window request, as sent to the parser's history socket
+ *  (`live --history-socket`, see parser/history.py). */
+export interface HistoryRequest {
+  ids: number[];
+  start: string;
+  end: string;
+  bucket?: number;
+  raw?: boolean;
+}
+
+export interface HistoryReply {
+  /** Earliest time from which the parser's ring buffers hold every sample
+   *  of the requested signals. */
+  covered_from: string;
+  rows: Array<Record<string, unknown>>;
+}
+
+export interface LiveHistory {
+  query(req: HistoryRequest): Promise<HistoryReply | null>;
+}
+
+/**
+ * Client for the live parser's in-memory history. Resolves null whenever
+ * the parser can't answer (not running yet, restarting, socket missing,
+ * timeout, error reply) so callers fall back to Postgres.
+ */
+export function createLiveHistoryClient(socketPath: string, timeoutMs = 500): LiveHistory {
+  return {
+    query(req) {
+      return new Promise((resolve) => {
+        let buf = '';
+        let done = false;
+        const finish = (reply: HistoryReply | null) => {
+          if (done) return;
+          done = true;
+          sock.destroy();
+          resolve(reply);
+        };
+        const sock = createConnection(socketPath);
+        sock.setTimeout(timeoutMs, () => finish(null));
+        sock.on('error', () => finish(null));
+        sock.on('close', () => finish(null));
+        sock.on('connect', () => sock.write(JSON.stringify(req) + '\n'));
+        sock.on('data', (chunk) => {
+          buf += chunk.toString('utf8');
+          const nl = buf.indexOf('\n');
+          if (nl < 0) return;
+          try {
+            const reply = JSON.parse(buf.slice(0, nl));
+            finish(Array.isArray(reply?.rows) ? reply as HistoryReply : null);
+          } catch {
+            finish(null);
+          }
+        });
+      });
+    },
+  };
+}
@@ -42,6 +42,7 @@ export class ParserManager extends EventEmitter {
   private stopRequested = false;
   private buf = '';
   private stderrBuf = '';
+  private subscription: string | null = null;
 
   constructor(private opts: ParserManagerOptions) {
     super();
@@ -73,6 +74,16 @@ export class ParserManager extends EventEmitter {
     this.spawn();
   }
 
+  /**
+   * Tell the parser which signal_ids the UI displays (null = all), as a
+   * stdin command (parser/subscriptions.py). Remembered and re-sent to
+   * every respawned child.
+   */
+  subscribe(signalIds: number[] | null): void {
+    this.subscription = JSON.stringify({ type: 'subscribe', signal_ids: signalIds }) + '\n';
+    if (this.running) this.child!.stdin.write(this.subscription);
+  }
+
   async stop(): Promise<void> {
     this.stopRequested = true;
     if (!this.child) return;
@@ -96,6 +107,9 @@ export class ParserManager extends EventEmitter {
     });
     this.child = child;
 
+    // A child that exits mid-write would otherwise crash us with EPIPE.
+    child.stdin.on('error', () => {});
+    if (this.subscription) child.stdin.write(this.subscription);
     child.stdout.setEncoding('utf8');
     child.stdout.on('data', (chunk: string) => this.onStdout(chunk));
     child.stderr.setEncoding('utf8');
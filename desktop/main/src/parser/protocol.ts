@@ -4,7 +4,21 @@ export type ParserEvent =
   | { type: 'session_ended'; session_id: string; row_count: number }
   | { type: 'frames'; rows: Array<{ ts: string; signal_id: number; value: number }> }
   | { type: 'import_progress'; file: string; pct: number }
-  | { type: 'signal_quality'; rssi: number; snr: number }
+  | { type: 'signal_quality'; rssi: number; snr: number; port?: string }
+  | {
+      type: 'serial_stats';
+      port: string | null;
+      bytes_per_s: number;
+      reads_per_s: number;
+      bytes_total: number;
+      queue_high_water: number;
+      packets: number;
+      desyncs: number;
+      bytes_discarded: number;
+      /** Frames from this port dropped as copies of another port's
+       *  (only when the parser merges several `--port`s). */
+      duplicates?: number;
+    }
   | { type: 'error'; msg: string };
 
 /** Parse one line from the parser subprocess. Returns null on malformed input. */
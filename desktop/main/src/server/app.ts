@@ -27,6 +27,7 @@ import { registerSerialPortRoutes } from './routes/serial-ports.ts';
 import { registerSpacesConfigRoutes } from './routes/spaces-config.ts';
 import { registerUnsyncedSummaryRoutes } from './routes/unsynced-summary.ts';
 import type { CloudDefaults } from '../cloud/defaults.ts';
+import type { LiveHistory } from '../parser/history-client.ts';
 
 /** Config keys that, when changed via POST /api/config, require the parser
  *  subprocess to be re-spawned so it picks up the new value. */
@@ -57,6 +58,11 @@ export interface BuildAppOptions {
    *  hasn't pasted their own creds. Null/missing fields fall back to manual
    *  entry via the Cloud config panel. */
   cloudDefaults?: CloudDefaults;
+  /** In-memory recent samples of the live parser (`--history-socket`);
+   *  /api/live/window prefers it over `live_today` when it covers the window. */
+  liveHistory?: LiveHistory;
+  /** Receives the signal_ids displayed by /ws/live clients (null = all). */
+  onLiveSubscription?: (signalIds: number[] | null) => void;
 }
 
 export async function buildApp(opts: BuildAppOptions): Promise<FastifyInstance> {
@@ -109,7 +115,7 @@ export async function buildApp(opts: BuildAppOptions): Promise<FastifyInstance>
 
     await app.register(websocketPlugin);
     if (opts.parser) {
-      registerWebSockets(app, opts.parser);
+      registerWebSockets(app, opts.parser, opts.onLiveSubscription);
       registerLiveRoutes(app, opts.parser);
       const { registerSimulateRoutes } = await import('./routes/simulate.ts');
       registerSimulateRoutes(app, { parser: opts.parser, pool });
@@ -146,7 +152,7 @@ export async function buildApp(opts: BuildAppOptions): Promise<FastifyInstance>
 
     registerSessionRoutes(app, pool);
     registerSignalRoutes(app, pool);
-    registerLiveWindowRoutes(app, { pool });
+    registerLiveWindowRoutes(app, { pool, history: opts.liveHistory });
     registerExportRoutes(app, pool);
     if (opts.dbcStorePath && opts.onDbcChanged) {
       registerDbcRoutes(app, {
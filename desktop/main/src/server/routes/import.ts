@@ -15,11 +15,14 @@ export interface ImportResult {
 export interface ImportDeps {
   /** Called per uploaded file. Saves to disk + runs parser batch + returns result.
    *  When `reparse` is true, the dedup short-circuit is skipped so the parser
-   *  re-decodes the file with the current DBC and overwrites prior rows. */
+   *  re-decodes the file with the current DBC and overwrites the rows of the
+   *  signals whose definition changed. */
   onImport: (filename: string, body: Buffer, reparse: boolean) => Promise<ImportResult>;
   /** Kill any currently-running parser child process. Returns true if a child
-   *  was killed, false if nothing was running. The parser commits in one
-   *  transaction so a kill mid-parse leaves the DB untouched for that file. */
+   *  was killed, false if nothing was running. The parser commits in chunks
+   *  and keeps the session hidden until its final commit, so a kill mid-parse
+   *  leaves no visible session for that file; importing it again resumes
+   *  from the last committed chunk. */
   onCancel: () => boolean;
 }
 
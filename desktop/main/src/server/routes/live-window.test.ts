@@ -49,4 +49,45 @@ describe('GET /api/live/window', () => {
     expect(sql).toMatch(/FROM live_today/);
     expect(sql).not.toMatch(/get_live_today_window/);
   });
+
+  it('answers from the parser history when it covers the window', async () => {
+    const query = vi.fn();
+    const history = { query: vi.fn(async () => ({
+      covered_from: '2026-05-28T04:00:00.000Z',
+      rows: [{ ts: '2026-05-28T05:00:00.000Z', signal_id: 1, signal_name: 'X', unit: '',
+        value_min: 0, value_max: 1, value_avg: 0.5, sample_n: 3 }],
+    })) };
+    const app = Fastify();
+    registerLiveWindowRoutes(app, { pool: { query } as any, history });
+    const res = await app.inject({
+      method: 'GET',
+      url: '/api/live/window?ids=1,2&start=2026-05-28T05:00:00Z&end=2026-05-28T06:00:00Z&bucket=1',
+    });
+    expect(res.statusCode).toBe(200);
+    expect(res.json()).toHaveLength(1);
+    expect(history.query).toHaveBeenCalledWith({
+      ids: [1, 2], start: '2026-05-28T05:00:00Z', end: '2026-05-28T06:00:00Z', bucket: 1,
+    });
+    expect(query).not.toHaveBeenCalled();
+  });
+
+  it('falls back to live_today when the history starts after the window', async () => {
+    const query = vi.fn(async () => ({ rows: [] }));
+    const history = { query: vi.fn(async () => ({
+      covered_from: '2026-05-28T05:30:00.000Z',
+      rows: [{ ts: '2026-05-28T05:30:00.000Z', signal_id: 1, signal_name: 'X', unit: '',
+        value_min: 1, value_max: 1, value_avg: 1, sample_n: 1 }],
+    })) };
+    const app = Fastify();
+    registerLiveWindowRoutes(app, { pool: { query } as any, history });
+    const res = await app.inject({
+      method: 'GET',
+      url: '/api/live/window?ids=1&start=2026-05-28T05:00:00Z&end=2026-05-28T06:00:00Z&raw=1',
+    });
+    expect(res.statusCode).toBe(200);
+    expect(history.query).toHaveBeenCalledWith({
+      ids: [1], start: '2026-05-28T05:00:00Z', end: '2026-05-28T06:00:00Z', raw: true,
+    });
+    expect(query).toHaveBeenCalledTimes(1);
+  });
 });
@@ -1,7 +1,13 @@
 import type { FastifyInstance } from 'fastify';
 import type pg from 'pg';
+import type { LiveHistory } from '../../parser/history-client.ts';
 
-export interface LiveWindowDeps { pool: pg.Pool }
+export interface LiveWindowDeps {
+  pool: pg.Pool;
+  /** The live parser's in-memory history. Windows it fully covers are
+   *  answered without touching Postgres. */
+  history?: LiveHistory;
+}
 
 interface Q { ids?: string; start?: string; end?: string; bucket?: string; raw?: string }
 
@@ -21,6 +27,24 @@ export function registerLiveWindowRoutes(app: FastifyInstance, deps: LiveWindowD
       reply.code(400);
       return { error: 'expected ?ids=&start=&end=(&bucket= | &raw=1)' };
     }
+    const bucket = Number(q.bucket ?? 0);
+    if (!raw && !(bucket > 0)) {
+      reply.code(400);
+      return { error: 'bucket must be > 0 unless raw=1' };
+    }
+    if (deps.history) {
+      const recent = await deps.history.query(
+        raw ? { ids, start, end, raw: true } : { ids, start, end, bucket },
+      );
+      // Empty answers still go to Postgres: rows written there by other
+      // paths (e.g. /api/live/simulate) never pass through the parser.
+      if (
+        recent && recent.rows.length > 0
+        && Date.parse(recent.covered_from) <= Date.parse(start)
+      ) {
+        return recent.rows;
+      }
+    }
     if (raw) {
       // Raw rows — no bucket averaging. Avg-per-bucket produced fractional
       // values and wrap-spikes for integer / cyclic signals like RTC_Second;
@@ -41,11 +65,6 @@ export function registerLiveWindowRoutes(app: FastifyInstance, deps: LiveWindowD
       );
       return rows;
     }
-    const bucket = Number(q.bucket ?? 0);
-    if (!(bucket > 0)) {
-      reply.code(400);
-      return { error: 'bucket must be > 0 unless raw=1' };
-    }
     const { rows } = await deps.pool.query(
       `SELECT * FROM get_live_today_window($1::int[], $2::timestamptz, $3::timestamptz, $4::double precision)`,
       [ids, start, end, bucket],
@@ -12,6 +12,9 @@ export interface LiveStatus {
    *  waiting for the next packet to arrive over WS. */
   rssi: number | null;
   snr: number | null;
+  /** Latest serial reader throughput report (bytes/s, reads/s, queue
+   *  high-water mark), emitted every few seconds while connected. */
+  serial: Omit<Extract<ParserEvent, { type: 'serial_stats' }>, 'type'> | null;
 }
 
 export function registerLiveRoutes(app: FastifyInstance, parser: EventEmitter) {
@@ -22,6 +25,7 @@ export function registerLiveRoutes(app: FastifyInstance, parser: EventEmitter) {
     source: null,
     rssi: null,
     snr: null,
+    serial: null,
   };
 
   parser.on('event', (e: ParserEvent) => {
@@ -34,6 +38,7 @@ export function registerLiveRoutes(app: FastifyInstance, parser: EventEmitter) {
         // values as if the link were still alive.
         state.rssi = null;
         state.snr = null;
+        state.serial = null;
       }
     } else if (e.type === 'session_started') {
       state.session_id = e.session_id;
@@ -44,6 +49,9 @@ export function registerLiveRoutes(app: FastifyInstance, parser: EventEmitter) {
     } else if (e.type === 'signal_quality') {
       state.rssi = e.rssi;
       state.snr = e.snr;
+    } else if (e.type === 'serial_stats') {
+      const { type: _type, ...stats } = e;
+      state.serial = stats;
     }
   });
 
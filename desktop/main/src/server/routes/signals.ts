@@ -3,8 +3,10 @@ import type pg from 'pg';
 import {
   explainSignalsWindow,
   getSessionSignalIds,
+  getSessionSignalStats,
   getSignalsWindow,
   getSignalWindow,
+  listSessionEvents,
   listSignalDefinitions,
 } from '../../db/signals.ts';
 
@@ -28,6 +30,33 @@ export function registerSignalRoutes(app: FastifyInstance, pool: pg.Pool) {
     async (req) => getSessionSignalIds(pool, req.params.id)
   );
 
+  app.get<{ Params: { id: string } }>(
+    '/api/sessions/:id/signal-stats',
+    async (req) => getSessionSignalStats(pool, req.params.id)
+  );
+
+  app.get<{
+    Params: { id: string };
+    Querystring: { ids?: string; kind?: string; limit?: string };
+  }>(
+    '/api/sessions/:id/events',
+    async (req, reply) => {
+      const { ids, kind, limit } = req.query;
+      const signalIds = ids
+        ? ids
+            .split(',')
+            .map((s) => Number(s))
+            .filter((n) => Number.isFinite(n))
+        : null;
+      const max = limit ? Number(limit) : 10000;
+      if (!Number.isInteger(max) || max <= 0) {
+        reply.code(400);
+        return { error: 'invalid_limit' };
+      }
+      return listSessionEvents(pool, req.params.id, signalIds, kind ?? null, max);
+    }
+  );
+
   app.get<{
     Params: { id: string };
     Querystring: { ids: string; start: string; end: string; bucket: string };
@@ -22,6 +22,7 @@ export function registerUnsyncedSummaryRoutes(app: FastifyInstance, pool: pg.Poo
        ) c ON c.session_id = s.id
        WHERE s.manifest_key IS NULL
          AND s.source = 'sd_import'
+         AND NOT EXISTS (SELECT 1 FROM import_resume r WHERE r.session_id = s.id)
        ORDER BY s.started_at DESC`,
     );
     const sessionIds = rows.map((r) => r.id);
@@ -4,12 +4,38 @@ import type { ParserEvent } from '../parser/protocol.ts';
 
 type LiveSocket = { send: (data: string) => void; readyState: number };
 
+/**
+ * `onSubscription` receives the signal_ids the /ws/live clients display
+ * (null = everything) whenever that changes, for the parser's subscription
+ * command (parser/subscriptions.py). A client opts in by sending
+ * `{"type":"subscribe","signal_ids":[...]}`; until it does it counts as
+ * wanting every signal.
+ */
 export function registerWebSockets(
   app: FastifyInstance,
-  parser: EventEmitter
+  parser: EventEmitter,
+  onSubscription?: (signalIds: number[] | null) => void,
 ): void {
   const liveClients = new Set<LiveSocket>();
   const eventClients = new Set<LiveSocket>();
+  const subscribed = new Map<LiveSocket, Set<number>>();
+  let published = '';
+
+  const publish = () => {
+    if (!onSubscription) return;
+    let ids: number[] | null = [];
+    const union = new Set<number>();
+    for (const sock of liveClients) {
+      const mine = subscribed.get(sock);
+      if (!mine) { ids = null; break; }
+      for (const id of mine) union.add(id);
+    }
+    if (ids !== null) ids = [...union].sort((a, b) => a - b);
+    const key = JSON.stringify(ids);
+    if (key === published) return;
+    published = key;
+    onSubscription(ids);
+  };
 
   parser.on('event', (e: ParserEvent) => {
     const encoded = JSON.stringify(e);
@@ -23,8 +49,28 @@ export function registerWebSockets(
 
   app.register(async (inner) => {
     inner.get('/ws/live', { websocket: true }, (socket) => {
-      liveClients.add(socket as unknown as LiveSocket);
-      socket.on('close', () => liveClients.delete(socket as unknown as LiveSocket));
+      const live = socket as unknown as LiveSocket;
+      liveClients.add(live);
+      publish();
+      socket.on('message', (raw: Buffer) => {
+        try {
+          const msg = JSON.parse(raw.toString('utf8'));
+          if (msg?.type !== 'subscribe') return;
+          if (Array.isArray(msg.signal_ids)) {
+            subscribed.set(live, new Set(msg.signal_ids.filter(Number.isInteger)));
+          } else {
+            subscribed.delete(live);
+          }
+          publish();
+        } catch {
+          // Not a command; ignore.
+        }
+      });
+      socket.on('close', () => {
+        liveClients.delete(live);
+        subscribed.delete(live);
+        publish();
+      });
     });
 
     inner.get('/ws/events', { websocket: true }, (socket) => {
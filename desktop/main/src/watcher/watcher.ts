@@ -22,8 +22,11 @@ export class FolderWatcher {
 
   async start(): Promise<void> {
     // Seed `seen` with already-imported files so we don't re-import on boot.
+    // Unfinished imports are left out so they get picked up (and resumed).
     const { rows } = await this.opts.pool.query<{ source_file: string }>(
-      `SELECT source_file FROM sessions WHERE source = 'sd_import' AND source_file IS NOT NULL`
+      `SELECT source_file FROM sessions s
+       WHERE source = 'sd_import' AND source_file IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM import_resume r WHERE r.session_id = s.id)`
     );
     for (const r of rows) this.seen.add(r.source_file);
 
@@ -0,0 +1,84 @@
+-- Alternative columnar storage for imported sessions. One row per
+-- (session, signal, 60-second chunk) holding compressed timestamp and value
+-- arrays; see parser/segments.py for the blob layouts. Written by the batch
+-- importer when run with --layout segments|both. A segment-only session
+-- still gets sd_rollup_1s rows (computed by the parser), so every replay
+-- view with a >= 1 s bucket works unchanged.
+--
+-- The header columns (sample_n, value_min/max/sum) compose the same way as
+-- the rollup's, so coarse aggregates never need to decode a blob.
+
+CREATE TABLE sd_segments (
+  session_id    UUID                NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+  signal_id     INTEGER             NOT NULL,
+  ts_start      TIMESTAMPTZ         NOT NULL,
+  ts_end        TIMESTAMPTZ         NOT NULL,
+  sample_n      INTEGER             NOT NULL,
+  value_min     DOUBLE PRECISION    NOT NULL,
+  value_max     DOUBLE PRECISION    NOT NULL,
+  value_sum     DOUBLE PRECISION    NOT NULL,
+  value_codec   SMALLINT            NOT NULL,
+  value_scale   DOUBLE PRECISION,
+  value_offset  DOUBLE PRECISION,
+  ts_data       BYTEA               NOT NULL,
+  value_data    BYTEA               NOT NULL,
+  PRIMARY KEY (session_id, signal_id, ts_start)
+);
+
+-- Blobs are already zlib'd by the parser; skip pglz's second attempt.
+ALTER TABLE sd_segments ALTER COLUMN ts_data SET STORAGE EXTERNAL;
+ALTER TABLE sd_segments ALTER COLUMN value_data SET STORAGE EXTERNAL;
+
+-- Signal lists must see segment-only sessions too. The sd_segments primary
+-- key leads with (session_id, signal_id), so the extra DISTINCT is an index
+-- range scan over a few hundred header rows at most.
+DROP FUNCTION IF EXISTS get_session_signal_ids(UUID);
+CREATE OR REPLACE FUNCTION get_session_signal_ids(p_session_id UUID)
+RETURNS TABLE (signal_id INTEGER)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+  RETURN QUERY
+  WITH RECURSIVE t AS (
+    (
+      SELECT r.signal_id
+      FROM sd_readings r
+      WHERE r.session_id = p_session_id
+      ORDER BY r.signal_id
+      LIMIT 1
+    )
+    UNION ALL
+    SELECT (
+      SELECT r.signal_id
+      FROM sd_readings r
+      WHERE r.session_id = p_session_id
+        AND r.signal_id > t.signal_id
+      ORDER BY r.signal_id
+      LIMIT 1
+    )
+    FROM t
+    WHERE t.signal_id IS NOT NULL
+  )
+  SELECT t.signal_id FROM t WHERE t.signal_id IS NOT NULL
+  UNION
+  SELECT s.signal_id FROM sd_segments s WHERE s.session_id = p_session_id
+  ORDER BY 1;
+END;
+$$;
+
+DROP FUNCTION IF EXISTS get_session_signals(UUID);
+CREATE OR REPLACE FUNCTION get_session_signals(p_session_id UUID)
+RETURNS TABLE (
+  signal_id   INTEGER,
+  source      TEXT,
+  signal_name TEXT,
+  unit        TEXT
+)
+LANGUAGE SQL STABLE AS $$
+  SELECT
+    ids.signal_id,
+    sd.source,
+    sd.signal_name,
+    sd.unit
+  FROM get_session_signal_ids(p_session_id) ids
+  JOIN signal_definitions sd ON sd.id = ids.signal_id;
+$$;
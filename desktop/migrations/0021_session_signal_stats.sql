@@ -0,0 +1,184 @@
+-- Precomputed per-session, per-signal summary statistics, plus denormalized
+-- row_count / signal_count on sessions. Migration 0005 had to drop
+-- signal_count from list_sessions because count(DISTINCT signal_id) over
+-- sd_readings timed out at 1.9M rows; with these the picker, signal list
+-- and distribution widgets never touch raw readings.
+--
+-- Writers:
+--   * the batch importer computes rows in Python from the decoded stream
+--     (parser/stats.py) — no extra scan;
+--   * live sessions call populate_session_signal_stats() when flushed;
+--   * older sessions are backfilled lazily by the same function.
+--
+-- histogram has 32 equal-width bins over [value_min, value_max] (last bin
+-- closed). Non-finite values count towards sample_n only.
+
+CREATE TABLE session_signal_stats (
+  session_id  UUID                NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+  signal_id   INTEGER             NOT NULL,
+  sample_n    BIGINT              NOT NULL,
+  value_min   DOUBLE PRECISION    NOT NULL,
+  value_max   DOUBLE PRECISION    NOT NULL,
+  value_mean  DOUBLE PRECISION    NOT NULL,
+  first_ts    TIMESTAMPTZ         NOT NULL,
+  last_ts     TIMESTAMPTZ         NOT NULL,
+  histogram   INTEGER[]           NOT NULL,
+  PRIMARY KEY (session_id, signal_id)
+);
+
+ALTER TABLE sessions
+  ADD COLUMN row_count    BIGINT,
+  ADD COLUMN signal_count INTEGER;
+
+CREATE OR REPLACE FUNCTION populate_session_signal_stats(p_session_id UUID)
+RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+  n_signals INTEGER;
+BEGIN
+  DELETE FROM session_signal_stats WHERE session_id = p_session_id;
+  INSERT INTO session_signal_stats (session_id, signal_id, sample_n,
+                                    value_min, value_max, value_mean,
+                                    first_ts, last_ts, histogram)
+  WITH r AS (
+    SELECT signal_id, ts, value,
+           value NOT IN ('NaN'::float8, 'Infinity'::float8, '-Infinity'::float8) AS finite
+    FROM sd_readings
+    WHERE session_id = p_session_id
+  ),
+  agg AS (
+    SELECT signal_id,
+           count(*)                            AS sample_n,
+           min(value) FILTER (WHERE finite)    AS value_min,
+           max(value) FILTER (WHERE finite)    AS value_max,
+           avg(value) FILTER (WHERE finite)    AS value_mean,
+           min(ts)                             AS first_ts,
+           max(ts)                             AS last_ts
+    FROM r
+    GROUP BY signal_id
+  ),
+  bins AS (
+    SELECT r.signal_id,
+           CASE WHEN a.value_max > a.value_min
+                THEN LEAST(floor((r.value - a.value_min)
+                                 / (a.value_max - a.value_min) * 32)::INT, 31)
+                ELSE 0 END AS bin,
+           count(*)::INT AS n
+    FROM r
+    JOIN agg a USING (signal_id)
+    WHERE r.finite
+    GROUP BY 1, 2
+  )
+  SELECT p_session_id, a.signal_id, a.sample_n,
+         COALESCE(a.value_min, 'NaN'), COALESCE(a.value_max, 'NaN'),
+         COALESCE(a.value_mean, 'NaN'),
+         a.first_ts, a.last_ts,
+         ARRAY(
+           SELECT COALESCE(b.n, 0)
+           FROM generate_series(0, 31) AS g(bin)
+           LEFT JOIN bins b ON b.signal_id = a.signal_id AND b.bin = g.bin
+           ORDER BY g.bin
+         )
+  FROM agg a;
+  GET DIAGNOSTICS n_signals = ROW_COUNT;
+
+  UPDATE sessions
+  SET signal_count = n_signals,
+      row_count = (SELECT COALESCE(sum(sample_n), 0)
+                   FROM session_signal_stats WHERE session_id = p_session_id)
+  WHERE id = p_session_id;
+  RETURN n_signals;
+END;
+$$;
+
+-- Signal list: one index range read from the stats table when the session
+-- has been summarised, otherwise the loose-index-scan fallback from 0020.
+DROP FUNCTION IF EXISTS get_session_signal_ids(UUID);
+CREATE OR REPLACE FUNCTION get_session_signal_ids(p_session_id UUID)
+RETURNS TABLE (signal_id INTEGER)
+LANGUAGE plpgsql STABLE AS $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM session_signal_stats s WHERE s.session_id = p_session_id) THEN
+    RETURN QUERY
+      SELECT s.signal_id FROM session_signal_stats s
+      WHERE s.session_id = p_session_id
+      ORDER BY s.signal_id;
+    RETURN;
+  END IF;
+
+  RETURN QUERY
+  WITH RECURSIVE t AS (
+    (
+      SELECT r.signal_id
+      FROM sd_readings r
+      WHERE r.session_id = p_session_id
+      ORDER BY r.signal_id
+      LIMIT 1
+    )
+    UNION ALL
+    SELECT (
+      SELECT r.signal_id
+      FROM sd_readings r
+      WHERE r.session_id = p_session_id
+        AND r.signal_id > t.signal_id
+      ORDER BY r.signal_id
+      LIMIT 1
+    )
+    FROM t
+    WHERE t.signal_id IS NOT NULL
+  )
+  SELECT t.signal_id FROM t WHERE t.signal_id IS NOT NULL
+  UNION
+  SELECT s.signal_id FROM sd_segments s WHERE s.session_id = p_session_id
+  ORDER BY 1;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION get_session_signal_stats(p_session_id UUID)
+RETURNS TABLE (
+  signal_id   INTEGER,
+  source      TEXT,
+  signal_name TEXT,
+  unit        TEXT,
+  sample_n    BIGINT,
+  value_min   DOUBLE PRECISION,
+  value_max   DOUBLE PRECISION,
+  value_mean  DOUBLE PRECISION,
+  first_ts    TIMESTAMPTZ,
+  last_ts     TIMESTAMPTZ,
+  histogram   INTEGER[]
+)
+LANGUAGE SQL STABLE AS $$
+  SELECT s.signal_id, d.source, d.signal_name, d.unit,
+         s.sample_n, s.value_min, s.value_max, s.value_mean,
+         s.first_ts, s.last_ts, s.histogram
+  FROM session_signal_stats s
+  JOIN signal_definitions d ON d.id = s.signal_id
+  WHERE s.session_id = p_session_id
+  ORDER BY d.source, d.signal_name;
+$$;
+
+-- signal_count is back, now read from the denormalized column.
+DROP FUNCTION IF EXISTS list_sessions(INT);
+CREATE OR REPLACE FUNCTION list_sessions(p_limit INT DEFAULT 50)
+RETURNS TABLE (
+  id            UUID,
+  date          DATE,
+  started_at    TIMESTAMPTZ,
+  ended_at      TIMESTAMPTZ,
+  duration_secs INT,
+  driver        TEXT,
+  car           TEXT,
+  row_count     BIGINT,
+  signal_count  INTEGER
+)
+LANGUAGE SQL STABLE AS $$
+  SELECT
+    s.id, s.date, s.started_at, s.ended_at,
+    EXTRACT(EPOCH FROM (s.ended_at - s.started_at))::INT AS duration_secs,
+    s.driver, s.car, s.row_count, s.signal_count
+  FROM sessions s
+  WHERE s.ended_at IS NOT NULL
+  ORDER BY s.started_at DESC
+  LIMIT p_limit;
+$$;
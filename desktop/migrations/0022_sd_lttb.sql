@@ -0,0 +1,63 @@
+-- Largest-Triangle-Three-Buckets overview tier. The batch importer reduces
+-- every signal of a session to a fixed point budget (parser/lttb.py,
+-- currently 800, 2000 and 10000 points) and stores each reduction as one row of
+-- parallel arrays. The replay "ALL" view reads these instead of the 1 s
+-- rollup, so opening a session costs O(budget) per signal no matter how
+-- long the session is.
+--
+-- A signal with fewer samples than a budget is stored whole at that budget
+-- and not at larger ones; get_signals_overview falls back to the largest
+-- budget a signal has.
+
+CREATE TABLE sd_lttb (
+  session_id  UUID                 NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+  signal_id   INTEGER              NOT NULL,
+  budget      INTEGER              NOT NULL,
+  ts_us       BIGINT[]             NOT NULL,  -- microseconds since the Unix epoch
+  value       DOUBLE PRECISION[]   NOT NULL,
+  PRIMARY KEY (session_id, signal_id, budget)
+);
+
+-- Same row shape as get_signals_window so the desktop can hand the result
+-- to the existing replay path unchanged. Each LTTB point is a one-sample
+-- bucket: value_min = value_max = value_avg, sample_n = 1.
+CREATE OR REPLACE FUNCTION get_signals_overview(
+  p_session_id  UUID,
+  p_signal_ids  INTEGER[],
+  p_points      INTEGER
+)
+RETURNS TABLE (
+  ts          TIMESTAMPTZ,
+  signal_id   INTEGER,
+  signal_name TEXT,
+  unit        TEXT,
+  value_min   DOUBLE PRECISION,
+  value_max   DOUBLE PRECISION,
+  value_avg   DOUBLE PRECISION,
+  sample_n    INT
+)
+LANGUAGE SQL STABLE AS $$
+  WITH chosen AS (
+    -- Smallest budget >= p_points, else the largest one stored.
+    SELECT DISTINCT ON (l.signal_id) l.signal_id, l.budget
+    FROM sd_lttb l
+    WHERE l.session_id = p_session_id
+      AND l.signal_id = ANY(p_signal_ids)
+    ORDER BY l.signal_id,
+             (l.budget >= p_points) DESC,
+             CASE WHEN l.budget >= p_points THEN l.budget ELSE -l.budget END
+  )
+  SELECT
+    'epoch'::timestamptz + u.ts_us * INTERVAL '1 microsecond' AS ts,
+    l.signal_id,
+    d.signal_name,
+    d.unit,
+    u.value, u.value, u.value,
+    1
+  FROM chosen c
+  JOIN sd_lttb l
+    ON l.session_id = p_session_id AND l.signal_id = c.signal_id AND l.budget = c.budget
+  JOIN signal_definitions d ON d.id = l.signal_id
+  CROSS JOIN LATERAL unnest(l.ts_us, l.value) AS u(ts_us, value)
+  ORDER BY 1;
+$$;
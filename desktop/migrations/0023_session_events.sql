@@ -0,0 +1,47 @@
+-- Event / threshold index. The batch importer evaluates the rules in the
+-- `<dbc>.events.csv` sidecar (parser/events.py) over every decoded signal
+-- and writes one row per hit: threshold crossings ("below:0.2"), state or
+-- fault-code changes ("change") and fault bits going high ("bit:3"). The
+-- desktop lists these to jump straight to "every time SOC < 20%" instead
+-- of scanning the session.
+
+CREATE TABLE session_events (
+  session_id  UUID              NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+  ts          TIMESTAMPTZ       NOT NULL,
+  signal_id   INTEGER           NOT NULL,
+  kind        TEXT              NOT NULL,
+  value       DOUBLE PRECISION  NOT NULL
+);
+
+CREATE INDEX session_events_session_ts_idx
+  ON session_events (session_id, ts);
+CREATE INDEX session_events_session_signal_ts_idx
+  ON session_events (session_id, signal_id, ts);
+
+-- Events of one session in time order. NULL p_signal_ids means every
+-- signal; p_kind matches the stored kind exactly or by prefix before the
+-- colon ('below' matches 'below:0.2').
+CREATE OR REPLACE FUNCTION list_session_events(
+  p_session_id  UUID,
+  p_signal_ids  INTEGER[] DEFAULT NULL,
+  p_kind        TEXT      DEFAULT NULL,
+  p_limit       INTEGER   DEFAULT 10000
+)
+RETURNS TABLE (
+  ts           TIMESTAMPTZ,
+  signal_id    INTEGER,
+  source       TEXT,
+  signal_name  TEXT,
+  kind         TEXT,
+  value        DOUBLE PRECISION
+)
+LANGUAGE sql STABLE AS $$
+  SELECT e.ts, e.signal_id, d.source, d.signal_name, e.kind, e.value
+  FROM session_events e
+  JOIN signal_definitions d ON d.id = e.signal_id
+  WHERE e.session_id = p_session_id
+    AND (p_signal_ids IS NULL OR e.signal_id = ANY (p_signal_ids))
+    AND (p_kind IS NULL OR e.kind = p_kind OR split_part(e.kind, ':', 1) = p_kind)
+  ORDER BY e.ts, e.signal_id
+  LIMIT p_limit
+$$;
@@ -0,0 +1,20 @@
+-- Append imports of growing .nfr files. When logs are copied off the car
+-- mid-day, LOG_00xx.NFR keeps growing between copies. The batch importer
+-- records how many bytes of the file a session holds; `batch --append`
+-- (parser/append.py) finds the checkpoint by header hash, checks that the
+-- stored bytes are a prefix of the new copy (nfr_reader.prefix_fingerprint)
+-- and decodes only the frames after it.
+
+CREATE TABLE import_checkpoints (
+  session_id     UUID         PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+  header_sha256  TEXT         NOT NULL,  -- of the 20-byte .nfr header
+  prefix_bytes   BIGINT       NOT NULL,  -- header + whole frames imported
+  fingerprint    TEXT         NOT NULL,  -- sha256 of the whole prefix
+  dbc_sha256     TEXT         NOT NULL,  -- DBC CSV the prefix was decoded with
+  layout         TEXT         NOT NULL,  -- rows | segments | both
+  last_ts_ms     BIGINT       NOT NULL,
+  updated_at     TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+CREATE INDEX import_checkpoints_header_idx
+  ON import_checkpoints (header_sha256, prefix_bytes);
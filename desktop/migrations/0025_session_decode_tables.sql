@@ -0,0 +1,16 @@
+-- What each session was decoded with. The batch importer stores a snapshot
+-- of the compiled DBC (per signal: frame IDs, bit layout, scale, offset;
+-- plus derived channels and event rules) and its hash. `batch --redecode`
+-- (parser/redecode.py) diffs it against the current DBC and rewrites only
+-- the signals whose values changed, instead of the whole session.
+
+CREATE TABLE session_decode_tables (
+  session_id      UUID         PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+  snapshot_sha256 TEXT         NOT NULL,
+  snapshot        JSONB        NOT NULL,  -- parser/dbc_diff.py snapshot_dbc()
+  layout          TEXT         NOT NULL,  -- rows | segments | both
+  updated_at      TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+CREATE INDEX session_decode_tables_sha_idx
+  ON session_decode_tables (snapshot_sha256);
@@ -0,0 +1,44 @@
+-- Resumable batch imports. The importer commits sd_readings in chunks and
+-- records here how many frames of the log are in; a re-run with the same
+-- DBC and layout continues from there instead of frame 0, so cancelling a
+-- long import no longer throws the work away. `scan` keeps what the first
+-- run's full pass over the log found, so a resumed run doesn't repeat it.
+--
+-- A session with a row here is unfinished: its ended_at stays NULL
+-- (list_sessions already skips those) and the session lists below hide it
+-- until the importer deletes the row in its final transaction.
+
+CREATE TABLE import_resume (
+  session_id   UUID         PRIMARY KEY REFERENCES sessions(id) ON DELETE CASCADE,
+  dbc_sha256   TEXT         NOT NULL,
+  layout       TEXT         NOT NULL,  -- rows | both
+  frames_done  BIGINT       NOT NULL,  -- committed prefix: header + frames_done * 18 bytes
+  rows_done    BIGINT       NOT NULL,
+  scan         JSONB,                 -- pass 1 of the file: end_ts_ms, signals seen + value ranges
+  updated_at   TIMESTAMPTZ  NOT NULL DEFAULT now()
+);
+
+DROP FUNCTION IF EXISTS list_sessions(INT);
+CREATE OR REPLACE FUNCTION list_sessions(p_limit INT DEFAULT 50)
+RETURNS TABLE (
+  id            UUID,
+  date          DATE,
+  started_at    TIMESTAMPTZ,
+  ended_at      TIMESTAMPTZ,
+  duration_secs INT,
+  driver        TEXT,
+  car           TEXT,
+  row_count     BIGINT,
+  signal_count  INTEGER
+)
+LANGUAGE SQL STABLE AS $$
+  SELECT
+    s.id, s.date, s.started_at, s.ended_at,
+    EXTRACT(EPOCH FROM (s.ended_at - s.started_at))::INT AS duration_secs,
+    s.driver, s.car, s.row_count, s.signal_count
+  FROM sessions s
+  WHERE s.ended_at IS NOT NULL
+    AND NOT EXISTS (SELECT 1 FROM import_resume r WHERE r.session_id = s.id)
+  ORDER BY s.started_at DESC
+  LIMIT p_limit;
+$$;
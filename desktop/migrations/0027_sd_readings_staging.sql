@@ -0,0 +1,17 @@
+-- Bulk loads (`parser/__main__.py bulk`, parser/bulk.py). Importing a whole
+-- weekend of logs one file at a time maintains sd_readings_lookup_idx row by
+-- row and runs an ANALYZE per file. A bulk load instead COPYs each file's
+-- readings into this unindexed, unlogged table, then moves the batch into
+-- sd_readings in one sorted INSERT (dropping and rebuilding the index when
+-- the batch is large next to the table) and analyzes once.
+--
+-- Staged sessions carry an import_resume row with layout 'staged', which
+-- keeps them out of session lists until the move commits. UNLOGGED: a crash
+-- empties the table, and the next bulk load re-imports those files.
+
+CREATE UNLOGGED TABLE sd_readings_staging (
+  ts           TIMESTAMPTZ NOT NULL,
+  session_id   UUID NOT NULL,
+  signal_id    INTEGER NOT NULL,
+  value        DOUBLE PRECISION NOT NULL
+);
@@ -4,8 +4,46 @@ Usage (invoke via the explicit script path; the module is a flat-layout
 package so `python -m parser` requires `PYTHONPATH=parser`):
 
   python parser/__main__.py live   --dbc <csv> --port <device> [--baud 9600]
-  python parser/__main__.py batch  --dbc <csv> --file <nfr>
+                                   [--port <device>...]
+                                   [--capture-dir <dir>] [--latest-file <path>]
+                                   [--history-socket <path>]
+                                   [--db-signals all|subscribed]
+  python parser/__main__.py batch  --dbc <csv> --file <nfr> [--layout rows]
+                                   [--parquet-dir <dir>]
+                                   [--from-ms <ms>] [--to-ms <ms>]
+                                   [--only <message|signal>...]
+                                   [--append | --redecode]
+  python parser/__main__.py bulk   --dbc <csv> --file <nfr>... [--layout rows]
+                                   [--flush-every 20]
+  python parser/__main__.py watch  --dbc <csv> --dir <path> [--layout rows]
+                                   [--settle-seconds 3]
   python parser/__main__.py replay --dbc <csv> --file <nfr> [--speed 1.0]
+                                   [--from-ms <ms>] [--to-ms <ms>]
+                                   [--only <message|signal>...]
+  python parser/__main__.py cache  --dbc <csv> --file <nfr> [--rebuild]
+  python parser/__main__.py export --out <path> [--format csv-long]
+                                   (--dbc <csv> --file <nfr> | --session <uuid>)
+  python parser/__main__.py season --signals <name>... --aggs <agg>...
+                                   [--from <date>] [--to <date>]
+                                   [--workers 4] [--out <csv>]
+
+`bulk` imports many logs (a weekend off the SD card) through an unindexed
+staging table, maintaining the sd_readings index and statistics once per
+batch of files instead of once per row / file (see `bulk.py`).
+`live` with several `--port`s reads every basestation on its own thread
+and merges them into one session, passing each frame on once even when
+both radios hear it (see `serial_source.merged_serial_events`).
+`live` and `replay` read subscription commands from stdin, one JSON
+object per line (`{"type": "subscribe", "signal_ids": [...]}`), and then
+emit only those signals (see `subscriptions.py`).
+`watch` stays running and imports logs as they appear (or grow) under a
+folder or SD card mount, newest first, once their copy has settled (see
+`watch.py`).
+`cache` needs no database: it decodes the log into per-signal NumPy arrays
+and saves them as `<nfr>.npz` next to it (see `nfr_cache.py`). `export`
+converts a log or a stored session to CSV / Parquet (see `export.py`).
+`season` aggregates signals across every session in a date range into one
+tidy CSV (see `season.py`); without `--out` the table goes to stdout.
 
 The DB connection string is read from the `NFR_DB_URL` environment variable
 (default: `postgres://postgres@localhost:5432/nfr_local`).
@@ -16,16 +54,29 @@ import argparse
 import os
 import sys
 import traceback
+from datetime import datetime
 from pathlib import Path
+from uuid import UUID
 
 # Make sibling modules importable regardless of cwd.
 sys.path.insert(0, str(Path(__file__).resolve().parent))
 
-from batch import run_batch_import  # noqa: E402
+from append import run_append_import  # noqa: E402
+from batch import LAYOUTS, run_batch_import  # noqa: E402
+from bulk import FLUSH_EVERY, run_bulk_import  # noqa: E402
+from compile import compile_csv  # noqa: E402
+from export import FORMATS, run_export  # noqa: E402
 from file_source import file_events  # noqa: E402
+from history import HISTORY_SAMPLES  # noqa: E402
 from live import run_live  # noqa: E402
+from nfr_cache import load_nfr_arrays  # noqa: E402
+from nfr_index import resolve_filter  # noqa: E402
 from protocol import ProtocolEmitter  # noqa: E402
-from serial_source import serial_events  # noqa: E402
+from redecode import run_redecode  # noqa: E402
+from season import DEFAULT_WORKERS, iter_season_aggregate, write_season_csv  # noqa: E402
+from serial_source import merged_serial_events, serial_events  # noqa: E402
+from subscriptions import DB_SIGNALS, Subscriptions, start_command_reader  # noqa: E402
+from watch import SETTLE_SECONDS, run_watch  # noqa: E402
 
 
 DEFAULT_DSN = "postgres://postgres@localhost:5432/nfr_local"
@@ -37,12 +88,102 @@ def _build_parser() -> argparse.ArgumentParser:
 
     live = sub.add_parser("live", help="Read live frames from a serial port.")
     live.add_argument("--dbc", required=True, type=Path)
-    live.add_argument("--port", required=True)
+    live.add_argument(
+        "--port",
+        required=True,
+        action="append",
+        help="Serial port of a basestation; repeat to merge several receivers.",
+    )
     live.add_argument("--baud", type=int, default=9600)
+    live.add_argument(
+        "--capture-dir",
+        type=Path,
+        default=None,
+        help="Also append the raw frames to rotating .nfr files in this folder.",
+    )
+    live.add_argument(
+        "--latest-file",
+        type=Path,
+        default=None,
+        help="Publish each signal's newest value in this memory-mapped table.",
+    )
+    live.add_argument(
+        "--history-socket",
+        type=Path,
+        default=None,
+        help="Serve recent samples for live graphs on this Unix socket.",
+    )
+    live.add_argument(
+        "--history-samples",
+        type=int,
+        default=HISTORY_SAMPLES,
+        help="Samples kept in memory per signal for --history-socket.",
+    )
+    live.add_argument(
+        "--db-signals",
+        choices=DB_SIGNALS,
+        default="all",
+        help="Decode and store every signal, or only those subscribed on stdin.",
+    )
 
     batch = sub.add_parser("batch", help="Import a single .nfr log file.")
     batch.add_argument("--dbc", required=True, type=Path)
     batch.add_argument("--file", required=True, type=Path)
+    batch.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default="rows",
+        help="Storage for decoded readings: sd_readings rows, compressed "
+        "sd_segments, or both.",
+    )
+    batch.add_argument(
+        "--parquet-dir",
+        type=Path,
+        default=None,
+        help="Also write per-source upload Parquet files here (needs pyarrow).",
+    )
+    incremental = batch.add_mutually_exclusive_group()
+    incremental.add_argument(
+        "--append",
+        action="store_true",
+        help="If an earlier, shorter copy of this log was imported, decode "
+        "only the new frames into that session (else import normally).",
+    )
+    incremental.add_argument(
+        "--redecode",
+        action="store_true",
+        help="Re-decode an imported log with this DBC, rewriting only the "
+        "signals whose definition changed (else import normally).",
+    )
+    _add_range_args(batch)
+
+    bulk = sub.add_parser(
+        "bulk",
+        help="Import many .nfr log files, loading sd_readings in batches.",
+    )
+    bulk.add_argument("--dbc", required=True, type=Path)
+    bulk.add_argument("--file", required=True, type=Path, nargs="+")
+    bulk.add_argument("--layout", choices=LAYOUTS, default="rows")
+    bulk.add_argument(
+        "--flush-every",
+        type=int,
+        default=FLUSH_EVERY,
+        help="Files staged before each move into sd_readings.",
+    )
+
+    watch = sub.add_parser(
+        "watch",
+        help="Import .nfr logs as they land in a folder or on an SD card.",
+    )
+    watch.add_argument("--dbc", required=True, type=Path)
+    watch.add_argument("--dir", required=True, type=Path)
+    watch.add_argument("--layout", choices=LAYOUTS, default="rows")
+    watch.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=SETTLE_SECONDS,
+        help="How long a log's size must stay unchanged before importing it.",
+    )
 
     replay = sub.add_parser(
         "replay",
@@ -51,38 +192,221 @@ def _build_parser() -> argparse.ArgumentParser:
     replay.add_argument("--dbc", required=True, type=Path)
     replay.add_argument("--file", required=True, type=Path)
     replay.add_argument("--speed", type=float, default=1.0)
+    _add_range_args(replay)
+
+    cache = sub.add_parser(
+        "cache",
+        help="Decode an .nfr file into a per-signal .npz cache (no database).",
+    )
+    cache.add_argument("--dbc", required=True, type=Path)
+    cache.add_argument("--file", required=True, type=Path)
+    cache.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Decode again even if the cache is current.",
+    )
+
+    export = sub.add_parser(
+        "export",
+        help="Convert an .nfr file or a stored session to CSV or Parquet.",
+    )
+    export.add_argument("--out", required=True, type=Path)
+    export.add_argument("--format", choices=FORMATS, default="csv-long")
+    export.add_argument("--dbc", type=Path, help="Required with --file.")
+    src = export.add_mutually_exclusive_group(required=True)
+    src.add_argument("--file", type=Path)
+    src.add_argument("--session", type=UUID)
+
+    season = sub.add_parser(
+        "season",
+        help="Aggregate signals across all sessions in a date range.",
+    )
+    season.add_argument(
+        "--signals", required=True, nargs="+", help='"name" or "source.name".'
+    )
+    season.add_argument(
+        "--aggs",
+        required=True,
+        nargs="+",
+        help="min max mean count p<q> above:<x> below:<x>",
+    )
+    season.add_argument(
+        "--from", dest="start", type=_timestamp, help="ISO date/time (inclusive)."
+    )
+    season.add_argument(
+        "--to", dest="end", type=_timestamp, help="ISO date/time (exclusive)."
+    )
+    season.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    season.add_argument("--out", type=Path)
 
     return p
 
 
+def _add_range_args(p: argparse.ArgumentParser) -> None:
+    p.add_argument(
+        "--from-ms",
+        type=int,
+        default=None,
+        help="Only frames at or after this log offset (ms). Negative counts "
+        "back from the end: --from-ms -1200000 is the last 20 minutes.",
+    )
+    p.add_argument(
+        "--to-ms",
+        type=int,
+        default=None,
+        help="Only frames before this log offset (ms); negative as above.",
+    )
+    p.add_argument(
+        "--only",
+        nargs="+",
+        default=None,
+        metavar="NAME",
+        help="Only these messages (name or 0x ID) or signals (name or "
+        "source.name); reads just their frames via the log's .idx.npz index.",
+    )
+
+
+def _timestamp(text: str) -> datetime:
+    ts = datetime.fromisoformat(text)
+    # Bare dates/times are local, like the session list in the app.
+    return ts if ts.tzinfo is not None else ts.astimezone()
+
+
 def main(argv: list[str] | None = None) -> int:
     args = _build_parser().parse_args(argv)
     dsn = os.environ.get("NFR_DB_URL", DEFAULT_DSN)
     emitter = ProtocolEmitter(sys.stdout)
 
     try:
+        if args.mode in ("live", "replay"):
+            # Subscription commands from the desktop (see subscriptions.py).
+            subscriptions = Subscriptions()
+            start_command_reader(sys.stdin, subscriptions)
         if args.mode == "live":
             run_live(
                 dsn=dsn,
                 dbc_csv=args.dbc,
-                source=serial_events(args.port, args.baud),
+                source=(
+                    serial_events(args.port[0], args.baud)
+                    if len(args.port) == 1
+                    else merged_serial_events(args.port, args.baud)
+                ),
                 emitter=emitter,
                 streaming_only=True,
+                capture_dir=args.capture_dir,
+                latest_path=args.latest_file,
+                history_socket=args.history_socket,
+                history_samples=args.history_samples,
+                subscriptions=subscriptions,
+                db_signals=args.db_signals,
             )
             return 0
         if args.mode == "batch":
+            if args.append or args.redecode:
+                flag = "--append" if args.append else "--redecode"
+                if args.from_ms is not None or args.to_ms is not None or args.only:
+                    raise ValueError(f"{flag} works on whole logs; drop --from-ms/--to-ms/--only")
+                if args.parquet_dir is not None:
+                    raise ValueError(f"{flag} does not write Parquet; drop --parquet-dir")
+                run = run_append_import if args.append else run_redecode
+                run(
+                    dsn=dsn,
+                    dbc_csv=args.dbc,
+                    nfr_file=args.file,
+                    emitter=emitter,
+                    layout=args.layout,
+                )
+                return 0
             run_batch_import(
-                dsn=dsn, dbc_csv=args.dbc, nfr_file=args.file, emitter=emitter
+                dsn=dsn,
+                dbc_csv=args.dbc,
+                nfr_file=args.file,
+                emitter=emitter,
+                layout=args.layout,
+                parquet_dir=args.parquet_dir,
+                from_ms=args.from_ms,
+                to_ms=args.to_ms,
+                only=args.only,
+            )
+            return 0
+        if args.mode == "bulk":
+            run_bulk_import(
+                dsn=dsn,
+                dbc_csv=args.dbc,
+                nfr_files=args.file,
+                emitter=emitter,
+                layout=args.layout,
+                flush_every=args.flush_every,
+            )
+            return 0
+        if args.mode == "watch":
+            run_watch(
+                dsn=dsn,
+                dbc_csv=args.dbc,
+                directory=args.dir,
+                emitter=emitter,
+                layout=args.layout,
+                settle_seconds=args.settle_seconds,
             )
             return 0
         if args.mode == "replay":
+            frame_ids = None
+            if args.only:
+                frame_ids = resolve_filter(compile_csv(str(args.dbc)), args.only).frame_ids
             run_live(
                 dsn=dsn,
                 dbc_csv=args.dbc,
-                source=file_events(args.file, speed=args.speed),
+                source=file_events(
+                    args.file,
+                    speed=args.speed,
+                    from_ms=args.from_ms,
+                    to_ms=args.to_ms,
+                    frame_ids=frame_ids,
+                ),
+                emitter=emitter,
+                subscriptions=subscriptions,
+            )
+            return 0
+        if args.mode == "cache":
+            emitter.import_progress(str(args.file), pct=0)
+            load_nfr_arrays(args.file, args.dbc, rebuild=args.rebuild)
+            emitter.import_progress(str(args.file), pct=100)
+            return 0
+        if args.mode == "export":
+            run_export(
+                out_path=args.out,
+                fmt=args.format,
                 emitter=emitter,
+                nfr_file=args.file,
+                dbc_csv=args.dbc,
+                dsn=dsn,
+                session_id=args.session,
             )
             return 0
+        if args.mode == "season":
+            def run(out, progress=None) -> None:
+                write_season_csv(
+                    out,
+                    iter_season_aggregate(
+                        dsn,
+                        args.signals,
+                        args.aggs,
+                        start=args.start,
+                        end=args.end,
+                        workers=args.workers,
+                        progress=progress,
+                    ),
+                )
+
+            if args.out is None:
+                # stdout carries the table, so no progress events.
+                run(sys.stdout)
+            else:
+                label = str(args.out)
+                args.out.parent.mkdir(parents=True, exist_ok=True)
+                with open(args.out, "w", newline="", encoding="utf-8") as out:
+                    run(out, lambda pct: emitter.import_progress(label, pct=pct))
+            return 0
     except Exception as err:  # noqa: BLE001
         # Send the short form on the JSON channel (for in-app surface), and
         # the full traceback on stderr so the desktop can capture it for
@@ -0,0 +1,335 @@
+"""Append import: extend a session from a longer copy of the same .nfr.
+
+When logs are copied off the car mid-day, LOG_00xx.NFR keeps growing
+between copies. A plain re-import hashes the whole new file, gets a new
+session id and decodes everything again. `run_append_import` instead:
+
+  1. Looks up `import_checkpoints` by the sha256 of the 20-byte header
+     (indexed) and keeps checkpoints whose stored prefix still fits.
+  2. Confirms the stored bytes are a prefix of the new file with
+     `nfr_reader.prefix_fingerprint` (sha256 of the whole prefix) and that
+     the DBC is the one the prefix was decoded with.
+  3. Decodes only the frames after the prefix (one `read_records` +
+     vectorised `decode_records`) and writes them in the session's layout.
+  4. Extends everything derived from the readings incrementally:
+     `ended_at`, the 1-second rollup (boundary buckets are merged), the
+     summary stats (`stats.merge_signal_stats`), derived channels and the
+     event index (each input is warmed up with its last stored sample, so
+     values and edges across the boundary are right; a threshold rule's
+     hysteresis state is re-derived from that one sample), and the LTTB
+     overview of the signals that grew.
+  5. Moves the checkpoint forward, continuing the prefix hash over the new
+     bytes only.
+
+Everything is committed in one transaction at the end, so a failed append
+leaves the session and its checkpoint as they were and can simply be run
+again. Apart from one sequential hash of the file, all of this is O(new
+frames). If no checkpoint matches — first import,
+different log, changed DBC — it falls back to a full `run_batch_import`.
+"""
+from __future__ import annotations
+
+import hashlib
+from datetime import timedelta
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from batch import checkpoint_for, compile_dbc, run_batch_import
+from columns import SignalColumns, from_epoch_us, to_epoch_us
+from db import (
+    ImportCheckpoint,
+    Reading,
+    SignalDef,
+    copy_sd_readings,
+    copy_sd_segments,
+    find_import_checkpoints,
+    merge_sd_rollup,
+    read_sd_lttb,
+    read_session_signal_stats,
+    upsert_signal_definitions,
+    write_import_checkpoint,
+    write_sd_lttb,
+    write_session_events,
+    write_session_signal_stats,
+)
+from decode import decode_records
+from derived import compute_derived, resolve_ref
+from events import compute_events
+from lttb import compute_lttb
+from nfr_reader import (
+    FRAME_SIZE,
+    HEADER_SIZE,
+    PrefixHash,
+    frame_count,
+    prefix_hash,
+    read_header,
+    read_records,
+)
+from protocol import ProtocolEmitter
+from segments import encode_segments
+from sessions_io import neighbour_samples
+from stats import compute_session_stats, merge_signal_stats
+
+Samples = tuple[np.ndarray, np.ndarray]
+
+
+def match_checkpoint(
+    conn: psycopg.Connection, nfr_file: Path, dbc_csv: Path
+) -> tuple[ImportCheckpoint, PrefixHash] | None:
+    """The longest checkpoint whose bytes are a prefix of `nfr_file` and
+    whose DBC matches `dbc_csv`, with the sha256 of that prefix (for
+    `nfr_reader.prefix_hash(resume=...)`).
+
+    Candidates are checked shortest first with one running hash, so the
+    file is read at most once however many checkpoints share its header.
+    """
+    with open(nfr_file, "rb") as f:
+        header_sha = hashlib.sha256(f.read(HEADER_SIZE)).hexdigest()
+    dbc_sha = hashlib.sha256(Path(dbc_csv).read_bytes()).hexdigest()
+    size = HEADER_SIZE + frame_count(nfr_file) * FRAME_SIZE
+    found = None
+    h, hashed = hashlib.sha256(), 0
+    for cp in reversed(find_import_checkpoints(conn, header_sha, size)):
+        if cp.dbc_sha256 != dbc_sha:
+            continue
+        h = prefix_hash(nfr_file, cp.prefix_bytes, resume=(h, hashed))
+        hashed = cp.prefix_bytes
+        if h.hexdigest() == cp.fingerprint:
+            found = (cp, h)
+    return found
+
+
+def _with_history(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    key_ids: dict[tuple[str, str], int],
+    tail: dict[tuple[str, str], Samples],
+    at_us: int,
+) -> dict[tuple[str, str], Samples]:
+    """Tail samples of every stored signal in `key_ids`, each preceded by
+    its last stored sample before `at_us` (when it has one)."""
+    out: dict[tuple[str, str], Samples] = {}
+    at = from_epoch_us(at_us)
+    for key, sid in key_ids.items():
+        prev, _ = neighbour_samples(conn, session_id, sid, at)
+        ts, values = tail.get(key, (np.empty(0, np.int64), np.empty(0)))
+        if prev is not None:
+            ts = np.concatenate([[prev[0]], ts]).astype(np.int64)
+            values = np.concatenate([[prev[1]], values])
+        if ts.size:
+            out[key] = (ts, values)
+    return out
+
+
+def run_append_import(
+    *,
+    dsn: str,
+    dbc_csv: Path,
+    nfr_file: Path,
+    emitter: ProtocolEmitter,
+    layout: str = "rows",
+) -> UUID:
+    """Import only the new frames of a grown log; see the module docstring.
+
+    `layout` applies to the fallback full import; appends keep the layout
+    the session was created with.
+    """
+    if not nfr_file.is_file():
+        raise FileNotFoundError(nfr_file)
+    with psycopg.connect(dsn) as conn:
+        match = match_checkpoint(conn, nfr_file, dbc_csv)
+    return append_from_checkpoint(
+        dsn=dsn, dbc_csv=dbc_csv, nfr_file=nfr_file, emitter=emitter,
+        match=match, layout=layout,
+    )
+
+
+def append_from_checkpoint(
+    *,
+    dsn: str,
+    dbc_csv: Path,
+    nfr_file: Path,
+    emitter: ProtocolEmitter,
+    match: tuple[ImportCheckpoint, PrefixHash] | None,
+    layout: str = "rows",
+) -> UUID:
+    """`run_append_import` for a caller that already ran `match_checkpoint`
+    (`watch.py`), so the prefix isn't hashed a second time. A `match` of
+    None means a full import."""
+    if match is None:
+        return run_batch_import(
+            dsn=dsn, dbc_csv=dbc_csv, nfr_file=nfr_file, emitter=emitter, layout=layout
+        )
+
+    cp, prefix_sha = match
+    session_id = cp.session_id
+    label = str(nfr_file)
+    emitter.session_started(str(session_id), source="sd_import")
+    emitter.import_progress(label, pct=0)
+    first_frame = (cp.prefix_bytes - HEADER_SIZE) // FRAME_SIZE
+    records = read_records(nfr_file, first_frame)
+    if records.size == 0:
+        emitter.import_progress(label, pct=100)
+        emitter.session_ended(str(session_id), row_count=0)
+        return session_id
+
+    write_rows = cp.layout in ("rows", "both")
+    write_segments = cp.layout in ("segments", "both")
+    decode_table, derived_specs, event_rules = compile_dbc(dbc_csv)
+    start_us = to_epoch_us(read_header(nfr_file).start_time)
+
+    # Decode the tail per (source, signal), merging signals that several
+    # frame IDs carry, as nfr_cache does.
+    units: dict[tuple[str, str], str] = {}
+    scales: dict[tuple[str, str], tuple[float, float]] = {}
+    parts: dict[tuple[str, str], list[Samples]] = {}
+    for frame_id, (ts_ms, values) in decode_records(records, decode_table).items():
+        msg = decode_table[frame_id]
+        sender = msg.sender or msg.name or "unknown"
+        for sig in msg.signals:
+            if sig.name in values:
+                key = (sender, sig.name)
+                units[key] = sig.unit or ""
+                scales[key] = (sig.scale, sig.offset)
+                parts.setdefault(key, []).append((start_us + ts_ms * 1000, values[sig.name]))
+    tail: dict[tuple[str, str], Samples] = {}
+    for key, chunks in parts.items():
+        ts = np.concatenate([c[0] for c in chunks])
+        values = np.concatenate([c[1] for c in chunks])
+        order = np.argsort(ts, kind="stable")
+        tail[key] = (ts[order], values[order])
+    emitter.import_progress(label, pct=50)
+
+    with psycopg.connect(dsn) as conn:
+        ids = upsert_signal_definitions(
+            conn,
+            [SignalDef(source=s, signal_name=n, unit=units[(s, n)]) for s, n in tail],
+        )
+        tail_start_us = min((int(ts[0]) for ts, _ in tail.values()), default=0)
+
+        # Derived channels and events need the sample just before the tail
+        # for zero-order hold and edge detection across the boundary.
+        # References resolve against the session's signals, as in batch.
+        present = dict(ids)
+        present.update(
+            ((src, name), sid)
+            for sid, src, name in conn.execute(
+                "SELECT d.id, d.source, d.signal_name FROM session_signal_stats s "
+                "JOIN signal_definitions d ON d.id = s.signal_id WHERE s.session_id = %s",
+                (str(session_id),),
+            ).fetchall()
+        )
+        if derived_specs and tail:
+            inputs = {}
+            for spec in derived_specs:
+                for ref in spec.expression.refs:
+                    key = resolve_ref(ref, present)
+                    if key is not None:
+                        inputs[key] = present[key]
+            history = _with_history(conn, session_id, inputs, tail, tail_start_us)
+            for key, (ts, values) in compute_derived(derived_specs, history).items():
+                keep = ts >= tail_start_us
+                if keep.any():
+                    tail[key] = (ts[keep], values[keep])
+            spec_by_key = {(d.source, d.name): d for d in derived_specs}
+            derived_keys = [k for k in tail if k in spec_by_key]
+            ids.update(
+                upsert_signal_definitions(
+                    conn,
+                    [
+                        SignalDef(
+                            source=k[0],
+                            signal_name=k[1],
+                            unit=spec_by_key[k].unit or "",
+                            description=spec_by_key[k].expression.text,
+                        )
+                        for k in derived_keys
+                    ],
+                )
+            )
+
+        columns = SignalColumns()
+        for key, (ts, values) in tail.items():
+            columns.extend(ids[key], ts, values)
+
+        if write_rows:
+            count = copy_sd_readings(
+                conn,
+                session_id,
+                (
+                    Reading(ts=from_epoch_us(t), signal_id=sid, value=v)
+                    for sid, ts, values in columns.items()
+                    for t, v in zip(ts.tolist(), values.tolist())
+                ),
+                commit=False,
+            )
+        else:
+            count = len(columns)
+        if write_segments:
+            segments = []
+            for key, (ts, values) in tail.items():
+                scale, offset = scales.get(key, (None, None))
+                segments.extend(
+                    encode_segments(ids[key], ts, values, scale=scale, offset=offset)
+                )
+            copy_sd_segments(conn, session_id, segments)
+
+        if event_rules and tail:
+            rule_keys = {}
+            for rule in event_rules:
+                key = resolve_ref(rule.signal, ids)
+                if key is not None:
+                    rule_keys[key] = ids[key]
+            history = _with_history(conn, session_id, rule_keys, tail, tail_start_us)
+            write_session_events(
+                conn,
+                session_id,
+                compute_events(event_rules, history),
+                ids,
+                replace=False,
+            )
+
+        by_signal = {s.signal_id: s for s in read_session_signal_stats(conn, session_id)}
+        for s in compute_session_stats(columns):
+            old = by_signal.get(s.signal_id)
+            by_signal[s.signal_id] = s if old is None else merge_signal_stats(old, s)
+        write_session_signal_stats(conn, session_id, list(by_signal.values()))
+
+        # Overview of the signals that grew: re-reduce their stored points
+        # plus the new samples. Exact for signals that were stored whole;
+        # otherwise an LTTB of an LTTB, which keeps the same peaks.
+        stored_overview = read_sd_lttb(conn, session_id)
+        overview = SignalColumns()
+        for sid, ts, values in columns.items():
+            if sid in stored_overview:
+                overview.extend(sid, *stored_overview[sid])
+            overview.extend(sid, ts, values)
+        write_sd_lttb(
+            conn, session_id, compute_lttb(overview), signal_ids=overview.signal_ids()
+        )
+
+        merge_sd_rollup(conn, session_id, columns)
+        last_ts_ms = int(records["ts_ms"].max())
+        if by_signal:
+            ended_at = from_epoch_us(max(s.last_ts_us for s in by_signal.values()))
+        else:
+            ended_at = read_header(nfr_file).start_time + timedelta(milliseconds=last_ts_ms)
+        conn.execute(
+            "UPDATE sessions SET ended_at = greatest(ended_at, %s) WHERE id = %s",
+            (ended_at, str(session_id)),
+        )
+        write_import_checkpoint(
+            conn,
+            checkpoint_for(
+                nfr_file, dbc_csv, session_id, cp.layout, max(cp.last_ts_ms, last_ts_ms),
+                prefix_sha=(prefix_sha, cp.prefix_bytes),
+            ),
+        )
+        conn.commit()
+
+    emitter.import_progress(label, pct=100)
+    emitter.session_ended(str(session_id), row_count=count)
+    return session_id
@@ -4,20 +4,76 @@ Flow:
   1. Compile the DBC CSV.
   2. Stream the .nfr file once to build the signal-definitions set and
      compute the end timestamp for the session. This is fast (binary read,
-     no DB writes).
+     no DB writes), and a resumed import skips it (see below).
   3. Upsert signal_definitions; open a session row (source=sd_import).
-  4. Stream the file again, COPY all decoded readings into sd_readings.
-  5. Set ended_at = max(ts). Emit import_progress periodically and
+  4. Stream the file again, COPY all decoded readings into sd_readings
+     and/or tee them into per-signal columns for compressed sd_segments
+     (see `layout` below). Whole-file imports that write rows commit every
+     `commit_frames` frames and can resume (see below). A plain rows
+     import keeps only the columns derived channels and event rules read;
+     its stats are accumulated as the rows stream past.
+  5. Evaluate derived channels (the `<dbc>.derived.csv` sidecar, see
+     `derived.py`) over the decoded columns and store them as ordinary
+     signals.
+  6. Evaluate the event rules (the `<dbc>.events.csv` sidecar, see
+     `events.py`) over the same columns and index the hits.
+  7. Set ended_at = max(ts), write per-signal summary statistics, the
+     LTTB overview series (`lttb.py`) and the 1-second rollup. Emit import_progress periodically and
      session_started / session_ended around the work.
+  8. Store a snapshot of the compiled DBC (`dbc_diff.py`) so a later
+     re-decode can rewrite just the signals a DBC fix touched.
+
+Storage layout (`layout=`):
+  "rows"     — one sd_readings row per reading (default; what replay reads).
+  "segments" — sd_segments only, ~10x smaller on disk. The 1-second rollup
+               is computed in Python from the decoded columns since there
+               are no raw rows for `populate_sd_rollup` to aggregate.
+  "both"     — write both; useful while migrating readers over.
+
+`from_ms=` / `to_ms=` import only frames with from_ms <= ts_ms < to_ms
+(offsets from the header start; negative counts back from the last frame).
+Both passes seek straight to the slice by bisection when the log's
+timestamps are sorted, and scan-and-filter when they are not.
+
+`only=` imports just the named messages or signals (see
+`nfr_index.resolve_filter`), reading their frames through the cached
+per-frame-ID index instead of the whole log.
+
+A partial (ranged or filtered) import gets its own session id, so it never
+overwrites the full import.
+
+Resuming: a whole-file import writing sd_readings commits each chunk of
+`commit_frames` frames together with an `import_resume` row (committed
+frame count, DBC sha256, layout). If it is killed or cancelled, re-running
+it with the same DBC and layout skips the committed frames — their
+columns are rebuilt chunk by chunk by a vectorised decode, which needs no
+database I/O — and COPYs only the rest. Step 2's signal set, value ranges
+and end timestamp are kept in the import_resume row too, so the resumed
+run doesn't decode the whole file again to recompute them. Everything written after the last chunk
+(derived channels, events, segments, stats, overview, rollup) commits
+once, together with the removal of the import_resume row, so a crash
+there is redone whole on the next run. Until that commit the session has
+no ended_at and an import_resume row, so session lists keep hiding it.
+
+`staging=True` (used by `bulk.py`) COPYs the readings into the unindexed
+sd_readings_staging table instead, computes the rollup in Python and
+skips ANALYZE; the session stays hidden (an import_resume row with layout
+"staged") until `bulk.flush_staging` moves its rows into sd_readings.
+
+`parquet_dir=` additionally writes the cloud-upload Parquet files (one per
+source, see `parquet_export.py`) from the same decoded columns, so upload
+doesn't need a second full scan of sd_readings.
 
 Emits progress via a `ProtocolEmitter`; callers choose the stream.
 """
 from __future__ import annotations
 
+import functools
 import hashlib
+import math
 from datetime import timedelta
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 from uuid import UUID, uuid5
 
 import psycopg
@@ -28,26 +84,137 @@ import psycopg
 _NFR_SESSION_NAMESPACE = UUID("8c4b2f6e-3a91-4d20-9c7e-1a5f8b9d2c33")
 
 
-def session_id_from_file(nfr_file: Path) -> UUID:
+def session_id_from_file(
+    nfr_file: Path,
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    only: str | None = None,
+) -> UUID:
     h = hashlib.sha256()
     with open(nfr_file, "rb") as f:
         for chunk in iter(lambda: f.read(64 * 1024), b""):
             h.update(chunk)
-    return uuid5(_NFR_SESSION_NAMESPACE, h.hexdigest())
+    name = h.hexdigest()
+    if from_ms is not None or to_ms is not None:
+        # A partial import is its own session; it must not replace (or be
+        # replaced by) the whole-file import of the same log.
+        name += f":{'' if from_ms is None else from_ms}:{'' if to_ms is None else to_ms}"
+    if only:
+        # Same for a message/signal subset (FrameFilter.key).
+        name += f"|{only}"
+    return uuid5(_NFR_SESSION_NAMESPACE, name)
 
-from compile import compile_csv
+from columns import SignalColumns, from_epoch_us, to_epoch_us
+from compile import (
+    compile_csv,
+    compile_derived,
+    compile_events,
+    derived_path_for,
+    events_path_for,
+)
 from db import (
+    ImportCheckpoint,
+    ImportResume,
     Reading,
+    SessionDecodeTable,
     SignalDef,
+    clear_import_resume,
     copy_sd_readings,
+    copy_sd_rollup,
+    copy_sd_segments,
     open_session,
+    read_import_resume,
     upsert_signal_definitions,
+    write_import_checkpoint,
+    write_import_resume,
+    write_sd_lttb,
+    write_session_decode_table,
+    write_session_events,
+    write_session_signal_stats,
+)
+from dbc_diff import snapshot_dbc, snapshot_sha256
+from decode import decode_frame, decode_records
+from derived import compute_derived, resolve_ref
+from events import compute_events
+from lttb import compute_lttb
+from nfr_index import iter_selected_frames, resolve_filter
+from nfr_reader import (
+    FRAME_SIZE,
+    HEADER_SIZE,
+    PrefixHash,
+    frame_count,
+    iter_frames,
+    iter_frames_between,
+    last_ts_ms,
+    prefix_hash,
+    read_header,
+    read_records,
+    resolve_bounds,
 )
-from decode import decode_frame
-from nfr_reader import iter_frames, read_header
 from protocol import ProtocolEmitter
+from segments import encode_segments
+from sessions_io import load_signal
+from stats import StatsAccumulator, compute_session_stats, compute_signal_stats
 
 PROGRESS_STEP_PCT = 10  # emit progress every 10% of file size
+COMMIT_FRAMES = 500_000  # frames per committed chunk of a resumable import
+STAGED = "staged"  # import_resume.layout of a session waiting in sd_readings_staging
+LAYOUTS = ("rows", "segments", "both")
+
+
+def checkpoint_for(
+    nfr_file: Path,
+    dbc_csv: Path,
+    session_id: UUID,
+    layout: str,
+    last_ts_ms: int,
+    *,
+    prefix_sha: tuple[PrefixHash, int] | None = None,
+) -> ImportCheckpoint:
+    """Checkpoint saying `session_id` holds every whole frame of `nfr_file`
+    (see `append.py`). `prefix_sha` is an already computed hash of a
+    shorter prefix to continue from, as for `nfr_reader.prefix_hash`."""
+    with open(nfr_file, "rb") as f:
+        header_sha = hashlib.sha256(f.read(HEADER_SIZE)).hexdigest()
+    prefix_bytes = HEADER_SIZE + frame_count(nfr_file) * FRAME_SIZE
+    return ImportCheckpoint(
+        session_id=session_id,
+        header_sha256=header_sha,
+        prefix_bytes=prefix_bytes,
+        fingerprint=prefix_hash(nfr_file, prefix_bytes, resume=prefix_sha).hexdigest(),
+        dbc_sha256=hashlib.sha256(Path(dbc_csv).read_bytes()).hexdigest(),
+        layout=layout,
+        last_ts_ms=last_ts_ms,
+    )
+
+
+@functools.lru_cache(maxsize=4)
+def _compile_dbc(dbc_csv: str, _content: tuple) -> tuple[dict, list, list]:
+    decode_table = compile_csv(dbc_csv)
+    derived_specs = compile_derived(dbc_csv, decode_table)
+    event_rules = compile_events(dbc_csv, decode_table, derived_specs)
+    return decode_table, derived_specs, event_rules
+
+
+def compile_dbc(dbc_csv: Path) -> tuple[dict, list, list]:
+    """(decode_table, derived_specs, event_rules) for a DBC CSV and its
+    sidecars. Compiled once per content of the three files, so a
+    long-running process (`watch.py`) decodes every log with the same
+    table and picks up an edited DBC on the next import."""
+    content = tuple(
+        hashlib.sha256(path.read_bytes()).hexdigest() if path.is_file() else None
+        for path in (Path(dbc_csv), derived_path_for(dbc_csv), events_path_for(dbc_csv))
+    )
+    return _compile_dbc(str(dbc_csv), content)
+
+
+def _referenced_keys(derived_specs, event_rules, keys) -> set[tuple[str, str]]:
+    """(source, signal_name) of every signal the derived channels and event
+    rules read, resolved like `derived.compute_derived` does."""
+    known = dict.fromkeys(keys) | dict.fromkeys((d.source, d.name) for d in derived_specs)
+    refs = [ref for spec in derived_specs for ref in spec.expression.refs]
+    refs += [rule.signal for rule in event_rules]
+    return {key for ref in refs if (key := resolve_ref(ref, known)) is not None}
 
 
 def run_batch_import(
@@ -56,37 +223,122 @@ def run_batch_import(
     dbc_csv: Path,
     nfr_file: Path,
     emitter: ProtocolEmitter,
+    layout: str = "rows",
+    parquet_dir: Path | None = None,
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    only: Sequence[str] | None = None,
+    commit_frames: int = COMMIT_FRAMES,
+    staging: bool = False,
 ) -> UUID:
+    if layout not in LAYOUTS:
+        raise ValueError(f"invalid layout: {layout!r}")
     if not nfr_file.is_file():
         raise FileNotFoundError(nfr_file)
+    write_rows = layout in ("rows", "both")
+    write_segments = layout in ("segments", "both")
+    staging = staging and write_rows
+    readings_table = "sd_readings_staging" if staging else "sd_readings"
+    # Every signal's decoded columns are kept only when a sink needs them
+    # all: segments, Parquet, or a rollup computed in Python (no rows in
+    # sd_readings for populate_sd_rollup). Otherwise only the inputs of
+    # derived channels and event rules are kept, summary stats stream
+    # through StatsAccumulators and the overview is built from sd_readings
+    # one signal at a time, so memory doesn't grow with the log.
+    keep_all_columns = (
+        write_segments or parquet_dir is not None or not write_rows or staging
+    )
 
-    decode_table = compile_csv(str(dbc_csv))
+    decode_table, derived_specs, event_rules = compile_dbc(dbc_csv)
     header = read_header(nfr_file)
+    # Optional [from_ms, to_ms) slice of the log (negative = back from the
+    # end). Both passes seek straight to it; see nfr_reader.frame_range.
+    if from_ms is not None or to_ms is not None:
+        from_ms, to_ms = resolve_bounds(from_ms, to_ms, last_ts_ms(nfr_file))
+    first_ts_ms = from_ms or 0
+    # Optional message / signal subset: read only those frames, through the
+    # per-frame-ID index cached next to the log (see nfr_index.py).
+    frame_filter = resolve_filter(decode_table, only) if only else None
+
+    def frames() -> Iterator[tuple[int, int, bytes]]:
+        if frame_filter is None:
+            return iter_frames_between(nfr_file, from_ms, to_ms)
+        return iter_selected_frames(nfr_file, frame_filter.frame_ids, from_ms, to_ms)
 
-    # Pass 1: collect signal defs + compute end timestamp.
+    # Per-signal lookups from the compiled DBC.
     signal_units: dict[tuple[str, str], str] = {}
     sender_lookup: dict[tuple[int, str], str] = {}
+    scale_lookup: dict[tuple[str, str], tuple[float, float]] = {}
     for msg in decode_table.values():
         sender = msg.sender or msg.name or "unknown"
         for sig in msg.signals:
             signal_units[(sender, sig.name)] = sig.unit or ""
             sender_lookup[(msg.frame_id, sig.name)] = sender
+            scale_lookup[(sender, sig.name)] = (sig.scale, sig.offset)
+
+    def scan() -> dict:
+        # Signals seen (with the finite value range of each, for streamed
+        # stats' histogram bins) and the last timestamp, in a form that
+        # import_resume can keep for a resumed run.
+        value_range: dict[tuple[str, str], list[float] | None] = {}
+        end_ts_ms = first_ts_ms
+        for ts_ms, frame_id, data in frames():
+            decoded = decode_frame(frame_id, data, decode_table)
+            if not decoded:
+                continue
+            for signal_name, value in decoded.items():
+                if frame_filter is not None and not frame_filter.keeps(frame_id, signal_name):
+                    continue
+                key = (sender_lookup.get((frame_id, signal_name), "unknown"), signal_name)
+                span = value_range.setdefault(key, None)
+                if not keep_all_columns and math.isfinite(value):
+                    if span is None:
+                        value_range[key] = [value, value]
+                    else:
+                        span[0], span[1] = min(span[0], value), max(span[1], value)
+            if ts_ms > end_ts_ms:
+                end_ts_ms = ts_ms
+        return {
+            "end_ts_ms": end_ts_ms,
+            "signals": [[*key, span] for key, span in value_range.items()],
+        }
+
+    deterministic_id = session_id_from_file(
+        nfr_file, from_ms, to_ms, frame_filter.key if frame_filter else None
+    )
+    # Whole-file imports that write rows commit every COMMIT_FRAMES frames
+    # and record how far they got in import_resume, so a killed or
+    # cancelled import continues where it stopped. The session stays
+    # hidden (ended_at NULL, import_resume row present) until the final
+    # commit below.
+    resumable = (
+        write_rows
+        and not staging
+        and from_ms is None
+        and to_ms is None
+        and frame_filter is None
+    )
+    dbc_sha = hashlib.sha256(Path(dbc_csv).read_bytes()).hexdigest()
 
-    signals_seen: set[tuple[str, str, str]] = set()
-    last_ts_ms = 0
-    for ts_ms, frame_id, data in iter_frames(nfr_file):
-        decoded = decode_frame(frame_id, data, decode_table)
-        if not decoded:
-            continue
-        for signal_name in decoded:
-            sender = sender_lookup.get((frame_id, signal_name), "unknown")
-            unit = signal_units.get((sender, signal_name), "")
-            signals_seen.add((sender, signal_name, unit))
-        if ts_ms > last_ts_ms:
-            last_ts_ms = ts_ms
-
-    # Pass 2: open session, upsert defs, COPY rows.
     with psycopg.connect(dsn) as conn:
+        resume = read_import_resume(conn, deterministic_id) if resumable else None
+        if resume is not None and (resume.dbc_sha256, resume.layout) != (dbc_sha, layout):
+            resume = None  # different DBC or layout: start over
+        # Pass 1: collect signal defs + compute end timestamp. A resumed
+        # import reuses the first run's, kept in its import_resume row.
+        seen = resume.scan if resume is not None and resume.scan is not None else scan()
+        end_ts_ms = seen["end_ts_ms"]
+        signals_seen = {
+            (sender, name, signal_units.get((sender, name), ""))
+            for sender, name, _span in seen["signals"]
+        }
+        value_range = {
+            (sender, name): tuple(span)
+            for sender, name, span in seen["signals"]
+            if span is not None
+        }
+
+        # Pass 2: open session, upsert defs, COPY rows.
         sig_id_map = upsert_signal_definitions(
             conn,
             [
@@ -94,74 +346,287 @@ def run_batch_import(
                 for (src, name, unit) in signals_seen
             ],
         )
-        deterministic_id = session_id_from_file(nfr_file)
         session_id = open_session(
             conn,
             source="sd_import",
             source_file=str(nfr_file),
-            started_at=header.start_time,
+            started_at=header.start_time + timedelta(milliseconds=first_ts_ms),
             session_id=deterministic_id,
         )
 
-        # Re-import policy: if this .nfr has been imported before, delete the
-        # previous parse's rows and re-decode with the current DBC. This is
-        # how a user recovers from "I parsed with the wrong DBC version" —
-        # they just import the file again and the new parse overwrites the
-        # old. session_id is deterministic from file content, so cloud sync
-        # / replays / favourites keep pointing at the same UUID.
-        with conn.cursor() as cur:
-            cur.execute(
-                "DELETE FROM sd_readings WHERE session_id = %s",
-                (str(session_id),),
-            )
-            deleted_rows = cur.rowcount or 0
-            # Reset session bookkeeping so ended_at gets recomputed below.
-            cur.execute(
-                "UPDATE sessions SET ended_at = NULL WHERE id = %s",
-                (str(session_id),),
-            )
+        columns = SignalColumns()
+        start_us = to_epoch_us(header.start_time)
+        if keep_all_columns:
+            keep_ids = None  # every signal
+            accumulators: dict[int, StatsAccumulator] = {}
+        else:
+            keep_ids = {
+                sig_id_map[key]
+                for key in _referenced_keys(derived_specs, event_rules, sig_id_map)
+                if key in sig_id_map
+            }
+            accumulators = {
+                sig_id: StatsAccumulator(
+                    sig_id, *value_range.get(key, (float("nan"), float("nan")))
+                )
+                for key, sig_id in sig_id_map.items()
+            }
+
+        deleted_rows = 0
+        if resume is not None:
+            start_frame, count = resume.frames_done, resume.rows_done
+            # The committed prefix's readings are in sd_readings already;
+            # the sinks below still need its columns, which a vectorised
+            # decode of the file rebuilds far faster than a COPY back out.
+            # Chunk by chunk, as committed, so the record arrays stay small.
+            for base in range(0, start_frame, commit_frames):
+                stop = min(base + commit_frames, start_frame)
+                prefix = decode_records(read_records(nfr_file, base, stop), decode_table)
+                for frame_id, (ts_ms, values) in prefix.items():
+                    for signal_name, column in values.items():
+                        sender = sender_lookup.get((frame_id, signal_name), "unknown")
+                        sig_id = sig_id_map.get((sender, signal_name))
+                        if sig_id is None:
+                            continue
+                        ts_us = start_us + ts_ms * 1000
+                        if keep_ids is None or sig_id in keep_ids:
+                            columns.extend(sig_id, ts_us, column)
+                        if sig_id in accumulators:
+                            accumulators[sig_id].extend(ts_us, column)
+        else:
+            start_frame, count = 0, 0
+            # Re-import policy: if this .nfr has been imported before, delete
+            # the previous parse's rows and re-decode with the current DBC.
+            # This is how a user recovers from "I parsed with the wrong DBC
+            # version" — they just import the file again and the new parse
+            # overwrites the old. session_id is deterministic from file
+            # content, so cloud sync / replays / favourites keep pointing at
+            # the same UUID.
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM sd_readings WHERE session_id = %s",
+                    (str(session_id),),
+                )
+                deleted_rows += cur.rowcount or 0
+                cur.execute(
+                    "DELETE FROM sd_segments WHERE session_id = %s",
+                    (str(session_id),),
+                )
+                deleted_rows += cur.rowcount or 0
+                # Rows an unfinished bulk load staged for this session.
+                cur.execute(
+                    "DELETE FROM sd_readings_staging WHERE session_id = %s",
+                    (str(session_id),),
+                )
+                # Reset session bookkeeping so ended_at gets recomputed below.
+                cur.execute(
+                    "UPDATE sessions SET ended_at = NULL WHERE id = %s",
+                    (str(session_id),),
+                )
+            if staging:
+                # Hidden until bulk.flush_staging moves its rows in;
+                # rows_done -1 until the file is completely staged.
+                write_import_resume(
+                    conn, ImportResume(session_id, dbc_sha, STAGED, 0, -1)
+                )
         emitter.session_started(str(session_id), source="sd_import")
-        if deleted_rows > 0:
+        if resume is not None or deleted_rows > 0:
             # Surface the rewrite explicitly so the desktop can show "re-parsed".
             emitter.import_progress(str(nfr_file), pct=0)
 
         next_progress_threshold = PROGRESS_STEP_PCT
+        # Decoded readings are also teed into per-signal columns (all of
+        # them or just `keep_ids`, see keep_all_columns) and into the stats
+        # accumulators, so no sink has to scan sd_readings afterwards.
 
-        def _readings() -> Iterable[Reading]:
+        def _readings(source: Iterable[tuple[int, int, bytes]]) -> Iterable[Reading]:
             nonlocal next_progress_threshold
-            for ts_ms, frame_id, data in iter_frames(nfr_file):
+            for ts_ms, frame_id, data in source:
                 decoded = decode_frame(frame_id, data, decode_table)
                 if not decoded:
                     continue
                 ts = header.start_time + timedelta(milliseconds=ts_ms)
+                ts_us = start_us + ts_ms * 1000
                 for signal_name, value in decoded.items():
                     sender = sender_lookup.get((frame_id, signal_name), "unknown")
                     sig_id = sig_id_map.get((sender, signal_name))
                     if sig_id is None:
                         continue
-                    yield Reading(ts=ts, signal_id=sig_id, value=float(value))
+                    value = float(value)
+                    if keep_ids is None or sig_id in keep_ids:
+                        columns.append(sig_id, ts_us, value)
+                    acc = accumulators.get(sig_id)
+                    if acc is not None:
+                        acc.add(ts_us, value)
+                    yield Reading(ts=ts, signal_id=sig_id, value=value)
 
                 # Emit periodic progress based on relative timestamp position.
-                pct = min(99, int(100 * ts_ms / max(last_ts_ms, 1)))
+                pct = min(
+                    99,
+                    int(100 * (ts_ms - first_ts_ms) / max(end_ts_ms - first_ts_ms, 1)),
+                )
                 if pct >= next_progress_threshold:
                     emitter.import_progress(str(nfr_file), pct=pct)
                     next_progress_threshold += PROGRESS_STEP_PCT
 
-        count = copy_sd_readings(conn, session_id, _readings())
+        if resumable:
+            total = frame_count(nfr_file)
+            for base in range(start_frame, total, commit_frames):
+                stop = min(base + commit_frames, total)
+                # The chunk's rows and its checkpoint commit together.
+                count += copy_sd_readings(
+                    conn,
+                    session_id,
+                    _readings(iter_frames(nfr_file, base, stop)),
+                    commit=False,
+                )
+                write_import_resume(
+                    conn, ImportResume(session_id, dbc_sha, layout, stop, count, seen)
+                )
+                conn.commit()
+        elif write_rows:
+            count = copy_sd_readings(
+                conn, session_id, _readings(frames()), table=readings_table
+            )
+        else:
+            count = sum(1 for _ in _readings(frames()))
+
+        id_to_key = {v: k for k, v in sig_id_map.items()}
+
+        # Derived channels are stored like any other signal, so every sink
+        # below (segments, stats, Parquet, rollup) picks them up and replay
+        # reads one precomputed series instead of re-deriving it per view.
+        derived = {}
+        if derived_specs:
+            derived = compute_derived(
+                derived_specs,
+                {id_to_key[sid]: (ts, v) for sid, ts, v in columns.items()},
+            )
+        if derived:
+            spec_by_key = {(d.source, d.name): d for d in derived_specs}
+            derived_ids = upsert_signal_definitions(
+                conn,
+                [
+                    SignalDef(
+                        source=src,
+                        signal_name=name,
+                        unit=spec_by_key[(src, name)].unit or "",
+                        description=spec_by_key[(src, name)].expression.text,
+                    )
+                    for (src, name) in derived
+                ],
+            )
+            for key, (ts_us, values) in derived.items():
+                columns.extend(derived_ids[key], ts_us, values)
+                id_to_key[derived_ids[key]] = key
+            if write_rows:
+                count += copy_sd_readings(
+                    conn,
+                    session_id,
+                    (
+                        Reading(ts=from_epoch_us(t), signal_id=derived_ids[key], value=v)
+                        for key, (ts_us, values) in derived.items()
+                        for t, v in zip(ts_us.tolist(), values.tolist())
+                    ),
+                    commit=False,
+                    table=readings_table,
+                )
+            else:
+                count += sum(ts_us.size for ts_us, _ in derived.values())
+
+        # Threshold crossings / state changes / fault bits, indexed once so
+        # the desktop can list them and jump straight to each one.
+        events = []
+        if event_rules:
+            events = compute_events(
+                event_rules,
+                {id_to_key[sid]: (ts, v) for sid, ts, v in columns.items()},
+            )
+        write_session_events(
+            conn, session_id, events, {k: sid for sid, k in id_to_key.items()}
+        )
+
+        if parquet_dir is not None:
+            # Imported lazily: pyarrow is an optional dependency.
+            from parquet_export import write_source_parquets
+
+            write_source_parquets(
+                parquet_dir,
+                columns,
+                {sig_id: key[0] for sig_id, key in id_to_key.items()},
+            )
+        if write_segments:
+            segments = []
+            for sig_id, ts_us, values in columns.items():
+                scale, offset = scale_lookup.get(id_to_key[sig_id], (None, None))
+                segments.extend(
+                    encode_segments(sig_id, ts_us, values, scale=scale, offset=offset)
+                )
+            copy_sd_segments(conn, session_id, segments)
+
+        if keep_ids is None:
+            stats = compute_session_stats(columns)
+        else:
+            # Streamed raw signals, plus the derived channels kept above.
+            stats = [s for acc in accumulators.values() if (s := acc.result()) is not None]
+            stats += [
+                compute_signal_stats(sig_id, ts_us, values)
+                for sig_id, ts_us, values in columns.items()
+                if sig_id not in accumulators and ts_us.size
+            ]
+        write_session_signal_stats(conn, session_id, stats)
+        # Fixed-budget overview series for the replay "ALL" view.
+        overview = compute_lttb(columns)
+        if keep_ids is not None:
+            # Signals not kept in memory are read back one at a time.
+            for sig_id in sorted(set(accumulators) - set(columns.signal_ids())):
+                one = SignalColumns()
+                one.extend(sig_id, *load_signal(conn, session_id, sig_id))
+                overview += compute_lttb(one)
+        write_sd_lttb(conn, session_id, overview)
+        # ended_at comes from the stats we just computed rather than a
+        # max(ts) over the session's sd_readings.
+        if stats:
+            ended_at = from_epoch_us(max(s.last_ts_us for s in stats))
+        else:
+            ended_at = header.start_time + timedelta(milliseconds=end_ts_ms)
 
         with conn.cursor() as cur:
             cur.execute(
-                "UPDATE sessions "
-                "SET ended_at = COALESCE("
-                "  (SELECT max(ts) FROM sd_readings WHERE session_id = %s),"
-                "  %s) "
-                "WHERE id = %s",
-                (session_id, header.start_time + timedelta(milliseconds=last_ts_ms), session_id),
+                "UPDATE sessions SET ended_at = %s WHERE id = %s",
+                (ended_at, session_id),
             )
             # Pre-aggregate into the 1-second rollup so replay opens don't
             # have to scan raw sd_readings every time. ~1000x less random
             # I/O at query time; the rollup itself adds ~1% to import.
-            cur.execute("SELECT populate_sd_rollup(%s)", (str(session_id),))
+            if write_rows and not staging:
+                cur.execute("SELECT populate_sd_rollup(%s)", (str(session_id),))
+            else:
+                cur.execute(
+                    "DELETE FROM sd_rollup_1s WHERE session_id = %s",
+                    (str(session_id),),
+                )
+                copy_sd_rollup(conn, session_id, columns)
+                if not staging:  # a bulk load analyzes once, after its flush
+                    cur.execute("ANALYZE sd_rollup_1s")
+        # What the session was decoded with, so `--redecode` after a DBC fix
+        # rewrites only the signals that changed (see redecode.py).
+        snapshot = snapshot_dbc(decode_table, derived_specs, event_rules)
+        write_session_decode_table(
+            conn,
+            SessionDecodeTable(session_id, snapshot_sha256(snapshot), snapshot, layout),
+        )
+        if from_ms is None and to_ms is None and frame_filter is None:
+            # Lets a later `--append` of a longer copy of this log decode
+            # only the new frames.
+            write_import_checkpoint(
+                conn, checkpoint_for(nfr_file, dbc_csv, session_id, layout, end_ts_ms)
+            )
+        if staging:
+            write_import_resume(conn, ImportResume(session_id, dbc_sha, STAGED, 0, count))
+        else:
+            # Only now does the session become visible.
+            clear_import_resume(conn, session_id)
         conn.commit()
 
         emitter.import_progress(str(nfr_file), pct=100)
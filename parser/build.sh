@@ -35,7 +35,7 @@ fi
 # imported before psycopg_binary". Importing `psycopg` itself loads the
 # binary backend implicitly, which is what we actually need for the
 # bundled binary to work.
-err="$("$PY" -c "import psycopg, serial, serial.tools.list_ports" 2>&1)" || {
+err="$("$PY" -c "import psycopg, serial, serial.tools.list_ports, numpy" 2>&1)" || {
   echo "ERROR: build environment is missing required modules." >&2
   echo "       Python: $PY" >&2
   echo "$err" | sed 's/^/         /' >&2
@@ -43,7 +43,7 @@ err="$("$PY" -c "import psycopg, serial, serial.tools.list_ports" 2>&1)" || {
   echo "       Installed packages (pip list):" >&2
   "$PY" -m pip list 2>&1 | sed 's/^/         /' >&2
   echo >&2
-  echo "       Try:  pip install 'psycopg[binary]' pyserial pyinstaller" >&2
+  echo "       Try:  pip install 'psycopg[binary]' pyserial numpy pyinstaller" >&2
   exit 1
 }
 
@@ -0,0 +1,150 @@
+"""Bulk load: import many .nfr logs with one index/ANALYZE pass per batch.
+
+Importing a competition weekend file by file maintains
+sd_readings_lookup_idx row by row and runs `populate_sd_rollup` (and its
+ANALYZE) once per file. `run_bulk_import` instead:
+
+  1. Imports each file with `run_batch_import(staging=True)`: readings go
+     to the unindexed, unlogged sd_readings_staging table; the rollup is
+     computed in Python from the decoded columns, as are stats, LTTB,
+     events and derived channels. Each file commits on its own and stays
+     hidden behind an import_resume row with layout "staged".
+  2. Every `flush_every` files (and at the end) `flush_staging` moves the
+     staged rows into sd_readings in one INSERT sorted by the index key.
+     When the batch is large next to the table (REBUILD_FRACTION) the
+     index is dropped first and rebuilt once afterwards; sd_readings is
+     then locked against readers (ACCESS EXCLUSIVE) until the flush
+     commits, so replay views wait for it. Then the staged sessions become
+     visible and both tables are analyzed, once.
+
+Cancelling is safe at any point: a killed file leaves only staged rows of
+a hidden session, and a killed flush rolls back as one transaction. The
+next bulk load flushes what was staged completely, re-imports the rest and
+carries on. Segment-only layouts don't stage anything and import as usual.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+from uuid import UUID
+
+import psycopg
+
+from batch import STAGED, run_batch_import
+from protocol import ProtocolEmitter
+
+FLUSH_EVERY = 20  # files staged before each move into sd_readings
+REBUILD_FRACTION = 0.25  # rebuild the index when staging this much of the table
+FLUSH_LABEL = "sd_readings"  # import_progress `file` while flushing
+
+
+def staged_sessions(conn: psycopg.Connection) -> dict[UUID, int]:
+    """Staged sessions whose rows are all in sd_readings_staging, with
+    their row counts. Leaves out files whose import was cut short
+    (rows_done -1) and, since staging is unlogged, sessions whose rows a
+    database crash emptied; both must be imported again."""
+    rows = conn.execute(
+        "SELECT r.session_id, r.rows_done FROM import_resume r "
+        "LEFT JOIN (SELECT session_id, count(*) AS n FROM sd_readings_staging "
+        "           GROUP BY session_id) s ON s.session_id = r.session_id "
+        "WHERE r.layout = %s AND r.rows_done >= 0 AND coalesce(s.n, 0) = r.rows_done",
+        (STAGED,),
+    ).fetchall()
+    return {sid: n for sid, n in rows}
+
+
+def flush_staging(conn: psycopg.Connection, emitter: ProtocolEmitter) -> int:
+    """Move every completely staged session into sd_readings and make it
+    visible. Returns the number of rows moved. Commits."""
+    staged = staged_sessions(conn)
+    ids = [str(sid) for sid in staged]
+    moved = sum(staged.values())
+    emitter.import_progress(FLUSH_LABEL, pct=0)
+    with conn.cursor() as cur:
+        if moved:
+            (existing,) = cur.execute(
+                "SELECT greatest(reltuples, 0)::bigint FROM pg_class "
+                "WHERE oid = 'sd_readings'::regclass"
+            ).fetchone()
+            rebuild = moved > REBUILD_FRACTION * existing
+            cur.execute("SET LOCAL maintenance_work_mem = '512MB'")
+            if rebuild:
+                # Holds an ACCESS EXCLUSIVE lock on sd_readings until the
+                # commit, so readers wait out the INSERT and the rebuild.
+                # Building a replacement index concurrently wouldn't help:
+                # the INSERT is only cheap because no index is maintained.
+                cur.execute("DROP INDEX sd_readings_lookup_idx")
+            # Sorted by the index key: even a maintained index is then
+            # appended to page by page instead of updated at random.
+            cur.execute(
+                "INSERT INTO sd_readings (ts, session_id, signal_id, value) "
+                "SELECT ts, session_id, signal_id, value FROM sd_readings_staging "
+                "WHERE session_id = ANY(%s::uuid[]) ORDER BY session_id, signal_id, ts",
+                (ids,),
+            )
+            emitter.import_progress(FLUSH_LABEL, pct=50)
+            if rebuild:
+                cur.execute(
+                    "CREATE INDEX sd_readings_lookup_idx "
+                    "ON sd_readings (session_id, signal_id, ts)"
+                )
+        cur.execute("DELETE FROM import_resume WHERE session_id = ANY(%s::uuid[])", (ids,))
+        # Only the rows just moved: anything else is still being staged by
+        # another bulk load, or belongs to a file that will be imported
+        # again (run_batch_import clears its session's staged rows first).
+        cur.execute(
+            "DELETE FROM sd_readings_staging WHERE session_id = ANY(%s::uuid[])", (ids,)
+        )
+    conn.commit()
+    if moved:
+        emitter.import_progress(FLUSH_LABEL, pct=90)
+        conn.execute("ANALYZE sd_readings")
+        conn.execute("ANALYZE sd_rollup_1s")
+        conn.commit()
+    emitter.import_progress(FLUSH_LABEL, pct=100)
+    return moved
+
+
+def run_bulk_import(
+    *,
+    dsn: str,
+    dbc_csv: Path,
+    nfr_files: Sequence[Path],
+    emitter: ProtocolEmitter,
+    layout: str = "rows",
+    flush_every: int = FLUSH_EVERY,
+) -> list[UUID]:
+    """Import `nfr_files` as described in the module docstring. Returns
+    their session ids in order."""
+    if flush_every < 1:
+        raise ValueError("flush_every must be at least 1")
+    for nfr_file in nfr_files:
+        if not nfr_file.is_file():
+            raise FileNotFoundError(nfr_file)
+
+    with psycopg.connect(dsn) as conn:
+        # Finish what an interrupted bulk load staged completely.
+        flush_staging(conn, emitter)
+
+    session_ids: list[UUID] = []
+    pending = 0
+    for nfr_file in nfr_files:
+        session_ids.append(
+            run_batch_import(
+                dsn=dsn,
+                dbc_csv=dbc_csv,
+                nfr_file=nfr_file,
+                emitter=emitter,
+                layout=layout,
+                staging=True,
+            )
+        )
+        pending += 1
+        if pending == flush_every:
+            with psycopg.connect(dsn) as conn:
+                flush_staging(conn, emitter)
+            pending = 0
+    if pending:
+        with psycopg.connect(dsn) as conn:
+            flush_staging(conn, emitter)
+    return session_ids
@@ -0,0 +1,123 @@
+"""Raw capture: keep the undecoded CAN frames of a live session as .nfr.
+
+Live mode stores decoded values only, so a DBC mistake found after a
+test day could never be fixed for the live data. `RawCapture` appends
+every received frame to a capture file in the .nfr format `nfr_reader`
+reads (18-byte records after a 20-byte header synthesised from the
+capture start), so `batch`, `replay` and `batch --redecode` can reprocess
+it at file speed like an SD-card log.
+
+  - One file per connect cycle, named LIVE_<yyyymmdd>_<hhmmss>.nfr after
+    its start (local time, like the car's RTC header). A file reaching
+    `max_bytes` is closed and the capture rotates to a new one with a
+    fresh header.
+  - Frame timestamps are the ones live mode stored, as milliseconds after
+    the header start, so a capture imports onto the same time axis. They
+    are clamped to never decrease, which keeps `frame_range` bisection
+    valid across wall-clock steps.
+  - Writes are append-only through a buffered file, flushed at least every
+    `flush_seconds` and on rotation / close; a crash loses at most that
+    much, and a torn last record is ignored by the reader.
+"""
+from __future__ import annotations
+
+import struct
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO
+
+from nfr_reader import FRAME_SIZE, HEADER_SIZE
+
+CAPTURE_MAX_BYTES = 256 * 1024 * 1024  # rotate after this much (~8 h at 500 Hz)
+FLUSH_SECONDS = 1.0
+BUFFER_BYTES = 64 * 1024
+PREFIX = "LIVE_"
+
+_FRAME = struct.Struct("<IIH8s")
+
+
+def nfr_header(start: datetime) -> bytes:
+    """The 20-byte .nfr header `nfr_reader.read_header` reads back as
+    `start` (to the millisecond)."""
+    local = start.astimezone()
+    return (
+        bytes(9)
+        + struct.pack("<BBBB", local.isoweekday() % 7, local.month, local.day, local.year - 2000)
+        + struct.pack(
+            "<BBBI", local.hour, local.minute, local.second, local.microsecond // 1000
+        )
+    )
+
+
+class RawCapture:
+    """Rotating, append-only .nfr writer for one live run."""
+
+    def __init__(
+        self,
+        directory: Path,
+        *,
+        max_bytes: int = CAPTURE_MAX_BYTES,
+        flush_seconds: float = FLUSH_SECONDS,
+    ) -> None:
+        if max_bytes < HEADER_SIZE + FRAME_SIZE:
+            raise ValueError("max_bytes must fit a header and one frame")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flush_seconds = flush_seconds
+        self.paths: list[Path] = []  # every file written, in order
+        self._file: BinaryIO | None = None
+        self._start: datetime | None = None
+        self._size = 0
+        self._last_ts_ms = 0
+        self._flushed_at = 0.0
+
+    def start(self, started_at: datetime) -> Path:
+        """Close any open file and begin a new one whose header is
+        `started_at`."""
+        self.close()
+        # The header holds whole milliseconds; offsets are taken from that.
+        start = started_at - timedelta(microseconds=started_at.microsecond % 1000)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = PREFIX + start.astimezone().strftime("%Y%m%d_%H%M%S")
+        path = self.directory / f"{stem}.nfr"
+        n = 1
+        while path.exists():
+            path = self.directory / f"{stem}_{n}.nfr"
+            n += 1
+        self._file = open(path, "xb", buffering=BUFFER_BYTES)
+        self._file.write(nfr_header(start))
+        self._start = start
+        self._size = HEADER_SIZE
+        self._last_ts_ms = 0
+        self._flushed_at = time.monotonic()
+        self.paths.append(path)
+        return path
+
+    def write(self, ts: datetime, frame_id: int, data: bytes) -> None:
+        """Append one frame received at `ts`. No-op outside start/close."""
+        if self._file is None:
+            return
+        if self._size + FRAME_SIZE > self.max_bytes:
+            self.start(ts)
+        ts_ms = (ts - self._start) // timedelta(milliseconds=1)
+        ts_ms = min(max(ts_ms, self._last_ts_ms), 0xFFFFFFFF)
+        self._last_ts_ms = ts_ms
+        data = data[:8]
+        self._file.write(_FRAME.pack(ts_ms, frame_id, len(data), data))
+        self._size += FRAME_SIZE
+        now = time.monotonic()
+        if now - self._flushed_at >= self.flush_seconds:
+            self._file.flush()
+            self._flushed_at = now
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> RawCapture:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -1,5 +1,12 @@
 import csv
-from signalSpec import SignalSpec, MessageSpec
+from pathlib import Path
+
+from derived import Expression, resolve_ref
+from events import KINDS
+from signalSpec import DerivedSpec, EventRule, SignalSpec, MessageSpec
+
+DERIVED_SUFFIX = ".derived.csv"
+EVENTS_SUFFIX = ".events.csv"
 
 
 def compile_csv(csv_path):
@@ -122,3 +129,111 @@ def _finalize_message(decode_table, frame_id, name, sender, signals):
     )
 
     decode_table[frame_id] = message
+
+
+def derived_path_for(csv_path):
+    """Sidecar holding derived-channel definitions for a DBC CSV."""
+    path = Path(csv_path)
+    return path.with_name(path.stem + DERIVED_SUFFIX)
+
+
+def compile_derived(csv_path, decode_table):
+    """
+    Load the derived-channel sidecar that sits next to a DBC CSV.
+
+    Returns:
+        list of DerivedSpec in file order (empty if there is no sidecar).
+
+    Every expression is parsed, and every signal it references must exist
+    in `decode_table` or be defined on an earlier row.
+    """
+
+    path = derived_path_for(csv_path)
+    if not path.is_file():
+        return []
+
+    known = {}
+    for msg in decode_table.values():
+        sender = msg.sender or msg.name or "unknown"
+        for sig in msg.signals:
+            known[(sender, sig.name)] = None
+
+    specs = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("Signal Name") or "").strip()
+            if not name:
+                continue
+            source = (row.get("Source") or "").strip() or "Derived"
+            expression = Expression(row["Expression"])
+            for ref in expression.refs:
+                if resolve_ref(ref, known) is None:
+                    raise ValueError(
+                        f"{path.name}: {name} references unknown signal {ref!r}"
+                    )
+            if (source, name) in known:
+                raise ValueError(f"{path.name}: {source}.{name} is already defined")
+            unit = (row.get("Unit") or "").strip() or None
+            specs.append(DerivedSpec(name=name, source=source, expression=expression, unit=unit))
+            known[(source, name)] = None
+
+    return specs
+
+
+def events_path_for(csv_path):
+    """Sidecar holding event-index rules for a DBC CSV."""
+    path = Path(csv_path)
+    return path.with_name(path.stem + EVENTS_SUFFIX)
+
+
+def compile_events(csv_path, decode_table, derived_specs=()):
+    """
+    Load the event-rule sidecar that sits next to a DBC CSV.
+
+    Returns:
+        list of EventRule in file order (empty if there is no sidecar).
+
+    Each rule must name a signal from `decode_table` or `derived_specs`,
+    a known kind, and a numeric Param where the kind needs one.
+    """
+
+    path = events_path_for(csv_path)
+    if not path.is_file():
+        return []
+
+    known = {}
+    for msg in decode_table.values():
+        sender = msg.sender or msg.name or "unknown"
+        for sig in msg.signals:
+            known[(sender, sig.name)] = None
+    for spec in derived_specs:
+        known[(spec.source, spec.name)] = None
+
+    rules = []
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            signal = (row.get("Signal") or "").strip()
+            if not signal:
+                continue
+            kind = (row.get("Kind") or "").strip().lower()
+            if kind not in KINDS:
+                raise ValueError(f"{path.name}:{line}: unknown kind {kind!r}")
+            if resolve_ref(signal, known) is None:
+                raise ValueError(f"{path.name}:{line}: unknown signal {signal!r}")
+
+            param = None
+            text = (row.get("Param") or "").strip()
+            if kind != "change":
+                if not text:
+                    raise ValueError(f"{path.name}:{line}: {kind} needs a Param")
+                param = float(text)
+                if kind == "bit" and (param != int(param) or not 0 <= param < 64):
+                    raise ValueError(f"{path.name}:{line}: bad bit index {text!r}")
+
+            hysteresis = float((row.get("Hysteresis") or "").strip() or 0)
+            if hysteresis < 0:
+                raise ValueError(f"{path.name}:{line}: Hysteresis must be >= 0")
+
+            rules.append(EventRule(signal, kind, param, hysteresis))
+
+    return rules
@@ -8,10 +8,21 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Iterable, Sequence
+from typing import TYPE_CHECKING, Iterable, Sequence
 from uuid import UUID
 
+import numpy as np
 import psycopg
+from psycopg.types.json import Jsonb
+
+from columns import from_epoch_us, rollup_1s, to_epoch_us
+from stats import SignalStats
+
+if TYPE_CHECKING:
+    from columns import SignalColumns
+    from events import SignalEvents
+    from lttb import LttbSeries
+    from segments import Segment
 
 
 @dataclass(frozen=True)
@@ -29,6 +40,41 @@ class Reading:
     value: float
 
 
+@dataclass(frozen=True)
+class ImportCheckpoint:
+    """How much of an .nfr file a session holds (see `append.py`)."""
+
+    session_id: UUID
+    header_sha256: str  # of the 20-byte header; the lookup key
+    prefix_bytes: int  # header + whole frames imported so far
+    fingerprint: str  # nfr_reader.prefix_fingerprint(file, prefix_bytes)
+    dbc_sha256: str
+    layout: str
+    last_ts_ms: int
+
+
+@dataclass(frozen=True)
+class ImportResume:
+    """How far an unfinished batch import got (see `batch.py`)."""
+
+    session_id: UUID
+    dbc_sha256: str
+    layout: str
+    frames_done: int  # frames whose readings are committed
+    rows_done: int
+    scan: dict | None = None  # batch.py's pass 1 over the whole file
+
+
+@dataclass(frozen=True)
+class SessionDecodeTable:
+    """The DBC snapshot a session was decoded with (see `dbc_diff.py`)."""
+
+    session_id: UUID
+    snapshot_sha256: str
+    snapshot: dict
+    layout: str
+
+
 def upsert_signal_definitions(
     conn: psycopg.Connection, defs: Sequence[SignalDef]
 ) -> dict[tuple[str, str], int]:
@@ -145,6 +191,9 @@ def end_session_and_flush(
                 "WHERE id = %s",
                 (session_id, session_id),
             )
+            cur.execute(
+                "SELECT populate_session_signal_stats(%s)", (session_id,)
+            )
     return moved
 
 
@@ -152,20 +201,28 @@ def copy_sd_readings(
     conn: psycopg.Connection,
     session_id: UUID,
     readings: Iterable[Reading],
+    *,
+    commit: bool = True,
+    table: str = "sd_readings",
 ) -> int:
     """Bulk-insert historical readings via COPY FROM STDIN.
 
     Returns the number of rows written. Intended for SD-import batch mode.
+    With commit=False the caller commits (e.g. together with a checkpoint).
+    `table="sd_readings_staging"` stages rows for a bulk load (`bulk.py`).
     """
+    if table not in ("sd_readings", "sd_readings_staging"):
+        raise ValueError(f"invalid table: {table!r}")
     count = 0
     with conn.cursor() as cur:
         with cur.copy(
-            "COPY sd_readings (ts, session_id, signal_id, value) FROM STDIN"
+            f"COPY {table} (ts, session_id, signal_id, value) FROM STDIN"
         ) as copy:
             for r in readings:
                 copy.write_row((r.ts, session_id, r.signal_id, r.value))
                 count += 1
-    conn.commit()
+    if commit:
+        conn.commit()
     return count
 
 
@@ -188,3 +245,380 @@ def copy_live_today(
                 count += 1
     conn.commit()
     return count
+
+
+def copy_sd_segments(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    segments: Iterable["Segment"],
+) -> int:
+    """Bulk-insert compressed per-signal segments (see `segments.py`).
+
+    Returns the number of segments written. Caller commits.
+    """
+    count = 0
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY sd_segments (session_id, signal_id, ts_start, ts_end, sample_n, "
+            "value_min, value_max, value_sum, value_codec, value_scale, "
+            "value_offset, ts_data, value_data) FROM STDIN"
+        ) as copy:
+            for s in segments:
+                copy.write_row(
+                    (
+                        session_id,
+                        s.signal_id,
+                        from_epoch_us(s.ts_start_us),
+                        from_epoch_us(s.ts_end_us),
+                        s.sample_n,
+                        s.value_min,
+                        s.value_max,
+                        s.value_sum,
+                        s.value_codec,
+                        s.value_scale,
+                        s.value_offset,
+                        s.ts_data,
+                        s.value_data,
+                    )
+                )
+                count += 1
+    return count
+
+
+def copy_sd_rollup(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    columns: "SignalColumns",
+) -> int:
+    """Write sd_rollup_1s rows computed in Python from decoded columns.
+
+    Used when a session has no sd_readings rows for `populate_sd_rollup` to
+    aggregate (segment-only layout). Caller deletes stale rows and commits.
+    """
+    count = 0
+    with conn.cursor() as cur:
+        with cur.copy(
+            "COPY sd_rollup_1s (session_id, signal_id, ts_bucket, "
+            "value_min, value_max, value_sum, sample_n) FROM STDIN"
+        ) as copy:
+            for signal_id, ts_us, values in columns.items():
+                buckets, vmin, vmax, vsum, n = rollup_1s(ts_us, values)
+                for i in range(buckets.size):
+                    copy.write_row(
+                        (
+                            session_id,
+                            signal_id,
+                            from_epoch_us(buckets[i]),
+                            float(vmin[i]),
+                            float(vmax[i]),
+                            float(vsum[i]),
+                            int(n[i]),
+                        )
+                    )
+                    count += 1
+    return count
+
+
+def write_session_signal_stats(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    stats: Sequence[SignalStats],
+) -> None:
+    """Replace a session's session_signal_stats rows and its denormalized
+    row_count / signal_count. Caller commits."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "DELETE FROM session_signal_stats WHERE session_id = %s",
+            (str(session_id),),
+        )
+        with cur.copy(
+            "COPY session_signal_stats (session_id, signal_id, sample_n, "
+            "value_min, value_max, value_mean, first_ts, last_ts, histogram) "
+            "FROM STDIN"
+        ) as copy:
+            for s in stats:
+                copy.write_row(
+                    (
+                        session_id,
+                        s.signal_id,
+                        s.sample_n,
+                        s.value_min,
+                        s.value_max,
+                        s.value_mean,
+                        from_epoch_us(s.first_ts_us),
+                        from_epoch_us(s.last_ts_us),
+                        s.histogram,
+                    )
+                )
+        cur.execute(
+            "UPDATE sessions SET row_count = %s, signal_count = %s WHERE id = %s",
+            (sum(s.sample_n for s in stats), len(stats), str(session_id)),
+        )
+
+
+def write_sd_lttb(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    series: Iterable["LttbSeries"],
+    *,
+    signal_ids: Sequence[int] | None = None,
+) -> int:
+    """Replace a session's sd_lttb overview rows (see `lttb.py`), or only
+    those of `signal_ids` when given.
+
+    Returns the number of rows written. Caller commits.
+    """
+    count = 0
+    with conn.cursor() as cur:
+        if signal_ids is None:
+            cur.execute("DELETE FROM sd_lttb WHERE session_id = %s", (str(session_id),))
+        else:
+            cur.execute(
+                "DELETE FROM sd_lttb WHERE session_id = %s AND signal_id = ANY(%s)",
+                (str(session_id), list(signal_ids)),
+            )
+        with cur.copy(
+            "COPY sd_lttb (session_id, signal_id, budget, ts_us, value) FROM STDIN"
+        ) as copy:
+            for s in series:
+                copy.write_row(
+                    (
+                        session_id,
+                        s.signal_id,
+                        s.budget,
+                        s.ts_us.tolist(),
+                        s.values.tolist(),
+                    )
+                )
+                count += 1
+    return count
+
+
+def write_session_events(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    events: Iterable["SignalEvents"],
+    signal_ids: dict[tuple[str, str], int],
+    *,
+    replace: bool = True,
+) -> int:
+    """Replace (or with replace=False, extend) a session's session_events
+    index (see `events.py`).
+
+    `signal_ids` maps each event's (source, signal_name) to its id.
+    Returns the number of rows written. Caller commits.
+    """
+    count = 0
+    with conn.cursor() as cur:
+        if replace:
+            cur.execute(
+                "DELETE FROM session_events WHERE session_id = %s", (str(session_id),)
+            )
+        with cur.copy(
+            "COPY session_events (session_id, ts, signal_id, kind, value) FROM STDIN"
+        ) as copy:
+            for e in events:
+                sig_id = signal_ids[e.key]
+                for t, v in zip(e.ts_us.tolist(), e.values.tolist()):
+                    copy.write_row(
+                        (session_id, from_epoch_us(t), sig_id, e.kind, v)
+                    )
+                    count += 1
+    return count
+
+
+def write_import_checkpoint(conn: psycopg.Connection, cp: ImportCheckpoint) -> None:
+    """Record (or move forward) a session's import checkpoint. Caller commits."""
+    conn.execute(
+        "INSERT INTO import_checkpoints (session_id, header_sha256, prefix_bytes, "
+        "fingerprint, dbc_sha256, layout, last_ts_ms) VALUES (%s, %s, %s, %s, %s, %s, %s) "
+        "ON CONFLICT (session_id) DO UPDATE SET header_sha256 = EXCLUDED.header_sha256, "
+        "prefix_bytes = EXCLUDED.prefix_bytes, "
+        "fingerprint = EXCLUDED.fingerprint, dbc_sha256 = EXCLUDED.dbc_sha256, "
+        "layout = EXCLUDED.layout, last_ts_ms = EXCLUDED.last_ts_ms, updated_at = now()",
+        (
+            str(cp.session_id),
+            cp.header_sha256,
+            cp.prefix_bytes,
+            cp.fingerprint,
+            cp.dbc_sha256,
+            cp.layout,
+            cp.last_ts_ms,
+        ),
+    )
+
+
+def find_import_checkpoints(
+    conn: psycopg.Connection, header_sha256: str, max_bytes: int
+) -> list[ImportCheckpoint]:
+    """Checkpoints of logs with this header that fit in `max_bytes`,
+    longest first."""
+    rows = conn.execute(
+        "SELECT session_id, header_sha256, prefix_bytes, fingerprint, dbc_sha256, "
+        "layout, last_ts_ms "
+        "FROM import_checkpoints WHERE header_sha256 = %s AND prefix_bytes <= %s "
+        "ORDER BY prefix_bytes DESC",
+        (header_sha256, max_bytes),
+    ).fetchall()
+    return [ImportCheckpoint(*row) for row in rows]
+
+
+def merge_sd_rollup(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    columns: "SignalColumns",
+) -> int:
+    """Fold newly decoded samples into a session's sd_rollup_1s.
+
+    Buckets the session already has (the second the previous import ended
+    in) are combined, not replaced. Returns the number of buckets written.
+    Caller commits.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS sd_rollup_1s_tail "
+            "(LIKE sd_rollup_1s) ON COMMIT DELETE ROWS"
+        )
+        with cur.copy(
+            "COPY sd_rollup_1s_tail (session_id, signal_id, ts_bucket, "
+            "value_min, value_max, value_sum, sample_n) FROM STDIN"
+        ) as copy:
+            for signal_id, ts_us, values in columns.items():
+                buckets, vmin, vmax, vsum, n = rollup_1s(ts_us, values)
+                for i in range(buckets.size):
+                    copy.write_row(
+                        (
+                            session_id,
+                            signal_id,
+                            from_epoch_us(buckets[i]),
+                            float(vmin[i]),
+                            float(vmax[i]),
+                            float(vsum[i]),
+                            int(n[i]),
+                        )
+                    )
+        cur.execute(
+            "INSERT INTO sd_rollup_1s AS r SELECT * FROM sd_rollup_1s_tail "
+            "ON CONFLICT (session_id, signal_id, ts_bucket) DO UPDATE SET "
+            "value_min = least(r.value_min, EXCLUDED.value_min), "
+            "value_max = greatest(r.value_max, EXCLUDED.value_max), "
+            "value_sum = r.value_sum + EXCLUDED.value_sum, "
+            "sample_n = r.sample_n + EXCLUDED.sample_n"
+        )
+        count = cur.rowcount or 0
+        cur.execute("DELETE FROM sd_rollup_1s_tail")
+    return count
+
+
+def read_session_signal_stats(
+    conn: psycopg.Connection, session_id: UUID
+) -> list[SignalStats]:
+    rows = conn.execute(
+        "SELECT signal_id, sample_n, value_min, value_max, value_mean, "
+        "first_ts, last_ts, histogram FROM session_signal_stats WHERE session_id = %s",
+        (str(session_id),),
+    ).fetchall()
+    return [
+        SignalStats(
+            signal_id=sid,
+            sample_n=int(n),
+            value_min=vmin,
+            value_max=vmax,
+            value_mean=mean,
+            first_ts_us=to_epoch_us(first),
+            last_ts_us=to_epoch_us(last),
+            histogram=list(hist),
+        )
+        for sid, n, vmin, vmax, mean, first, last, hist in rows
+    ]
+
+
+def read_sd_lttb(
+    conn: psycopg.Connection, session_id: UUID
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """Each signal's largest stored overview series as (ts_us, value)."""
+    rows = conn.execute(
+        "SELECT DISTINCT ON (signal_id) signal_id, ts_us, value FROM sd_lttb "
+        "WHERE session_id = %s ORDER BY signal_id, budget DESC",
+        (str(session_id),),
+    ).fetchall()
+    return {
+        sid: (np.array(ts, dtype=np.int64), np.array(values, dtype=np.float64))
+        for sid, ts, values in rows
+    }
+
+
+def write_session_decode_table(conn: psycopg.Connection, table: SessionDecodeTable) -> None:
+    """Record the DBC snapshot a session was decoded with. Caller commits."""
+    conn.execute(
+        "INSERT INTO session_decode_tables (session_id, snapshot_sha256, snapshot, layout) "
+        "VALUES (%s, %s, %s, %s) "
+        "ON CONFLICT (session_id) DO UPDATE SET snapshot_sha256 = EXCLUDED.snapshot_sha256, "
+        "snapshot = EXCLUDED.snapshot, layout = EXCLUDED.layout, updated_at = now()",
+        (str(table.session_id), table.snapshot_sha256, Jsonb(table.snapshot), table.layout),
+    )
+
+
+def read_session_decode_table(
+    conn: psycopg.Connection, session_id: UUID
+) -> SessionDecodeTable | None:
+    row = conn.execute(
+        "SELECT session_id, snapshot_sha256, snapshot, layout FROM session_decode_tables "
+        "WHERE session_id = %s",
+        (str(session_id),),
+    ).fetchone()
+    return None if row is None else SessionDecodeTable(*row)
+
+
+def delete_session_signals(
+    conn: psycopg.Connection, session_id: UUID, signal_ids: Sequence[int]
+) -> None:
+    """Drop everything a session stores for `signal_ids`: readings,
+    segments, rollup, stats, overview and events. Caller commits."""
+    with conn.cursor() as cur:
+        for table in (
+            "sd_readings",
+            "sd_segments",
+            "sd_rollup_1s",
+            "session_signal_stats",
+            "sd_lttb",
+            "session_events",
+        ):
+            cur.execute(
+                f"DELETE FROM {table} WHERE session_id = %s AND signal_id = ANY(%s)",
+                (str(session_id), list(signal_ids)),
+            )
+
+
+def write_import_resume(conn: psycopg.Connection, resume: ImportResume) -> None:
+    """Record (or move forward) an unfinished import. Caller commits."""
+    conn.execute(
+        "INSERT INTO import_resume "
+        "(session_id, dbc_sha256, layout, frames_done, rows_done, scan) "
+        "VALUES (%s, %s, %s, %s, %s, %s) "
+        "ON CONFLICT (session_id) DO UPDATE SET dbc_sha256 = EXCLUDED.dbc_sha256, "
+        "layout = EXCLUDED.layout, frames_done = EXCLUDED.frames_done, "
+        "rows_done = EXCLUDED.rows_done, scan = EXCLUDED.scan, updated_at = now()",
+        (
+            str(resume.session_id),
+            resume.dbc_sha256,
+            resume.layout,
+            resume.frames_done,
+            resume.rows_done,
+            None if resume.scan is None else Jsonb(resume.scan),
+        ),
+    )
+
+
+def read_import_resume(conn: psycopg.Connection, session_id: UUID) -> ImportResume | None:
+    row = conn.execute(
+        "SELECT session_id, dbc_sha256, layout, frames_done, rows_done, scan "
+        "FROM import_resume WHERE session_id = %s",
+        (str(session_id),),
+    ).fetchone()
+    return None if row is None else ImportResume(*row)
+
+
+def clear_import_resume(conn: psycopg.Connection, session_id: UUID) -> None:
+    """Mark a session's import finished. Caller commits."""
+    conn.execute("DELETE FROM import_resume WHERE session_id = %s", (str(session_id),))
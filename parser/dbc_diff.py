@@ -0,0 +1,149 @@
+"""Snapshots of a compiled DBC and the diff between two of them.
+
+Batch import stores, per session, a snapshot of what it decoded with: for
+every (source, signal) the frame IDs and bit layout / scale / offset that
+produce it, plus the derived channels and event rules. Re-decoding the
+session with a newer DBC (`redecode.py`) diffs the stored snapshot
+against the current one and rewrites only the signals whose values can
+have changed:
+
+    old = read_session_decode_table(conn, session_id).snapshot
+    diff = diff_snapshots(old, snapshot_dbc(table, derived, rules))
+    diff.decode    # re-decode these from the log
+    diff.derived   # recompute these derived channels
+    diff.removed   # drop these from the session
+
+A unit or description change is metadata only and never forces a
+re-decode.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Sequence
+
+from derived import resolve_ref
+from signalSpec import DerivedSpec, EventRule
+
+SNAPSHOT_VERSION = 1
+
+Key = tuple[str, str]
+
+
+def snapshot_dbc(
+    decode_table: dict,
+    derived_specs: Sequence[DerivedSpec] = (),
+    event_rules: Sequence[EventRule] = (),
+) -> dict:
+    """JSON-serialisable description of everything that determines a
+    session's decoded values."""
+    signals: dict[Key, dict] = {}
+    for frame_id in sorted(decode_table):
+        msg = decode_table[frame_id]
+        sender = msg.sender or msg.name or "unknown"
+        for sig in msg.signals:
+            entry = signals.setdefault(
+                (sender, sig.name), {"source": sender, "name": sig.name, "unit": "", "frames": []}
+            )
+            entry["unit"] = sig.unit or ""
+            entry["frames"].append(
+                {
+                    "frame_id": frame_id,
+                    "required_bytes": msg.required_bytes,
+                    "start_bit": sig.start_bit,
+                    "length": sig.length,
+                    "signed": bool(sig.signed),
+                    "is_float": bool(sig.is_float),
+                    "scale": sig.scale,
+                    "offset": sig.offset,
+                }
+            )
+    return {
+        "version": SNAPSHOT_VERSION,
+        "signals": [signals[k] for k in sorted(signals)],
+        "derived": [
+            {
+                "source": d.source,
+                "name": d.name,
+                "expression": d.expression.text,
+                "refs": list(d.expression.refs),
+                "unit": d.unit or "",
+            }
+            for d in sorted(derived_specs, key=lambda d: (d.source, d.name))
+        ],
+        "events": sorted([r.signal, r.label, r.hysteresis] for r in event_rules),
+    }
+
+
+def snapshot_sha256(snapshot: dict) -> str:
+    return hashlib.sha256(
+        json.dumps(snapshot, sort_keys=True, separators=(",", ":")).encode()
+    ).hexdigest()
+
+
+@dataclass(frozen=True)
+class DbcDiff:
+    decode: frozenset[Key]  # decoded signals that are new or decode differently
+    derived: frozenset[Key]  # derived channels that are new, changed, or read a changed input
+    events: frozenset[Key]  # signals whose event rules changed
+    removed: frozenset[Key]  # signals (decoded or derived) no longer defined
+
+    @property
+    def empty(self) -> bool:
+        return not (self.decode or self.derived or self.events or self.removed)
+
+    @property
+    def rewritten(self) -> frozenset[Key]:
+        """Signals whose stored samples are replaced."""
+        return self.decode | self.derived
+
+
+def diff_snapshots(old: dict, new: dict) -> DbcDiff:
+    """What changed between two `snapshot_dbc` results."""
+    if old.get("version") != new.get("version"):
+        # Unknown snapshot layout: treat every signal as changed.
+        old = {"signals": [], "derived": [], "events": []}
+    old_sig = {(s["source"], s["name"]): s["frames"] for s in old["signals"]}
+    new_sig = {(s["source"], s["name"]): s["frames"] for s in new["signals"]}
+    decode = {k for k, frames in new_sig.items() if old_sig.get(k) != frames}
+
+    old_der = {(d["source"], d["name"]): d["expression"] for d in old["derived"]}
+    new_der = {(d["source"], d["name"]): d["expression"] for d in new["derived"]}
+    # A derived channel changes with its expression or with any input; a
+    # chain of derived channels is followed until nothing more changes.
+    available = dict.fromkeys(list(new_sig) + list(new_der))
+    derived = {k for k, text in new_der.items() if old_der.get(k) != text}
+    changed = set(decode) | derived
+    refs = {(d["source"], d["name"]): d["refs"] for d in new["derived"]}
+    grew = True
+    while grew:
+        grew = False
+        for key, names in refs.items():
+            if key in derived:
+                continue
+            if any(resolve_ref(name, available) in changed for name in names):
+                derived.add(key)
+                changed.add(key)
+                grew = True
+
+    old_rules: dict[str, set] = {}
+    new_rules: dict[str, set] = {}
+    for rules, snap in ((old_rules, old), (new_rules, new)):
+        for signal, label, hysteresis in snap["events"]:
+            rules.setdefault(signal, set()).add((label, hysteresis))
+    events = set()
+    for ref in set(old_rules) | set(new_rules):
+        if old_rules.get(ref) != new_rules.get(ref):
+            key = resolve_ref(ref, available)
+            if key is not None:
+                events.add(key)
+
+    removed = (set(old_sig) | set(old_der)) - set(available)
+    return DbcDiff(
+        decode=frozenset(decode),
+        derived=frozenset(derived),
+        events=frozenset(events),
+        removed=frozenset(removed),
+    )
+
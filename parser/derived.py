@@ -0,0 +1,187 @@
+"""Derived channels: expressions over decoded signals, evaluated at import.
+
+Definitions live in a CSV sidecar next to the DBC (`NFR26DBC.derived.csv`
+for `NFR26DBC.csv`, see `compile.compile_derived`):
+
+    Source,Signal Name,Expression,Unit
+    Derived,Pack_Power,Battery_Voltage * Battery_Current,W
+    Derived,Cell_Spread,Max_Cell_Voltage - Min_Cell_Voltage,V
+
+Expressions may use numbers, + - * / ** %, unary minus, parentheses and
+abs() sqrt() min() max() mean() sum() (the last four elementwise across
+their arguments). Signals are referenced by bare name when it is a valid
+identifier and unambiguous, or in brackets as `[Source.Signal_Name]`
+(needed for sources like `Front-Right-Inverter`). Earlier rows can be
+referenced by later ones.
+
+Evaluation is vectorised over whole signals: the inputs are aligned on the
+union of their timestamps with zero-order hold, and the channel has one
+sample per input sample from the point where every input has a value.
+"""
+from __future__ import annotations
+
+import ast
+import re
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from signalSpec import DerivedSpec
+
+Samples = tuple[np.ndarray, np.ndarray]
+
+_BRACKET_REF = re.compile(r"\[([^\[\]]+)\]")
+_BIN_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.true_divide,
+    ast.Pow: np.power,
+    ast.Mod: np.mod,
+}
+_FUNCTIONS = {
+    "abs": (1, lambda args: np.abs(args[0])),
+    "sqrt": (1, lambda args: np.sqrt(args[0])),
+    "min": (None, lambda args: np.minimum.reduce(args)),
+    "max": (None, lambda args: np.maximum.reduce(args)),
+    "sum": (None, lambda args: np.add.reduce(args)),
+    "mean": (None, lambda args: np.add.reduce(args) / len(args)),
+}
+
+
+class Expression:
+    """A parsed, validated derived-channel expression."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.refs: list[str] = []
+        placeholders: dict[str, str] = {}
+
+        def bracket(match: re.Match[str]) -> str:
+            ref = match.group(1).strip()
+            name = placeholders.setdefault(ref, f"__ref{len(placeholders)}")
+            return name
+
+        source = _BRACKET_REF.sub(bracket, text)
+        try:
+            tree = ast.parse(source, mode="eval")
+        except SyntaxError as err:
+            raise ValueError(f"invalid expression {text!r}: {err.msg}") from None
+        by_placeholder = {v: k for k, v in placeholders.items()}
+        self._names: dict[str, str] = {}
+        self._check(tree.body, by_placeholder)
+        self._tree = tree.body
+
+    def _check(self, node: ast.AST, by_placeholder: Mapping[str, str]) -> None:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return
+        if isinstance(node, ast.Name):
+            ref = by_placeholder.get(node.id, node.id)
+            self._names[node.id] = ref
+            if ref not in self.refs:
+                self.refs.append(ref)
+            return
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+            self._check(node.left, by_placeholder)
+            self._check(node.right, by_placeholder)
+            return
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            self._check(node.operand, by_placeholder)
+            return
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in _FUNCTIONS
+            and not node.keywords
+            and node.args
+        ):
+            arity, _ = _FUNCTIONS[node.func.id]
+            if arity is not None and len(node.args) != arity:
+                raise ValueError(
+                    f"invalid expression {self.text!r}: "
+                    f"{node.func.id}() takes {arity} argument(s)"
+                )
+            for arg in node.args:
+                self._check(arg, by_placeholder)
+            return
+        raise ValueError(
+            f"invalid expression {self.text!r}: unsupported {type(node).__name__}"
+        )
+
+    def evaluate(self, inputs: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Evaluate over aligned arrays keyed by reference (as in `refs`)."""
+        with np.errstate(all="ignore"):
+            return np.asarray(self._eval(self._tree, inputs), dtype=np.float64)
+
+    def _eval(self, node: ast.AST, inputs: Mapping[str, np.ndarray]):
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return inputs[self._names[node.id]]
+        if isinstance(node, ast.BinOp):
+            return _BIN_OPS[type(node.op)](
+                self._eval(node.left, inputs), self._eval(node.right, inputs)
+            )
+        if isinstance(node, ast.UnaryOp):
+            value = self._eval(node.operand, inputs)
+            return -value if isinstance(node.op, ast.USub) else value
+        _, fn = _FUNCTIONS[node.func.id]
+        return fn([self._eval(arg, inputs) for arg in node.args])
+
+
+def align_zoh(inputs: Sequence[Samples]) -> tuple[np.ndarray, list[np.ndarray]]:
+    """Align signals on the union of their timestamps with zero-order hold,
+    starting where every input has a value."""
+    ts = np.unique(np.concatenate([s[0] for s in inputs]))
+    start = max(int(s[0][0]) for s in inputs)
+    ts = ts[ts >= start]
+    aligned = []
+    for s_ts, s_values in inputs:
+        idx = np.searchsorted(s_ts, ts, side="right") - 1
+        aligned.append(s_values[idx])
+    return ts, aligned
+
+
+def resolve_ref(ref: str, available: Mapping[tuple[str, str], Samples]) -> tuple[str, str] | None:
+    """Match "name" or "Source.name" against available (source, name) keys.
+
+    Returns None when the signal is not present; raises on ambiguity.
+    """
+    if "." in ref:
+        source, name = ref.rsplit(".", 1)
+        if (source, name) in available:
+            return (source, name)
+    matches = [key for key in available if key[1] == ref]
+    if len(matches) > 1:
+        raise ValueError(
+            f"derived channel reference {ref!r} is ambiguous; use [Source.{ref}]"
+        )
+    return matches[0] if matches else None
+
+
+def compute_derived(
+    specs: Sequence[DerivedSpec],
+    signals: Mapping[tuple[str, str], Samples],
+) -> dict[tuple[str, str], Samples]:
+    """Evaluate `specs` in order over ts-sorted `signals`.
+
+    Channels whose inputs are missing from this log are skipped. Results are
+    keyed by (source, signal_name) and are visible to later specs.
+    """
+    available = dict(signals)
+    out: dict[tuple[str, str], Samples] = {}
+    for spec in specs:
+        keys = [resolve_ref(ref, available) for ref in spec.expression.refs]
+        if any(k is None or available[k][0].size == 0 for k in keys):
+            continue
+        if keys:
+            ts, aligned = align_zoh([available[k] for k in keys])
+        else:
+            ts, aligned = np.empty(0, dtype=np.int64), []
+        if ts.size == 0:
+            continue
+        values = spec.expression.evaluate(dict(zip(spec.expression.refs, aligned)))
+        values = np.broadcast_to(values, ts.shape).astype(np.float64)
+        key = (spec.source, spec.name)
+        out[key] = available[key] = (ts, values)
+    return out
@@ -0,0 +1,99 @@
+"""Event / threshold index built by the batch importer.
+
+Rules live in a CSV sidecar next to the DBC (`NFR26DBC.events.csv` for
+`NFR26DBC.csv`, see `compile.compile_events`):
+
+    Signal,Kind,Param,Hysteresis
+    SOC,below,0.2,0.01
+    FR_Fault_Code,change,,
+    Overvoltage_Fault,bit,0,
+
+Kinds:
+  "below"  — value drops under Param. Re-arms once it is back at or above
+             Param + Hysteresis, so noise around the threshold fires once.
+  "above"  — value rises over Param; re-arms at or below Param - Hysteresis.
+  "change" — value differs from the previous sample (state machines,
+             fault codes).
+  "bit"    — bit number Param of the integer value goes from 0 to 1.
+
+Only transitions are events; a signal that starts out below a threshold
+does not fire until it has been above it. Signals are referenced as in
+derived channels ("name" or "Source.name") and derived channels can be
+used. Each event records the sample's timestamp and value, and lands in
+`session_events` where `list_session_events` reads it back by index.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Mapping, Sequence
+
+import numpy as np
+
+from derived import resolve_ref
+from signalSpec import EventRule
+
+KINDS = ("below", "above", "change", "bit")
+
+Samples = tuple[np.ndarray, np.ndarray]
+
+
+@dataclass(frozen=True)
+class SignalEvents:
+    key: tuple[str, str]  # (source, signal_name)
+    kind: str  # EventRule.label
+    ts_us: np.ndarray
+    values: np.ndarray
+
+
+def _rising(state: np.ndarray) -> np.ndarray:
+    """Indices i >= 1 where a 0/1 state goes 0 -> 1."""
+    return np.flatnonzero(state[1:] & ~state[:-1]) + 1
+
+
+def _latched(on: np.ndarray, off: np.ndarray) -> np.ndarray:
+    """Boolean state that turns on where `on`, off where `off`, and holds
+    otherwise (starting off). Vectorised forward fill."""
+    mark = on | off
+    last = np.where(mark, np.arange(on.size), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, on[np.maximum(last, 0)], False)
+
+
+def detect(rule: EventRule, ts_us: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Indices of the samples at which `rule` fires."""
+    if values.size < 2:
+        return np.empty(0, dtype=np.int64)
+    with np.errstate(invalid="ignore"):
+        if rule.kind == "change":
+            same = (values[1:] == values[:-1]) | (
+                np.isnan(values[1:]) & np.isnan(values[:-1])
+            )
+            return np.flatnonzero(~same) + 1
+        if rule.kind == "bit":
+            finite = np.isfinite(values)
+            raw = np.where(finite, values, 0).astype(np.int64)
+            return _rising(((raw >> int(rule.param)) & 1).astype(bool))
+        if rule.kind == "below":
+            on = values < rule.param
+            off = values >= rule.param + rule.hysteresis
+        else:
+            on = values > rule.param
+            off = values <= rule.param - rule.hysteresis
+    return _rising(_latched(on, off))
+
+
+def compute_events(
+    rules: Sequence[EventRule],
+    signals: Mapping[tuple[str, str], Samples],
+) -> list[SignalEvents]:
+    """Evaluate every rule whose signal is present; skips the rest."""
+    out: list[SignalEvents] = []
+    for rule in rules:
+        key = resolve_ref(rule.signal, signals)
+        if key is None:
+            continue
+        ts_us, values = signals[key]
+        idx = detect(rule, ts_us, values)
+        if idx.size:
+            out.append(SignalEvents(key, rule.label, ts_us[idx], values[idx]))
+    return out
@@ -0,0 +1,433 @@
+"""Export an .nfr log or a stored session to CSV or Parquet.
+
+Replaces the legacy `main.py` conversion (csv.writer row by row plus a
+`print` per decoded frame) with a streaming pipeline:
+
+  * .nfr input is read `CHUNK_FRAMES` frames at a time with
+    `nfr_reader.read_records` and decoded with `decode.decode_records`;
+  * a stored session is streamed out of Postgres one time window at a time:
+    each signal's readings come off the (session_id, signal_id, ts) index
+    with binary `COPY ... TO STDOUT` (sd_readings) or from its decoded
+    segments (sd_segments), and the sorted per-signal runs are merged into
+    timestamp order here;
+  * each chunk is formatted in bulk and written through a large buffer.
+
+Memory is bounded by one chunk regardless of log length. Progress is
+reported with `import_progress` (keyed by the output path); there is no
+per-frame console output.
+
+Formats:
+  "csv-long" — `timestamp,source,signal_name,value`, one row per reading.
+  "csv-wide" — `timestamp,<source.signal_name>...`, one row per distinct
+               timestamp; a cell is empty when that signal has no sample at
+               that timestamp.
+  "parquet"  — the long layout as ZSTD Parquet (needs pyarrow), one row
+               group per chunk.
+
+Rows are in timestamp order. Timestamps are UTC ISO-8601 with microseconds.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, TextIO
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from columns import US_PER_SECOND, from_epoch_us, to_epoch_us
+from compile import compile_csv
+from decode import decode_records
+from nfr_reader import frame_count, read_header, read_records
+from protocol import ProtocolEmitter
+from segments import SEGMENT_SECONDS, read_segment_window
+from sessions_io import PG_EPOCH_OFFSET_US, iter_copy_records
+
+FORMATS = ("csv-long", "csv-wide", "parquet")
+CHUNK_FRAMES = 1 << 18
+CHUNK_ROWS = 1 << 20
+WRITE_BUFFER = 1 << 20
+PROGRESS_STEP_PCT = 5
+
+# One (timestamptz, float8) tuple of a binary COPY.
+_SAMPLE_DTYPE = np.dtype(
+    [
+        ("nfields", ">i2"),
+        ("ts_len", ">i4"),
+        ("ts", ">i8"),
+        ("value_len", ">i4"),
+        ("value", ">f8"),
+    ]
+)
+
+
+@dataclass
+class _Chunk:
+    ts_us: np.ndarray  # int64, non-decreasing
+    column: np.ndarray  # int64 index into the stream's labels
+    values: np.ndarray  # float64
+    pct: float  # progress after this chunk
+
+
+@dataclass
+class _Stream:
+    labels: list[tuple[str, str]]  # column index -> (source, signal_name)
+    chunks: Iterator[_Chunk]
+
+
+def _sorted_chunk(
+    ts_parts: list[np.ndarray],
+    col_parts: list[np.ndarray],
+    value_parts: list[np.ndarray],
+    pct: float,
+) -> _Chunk:
+    ts_us = np.concatenate(ts_parts)
+    column = np.concatenate(col_parts)
+    values = np.concatenate(value_parts)
+    order = np.lexsort((column, ts_us))
+    return _Chunk(ts_us[order], column[order], values[order], pct)
+
+
+def _merged_chunk(
+    runs: list[tuple[int, np.ndarray, np.ndarray]], pct: float
+) -> _Chunk:
+    """Merge per-signal (column, ts_us, values) runs, each sorted by time and
+    listed in column order, into one chunk ordered by (ts, column)."""
+    ts_us = np.concatenate([r[1] for r in runs])
+    column = np.concatenate(
+        [np.full(r[1].size, r[0], dtype=np.int64) for r in runs]
+    )
+    values = np.concatenate([r[2] for r in runs])
+    # A stable sort over pre-sorted runs is a run merge, and keeps equal
+    # timestamps in column order.
+    order = np.argsort(ts_us, kind="stable")
+    return _Chunk(ts_us[order], column[order], values[order], pct)
+
+
+# ---- sources ---------------------------------------------------------------
+
+def _nfr_stream(nfr_file: Path, dbc_csv: Path, chunk_frames: int) -> _Stream:
+    decode_table = compile_csv(str(dbc_csv))
+    start_us = to_epoch_us(read_header(nfr_file).start_time)
+    total = frame_count(nfr_file)
+
+    # Cheap pre-pass over the id/dlc columns only, so the label set (and the
+    # wide header) lists just the signals the log actually contains.
+    present: set[int] = set()
+    for lo in range(0, total, chunk_frames):
+        recs = read_records(nfr_file, lo, lo + chunk_frames)
+        for frame_id in np.unique(recs["frame_id"]).tolist():
+            msg = decode_table.get(frame_id)
+            if msg is None or frame_id in present:
+                continue
+            mask = recs["frame_id"] == frame_id
+            if np.any(recs["dlc"][mask] >= msg.required_bytes):
+                present.add(frame_id)
+
+    index: dict[tuple[str, str], int] = {}
+    column_of: dict[tuple[int, str], int] = {}
+    for frame_id in sorted(present):
+        msg = decode_table[frame_id]
+        sender = msg.sender or msg.name or "unknown"
+        for sig in msg.signals:
+            key = (sender, sig.name)
+            column_of[(frame_id, sig.name)] = index.setdefault(key, len(index))
+    labels = sorted(index, key=index.__getitem__)
+
+    def chunks() -> Iterator[_Chunk]:
+        for lo in range(0, total, chunk_frames):
+            recs = read_records(nfr_file, lo, lo + chunk_frames)
+            decoded = decode_records(recs, decode_table)
+            ts_parts, col_parts, value_parts = [], [], []
+            for frame_id, (ts_ms, values) in decoded.items():
+                ts_us = start_us + ts_ms * 1000
+                for name, column in values.items():
+                    ts_parts.append(ts_us)
+                    col_parts.append(
+                        np.full(ts_us.size, column_of[(frame_id, name)], dtype=np.int64)
+                    )
+                    value_parts.append(column)
+            pct = 100 * min(lo + chunk_frames, total) / max(total, 1)
+            if ts_parts:
+                yield _sorted_chunk(ts_parts, col_parts, value_parts, pct)
+
+    return _Stream(labels=labels, chunks=chunks())
+
+
+def _session_stream(
+    conn: psycopg.Connection, session_id: UUID, chunk_rows: int
+) -> _Stream:
+    sid = str(session_id)
+    signal_rows = conn.execute(
+        "SELECT g.signal_id, d.source, d.signal_name "
+        "FROM get_session_signal_ids(%s) g "
+        "JOIN signal_definitions d ON d.id = g.signal_id "
+        "ORDER BY d.source, d.signal_name",
+        (sid,),
+    ).fetchall()
+    if not signal_rows:
+        raise ValueError(f"session {session_id} has no readings")
+    labels = [(src, name) for _id, src, name in signal_rows]
+    row = conn.execute(
+        "SELECT row_count FROM sessions WHERE id = %s", (sid,)
+    ).fetchone()
+    expected = int(row[0]) if row is not None and row[0] else None
+    has_rows = conn.execute(
+        "SELECT EXISTS (SELECT 1 FROM sd_readings WHERE session_id = %s)", (sid,)
+    ).fetchone()[0]
+    # Column index -> signal_id, in label order, so per-signal runs
+    # concatenate already sorted by column.
+    by_column = [int(r[0]) for r in signal_rows]
+
+    def windows(lo_us: int, hi_us: int, step: int) -> Iterator[tuple[int, float]]:
+        window = lo_us
+        while window <= hi_us:
+            nxt = window + step
+            yield window, 100 * min(nxt - lo_us, hi_us - lo_us) / max(hi_us - lo_us, 1)
+            window = nxt
+
+    def from_rows() -> Iterator[_Chunk]:
+        # Each signal is read in ts order off sd_readings_lookup_idx
+        # (session_id, signal_id, ts) one time window at a time, and the
+        # sorted runs are merged here; a session-wide ORDER BY ts would make
+        # the server sort every reading first.
+        first, last = conn.execute(
+            "SELECT min(b.lo), max(b.hi) FROM unnest(%s::int[]) AS s(id), "
+            "LATERAL (SELECT min(ts) AS lo, max(ts) AS hi FROM sd_readings "
+            "WHERE session_id = %s AND signal_id = s.id) b",
+            (by_column, sid),
+        ).fetchone()
+        if expected is None:
+            total = conn.execute(
+                "SELECT count(*) FROM sd_readings WHERE session_id = %s", (sid,)
+            ).fetchone()[0]
+        else:
+            total = expected
+        lo_us, hi_us = to_epoch_us(first), to_epoch_us(last)
+        # Size windows to hold about `chunk_rows` readings on average.
+        step = max(1, (hi_us - lo_us + 1) * chunk_rows // max(total, 1))
+        query = (
+            "COPY (SELECT ts, value FROM sd_readings WHERE session_id = %s "
+            "AND signal_id = %s AND ts >= %s AND ts < %s ORDER BY ts) "
+            "TO STDOUT (FORMAT BINARY)"
+        )
+        for window, pct in windows(lo_us, hi_us, step):
+            bounds = (from_epoch_us(window), from_epoch_us(window + step))
+            runs = []
+            for column, signal_id in enumerate(by_column):
+                for recs in iter_copy_records(
+                    conn, query, (sid, signal_id, *bounds), _SAMPLE_DTYPE,
+                    chunk_rows=chunk_rows,
+                ):
+                    runs.append(
+                        (
+                            column,
+                            recs["ts"].astype(np.int64) + PG_EPOCH_OFFSET_US,
+                            recs["value"].astype(np.float64),
+                        )
+                    )
+            if runs:
+                yield _merged_chunk(runs, pct)
+
+    def from_segments() -> Iterator[_Chunk]:
+        first, last = conn.execute(
+            "SELECT min(ts_start), max(ts_end) FROM sd_segments WHERE session_id = %s",
+            (sid,),
+        ).fetchone()
+        if first is None:
+            return
+        step = SEGMENT_SECONDS * US_PER_SECOND
+        lo_us = to_epoch_us(first) // step * step
+        hi_us = to_epoch_us(last)
+        for window, pct in windows(lo_us, hi_us, step):
+            data = read_segment_window(
+                conn, session_id, by_column,
+                start=from_epoch_us(window), end=from_epoch_us(window + step),
+            )
+            runs = [
+                (column, *data[signal_id])
+                for column, signal_id in enumerate(by_column)
+                if data[signal_id][0].size
+            ]
+            if runs:
+                yield _merged_chunk(runs, pct)
+
+    return _Stream(labels=labels, chunks=from_rows() if has_rows else from_segments())
+
+
+# ---- writers ---------------------------------------------------------------
+
+def _csv_field(text: str) -> str:
+    if any(c in text for c in ',"\n\r'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def _iso(ts_us: np.ndarray) -> list[str]:
+    return [
+        s + "Z"
+        for s in np.datetime_as_string(ts_us.astype("datetime64[us]"), unit="us").tolist()
+    ]
+
+
+def _write_csv_long(out: TextIO, stream: _Stream, progress) -> int:
+    prefixes = [f"{_csv_field(src)},{_csv_field(name)}," for src, name in stream.labels]
+    out.write("timestamp,source,signal_name,value\n")
+    rows = 0
+    for chunk in stream.chunks:
+        ts = _iso(chunk.ts_us)
+        out.write(
+            "".join(
+                f"{t},{prefixes[c]}{v!r}\n"
+                for t, c, v in zip(ts, chunk.column.tolist(), chunk.values.tolist())
+            )
+        )
+        rows += chunk.ts_us.size
+        progress(chunk.pct)
+    return rows
+
+
+def _write_csv_wide(out: TextIO, stream: _Stream, progress) -> int:
+    width = len(stream.labels)
+    out.write(
+        ",".join(
+            ["timestamp"] + [_csv_field(f"{src}.{name}") for src, name in stream.labels]
+        )
+        + "\n"
+    )
+    rows = 0
+    # Readings sharing the last timestamp of a chunk may continue in the next
+    # one, so that tail is held back and folded into the following chunk.
+    carry: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+
+    def emit(ts_us: np.ndarray, column: np.ndarray, values: np.ndarray) -> int:
+        # Later readings of the same signal at the same timestamp win.
+        keep = np.ones(ts_us.size, dtype=bool)
+        keep[:-1] = (ts_us[1:] != ts_us[:-1]) | (column[1:] != column[:-1])
+        ts_us, column, values = ts_us[keep], column[keep], values[keep]
+        # Rows are written sparsely: each reading is prefixed with the commas
+        # that skip the empty cells since the previous one in its row, so the
+        # work is per reading rather than per timestamp x signal.
+        starts = np.flatnonzero(np.r_[True, ts_us[1:] != ts_us[:-1]])
+        ends = np.r_[starts[1:], ts_us.size]
+        prev = np.r_[-1, column[:-1]]
+        prev[starts] = -1
+        cells = [
+            "," * gap + repr(v)
+            for gap, v in zip((column - prev).tolist(), values.tolist())
+        ]
+        pads = (width - 1 - column[ends - 1]).tolist()
+        out.write(
+            "".join(
+                t + "".join(cells[lo:hi]) + "," * pad + "\n"
+                for t, lo, hi, pad in zip(
+                    _iso(ts_us[starts]), starts.tolist(), ends.tolist(), pads
+                )
+            )
+        )
+        return starts.size
+
+    for chunk in stream.chunks:
+        ts_us, column, values = chunk.ts_us, chunk.column, chunk.values
+        if carry is not None:
+            ts_us = np.concatenate([carry[0], ts_us])
+            column = np.concatenate([carry[1], column])
+            values = np.concatenate([carry[2], values])
+        cut = int(np.searchsorted(ts_us, ts_us[-1], side="left"))
+        carry = (ts_us[cut:], column[cut:], values[cut:])
+        if cut:
+            rows += emit(ts_us[:cut], column[:cut], values[:cut])
+        progress(chunk.pct)
+    if carry is not None:
+        rows += emit(*carry)
+    return rows
+
+
+def _write_parquet(out_path: Path, stream: _Stream, progress) -> int:
+    # Imported lazily: pyarrow is an optional dependency.
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            pa.field("timestamp", pa.timestamp("us", tz="UTC")),
+            pa.field("source", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("signal_name", pa.dictionary(pa.int32(), pa.string())),
+            pa.field("value", pa.float64()),
+        ]
+    )
+    sources = pa.array([src for src, _ in stream.labels], type=pa.string())
+    names = pa.array([name for _, name in stream.labels], type=pa.string())
+    rows = 0
+    with pq.ParquetWriter(out_path, schema, compression="zstd") as writer:
+        for chunk in stream.chunks:
+            column = pa.array(chunk.column.astype(np.int32))
+            writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(chunk.ts_us, type=schema.field("timestamp").type),
+                        pa.DictionaryArray.from_arrays(column, sources),
+                        pa.DictionaryArray.from_arrays(column, names),
+                        pa.array(chunk.values, type=pa.float64()),
+                    ],
+                    schema=schema,
+                )
+            )
+            rows += chunk.ts_us.size
+            progress(chunk.pct)
+    return rows
+
+
+def run_export(
+    *,
+    out_path: Path,
+    fmt: str,
+    emitter: ProtocolEmitter,
+    nfr_file: Path | None = None,
+    dbc_csv: Path | None = None,
+    dsn: str | None = None,
+    session_id: UUID | None = None,
+    chunk_frames: int = CHUNK_FRAMES,
+    chunk_rows: int = CHUNK_ROWS,
+) -> int:
+    """Export one .nfr (`nfr_file` + `dbc_csv`) or one stored session
+    (`dsn` + `session_id`) to `out_path`. Returns the number of rows written
+    (readings for the long formats, timestamps for csv-wide)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"invalid format: {fmt!r}")
+    if (nfr_file is None) == (session_id is None):
+        raise ValueError("export needs exactly one of nfr_file or session_id")
+
+    label = str(out_path)
+    next_progress = PROGRESS_STEP_PCT
+
+    def progress(pct: float) -> None:
+        nonlocal next_progress
+        if pct >= next_progress and pct < 100:
+            emitter.import_progress(label, pct=pct)
+            next_progress = (int(pct) // PROGRESS_STEP_PCT + 1) * PROGRESS_STEP_PCT
+
+    def write(stream: _Stream) -> int:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == "parquet":
+            return _write_parquet(out_path, stream, progress)
+        with open(out_path, "w", newline="", encoding="utf-8", buffering=WRITE_BUFFER) as out:
+            if fmt == "csv-long":
+                return _write_csv_long(out, stream, progress)
+            return _write_csv_wide(out, stream, progress)
+
+    emitter.import_progress(label, pct=0)
+    if nfr_file is not None:
+        if dbc_csv is None:
+            raise ValueError("exporting an .nfr file needs dbc_csv")
+        if not nfr_file.is_file():
+            raise FileNotFoundError(nfr_file)
+        rows = write(_nfr_stream(nfr_file, dbc_csv, chunk_frames))
+    else:
+        if dsn is None:
+            raise ValueError("exporting a session needs dsn")
+        with psycopg.connect(dsn) as conn:
+            rows = write(_session_stream(conn, session_id, chunk_rows))
+    emitter.import_progress(label, pct=100)
+    return rows
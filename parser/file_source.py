@@ -5,18 +5,30 @@ stack without a basestation. Speed controls the playback rate:
   - speed == 1.0  → real time (frames emerge at their recorded cadence)
   - speed == 10.0 → 10x faster than real time
   - speed == 0.0  → no delay (flood as fast as possible; good for CI smoke)
+
+`from_ms` / `to_ms` replay only that slice of the log (see
+`nfr_reader.iter_frames_between`); pacing starts at the first frame played.
+`frame_ids` replays only those CAN IDs, read through the log's
+per-frame-ID index (`nfr_index.py`).
 """
 from __future__ import annotations
 
 import time
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 
 from live import SourceEvent
-from nfr_reader import iter_frames
+from nfr_index import iter_selected_frames
+from nfr_reader import iter_frames_between
 
 
-def file_events(path: Path, speed: float = 1.0) -> Iterator[SourceEvent]:
+def file_events(
+    path: Path,
+    speed: float = 1.0,
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    frame_ids: Iterable[int] | None = None,
+) -> Iterator[SourceEvent]:
     if speed < 0:
         raise ValueError(f"speed must be >= 0, got {speed!r}")
 
@@ -25,7 +37,11 @@ def file_events(path: Path, speed: float = 1.0) -> Iterator[SourceEvent]:
     wall_start = time.monotonic()
     first_ts_ms: int | None = None
 
-    for ts_ms, frame_id, data in iter_frames(path):
+    if frame_ids is None:
+        frames = iter_frames_between(path, from_ms, to_ms)
+    else:
+        frames = iter_selected_frames(path, frame_ids, from_ms, to_ms)
+    for ts_ms, frame_id, data in frames:
         if speed > 0:
             if first_ts_ms is None:
                 first_ts_ms = ts_ms
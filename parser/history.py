@@ -0,0 +1,244 @@
+"""In-process live history: recent samples per signal, served over a socket.
+
+Every refresh of a live graph used to query `live_today` in Postgres
+(`/api/live/window`, up to 100k rows in raw mode). With `history_socket=`
+`run_live` also keeps the last `samples` readings of each signal in a
+preallocated NumPy ring buffer and answers window queries from memory on
+a Unix domain socket, so the short live windows never touch the disk.
+
+Protocol: newline-delimited JSON, one reply line per request line; a
+connection may send any number of requests.
+
+    {"ids": [1, 2], "start": "<iso>", "end": "<iso>", "bucket": 1.0}
+    {"ids": [1, 2], "start": "<iso>", "end": "<iso>", "raw": true}
+
+    {"covered_from": "<iso>", "rows": [{"ts", "signal_id", "signal_name",
+     "unit", "value_min", "value_max", "value_avg", "sample_n"}, ...]}
+    {"error": "<message>"}
+
+Rows have the shape `get_live_today_window` returns (raw mode: one row
+per sample, value_min = value_max = value_avg, sample_n = 1, at most
+RAW_ROW_CAP rows), ordered by ts. `covered_from` is the earliest time
+from which the buffers hold every sample of the requested signals; a
+client falls back to Postgres for windows starting before it.
+"""
+from __future__ import annotations
+
+import json
+import socket
+import socketserver
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+
+from columns import from_epoch_us, to_epoch_us
+
+HISTORY_SAMPLES = 32_768  # per signal: 5 min at ~100 Hz, 512 KiB
+RAW_ROW_CAP = 100_000
+
+
+class _Ring:
+    __slots__ = ("ts", "values", "head", "size", "last_ts")
+
+    def __init__(self, capacity: int) -> None:
+        self.ts = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.head = 0
+        self.size = 0
+        self.last_ts = None
+
+    def push(self, ts_us: int, value: float) -> None:
+        # Keep ts sorted for searchsorted, even across wall-clock steps.
+        if self.last_ts is not None and ts_us < self.last_ts:
+            ts_us = self.last_ts
+        self.ts[self.head] = ts_us
+        self.values[self.head] = value
+        self.last_ts = ts_us
+        self.head = (self.head + 1) % self.ts.size
+        if self.size < self.ts.size:
+            self.size += 1
+
+    @property
+    def oldest(self) -> int | None:
+        """Timestamp of the oldest retained sample once samples have been
+        overwritten; None while the ring still holds everything."""
+        return int(self.ts[self.head]) if self.size == self.ts.size else None
+
+    def between(self, start_us: int, end_us: int) -> tuple[np.ndarray, np.ndarray]:
+        """Copies of the samples with start_us <= ts < end_us, in order."""
+        if self.size < self.ts.size:
+            spans = [(0, self.size)]
+        else:
+            spans = [(self.head, self.ts.size), (0, self.head)]
+        ts_parts, value_parts = [], []
+        for a, b in spans:
+            ts = self.ts[a:b]
+            i, j = np.searchsorted(ts, [start_us, end_us])
+            ts_parts.append(ts[i:j].copy())
+            value_parts.append(self.values[a + i : a + j].copy())
+        return np.concatenate(ts_parts), np.concatenate(value_parts)
+
+
+def _iso(ts_us: int) -> str:
+    return from_epoch_us(ts_us).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _parse_ts(text: str) -> int:
+    ts = datetime.fromisoformat(text)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return to_epoch_us(ts)
+
+
+class LiveHistory:
+    """Ring buffers of the newest `samples` readings of each signal.
+
+    `signals` maps signal_id to (signal_name, unit). Buffers are allocated
+    on a signal's first sample; appends and queries may come from
+    different threads.
+    """
+
+    def __init__(
+        self,
+        signals: Mapping[int, tuple[str, str]],
+        *,
+        samples: int = HISTORY_SAMPLES,
+        started_us: int | None = None,
+    ) -> None:
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+        self.signals = dict(signals)
+        self.samples = samples
+        if started_us is None:
+            started_us = to_epoch_us(datetime.now(timezone.utc))
+        self.started_us = started_us
+        self._rings: dict[int, _Ring] = {}
+        self._lock = threading.Lock()
+
+    def append(self, signal_id: int, ts_us: int, value: float) -> None:
+        ring = self._rings.get(signal_id)
+        with self._lock:
+            if ring is None:
+                if signal_id not in self.signals:
+                    return
+                ring = self._rings[signal_id] = _Ring(self.samples)
+            ring.push(ts_us, value)
+
+    def window(
+        self,
+        signal_ids: list[int],
+        start_us: int,
+        end_us: int,
+        bucket_secs: float | None = None,
+    ) -> dict[str, Any]:
+        """Rows for [start_us, end_us), bucketed like
+        `get_live_today_window`, or raw when `bucket_secs` is None."""
+        ids = [sid for sid in dict.fromkeys(signal_ids) if sid in self.signals]
+        with self._lock:
+            rings = [(sid, self._rings[sid]) for sid in ids if sid in self._rings]
+            samples = {sid: ring.between(start_us, end_us) for sid, ring in rings}
+            oldest = [ring.oldest for _, ring in rings]
+        covered_from = max([self.started_us] + [t for t in oldest if t is not None])
+
+        rows: list[dict] = []
+        if bucket_secs is None:
+            if samples:
+                # Merge by time and cap before building any dicts.
+                ts = np.concatenate([t for t, _ in samples.values()])
+                values = np.concatenate([v for _, v in samples.values()])
+                sids = np.concatenate(
+                    [np.full(t.size, sid) for sid, (t, _) in samples.items()]
+                )
+                order = np.argsort(ts, kind="stable")[:RAW_ROW_CAP]
+                for t, sid, v in zip(
+                    ts[order].tolist(), sids[order].tolist(), values[order].tolist()
+                ):
+                    name, unit = self.signals[sid]
+                    rows.append(
+                        {"ts": t, "signal_id": sid, "signal_name": name, "unit": unit,
+                         "value_min": v, "value_max": v, "value_avg": v, "sample_n": 1}
+                    )
+        else:
+            bucket_us = max(1, round(bucket_secs * 1_000_000))
+            for sid, (ts, values) in samples.items():
+                if not ts.size:
+                    continue
+                name, unit = self.signals[sid]
+                keys, starts = np.unique(ts // bucket_us, return_index=True)
+                counts = np.diff(np.append(starts, ts.size))
+                sums = np.add.reduceat(values, starts)
+                for key, lo, hi, total, n in zip(
+                    (keys * bucket_us).tolist(),
+                    np.minimum.reduceat(values, starts).tolist(),
+                    np.maximum.reduceat(values, starts).tolist(),
+                    sums.tolist(),
+                    counts.tolist(),
+                ):
+                    rows.append(
+                        {"ts": key, "signal_id": sid, "signal_name": name, "unit": unit,
+                         "value_min": lo, "value_max": hi, "value_avg": total / n,
+                         "sample_n": n}
+                    )
+            rows.sort(key=lambda r: r["ts"])
+        for row in rows:
+            row["ts"] = _iso(row["ts"])
+        return {"covered_from": _iso(covered_from), "rows": rows}
+
+    def handle(self, request: Mapping[str, Any]) -> dict[str, Any]:
+        """Answer one protocol request (see the module docstring)."""
+        ids = [int(i) for i in request["ids"]]
+        start_us = _parse_ts(request["start"])
+        end_us = _parse_ts(request["end"])
+        if request.get("raw"):
+            return self.window(ids, start_us, end_us)
+        bucket = float(request.get("bucket") or 0)
+        if not bucket > 0:
+            raise ValueError("bucket must be > 0 unless raw is set")
+        return self.window(ids, start_us, end_us, bucket)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        history: LiveHistory = self.server.history  # type: ignore[attr-defined]
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                reply = history.handle(json.loads(line))
+            except (ValueError, KeyError, TypeError) as err:
+                reply = {"error": str(err) or type(err).__name__}
+            self.wfile.write(json.dumps(reply, separators=(",", ":")).encode() + b"\n")
+            self.wfile.flush()
+
+
+class HistoryServer:
+    """Serves a `LiveHistory` on a Unix domain socket at `path` from a
+    background thread until closed."""
+
+    def __init__(self, path: Path, history: LiveHistory) -> None:
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("the history socket needs Unix domain sockets")
+        self.path = path
+        path.unlink(missing_ok=True)
+        self._server = socketserver.ThreadingUnixStreamServer(str(path), _Handler)
+        self._server.daemon_threads = True
+        self._server.history = history  # type: ignore[attr-defined]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="history-socket", daemon=True
+        )
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> HistoryServer:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
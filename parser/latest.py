@@ -0,0 +1,174 @@
+"""Shared-memory latest-value table for live mode.
+
+Numeric and gauge widgets only need the newest value of each signal.
+With `latest_path=` `run_live` keeps that value in a memory-mapped file
+any local process can read directly, without following the JSON stream.
+
+Layout (little-endian, fixed for the life of the file):
+
+  header, HEADER_SIZE = 32 bytes
+    [0..7]    magic b"NFRLATES"
+    [8..11]   version (uint32, = 1)
+    [12..15]  slot_count (uint32)
+    [16..19]  slot_size (uint32, = 24)
+    [20..23]  writer state (uint32): 1 while live mode runs, 0 after
+    [24..31]  writer pid (uint64)
+  slot i (for signal_id i) at HEADER_SIZE + i * SLOT_SIZE
+    [0..7]    seq   (uint64) even = stable, odd = being written, 0 = never
+    [8..15]   ts_us (int64, microseconds since the Unix epoch)
+    [16..23]  value (float64)
+
+Seqlock protocol: the single writer bumps `seq` to odd, writes ts_us and
+value, then bumps it to the next even number. A reader reads `seq`, the
+data, and `seq` again, and keeps the data only if both reads are the same
+even number; otherwise it retries. `seq // 2` counts updates of the slot.
+
+The writer creates a new file for every run and renames it over `path`,
+so a reader never sees a half-initialised table; `LatestReader.stale`
+tells a reader to reopen after live mode restarted.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b"NFRLATES"
+VERSION = 1
+HEADER_SIZE = 32
+SLOT_SIZE = 24
+READ_RETRIES = 100
+
+_HEADER = struct.Struct("<8sIIIIQ")
+_SEQ = struct.Struct("<Q")
+_DATA = struct.Struct("<qd")
+_STATE_OFFSET = 20
+SLOT_DTYPE = np.dtype([("seq", "<u8"), ("ts_us", "<i8"), ("value", "<f8")])
+
+
+class LatestWriter:
+    """The live process's side of the table."""
+
+    def __init__(self, path: Path, slot_count: int) -> None:
+        self.path = path
+        self.slot_count = slot_count
+        size = HEADER_SIZE + slot_count * SLOT_SIZE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            os.ftruncate(fd, size)
+            self._mm = mmap.mmap(fd, size)
+            self._mm[:HEADER_SIZE] = _HEADER.pack(
+                MAGIC, VERSION, slot_count, SLOT_SIZE, 1, os.getpid()
+            )
+            os.replace(tmp, path)
+        except BaseException:
+            os.close(fd)
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        os.close(fd)
+        self._seq = [0] * slot_count
+
+    def update(self, signal_id: int, ts_us: int, value: float) -> None:
+        """Publish the newest sample of `signal_id`; ids beyond the table
+        (defined after it was sized) are ignored."""
+        if not 0 <= signal_id < self.slot_count:
+            return
+        offset = HEADER_SIZE + signal_id * SLOT_SIZE
+        seq = self._seq[signal_id]
+        _SEQ.pack_into(self._mm, offset, seq + 1)
+        _DATA.pack_into(self._mm, offset + 8, ts_us, value)
+        _SEQ.pack_into(self._mm, offset, seq + 2)
+        self._seq[signal_id] = seq + 2
+
+    def close(self) -> None:
+        """Mark the writer gone; the last values stay readable."""
+        if not self._mm.closed:
+            struct.pack_into("<I", self._mm, _STATE_OFFSET, 0)
+            self._mm.close()
+
+    def __enter__(self) -> LatestWriter:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+class LatestReader:
+    """Read-only view of a table written by `LatestWriter`.
+
+        reader = LatestReader(Path("/tmp/nfr-latest.bin"))
+        reader.read(42)        # (ts_us, value, seq) or None
+        reader.snapshot()      # {signal_id: (ts_us, value, seq)}
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._inode = os.fstat(f.fileno()).st_ino
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, slot_count, slot_size, _state, _pid = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or slot_size != SLOT_SIZE:
+            self._mm.close()
+            raise ValueError(f"{path}: not a version {VERSION} latest-value table")
+        self.slot_count = slot_count
+        self._slots = np.frombuffer(
+            self._mm, dtype=SLOT_DTYPE, count=slot_count, offset=HEADER_SIZE
+        )
+
+    @property
+    def writer_active(self) -> bool:
+        return struct.unpack_from("<I", self._mm, _STATE_OFFSET)[0] == 1
+
+    @property
+    def stale(self) -> bool:
+        """True once a newer run has replaced the file at `path`."""
+        try:
+            return os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            return True
+
+    def read(self, signal_id: int) -> tuple[int, float, int] | None:
+        """Consistent (ts_us, value, seq) of one signal, or None if it has
+        never been written."""
+        if not 0 <= signal_id < self.slot_count:
+            return None
+        offset = HEADER_SIZE + signal_id * SLOT_SIZE
+        for _ in range(READ_RETRIES):
+            (before,) = _SEQ.unpack_from(self._mm, offset)
+            ts_us, value = _DATA.unpack_from(self._mm, offset + 8)
+            (after,) = _SEQ.unpack_from(self._mm, offset)
+            if before == after and before % 2 == 0:
+                return (ts_us, value, before) if before else None
+        raise TimeoutError(f"signal {signal_id}: no consistent read")
+
+    def snapshot(self) -> dict[int, tuple[int, float, int]]:
+        """Every written slot, read together with one vectorised pass (and
+        per-slot retries for the few caught mid-write)."""
+        before = self._slots["seq"].copy()
+        data = self._slots[["ts_us", "value"]].copy()
+        after = self._slots["seq"].copy()
+        out = {}
+        for sid in np.flatnonzero(after).tolist():
+            if before[sid] == after[sid] and after[sid] % 2 == 0:
+                out[sid] = (int(data["ts_us"][sid]), float(data["value"][sid]), int(after[sid]))
+            else:
+                sample = self.read(sid)
+                if sample is not None:
+                    out[sid] = sample
+        return out
+
+    def close(self) -> None:
+        # The NumPy view must go before the map can close.
+        del self._slots
+        self._mm.close()
+
+    def __enter__(self) -> LatestReader:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -1,19 +1,33 @@
 """Live mode: consume frames from a source and maintain one session per
 connect/disconnect cycle.
 
+With `capture_dir=` every received frame is also appended, undecoded, to
+a rotating .nfr capture file (see `capture.py`), so live data can later be
+imported or re-decoded like an SD-card log. With `latest_path=` the
+newest value of every signal is also published in a memory-mapped table
+for gauge readers (see `latest.py`). With `history_socket=` recent
+samples are kept in memory and served to live graphs (see `history.py`).
+With `subscriptions=` only the signals the UI displays are emitted, and
+with `db_signals="subscribed"` only those are decoded and stored (see
+`subscriptions.py`); with the default `db_signals="all"` every frame is
+still decoded in full, so decode CPU does not shrink with the selection.
+
 The source is an iterable of `SourceEvent` objects. The real serial runner
 (wired up in `__main__.py`) converts a pyserial port and a reconnect loop
 into this sequence; tests feed synthetic events.
 """
 from __future__ import annotations
 
+from contextlib import ExitStack
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping
 
 import psycopg
 
+from capture import CAPTURE_MAX_BYTES, RawCapture
+from columns import to_epoch_us
 from compile import compile_csv
 from db import (
     Reading,
@@ -25,7 +39,10 @@ from db import (
     upsert_signal_definitions,
 )
 from decode import decode_frame
+from history import HISTORY_SAMPLES, HistoryServer, LiveHistory
+from latest import LatestWriter
 from protocol import ProtocolEmitter
+from subscriptions import DB_SIGNALS, Subscriptions, plan_for
 
 BATCH_SIZE = 50
 # Safety cap on rows per outbound `frames` event. In practice we flush after
@@ -37,7 +54,7 @@ PROTOCOL_BATCH_ROWS = 100
 
 @dataclass(frozen=True)
 class SourceEvent:
-    kind: str   # "connected" | "disconnected" | "frame" | "signal_quality"
+    kind: str   # "connected" | "disconnected" | "frame" | "signal_quality" | "serial_stats"
     port: str | None = None
     ts_ms: int | None = None
     frame_id: int | None = None
@@ -47,6 +64,9 @@ class SourceEvent:
     # forwarded to the UI for diagnostic display.
     rssi: int | None = None
     snr: float | None = None
+    # Populated only for kind="serial_stats": reader-thread throughput
+    # counters (see serial_source.SerialReader).
+    stats: Mapping[str, float] | None = None
 
 
 @dataclass(frozen=True)
@@ -76,15 +96,50 @@ def run_live(
     emitter: ProtocolEmitter,
     connect_time: datetime | None = None,
     streaming_only: bool = False,
+    capture_dir: Path | None = None,
+    capture_max_bytes: int = CAPTURE_MAX_BYTES,
+    latest_path: Path | None = None,
+    history_socket: Path | None = None,
+    history_samples: int = HISTORY_SAMPLES,
+    subscriptions: Subscriptions | None = None,
+    db_signals: str = "all",
 ) -> RunSummary:
+    if db_signals not in DB_SIGNALS:
+        raise ValueError(f"invalid db_signals: {db_signals!r}")
     decode_table = compile_csv(str(dbc_csv))
     defs, sender_lookup = _make_sig_lookups(decode_table)
+    capture = (
+        RawCapture(capture_dir, max_bytes=capture_max_bytes) if capture_dir else None
+    )
 
     sessions_closed = 0
     rows_written = 0
 
-    with psycopg.connect(dsn) as conn:
+    with psycopg.connect(dsn) as conn, ExitStack() as resources:
+        if capture is not None:
+            resources.enter_context(capture)
         sig_id_map = upsert_signal_definitions(conn, defs)
+        latest = None
+        if latest_path is not None:
+            latest = resources.enter_context(
+                LatestWriter(latest_path, max(sig_id_map.values(), default=-1) + 1)
+            )
+        history = None
+        if history_socket is not None:
+            history = LiveHistory(
+                {sig_id_map[(d.source, d.signal_name)]: (d.signal_name, d.unit) for d in defs},
+                samples=history_samples,
+            )
+            resources.enter_context(HistoryServer(history_socket, history))
+        key_ids = {
+            key: sig_id_map[(sender, key[1])]
+            for key, sender in sender_lookup.items()
+            if (sender, key[1]) in sig_id_map
+        }
+        # Rebuilt whenever the subscription changes; see subscriptions.py.
+        plan_version = 0
+        selected: frozenset[int] | None = None
+        plan = decode_table
 
         active_session = None  # UUID | None
         # Separate boolean for "connection is live, process frames" so that
@@ -118,6 +173,8 @@ def run_live(
             if evt.kind == "connected":
                 emitter.serial_status("connected", port=evt.port)
                 session_start = connect_time or datetime.now(timezone.utc)
+                if capture is not None:
+                    capture.start(session_start)
                 if streaming_only:
                     # No session in streaming-only mode; mark the link as
                     # active so downstream frame handling proceeds while
@@ -132,9 +189,6 @@ def run_live(
             elif evt.kind == "frame":
                 if active_session is None and not connection_active:
                     continue
-                decoded = decode_frame(evt.frame_id, evt.data, decode_table)
-                if not decoded:
-                    continue
                 # In streaming_only (serial-live) mode evt.ts_ms is the car's
                 # internal CAN-bus timestamp (e.g. milliseconds since ECU
                 # power-on). Adding it to session_start produces timestamps
@@ -151,6 +205,23 @@ def run_live(
                     ts = (session_start or datetime.now(timezone.utc)) + timedelta(
                         milliseconds=evt.ts_ms or 0
                     )
+                if capture is not None:
+                    # Before decoding: frames the DBC doesn't know yet are
+                    # exactly the ones a later re-decode may need.
+                    capture.write(ts, evt.frame_id, evt.data or b"")
+                if subscriptions is not None and subscriptions.state[0] != plan_version:
+                    plan_version, selected = subscriptions.state
+                    # With db_signals="all" the database (and the latest and
+                    # history tables) take every signal, so the full table
+                    # is decoded and only the emit below is filtered.
+                    if db_signals == "subscribed":
+                        plan = plan_for(decode_table, key_ids, selected)
+                decoded = decode_frame(evt.frame_id, evt.data, plan)
+                if not decoded:
+                    continue
+                ts_us = 0
+                if latest is not None or history is not None:
+                    ts_us = to_epoch_us(ts)
                 for signal_name, value in decoded.items():
                     sender = sender_lookup.get(
                         (evt.frame_id, signal_name), "unknown"
@@ -161,9 +232,14 @@ def run_live(
                     rt_batch.append(
                         Reading(ts=ts, signal_id=sig_id, value=float(value))
                     )
-                    out_rows.append(
-                        {"ts": ts, "signal_id": sig_id, "value": float(value)}
-                    )
+                    if selected is None or sig_id in selected:
+                        out_rows.append(
+                            {"ts": ts, "signal_id": sig_id, "value": float(value)}
+                        )
+                    if latest is not None:
+                        latest.update(sig_id, ts_us, float(value))
+                    if history is not None:
+                        history.append(sig_id, ts_us, float(value))
                     rows_written += 1
                     if len(rt_batch) >= BATCH_SIZE:
                         _flush_rt()
@@ -175,7 +251,12 @@ def run_live(
                 _flush_out()
 
             elif evt.kind == "signal_quality":
-                emitter.signal_quality(rssi=evt.rssi or 0, snr=float(evt.snr or 0.0))
+                emitter.signal_quality(
+                    rssi=evt.rssi or 0, snr=float(evt.snr or 0.0), port=evt.port
+                )
+
+            elif evt.kind == "serial_stats":
+                emitter.serial_stats(port=evt.port, stats=evt.stats or {})
 
             elif evt.kind == "disconnected":
                 _flush_rt()
@@ -186,6 +267,8 @@ def run_live(
                     sessions_closed += 1
                 active_session = None
                 connection_active = False
+                if capture is not None:
+                    capture.close()
                 emitter.serial_status("disconnected")
                 session_start = None
 
@@ -0,0 +1,136 @@
+"""Largest-Triangle-Three-Buckets overview series, computed at import.
+
+The replay "ALL" view of a multi-hour session only needs a few thousand
+visually faithful points per signal. The batch importer reduces every
+signal to each budget in `LTTB_BUDGETS` and stores the result in `sd_lttb`,
+so `get_signals_overview` answers in time proportional to the budget, not
+the session length.
+
+LTTB keeps the first and last samples and, for each of `budget - 2` equal
+count buckets, the sample forming the largest triangle with the previously
+kept sample and the mean of the next bucket. That choice is sequential
+within a signal, so instead of looping per signal, `lttb_many` walks the
+buckets once for all signals together: bucket i of every signal sits in
+one contiguous slice, and each step is a handful of NumPy calls over it.
+
+Non-finite values are dropped before reduction. A signal with no more
+samples than a budget is stored whole at that budget and not at larger
+ones (the overview query falls back to the largest stored budget).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from columns import SignalColumns
+
+# Keep in sync with get_signals_overview callers (desktop db/signals.ts).
+LTTB_BUDGETS = (800, 2000, 10000)
+
+
+@dataclass(frozen=True)
+class LttbSeries:
+    signal_id: int
+    budget: int
+    ts_us: np.ndarray
+    values: np.ndarray
+
+
+def lttb_many(
+    series: Sequence[tuple[np.ndarray, np.ndarray]], n_out: int
+) -> list[np.ndarray]:
+    """Indices of the LTTB-selected samples of each (x, y) series.
+
+    `x` must be non-decreasing; every series must have more than `n_out`
+    samples (shorter ones need no reduction).
+    """
+    if n_out < 3:
+        raise ValueError("n_out must be at least 3")
+    k = len(series)
+    if k == 0:
+        return []
+    m = n_out - 2  # buckets between the fixed first and last samples
+    sizes = np.array([x.size for x, _ in series], dtype=np.int64)
+    if np.any(sizes <= n_out):
+        raise ValueError("every series must be longer than n_out")
+
+    # lo[s, i]: first index of bucket i in series s; buckets cover 1..n-2.
+    # Integer arithmetic so the last bucket always ends exactly at n-1.
+    lo = np.arange(m + 1)[None, :] * (sizes - 2)[:, None] // m + 1
+    counts = np.diff(lo, axis=1)  # (k, m), all >= 1 since n > n_out
+
+    # Lay out all inner samples bucket-major, series-minor: bucket i of
+    # every series is then one contiguous run starting at offsets[i, s].
+    offsets = np.concatenate([[0], np.cumsum(counts.T.ravel())])[:-1].reshape(m, k)
+    total = int(counts.sum())
+    xs = np.empty(total)
+    ys = np.empty(total)
+    src = np.empty(total, dtype=np.int64)  # index within its own series
+    owner = np.empty(total, dtype=np.int64)
+    next_x = np.empty((k, m))
+    next_y = np.empty((k, m))
+    first_x = np.empty(k)
+    first_y = np.empty(k)
+    for s, (x, y) in enumerate(series):
+        x = np.asarray(x, dtype=np.float64) - float(x[0])
+        y = np.asarray(y, dtype=np.float64)
+        n = x.size
+        inner = np.arange(1, n - 1)
+        bucket = np.repeat(np.arange(m), counts[s])
+        pos = offsets[bucket, s] + (inner - lo[s, bucket])
+        xs[pos], ys[pos], src[pos], owner[pos] = x[1:-1], y[1:-1], inner, s
+        mean_x = np.add.reduceat(x[1:-1], lo[s, :-1] - 1) / counts[s]
+        mean_y = np.add.reduceat(y[1:-1], lo[s, :-1] - 1) / counts[s]
+        # The "next bucket" of the last bucket is the final sample.
+        next_x[s, :-1], next_x[s, -1] = mean_x[1:], x[-1]
+        next_y[s, :-1], next_y[s, -1] = mean_y[1:], y[-1]
+        first_x[s], first_y[s] = x[0], y[0]
+
+    chosen = np.empty((k, m), dtype=np.int64)
+    ax, ay = first_x, first_y
+    for i in range(m):
+        start = offsets[i, 0]
+        stop = offsets[i + 1, 0] if i + 1 < m else total
+        seg = offsets[i] - start
+        who = owner[start:stop]
+        bx, by = xs[start:stop], ys[start:stop]
+        pax, pay = ax[who], ay[who]
+        area = np.abs(
+            (pax - next_x[who, i]) * (by - pay) - (pax - bx) * (next_y[who, i] - pay)
+        )
+        best = np.maximum.reduceat(area, seg)
+        hits = np.flatnonzero(area == best[who])
+        pick = hits[np.searchsorted(hits, seg)] + start
+        chosen[:, i] = src[pick]
+        ax, ay = xs[pick], ys[pick]
+
+    return [
+        np.concatenate([[0], chosen[s], [sizes[s] - 1]]) for s in range(k)
+    ]
+
+
+def compute_lttb(
+    columns: SignalColumns, budgets: Sequence[int] = LTTB_BUDGETS
+) -> list[LttbSeries]:
+    finite: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+    for signal_id, ts_us, values in columns.items():
+        keep = np.isfinite(values)
+        if not keep.all():
+            ts_us, values = ts_us[keep], values[keep]
+        if ts_us.size:
+            finite[signal_id] = (ts_us, values)
+
+    out: list[LttbSeries] = []
+    remaining = dict(finite)
+    for budget in sorted(budgets):
+        reduce_ids = [sid for sid, (ts, _) in remaining.items() if ts.size > budget]
+        for sid in [sid for sid in remaining if sid not in reduce_ids]:
+            ts_us, values = remaining.pop(sid)
+            out.append(LttbSeries(sid, budget, ts_us, values))
+        picked = lttb_many([remaining[sid] for sid in reduce_ids], budget)
+        for sid, idx in zip(reduce_ids, picked):
+            ts_us, values = remaining[sid]
+            out.append(LttbSeries(sid, budget, ts_us[idx], values[idx]))
+    return out
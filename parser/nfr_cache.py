@@ -0,0 +1,145 @@
+"""Offline .nfr → per-signal NumPy arrays, cached next to the log.
+
+For analysis scripts that want a log's signals without importing it into
+Postgres:
+
+    from nfr_cache import load_nfr_arrays
+    arrays = load_nfr_arrays(Path("LOG_0012.NFR"), Path("NFR26DBC.csv"))
+    ts_us, bus_v = arrays["PDM.bus_v"]
+
+The first call reads the whole file with one `np.fromfile` and decodes each
+message with `decode.decode_records` (vectorised, same values as
+`decode_frame`), then saves the result as `<log>.npz` beside the log. Later
+calls load the .npz directly. The cache records sha256 of the log and of
+the DBC CSV it was decoded with; if either changes it is rebuilt.
+
+Keys are "source.signal_name" with the same source naming the batch
+importer uses for signal_definitions. Timestamps are int64 microseconds
+since the Unix epoch (header start time + frame ts_ms), values float64.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from columns import to_epoch_us
+from compile import compile_csv
+from decode import decode_records
+from nfr_reader import read_header, read_records
+
+# Bump when the on-disk layout or decode semantics change so stale caches
+# are rebuilt rather than misread.
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".npz"
+
+SignalArrays = dict[str, tuple[np.ndarray, np.ndarray]]
+
+
+def cache_path_for(nfr_file: Path) -> Path:
+    return nfr_file.with_name(nfr_file.name + CACHE_SUFFIX)
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(nfr_file: Path, dbc_csv: Path) -> str:
+    return f"v{CACHE_VERSION}:{_sha256(nfr_file)}:{_sha256(dbc_csv)}"
+
+
+def decode_nfr_arrays(nfr_file: Path, dbc_csv: Path) -> SignalArrays:
+    """Decode the whole log into {"source.signal_name": (ts_us, values)}."""
+    decode_table = compile_csv(str(dbc_csv))
+    start_us = to_epoch_us(read_header(nfr_file).start_time)
+    decoded = decode_records(read_records(nfr_file), decode_table)
+
+    parts: dict[str, list[tuple[np.ndarray, np.ndarray]]] = {}
+    for frame_id, (ts_ms, values) in decoded.items():
+        msg = decode_table[frame_id]
+        sender = msg.sender or msg.name or "unknown"
+        ts_us = start_us + ts_ms * 1000
+        for name, column in values.items():
+            parts.setdefault(f"{sender}.{name}", []).append((ts_us, column))
+
+    out: SignalArrays = {}
+    for key, chunks in parts.items():
+        if len(chunks) == 1:
+            ts_us, column = chunks[0]
+        else:
+            # Same (source, name) carried by several frame IDs: merge in
+            # time order, file order breaking ties.
+            ts_us = np.concatenate([c[0] for c in chunks])
+            column = np.concatenate([c[1] for c in chunks])
+            order = np.argsort(ts_us, kind="stable")
+            ts_us, column = ts_us[order], column[order]
+        out[key] = (ts_us, column)
+    return out
+
+
+def _read_cache(path: Path, key: str) -> SignalArrays | None:
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            if str(npz["__key__"]) != key:
+                return None
+            names = [str(n) for n in npz["__names__"]]
+            return {
+                name: (npz[f"ts_{i}"], npz[f"v_{i}"]) for i, name in enumerate(names)
+            }
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_cache(path: Path, key: str, arrays: SignalArrays) -> None:
+    names = sorted(arrays)
+    payload: dict[str, np.ndarray] = {
+        "__key__": np.array(key),
+        "__names__": np.array(names, dtype=np.str_),
+    }
+    for i, name in enumerate(names):
+        payload[f"ts_{i}"], payload[f"v_{i}"] = arrays[name]
+    # Write then rename so a concurrent reader never sees a partial file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **payload)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def load_nfr_arrays(
+    nfr_file: Path,
+    dbc_csv: Path,
+    *,
+    cache_path: Path | None = None,
+    rebuild: bool = False,
+) -> SignalArrays:
+    """Per-signal arrays for `nfr_file`, from the cache when it is current.
+
+    A log on a read-only mount (e.g. the SD card itself) still decodes; the
+    cache is just not written.
+    """
+    if not nfr_file.is_file():
+        raise FileNotFoundError(nfr_file)
+    path = cache_path or cache_path_for(nfr_file)
+    key = cache_key(nfr_file, dbc_csv)
+    if not rebuild and path.is_file():
+        cached = _read_cache(path, key)
+        if cached is not None:
+            return cached
+
+    arrays = decode_nfr_arrays(nfr_file, dbc_csv)
+    try:
+        _write_cache(path, key, arrays)
+    except OSError:
+        pass
+    return arrays
@@ -0,0 +1,261 @@
+"""Per-frame-ID record index for .nfr logs, cached next to the log.
+
+Importing or replaying only the BMS or IMU messages of a long log should
+not mean reading every frame. `load_index` builds, once, the list of frame
+positions for each CAN ID and saves it as `<log>.idx.npz`; afterwards
+`iter_selected_frames` reads just the frames of the requested IDs (through
+a memory map, so the OS only pages in the parts of the file they sit in).
+
+Building streams the file once in CHUNK_FRAMES blocks and is vectorised:
+each block's frame_id column is stably sorted and split per ID. The index
+is keyed on the log's size and mtime (a log is written once on the car, so
+that is enough to notice it was replaced) and costs 4 bytes per frame.
+
+Filters name messages ("BMS_Status", "0x152") or signals ("SOC",
+"BMS.SOC"); see `resolve_filter`.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from nfr_reader import (
+    FRAME_DTYPE,
+    HEADER_SIZE,
+    frame_count,
+    frame_range,
+    last_ts_ms,
+    read_records,
+    resolve_bounds,
+)
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx.npz"
+CHUNK_FRAMES = 1 << 20
+
+
+@dataclass(frozen=True)
+class NfrIndex:
+    frame_ids: np.ndarray  # sorted unique CAN IDs (uint32)
+    bounds: np.ndarray  # positions of frame_ids[i] are positions[bounds[i]:bounds[i+1]]
+    positions: np.ndarray  # frame indices grouped by ID, ascending within each (uint32)
+
+    def positions_for(self, frame_ids: Iterable[int]) -> np.ndarray:
+        """Ascending frame indices of every frame with one of `frame_ids`."""
+        wanted = np.array(sorted(set(frame_ids)), dtype=np.int64)
+        at = np.searchsorted(self.frame_ids, wanted)
+        found = at < self.frame_ids.size
+        found[found] = self.frame_ids[at[found]] == wanted[found]
+        at = at[found]
+        parts = [self.positions[self.bounds[i] : self.bounds[i + 1]] for i in at]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(parts)).astype(np.int64)
+
+    def count(self, frame_id: int) -> int:
+        i = int(np.searchsorted(self.frame_ids, frame_id))
+        if i == self.frame_ids.size or self.frame_ids[i] != frame_id:
+            return 0
+        return int(self.bounds[i + 1] - self.bounds[i])
+
+
+def index_path_for(nfr_file: Path) -> Path:
+    return nfr_file.with_name(nfr_file.name + INDEX_SUFFIX)
+
+
+def index_key(nfr_file: Path) -> str:
+    st = os.stat(nfr_file)
+    return f"v{INDEX_VERSION}:{st.st_size}:{st.st_mtime_ns}"
+
+
+def build_index(nfr_file: Path, chunk_frames: int = CHUNK_FRAMES) -> NfrIndex:
+    """Scan the log once and group frame positions by CAN ID."""
+    groups: dict[int, list[np.ndarray]] = {}
+    total = frame_count(nfr_file)
+    for base in range(0, total, chunk_frames):
+        ids = read_records(nfr_file, base, base + chunk_frames)["frame_id"]
+        order = np.argsort(ids, kind="stable")
+        unique, starts = np.unique(ids[order], return_index=True)
+        for fid, run in zip(unique.tolist(), np.split(order, starts[1:])):
+            groups.setdefault(fid, []).append((run + base).astype(np.uint32))
+
+    frame_ids = np.array(sorted(groups), dtype=np.uint32)
+    runs = [np.concatenate(groups[fid]) for fid in frame_ids.tolist()]
+    bounds = np.zeros(len(runs) + 1, dtype=np.int64)
+    np.cumsum([r.size for r in runs], out=bounds[1:])
+    positions = np.concatenate(runs) if runs else np.empty(0, dtype=np.uint32)
+    return NfrIndex(frame_ids, bounds, positions)
+
+
+def _read_index(path: Path, key: str) -> NfrIndex | None:
+    try:
+        with np.load(path, allow_pickle=False) as npz:
+            if str(npz["__key__"]) != key:
+                return None
+            return NfrIndex(npz["frame_ids"], npz["bounds"], npz["positions"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _write_index(path: Path, key: str, index: NfrIndex) -> None:
+    # Write then rename so a concurrent reader never sees a partial file.
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f,
+                __key__=np.array(key),
+                frame_ids=index.frame_ids,
+                bounds=index.bounds,
+                positions=index.positions,
+            )
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def load_index(
+    nfr_file: Path, *, index_path: Path | None = None, rebuild: bool = False
+) -> NfrIndex:
+    """The log's index, from the sidecar when it is current.
+
+    A log on a read-only mount still gets an (unsaved) index.
+    """
+    if not nfr_file.is_file():
+        raise FileNotFoundError(nfr_file)
+    path = index_path or index_path_for(nfr_file)
+    key = index_key(nfr_file)
+    if not rebuild and path.is_file():
+        cached = _read_index(path, key)
+        if cached is not None:
+            return cached
+    index = build_index(nfr_file)
+    try:
+        _write_index(path, key, index)
+    except OSError:
+        pass
+    return index
+
+
+@dataclass(frozen=True)
+class FrameFilter:
+    frame_ids: frozenset[int]
+    # (frame_id, signal_name) pairs to keep; None keeps every signal of
+    # the selected messages.
+    signals: frozenset[tuple[int, str]] | None
+
+    def keeps(self, frame_id: int, signal_name: str) -> bool:
+        return self.signals is None or (frame_id, signal_name) in self.signals
+
+    @property
+    def key(self) -> str:
+        """Canonical text form, for deriving session ids."""
+        if self.signals is None:
+            return ",".join(f"{fid:x}" for fid in sorted(self.frame_ids))
+        return ",".join(f"{fid:x}.{name}" for fid, name in sorted(self.signals))
+
+
+def resolve_filter(decode_table: dict, names: Iterable[str]) -> FrameFilter:
+    """Resolve message names, frame IDs ("0x152" or "338"), signal names or
+    "Source.signal" names against a compiled DBC.
+
+    A message keeps all of its signals; if any name is a signal, only the
+    named signals (plus every signal of named messages) are kept.
+    """
+    signals: set[tuple[int, str]] = set()
+    whole: set[int] = set()
+    for name in names:
+        matched = False
+        try:
+            fid = int(name, 0)
+        except ValueError:
+            fid = None
+        for msg in decode_table.values():
+            sender = msg.sender or msg.name or "unknown"
+            if msg.frame_id == fid or msg.name == name:
+                whole.add(msg.frame_id)
+                matched = True
+                continue
+            for sig in msg.signals:
+                if name in (sig.name, f"{sender}.{sig.name}"):
+                    signals.add((msg.frame_id, sig.name))
+                    matched = True
+        if not matched:
+            raise ValueError(f"{name!r} matches no message or signal in the DBC")
+    frame_ids = whole | {fid for fid, _ in signals}
+    if not signals:
+        return FrameFilter(frozenset(frame_ids), None)
+    for fid in whole:
+        signals.update((fid, sig.name) for sig in decode_table[fid].signals)
+    return FrameFilter(frozenset(frame_ids), frozenset(signals))
+
+
+def read_selected_records(
+    nfr_file: Path, frame_ids: Iterable[int], *, index: NfrIndex | None = None
+) -> np.ndarray:
+    """Every frame with one of `frame_ids` as one structured array (in file
+    order), for the vectorised `decode.decode_records`."""
+    if index is None:
+        index = load_index(nfr_file)
+    positions = index.positions_for(frame_ids)
+    if positions.size == 0:
+        return np.empty(0, dtype=FRAME_DTYPE)
+    records = np.memmap(
+        nfr_file, dtype=FRAME_DTYPE, mode="r", offset=HEADER_SIZE,
+        shape=(frame_count(nfr_file),),
+    )
+    return np.asarray(records[positions])
+
+
+def iter_selected_frames(
+    nfr_file: Path,
+    frame_ids: Iterable[int],
+    from_ms: int | None = None,
+    to_ms: int | None = None,
+    *,
+    index: NfrIndex | None = None,
+    chunk_frames: int = CHUNK_FRAMES,
+) -> Iterator[tuple[int, int, bytes]]:
+    """Frames with one of `frame_ids` (and from_ms <= ts_ms < to_ms), in
+    file order, read via the index instead of a full scan."""
+    if index is None:
+        index = load_index(nfr_file)
+    positions = index.positions_for(frame_ids)
+    ts_filter = None
+    if from_ms is not None or to_ms is not None:
+        span = frame_range(nfr_file, from_ms, to_ms)
+        if span is not None:
+            positions = positions[(positions >= span[0]) & (positions < span[1])]
+        else:
+            ts_filter = resolve_bounds(from_ms, to_ms, last_ts_ms(nfr_file))
+    if positions.size == 0:
+        return
+
+    records = np.memmap(
+        nfr_file, dtype=FRAME_DTYPE, mode="r", offset=HEADER_SIZE,
+        shape=(frame_count(nfr_file),),
+    )
+    for start in range(0, positions.size, chunk_frames):
+        chunk = records[positions[start : start + chunk_frames]]
+        if ts_filter is not None:
+            lo, hi = ts_filter
+            ts = chunk["ts_ms"]
+            keep = np.ones(ts.size, dtype=bool)
+            if lo is not None:
+                keep &= ts >= lo
+            if hi is not None:
+                keep &= ts < hi
+            chunk = chunk[keep]
+        for ts_ms, frame_id, dlc, data in zip(
+            chunk["ts_ms"].tolist(),
+            chunk["frame_id"].tolist(),
+            chunk["dlc"].tolist(),
+            chunk["data"],
+        ):
+            yield ts_ms, frame_id, data[: min(dlc, 8)].tobytes()
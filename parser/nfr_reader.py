@@ -10,14 +10,23 @@ Frame layout (18 bytes):
   [4..7]   frame_id      (uint32 LE)
   [8..9]   dlc           (uint16 LE)
   [10..17] data          (8 bytes; first `dlc` are valid payload)
+
+Because frames are fixed-size and `ts_ms` normally never decreases, the
+frames in a time range can be found by bisection (`frame_range`) and read
+with a single seek, instead of scanning from the start of the file.
 """
 from __future__ import annotations
 
+import hashlib
+import mmap
+import os
 import struct
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator
+from typing import Iterator, Protocol
+
+import numpy as np
 
 HEADER_SIZE = 20
 FRAME_SIZE = 18
@@ -48,14 +57,188 @@ def read_header(path: Path) -> HeaderInfo:
     return HeaderInfo(date=date_str, start_time=start_dt)
 
 
-def iter_frames(path: Path) -> Iterator[tuple[int, int, bytes]]:
+def iter_frames(
+    path: Path, start: int = 0, stop: int | None = None
+) -> Iterator[tuple[int, int, bytes]]:
+    """Yield frames [start, stop) (default: all of them)."""
     with open(path, "rb") as f:
         header = f.read(HEADER_SIZE)
         if len(header) < HEADER_SIZE:
             return
-        while True:
+        if start:
+            f.seek(HEADER_SIZE + start * FRAME_SIZE)
+        remaining = -1 if stop is None else max(0, stop - start)
+        while remaining != 0:
+            remaining -= 1
             frame = f.read(FRAME_SIZE)
             if len(frame) < FRAME_SIZE:
                 return
             ts_ms, frame_id, dlc = struct.unpack_from("<IIH", frame, 0)
             yield ts_ms, frame_id, bytes(frame[10:10 + dlc])
+
+
+# Structured view of one on-disk frame, for vectorised readers.
+FRAME_DTYPE = np.dtype(
+    [
+        ("ts_ms", "<u4"),
+        ("frame_id", "<u4"),
+        ("dlc", "<u2"),
+        ("data", "u1", (8,)),
+    ]
+)
+
+
+def frame_count(path: Path) -> int:
+    """Number of complete frames in the file (a partial trailing frame is
+    ignored, as in `iter_frames`)."""
+    size = os.path.getsize(path)
+    return max(0, (size - HEADER_SIZE) // FRAME_SIZE)
+
+
+def read_records(path: Path, start: int = 0, stop: int | None = None) -> np.ndarray:
+    """Read frames [start, stop) as a FRAME_DTYPE array in one read."""
+    total = frame_count(path)
+    stop = total if stop is None else min(stop, total)
+    start = max(0, min(start, stop))
+    return np.fromfile(
+        path,
+        dtype=FRAME_DTYPE,
+        count=stop - start,
+        offset=HEADER_SIZE + start * FRAME_SIZE,
+    )
+
+
+# Number of evenly spaced frames checked for non-decreasing timestamps
+# before trusting bisection.
+MONOTONIC_PROBES = 256
+
+
+def frame_range(
+    path: Path, from_ms: int | None = None, to_ms: int | None = None
+) -> tuple[int, int] | None:
+    """Frame indices [start, stop) with from_ms <= ts_ms < to_ms, found by
+    bisection without reading the frames in between.
+
+    Negative `from_ms` / `to_ms` count back from the last frame's
+    timestamp (`from_ms=-20 * 60_000` is "the last 20 minutes").
+
+    Returns None when the timestamps visibly go backwards (RTC reset,
+    wraparound): bisection would be wrong there, so callers fall back to a
+    filtering scan (`iter_frames_between` does this). The check samples
+    MONOTONIC_PROBES frames plus the neighbours of both cut points, so a
+    short backwards blip between probes can go unnoticed.
+    """
+    n = frame_count(path)
+    if n == 0:
+        return (0, 0)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+        def ts(i: int) -> int:
+            return struct.unpack_from("<I", mm, HEADER_SIZE + i * FRAME_SIZE)[0]
+
+        probes = sorted({i * (n - 1) // MONOTONIC_PROBES for i in range(MONOTONIC_PROBES + 1)})
+        probe_ts = [ts(i) for i in probes]
+        if any(b < a for a, b in zip(probe_ts, probe_ts[1:])):
+            return None
+        last = probe_ts[-1]
+        from_ms, to_ms = resolve_bounds(from_ms, to_ms, last)
+
+        def bisect(target: int) -> int:
+            lo, hi = 0, n
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if ts(mid) < target:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            return lo
+
+        start = 0 if from_ms is None else bisect(from_ms)
+        stop = n if to_ms is None else max(start, bisect(to_ms))
+        # Cut points must sit on a non-decreasing step, or the file is not
+        # sorted around them after all.
+        for i in (start, stop):
+            if 0 < i < n and ts(i) < ts(i - 1):
+                return None
+    return (start, stop)
+
+
+def last_ts_ms(path: Path) -> int:
+    """Timestamp of the last complete frame (0 for an empty log)."""
+    n = frame_count(path)
+    return int(read_records(path, n - 1, n)["ts_ms"][0]) if n else 0
+
+
+def resolve_bounds(
+    from_ms: int | None, to_ms: int | None, last_ms: int
+) -> tuple[int | None, int | None]:
+    """Turn negative (from-the-end) bounds into absolute ts_ms."""
+    if from_ms is not None and from_ms < 0:
+        from_ms = max(0, last_ms + from_ms)
+    if to_ms is not None and to_ms < 0:
+        to_ms = max(0, last_ms + to_ms)
+    return from_ms, to_ms
+
+
+def iter_frames_between(
+    path: Path, from_ms: int | None = None, to_ms: int | None = None
+) -> Iterator[tuple[int, int, bytes]]:
+    """Frames with from_ms <= ts_ms < to_ms, in file order.
+
+    Seeks straight to the range when the file is sorted (`frame_range`);
+    otherwise scans the whole file and filters.
+    """
+    if from_ms is None and to_ms is None:
+        yield from iter_frames(path)
+        return
+    span = frame_range(path, from_ms, to_ms)
+    if span is not None:
+        yield from iter_frames(path, *span)
+        return
+    from_ms, to_ms = resolve_bounds(from_ms, to_ms, last_ts_ms(path))
+    for frame in iter_frames(path):
+        if (from_ms is None or frame[0] >= from_ms) and (to_ms is None or frame[0] < to_ms):
+            yield frame
+
+
+# Read size for hashing a log prefix.
+FINGERPRINT_BLOCK = 1 << 20
+
+
+class PrefixHash(Protocol):
+    """The part of a hashlib object `prefix_hash` uses and returns."""
+
+    def update(self, data: bytes, /) -> None: ...
+    def hexdigest(self) -> str: ...
+    def copy(self) -> PrefixHash: ...
+
+
+def prefix_hash(
+    path: Path,
+    prefix_bytes: int,
+    *,
+    resume: tuple[PrefixHash, int] | None = None,
+) -> PrefixHash:
+    """sha256 over the first `prefix_bytes` of a log.
+
+    `resume` is a (hash, bytes_hashed) pair from an earlier call over a
+    shorter prefix of the same bytes; only the bytes after it are read, so
+    a growing log is hashed once overall. The passed hash is not modified.
+    """
+    h, pos = (hashlib.sha256(), 0) if resume is None else (resume[0].copy(), resume[1])
+    with open(path, "rb") as f:
+        f.seek(pos)
+        while pos < prefix_bytes:
+            block = f.read(min(FINGERPRINT_BLOCK, prefix_bytes - pos))
+            if not block:
+                raise ValueError(f"{path}: shorter than {prefix_bytes} bytes")
+            h.update(block)
+            pos += len(block)
+    return h
+
+
+def prefix_fingerprint(path: Path, prefix_bytes: int) -> str:
+    """Identity of the first `prefix_bytes` of a log: the sha256 of every
+    byte of it, so a newer copy matches only if nothing already imported
+    was rewritten."""
+    return prefix_hash(path, prefix_bytes).hexdigest()
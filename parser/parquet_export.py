@@ -0,0 +1,119 @@
+"""Per-source Parquet files written straight from the decode stream.
+
+Produces the same files `desktop/main/src/parquet/writer.ts` builds for cloud
+upload — one ZSTD Parquet per signal source, columns
+`(timestamp TIMESTAMPTZ, signal_id INTEGER, value DOUBLE)`, rows ordered by
+`(signal_id, ts)` — but from the columns the batch importer already holds in
+memory, so upload doesn't have to re-read the session out of sd_readings.
+
+Alongside the Parquets a `parquet_files.json` index records, per file, the
+same fields writer.ts returns (`source`, `localPath`, `bytes`, `rowCount`,
+`sha256`), which is everything a `session_blobs` row needs besides the
+object key assigned at upload time.
+
+Requires the optional `pyarrow` dependency (`pip install -e ".[parquet]"`).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from columns import SignalColumns
+
+INDEX_FILE = "parquet_files.json"
+ROW_GROUP_SIZE = 1_000_000
+
+SCHEMA = pa.schema(
+    [
+        pa.field("timestamp", pa.timestamp("us", tz="UTC")),
+        pa.field("signal_id", pa.int32()),
+        pa.field("value", pa.float64()),
+    ]
+)
+
+
+@dataclass(frozen=True)
+class WrittenFile:
+    source: str
+    localPath: str
+    bytes: int
+    rowCount: int
+    sha256: str
+
+
+def safe_source_name(source: str) -> str:
+    """Filename-safe source, identical to writer.ts / upload.ts."""
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", source)
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def write_source_parquets(
+    out_dir: Path,
+    columns: SignalColumns,
+    source_by_signal: Mapping[int, str],
+) -> list[WrittenFile]:
+    """Write one Parquet per source and the JSON index; return the file list.
+
+    Signals are visited in ascending signal_id and each column is already
+    ts-sorted, so concatenation yields the required (signal_id, ts) order
+    without a sort over the whole source.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    by_source: dict[str, list[int]] = {}
+    for signal_id in columns.signal_ids():
+        source = source_by_signal.get(signal_id)
+        if source is None:
+            continue
+        by_source.setdefault(source, []).append(signal_id)
+
+    written: list[WrittenFile] = []
+    for source in sorted(by_source):
+        ts_parts: list[np.ndarray] = []
+        id_parts: list[np.ndarray] = []
+        value_parts: list[np.ndarray] = []
+        for signal_id in by_source[source]:
+            ts_us, values = columns.arrays(signal_id)
+            ts_parts.append(ts_us)
+            id_parts.append(np.full(ts_us.size, signal_id, dtype=np.int32))
+            value_parts.append(values)
+        table = pa.Table.from_arrays(
+            [
+                pa.array(np.concatenate(ts_parts), type=SCHEMA.field("timestamp").type),
+                pa.array(np.concatenate(id_parts), type=pa.int32()),
+                pa.array(np.concatenate(value_parts), type=pa.float64()),
+            ],
+            schema=SCHEMA,
+        )
+        path = out_dir / f"{safe_source_name(source)}.parquet"
+        pq.write_table(
+            table, path, compression="zstd", row_group_size=ROW_GROUP_SIZE
+        )
+        written.append(
+            WrittenFile(
+                source=source,
+                localPath=str(path),
+                bytes=path.stat().st_size,
+                rowCount=table.num_rows,
+                sha256=_sha256_file(path),
+            )
+        )
+
+    (out_dir / INDEX_FILE).write_text(
+        json.dumps([asdict(w) for w in written], indent=2)
+    )
+    return written
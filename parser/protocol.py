@@ -54,8 +54,14 @@ class ProtocolEmitter:
         clamped = max(0, min(100, int(pct)))
         self._emit({"type": "import_progress", "file": file, "pct": clamped})
 
-    def signal_quality(self, *, rssi: int, snr: float) -> None:
-        self._emit({"type": "signal_quality", "rssi": int(rssi), "snr": float(snr)})
+    def signal_quality(self, *, rssi: int, snr: float, port: str | None = None) -> None:
+        body: dict[str, Any] = {"type": "signal_quality", "rssi": int(rssi), "snr": float(snr)}
+        if port is not None:
+            body["port"] = port
+        self._emit(body)
+
+    def serial_stats(self, *, port: str | None, stats: Mapping[str, float]) -> None:
+        self._emit({"type": "serial_stats", "port": port, **stats})
 
     def error(self, msg: str) -> None:
         self._emit({"type": "error", "msg": msg})
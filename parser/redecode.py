@@ -0,0 +1,259 @@
+"""Selective re-decode: rewrite only the signals a DBC fix changed.
+
+"Re-decode with current DBC" used to wipe and rewrite a whole session.
+Every import now stores the DBC snapshot it decoded with
+(`session_decode_tables`, see `dbc_diff.py`); `run_redecode`:
+
+  1. Diffs that snapshot against the current DBC. Identical → nothing to do.
+  2. Reads, through the per-frame-ID index (`nfr_index.py`), only the
+     frames of messages carrying a changed signal and decodes them with
+     the vectorised `decode_records`.
+  3. Recomputes the derived channels that read a changed signal (their
+     other inputs are loaded from the session) and the events of changed
+     signals or changed rules.
+  4. Deletes and rewrites just those signal_ids: readings / segments in
+     the session's layout, rollup, stats, LTTB overview and events. Signals
+     the new DBC no longer defines are dropped.
+  5. Stores the new snapshot.
+
+Steps 4 and 5 are one transaction, so readers never see a half-rewritten
+session and a failed re-decode leaves the old one in place.
+
+Sessions imported before snapshots existed fall back to a full
+`run_batch_import`, as does a log that was never imported.
+"""
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from batch import compile_dbc, run_batch_import, session_id_from_file
+from columns import SignalColumns, from_epoch_us, to_epoch_us
+from db import (
+    Reading,
+    SessionDecodeTable,
+    SignalDef,
+    copy_sd_readings,
+    copy_sd_rollup,
+    copy_sd_segments,
+    delete_session_signals,
+    read_session_decode_table,
+    read_session_signal_stats,
+    upsert_signal_definitions,
+    write_sd_lttb,
+    write_session_decode_table,
+    write_session_events,
+    write_session_signal_stats,
+)
+from dbc_diff import Key, diff_snapshots, snapshot_dbc, snapshot_sha256
+from decode import decode_records
+from derived import compute_derived, resolve_ref
+from events import compute_events
+from lttb import compute_lttb
+from nfr_index import read_selected_records
+from nfr_reader import read_header
+from protocol import ProtocolEmitter
+from segments import encode_segments
+from sessions_io import load_signal
+from stats import compute_session_stats
+
+Samples = tuple[np.ndarray, np.ndarray]
+
+
+def _decode_keys(
+    nfr_file: Path, decode_table: dict, keys: frozenset[Key]
+) -> dict[Key, Samples]:
+    """Samples of `keys`, decoded from just the frames that carry them."""
+    frame_ids = set()
+    for msg in decode_table.values():
+        sender = msg.sender or msg.name or "unknown"
+        if any((sender, sig.name) in keys for sig in msg.signals):
+            frame_ids.add(msg.frame_id)
+    records = read_selected_records(nfr_file, frame_ids)
+    start_us = to_epoch_us(read_header(nfr_file).start_time)
+
+    parts: dict[Key, list[Samples]] = {}
+    for frame_id, (ts_ms, values) in decode_records(records, decode_table).items():
+        msg = decode_table[frame_id]
+        sender = msg.sender or msg.name or "unknown"
+        for name, column in values.items():
+            if (sender, name) in keys:
+                parts.setdefault((sender, name), []).append((start_us + ts_ms * 1000, column))
+    out: dict[Key, Samples] = {}
+    for key, chunks in parts.items():
+        ts = np.concatenate([c[0] for c in chunks])
+        values = np.concatenate([c[1] for c in chunks])
+        order = np.argsort(ts, kind="stable")
+        out[key] = (ts[order], values[order])
+    return out
+
+
+def run_redecode(
+    *,
+    dsn: str,
+    dbc_csv: Path,
+    nfr_file: Path,
+    emitter: ProtocolEmitter,
+    layout: str = "rows",
+) -> UUID:
+    """Bring the whole-file session of `nfr_file` up to date with `dbc_csv`;
+    see the module docstring.
+
+    `layout` applies to the fallback full import; a re-decode keeps the
+    layout the session was created with.
+    """
+    if not nfr_file.is_file():
+        raise FileNotFoundError(nfr_file)
+    session_id = session_id_from_file(nfr_file)
+    with psycopg.connect(dsn) as conn:
+        stored = read_session_decode_table(conn, session_id)
+    if stored is None:
+        return run_batch_import(
+            dsn=dsn, dbc_csv=dbc_csv, nfr_file=nfr_file, emitter=emitter, layout=layout
+        )
+
+    label = str(nfr_file)
+    emitter.session_started(str(session_id), source="sd_import")
+    emitter.import_progress(label, pct=0)
+    decode_table, derived_specs, event_rules = compile_dbc(dbc_csv)
+    snapshot = snapshot_dbc(decode_table, derived_specs, event_rules)
+    sha = snapshot_sha256(snapshot)
+    if sha == stored.snapshot_sha256:
+        emitter.import_progress(label, pct=100)
+        emitter.session_ended(str(session_id), row_count=0)
+        return session_id
+
+    diff = diff_snapshots(stored.snapshot, snapshot)
+    fresh = _decode_keys(nfr_file, decode_table, diff.decode) if diff.decode else {}
+    emitter.import_progress(label, pct=50)
+    units = {(s["source"], s["name"]): s["unit"] for s in snapshot["signals"]}
+    universe = dict.fromkeys(
+        list(units) + [(d["source"], d["name"]) for d in snapshot["derived"]]
+    )
+
+    with psycopg.connect(dsn) as conn:
+        stored_ids: dict[Key, int] = {
+            (src, name): sid
+            for sid, src, name in conn.execute(
+                "SELECT d.id, d.source, d.signal_name FROM session_signal_stats s "
+                "JOIN signal_definitions d ON d.id = s.signal_id WHERE s.session_id = %s",
+                (str(session_id),),
+            ).fetchall()
+        }
+
+        def stored_samples(keys) -> dict[Key, Samples]:
+            return {
+                k: load_signal(conn, session_id, stored_ids[k])
+                for k in keys
+                if k in stored_ids and k not in diff.rewritten and k not in diff.removed
+            }
+
+        # Derived channels that read a changed signal, in DBC order; their
+        # unchanged inputs come from the session.
+        specs = [d for d in derived_specs if (d.source, d.name) in diff.derived]
+        derived = {}
+        if specs:
+            refs = {resolve_ref(r, universe) for d in specs for r in d.expression.refs}
+            derived = compute_derived(specs, {**stored_samples(refs), **fresh})
+
+        # Units may change without the values changing; keep them current.
+        ids = upsert_signal_definitions(
+            conn,
+            [
+                SignalDef(source=k[0], signal_name=k[1], unit=units[k])
+                for k in units
+                if k in fresh or k in stored_ids
+            ],
+        )
+        spec_by_key = {(d.source, d.name): d for d in derived_specs}
+        ids.update(
+            upsert_signal_definitions(
+                conn,
+                [
+                    SignalDef(
+                        source=k[0],
+                        signal_name=k[1],
+                        unit=spec_by_key[k].unit or "",
+                        description=spec_by_key[k].expression.text,
+                    )
+                    for k in spec_by_key
+                    if k in derived or k in stored_ids
+                ],
+            )
+        )
+        fresh.update(derived)
+
+        stale = [
+            sid for k, sid in stored_ids.items() if k in diff.rewritten or k in diff.removed
+        ]
+        delete_session_signals(conn, session_id, stale)
+
+        columns = SignalColumns()
+        for key, (ts, values) in fresh.items():
+            columns.extend(ids[key], ts, values)
+        count = len(columns)
+        if stored.layout in ("rows", "both"):
+            copy_sd_readings(
+                conn,
+                session_id,
+                (
+                    Reading(ts=from_epoch_us(t), signal_id=sid, value=v)
+                    for sid, ts, values in columns.items()
+                    for t, v in zip(ts.tolist(), values.tolist())
+                ),
+                commit=False,
+            )
+        if stored.layout in ("segments", "both"):
+            scales = {}
+            for msg in decode_table.values():
+                sender = msg.sender or msg.name or "unknown"
+                for sig in msg.signals:
+                    scales[(sender, sig.name)] = (sig.scale, sig.offset)
+            segments = []
+            for key, (ts, values) in fresh.items():
+                scale, offset = scales.get(key, (None, None))
+                segments.extend(encode_segments(ids[key], ts, values, scale=scale, offset=offset))
+            copy_sd_segments(conn, session_id, segments)
+
+        # Events of every rewritten signal plus signals whose rules changed.
+        targets = set(fresh) | set(diff.events)
+        rules = [r for r in event_rules if resolve_ref(r.signal, universe) in targets]
+        rule_only = [stored_ids[k] for k in diff.events if k in stored_ids and k not in fresh]
+        if rule_only:
+            conn.execute(
+                "DELETE FROM session_events WHERE session_id = %s AND signal_id = ANY(%s)",
+                (str(session_id), rule_only),
+            )
+        if rules:
+            inputs = {**stored_samples(diff.events), **fresh}
+            all_ids = {**stored_ids, **ids}
+            write_session_events(
+                conn, session_id, compute_events(rules, inputs), all_ids, replace=False
+            )
+
+        stats = read_session_signal_stats(conn, session_id) + compute_session_stats(columns)
+        write_session_signal_stats(conn, session_id, stats)
+        write_sd_lttb(conn, session_id, compute_lttb(columns), signal_ids=columns.signal_ids())
+        copy_sd_rollup(conn, session_id, columns)
+        if stats:
+            conn.execute(
+                "UPDATE sessions SET ended_at = %s WHERE id = %s",
+                (from_epoch_us(max(s.last_ts_us for s in stats)), str(session_id)),
+            )
+        write_session_decode_table(
+            conn, SessionDecodeTable(session_id, sha, snapshot, stored.layout)
+        )
+        # Keep `--append` working for the re-decoded session.
+        conn.execute(
+            "UPDATE import_checkpoints SET dbc_sha256 = %s WHERE session_id = %s",
+            (hashlib.sha256(Path(dbc_csv).read_bytes()).hexdigest(), str(session_id)),
+        )
+        conn.commit()
+
+    emitter.import_progress(label, pct=100)
+    emitter.session_ended(str(session_id), row_count=count)
+    return session_id
@@ -0,0 +1,224 @@
+"""Align several signals onto one fixed-rate time base.
+
+G-G plots, cell-voltage strips and products like V x I need their inputs on
+a common clock. `resample` does that for in-memory arrays (e.g. from
+`nfr_cache.load_nfr_arrays` or `sessions_io.load_signals`);
+`iter_resampled` / `resample_session` do it window by window so a long
+session never has to be loaded whole.
+
+Modes (grid point t, step s):
+  "zoh"    — zero-order hold: the last sample at or before t.
+  "linear" — linear interpolation between the samples either side of t.
+  "mean"   — mean of the samples in [t, t + s).
+
+Cells with no defined value (before a signal's first sample, after its last
+one for "linear", or an empty bucket for "mean") are NaN. The grid is
+`start_us + k * step` in int64 microseconds since the Unix epoch; by default
+it starts at the earliest sample rounded down to a multiple of the step and
+ends at the latest sample.
+
+Each window is processed with `np.searchsorted` / `np.interp` /
+`np.bincount` per signal — no per-sample Python. Windows see one sample
+either side of their edges, so results do not depend on the chunk size.
+"""
+from __future__ import annotations
+
+from typing import Callable, Iterator, Sequence
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from columns import US_PER_SECOND, from_epoch_us, to_epoch_us
+from sessions_io import load_signal, neighbour_samples
+
+MODES = ("zoh", "linear", "mean")
+DEFAULT_CHUNK_POINTS = 1 << 16
+
+Samples = tuple[np.ndarray, np.ndarray]
+# fetch(lo_us, hi_us) -> per signal, the samples in [lo_us, hi_us) plus the
+# last sample before lo_us and the first at or after hi_us when they exist.
+Fetch = Callable[[int, int], Sequence[Samples]]
+
+
+def step_us(rate_hz: float) -> int:
+    if not rate_hz > 0:
+        raise ValueError(f"rate_hz must be positive, got {rate_hz!r}")
+    step = round(US_PER_SECOND / rate_hz)
+    if step < 1:
+        raise ValueError(f"rate_hz too high: {rate_hz!r}")
+    return step
+
+
+def resample_window(
+    samples: Sequence[Samples], grid_us: np.ndarray, mode: str, step: int
+) -> np.ndarray:
+    """Resample each (ts_us, values) pair onto `grid_us`; returns a
+    (len(grid_us), len(samples)) float64 matrix."""
+    if mode not in MODES:
+        raise ValueError(f"invalid mode: {mode!r}")
+    out = np.full((grid_us.size, len(samples)), np.nan)
+    if grid_us.size == 0:
+        return out
+    for col, (ts, values) in enumerate(samples):
+        if ts.size == 0:
+            continue
+        if mode == "zoh":
+            idx = np.searchsorted(ts, grid_us, side="right") - 1
+            have = idx >= 0
+            out[have, col] = values[idx[have]]
+        elif mode == "linear":
+            out[:, col] = np.interp(grid_us, ts, values, left=np.nan, right=np.nan)
+        else:
+            bucket = (ts - grid_us[0]) // step
+            keep = (bucket >= 0) & (bucket < grid_us.size)
+            bucket = bucket[keep]
+            counts = np.bincount(bucket, minlength=grid_us.size)
+            sums = np.bincount(bucket, weights=values[keep], minlength=grid_us.size)
+            filled = counts > 0
+            out[filled, col] = sums[filled] / counts[filled]
+    return out
+
+
+def iter_resampled(
+    fetch: Fetch,
+    *,
+    rate_hz: float,
+    mode: str,
+    start_us: int,
+    end_us: int,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Yield (grid_us, matrix) chunks of at most `chunk_points` rows covering
+    `start_us` .. `end_us` inclusive."""
+    if mode not in MODES:
+        raise ValueError(f"invalid mode: {mode!r}")
+    step = step_us(rate_hz)
+    if end_us < start_us:
+        return
+    n_points = (end_us - start_us) // step + 1
+    for k0 in range(0, n_points, chunk_points):
+        k1 = min(k0 + chunk_points, n_points)
+        grid = start_us + step * np.arange(k0, k1, dtype=np.int64)
+        samples = fetch(int(grid[0]), int(grid[-1]) + step)
+        yield grid, resample_window(samples, grid, mode, step)
+
+
+def array_fetcher(signals: Sequence[Samples]) -> Fetch:
+    """A `Fetch` over in-memory, ts-sorted arrays."""
+
+    def fetch(lo_us: int, hi_us: int) -> list[Samples]:
+        out = []
+        for ts, values in signals:
+            i0 = max(int(np.searchsorted(ts, lo_us, side="left")) - 1, 0)
+            i1 = int(np.searchsorted(ts, hi_us, side="left")) + 1
+            out.append((ts[i0:i1], values[i0:i1]))
+        return out
+
+    return fetch
+
+
+def default_bounds(signals: Sequence[Samples], rate_hz: float) -> tuple[int, int]:
+    firsts = [int(ts[0]) for ts, _ in signals if ts.size]
+    lasts = [int(ts[-1]) for ts, _ in signals if ts.size]
+    if not firsts:
+        raise ValueError("no samples to resample")
+    step = step_us(rate_hz)
+    return min(firsts) // step * step, max(lasts)
+
+
+def resample(
+    signals: Sequence[Samples],
+    *,
+    rate_hz: float,
+    mode: str = "zoh",
+    start_us: int | None = None,
+    end_us: int | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Resample in-memory signals; returns (grid_us, matrix) with one column
+    per input signal, in input order."""
+    lo, hi = default_bounds(signals, rate_hz)
+    chunks = list(
+        iter_resampled(
+            array_fetcher(signals),
+            rate_hz=rate_hz,
+            mode=mode,
+            start_us=lo if start_us is None else start_us,
+            end_us=hi if end_us is None else end_us,
+        )
+    )
+    if not chunks:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(signals)))
+    return (
+        np.concatenate([c[0] for c in chunks]),
+        np.concatenate([c[1] for c in chunks]),
+    )
+
+
+def session_fetcher(
+    conn: psycopg.Connection, session_id: UUID, signal_ids: Sequence[int]
+) -> Fetch:
+    """A `Fetch` reading each window of a stored session through
+    `sessions_io` (sd_readings or sd_segments)."""
+
+    def fetch(lo_us: int, hi_us: int) -> list[Samples]:
+        lo, hi = from_epoch_us(lo_us), from_epoch_us(hi_us)
+        out = []
+        for signal_id in signal_ids:
+            ts, values = load_signal(conn, session_id, signal_id, start=lo, end=hi)
+            prev, _ = neighbour_samples(conn, session_id, signal_id, lo)
+            _, nxt = neighbour_samples(conn, session_id, signal_id, hi)
+            if prev is not None:
+                ts = np.concatenate([[prev[0]], ts])
+                values = np.concatenate([[prev[1]], values])
+            if nxt is not None:
+                ts = np.concatenate([ts, [nxt[0]]])
+                values = np.concatenate([values, [nxt[1]]])
+            out.append((ts, values))
+        return out
+
+    return fetch
+
+
+def resample_session(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    signal_ids: Sequence[int],
+    *,
+    rate_hz: float,
+    mode: str = "zoh",
+    start_us: int | None = None,
+    end_us: int | None = None,
+    chunk_points: int = DEFAULT_CHUNK_POINTS,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream a stored session's signals as aligned (grid_us, matrix) chunks.
+
+    Default bounds come from `session_signal_stats`, falling back to the
+    session's started_at / ended_at.
+    """
+    if start_us is None or end_us is None:
+        row = conn.execute(
+            "SELECT min(first_ts), max(last_ts) FROM session_signal_stats "
+            "WHERE session_id = %s AND signal_id = ANY(%s)",
+            (str(session_id), list(signal_ids)),
+        ).fetchone()
+        if row is None or row[0] is None:
+            row = conn.execute(
+                "SELECT started_at, ended_at FROM sessions WHERE id = %s",
+                (str(session_id),),
+            ).fetchone()
+        if row is None or row[0] is None or row[1] is None:
+            raise ValueError(f"session {session_id} has no time range")
+        step = step_us(rate_hz)
+        if start_us is None:
+            start_us = to_epoch_us(row[0]) // step * step
+        if end_us is None:
+            end_us = to_epoch_us(row[1])
+    return iter_resampled(
+        session_fetcher(conn, session_id, signal_ids),
+        rate_hz=rate_hz,
+        mode=mode,
+        start_us=start_us,
+        end_us=end_us,
+        chunk_points=chunk_points,
+    )
@@ -0,0 +1,263 @@
+"""Season-wide aggregates: one tidy table over many sessions.
+
+Answers "max inverter IGBT temperature per session this season" in one
+call instead of one query per session:
+
+    rows = season_aggregate(
+        dsn, ["FR_IGBT_Temp", "SOC"], ["max", "p95", "above:80"],
+        start=datetime(2026, 3, 1, tzinfo=UTC),
+    )
+
+Aggregates (per session, per signal):
+  "min" "max" "mean" "count" — exact from sd_rollup_1s (each bucket keeps
+        min / max / sum / n), so no raw rows are read. Sessions without a
+        rollup for the signal (live captures), or whose rollup holds
+        non-finite samples, fall back to raw samples.
+  "p<q>"          — q-th percentile (0..100, e.g. "p95"), linear
+                    interpolation; needs raw samples.
+  "above:<x>"     — seconds the signal spent above / below x, holding
+  "below:<x>"       each sample until the next (zero-order hold); needs
+                    raw samples.
+
+Raw samples come through `sessions_io.load_signal`, so sd_segments and
+sd_readings sessions both work. Sessions fan out over a small pool of
+connections (`workers`, default 4) — enough to overlap Postgres I/O and
+NumPy work without swamping a laptop database.
+"""
+from __future__ import annotations
+
+import csv
+import math
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator, Sequence, TextIO
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from sessions_io import load_signal, resolve_signal_ids
+
+ROLLUP_AGGS = ("min", "max", "mean", "count")
+DEFAULT_WORKERS = 4
+COLUMNS = ("session_id", "started_at", "source", "signal_name", "agg", "value")
+
+_PERCENTILE = re.compile(r"p(\d+(?:\.\d+)?)")
+_DURATION = re.compile(r"(above|below):(.+)")
+
+
+@dataclass(frozen=True)
+class SeasonRow:
+    session_id: UUID
+    started_at: datetime
+    source: str
+    signal_name: str
+    agg: str
+    value: float | None  # None: signal absent from the session
+
+
+def check_aggs(aggs: Sequence[str]) -> list[str]:
+    """Validate aggregate names; returns them in order, deduplicated."""
+    out: list[str] = []
+    for agg in aggs:
+        if agg in ROLLUP_AGGS:
+            pass
+        elif m := _PERCENTILE.fullmatch(agg):
+            if not 0 <= float(m.group(1)) <= 100:
+                raise ValueError(f"percentile out of range: {agg!r}")
+        elif m := _DURATION.fullmatch(agg):
+            try:
+                float(m.group(2))
+            except ValueError:
+                raise ValueError(f"invalid threshold in {agg!r}") from None
+        else:
+            raise ValueError(f"unknown aggregate: {agg!r}")
+        if agg not in out:
+            out.append(agg)
+    return out
+
+
+def raw_aggregate(agg: str, ts_us: np.ndarray, values: np.ndarray) -> float | None:
+    """One aggregate over raw (ts-sorted) samples; non-finite values are
+    ignored. None when there is nothing to aggregate."""
+    keep = np.isfinite(values)
+    if not keep.all():
+        ts_us, values = ts_us[keep], values[keep]
+    if agg == "count":
+        return float(values.size)
+    if values.size == 0:
+        return None
+    if agg == "min":
+        return float(values.min())
+    if agg == "max":
+        return float(values.max())
+    if agg == "mean":
+        return float(values.mean())
+    if m := _PERCENTILE.fullmatch(agg):
+        return float(np.percentile(values, float(m.group(1))))
+    kind, threshold = _DURATION.fullmatch(agg).groups()
+    held = np.diff(ts_us)
+    hit = values[:-1] > float(threshold) if kind == "above" else values[:-1] < float(threshold)
+    return float(held[hit].sum()) / 1e6
+
+
+def _rollup_aggregates(
+    conn: psycopg.Connection, session_id: UUID, signal_ids: Sequence[int]
+) -> dict[int, dict[str, float]]:
+    rows = conn.execute(
+        "SELECT signal_id, min(value_min), max(value_max), sum(value_sum), sum(sample_n) "
+        "FROM sd_rollup_1s WHERE session_id = %s AND signal_id = ANY(%s) "
+        "GROUP BY signal_id",
+        (str(session_id), list(signal_ids)),
+    ).fetchall()
+    # A NaN or infinite sample poisons its bucket's sum (and max), and the
+    # raw path drops such samples, so those signals fall back to raw too.
+    return {
+        sid: {"min": vmin, "max": vmax, "mean": vsum / n, "count": float(n)}
+        for sid, vmin, vmax, vsum, n in rows
+        if n and math.isfinite(vmin) and math.isfinite(vmax) and math.isfinite(vsum)
+    }
+
+
+def _session_rows(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    started_at: datetime,
+    signals: Sequence[tuple[int, str, str]],
+    aggs: Sequence[str],
+) -> list[SeasonRow]:
+    rollup = {}
+    if any(a in ROLLUP_AGGS for a in aggs):
+        rollup = _rollup_aggregates(conn, session_id, [s[0] for s in signals])
+    out: list[SeasonRow] = []
+    for sid, source, name in signals:
+        exact = rollup.get(sid, {})
+        raw = None
+        for agg in aggs:
+            if agg in exact:
+                value = exact[agg]
+            else:
+                if raw is None:
+                    raw = load_signal(conn, session_id, sid)
+                value = raw_aggregate(agg, *raw)
+            if agg == "count" and not value:
+                value = None
+            out.append(SeasonRow(session_id, started_at, source, name, agg, value))
+    return out
+
+
+def list_season_sessions(
+    conn: psycopg.Connection,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> list[tuple[UUID, datetime]]:
+    """Finished sessions that started in [start, end), oldest first.
+
+    Like list_sessions, skips sessions still being captured (no ended_at)
+    and imports that haven't finished (an import_resume row).
+    """
+    return conn.execute(
+        "SELECT id, started_at FROM sessions "
+        "WHERE ended_at IS NOT NULL "
+        "AND NOT EXISTS (SELECT 1 FROM import_resume r WHERE r.session_id = sessions.id) "
+        "AND (%(start)s::timestamptz IS NULL OR started_at >= %(start)s) "
+        "AND (%(end)s::timestamptz IS NULL OR started_at < %(end)s) "
+        "ORDER BY started_at, id",
+        {"start": start, "end": end},
+    ).fetchall()
+
+
+def iter_season_aggregate(
+    dsn: str,
+    signals: Sequence[str],
+    aggs: Sequence[str],
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    workers: int = DEFAULT_WORKERS,
+    progress: Callable[[int], None] | None = None,
+) -> Iterator[SeasonRow]:
+    """Yield rows session by session (in start order) as workers finish.
+
+    `signals` are "name" or "source.name" as in `resolve_signal_ids`.
+    At most `workers` sessions are in flight, each on its own connection.
+    `progress` is called with the percentage of sessions done.
+    """
+    aggs = check_aggs(aggs)
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    with psycopg.connect(dsn) as conn:
+        ids = resolve_signal_ids(conn, signals)
+        names = dict(
+            (sid, (src, name))
+            for sid, src, name in conn.execute(
+                "SELECT id, source, signal_name FROM signal_definitions WHERE id = ANY(%s)",
+                (list(ids.values()),),
+            ).fetchall()
+        )
+        sessions = list_season_sessions(conn, start, end)
+    chosen = [(sid, *names[sid]) for sid in dict.fromkeys(ids.values())]
+
+    # Each worker thread borrows a connection for one session at a time;
+    # connections are opened lazily and closed when the scan ends.
+    pool: queue.LifoQueue[psycopg.Connection | None] = queue.LifoQueue()
+    for _ in range(workers):
+        pool.put(None)
+    opened: list[psycopg.Connection] = []
+
+    def run(session: tuple[UUID, datetime]) -> list[SeasonRow]:
+        conn = pool.get()
+        try:
+            if conn is None:
+                conn = psycopg.connect(dsn, autocommit=True)
+                opened.append(conn)
+            return _session_rows(conn, session[0], session[1], chosen, aggs)
+        finally:
+            pool.put(conn)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Submit in windows so a long season doesn't hold every
+            # session's rows in memory before the first one is written.
+            window = workers * 2
+            pending = [executor.submit(run, s) for s in sessions[:window]]
+            done = 0
+            while pending:
+                rows = pending.pop(0).result()
+                if done + window < len(sessions):
+                    pending.append(executor.submit(run, sessions[done + window]))
+                done += 1
+                if progress is not None:
+                    progress(100 * done // len(sessions))
+                yield from rows
+    finally:
+        for conn in opened:
+            conn.close()
+
+
+def season_aggregate(dsn: str, signals: Sequence[str], aggs: Sequence[str], **kwargs) -> list[SeasonRow]:
+    """`iter_season_aggregate` collected into a list."""
+    return list(iter_season_aggregate(dsn, signals, aggs, **kwargs))
+
+
+def write_season_csv(out: TextIO, rows: Iterator[SeasonRow]) -> int:
+    """Write rows as a tidy CSV (one value per line). Returns the row count."""
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    count = 0
+    for r in rows:
+        writer.writerow(
+            (
+                r.session_id,
+                r.started_at.isoformat(),
+                r.source,
+                r.signal_name,
+                r.agg,
+                "" if r.value is None else repr(r.value),
+            )
+        )
+        count += 1
+    return count
@@ -22,14 +22,30 @@ processIncomingPackets):
 Each CanFrame in a packet is emitted as a SourceEvent(kind="frame"). One
 signal_quality event is emitted per USB packet, carrying the LoRa-link
 rssi and snr for the most recent packet so the UI can show link health.
+
+Reading happens on its own thread (`SerialReader`): large reads into a
+preallocated buffer, returning after a short inter-byte gap, handed to the
+parser as chunks through a deque. Decoding and Postgres stalls therefore
+never leave the OS serial buffer undrained. Every STATS_INTERVAL a
+serial_stats event reports bytes/s, reads/s, the queue high-water mark and
+the framing counters of `SyncStats` (packets, desyncs, bytes discarded).
+
+`merged_serial_events` reads several basestations at once (one thread per
+port) and merges them into a single stream, passing each frame on once.
 """
 from __future__ import annotations
 
 import math
+import queue
 import struct
+import threading
 import time
+from collections import deque
+from contextlib import closing
+from dataclasses import dataclass
 from typing import Iterator
 
+import numpy as np
 import serial
 
 from live import SourceEvent
@@ -37,19 +53,67 @@ from nfr_reader import FRAME_SIZE
 
 RECONNECT_INTERVAL = 2.0
 IDLE_TIMEOUT = 10.0
+READ_SIZE = 4096  # bytes per read call
+READ_TIMEOUT = 0.1  # longest a read waits for its first byte
+INTER_BYTE_TIMEOUT = 0.005  # a gap this long ends a read early
+DRIVER_BUFFER = 1 << 16  # OS receive buffer to request where settable
+STATS_INTERVAL = 5.0
+DEDUP_WINDOW = 2.0  # seconds a frame is remembered across ports
 
 HEADER_SIZE = 2 + 4 + 1  # rssi + snr + len = 7 bytes
 HEADER_STRUCT = struct.Struct("<hfB")  # rssi (i16), snr (f32), len (u8)
+RSSI_MIN, RSSI_MAX = -150, 20  # dBm
+SNR_LIMIT = 30.0  # dB
+
+
+@dataclass
+class SyncStats:
+    """Framing health of one connection, updated by `_parse_packets`."""
+
+    packets: int = 0
+    desyncs: int = 0  # times the stream lost packet alignment
+    bytes_discarded: int = 0  # skipped while looking for the next header
+    in_sync: bool = True
+
+
+def _header_candidates(buf: bytes, start: int) -> np.ndarray:
+    """Offsets >= `start` at which a header passes every sanity check of
+    `_parse_packets`, found for all offsets at once. Each field is read as
+    an unaligned view with a one-byte stride, so offset k of `rssi` is the
+    i16 at buf[k:k+2], and so on."""
+    count = len(buf) - start - HEADER_SIZE + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
 
+    def field(dtype: str, at: int) -> np.ndarray:
+        return np.ndarray((count,), dtype=dtype, buffer=buf, offset=start + at, strides=(1,))
 
-def _parse_packets(buf: bytes) -> tuple[list[SourceEvent], bytes]:
+    rssi = field("<i2", 0)
+    snr = field("<f4", 2)
+    size = field("u1", 6)
+    with np.errstate(invalid="ignore"):
+        ok = (size != 0) & (size % FRAME_SIZE == 0)
+        ok &= (rssi >= RSSI_MIN) & (rssi <= RSSI_MAX)
+        ok &= np.isfinite(snr) & (snr >= -SNR_LIMIT) & (snr <= SNR_LIMIT)
+    return np.flatnonzero(ok) + start
+
+
+def _parse_packets(
+    buf: bytes, stats: SyncStats | None = None, *, port: str | None = None
+) -> tuple[list[SourceEvent], bytes]:
     """Drain as many complete USB packets as possible from `buf`.
 
     Returns (events_in_order, remaining_bytes). Stream is assumed to be
-    byte-aligned to a packet boundary; if a payload size is not a multiple
-    of FRAME_SIZE, we drop one byte and try to resync.
+    byte-aligned to a packet boundary; when a header fails the sanity
+    checks, the parser jumps straight to the next offset whose header
+    passes them (`_header_candidates`) instead of stepping one byte at a
+    time. `stats`, if given, accumulates desync counts across calls; `port`
+    labels the frame and signal_quality events.
     """
+    if stats is None:
+        stats = SyncStats()
     events: list[SourceEvent] = []
+    candidates: np.ndarray | None = None
     i = 0
     while i + HEADER_SIZE <= len(buf):
         rssi, snr, payload_size = HEADER_STRUCT.unpack_from(buf, i)
@@ -60,27 +124,36 @@ def _parse_packets(buf: bytes) -> tuple[list[SourceEvent], bytes]:
         # Each check below filters out a class of garbage; combined they
         # cut the false-positive resync rate by orders of magnitude.
         #
-        # The basestation never sends empty payloads (a packet always
-        # carries at least one CanFrame), so payload_size == 0 means we
-        # are misaligned.
-        if payload_size == 0:
-            i += 1
-            continue
-        # LoRa RSSI is in dBm and physically bounded; values outside
-        # [-150, 20] dBm are not legitimate link measurements.
-        if rssi < -150 or rssi > 20:
-            i += 1
-            continue
-        # SNR comes through as float32; misaligned reads regularly produce
-        # NaN/inf or huge magnitudes. Real link SNR sits in [-30, 30] dB.
-        if not math.isfinite(snr) or snr < -30.0 or snr > 30.0:
-            i += 1
-            continue
-        # Each CanFrame is exactly FRAME_SIZE bytes, so any valid payload
-        # must be a multiple of FRAME_SIZE. A misaligned read will almost
-        # always have a fractional length here.
-        if payload_size % FRAME_SIZE != 0:
-            i += 1
+        # - The basestation never sends empty payloads (a packet always
+        #   carries at least one CanFrame), so payload_size == 0 means we
+        #   are misaligned.
+        # - LoRa RSSI is in dBm and physically bounded; values outside
+        #   [RSSI_MIN, RSSI_MAX] are not legitimate link measurements.
+        # - SNR comes through as float32; misaligned reads regularly
+        #   produce NaN/inf or huge magnitudes. Real link SNR sits in
+        #   [-SNR_LIMIT, SNR_LIMIT] dB.
+        # - Each CanFrame is exactly FRAME_SIZE bytes, so any valid
+        #   payload must be a multiple of FRAME_SIZE.
+        #
+        # `_header_candidates` applies the same checks vectorised.
+        if (
+            payload_size == 0
+            or payload_size % FRAME_SIZE != 0
+            or not RSSI_MIN <= rssi <= RSSI_MAX
+            or not math.isfinite(snr)
+            or not -SNR_LIMIT <= snr <= SNR_LIMIT
+        ):
+            if stats.in_sync:
+                stats.desyncs += 1
+                stats.in_sync = False
+            if candidates is None:
+                candidates = _header_candidates(buf, i + 1)
+            k = int(np.searchsorted(candidates, i + 1))
+            # Without a candidate, keep the tail that could still be the
+            # start of a header once more bytes arrive.
+            nxt = int(candidates[k]) if k < candidates.size else len(buf) - HEADER_SIZE + 1
+            stats.bytes_discarded += nxt - i
+            i = nxt
             continue
         if i + HEADER_SIZE + payload_size > len(buf):
             # Wait for the rest of this packet to arrive.
@@ -88,15 +161,15 @@ def _parse_packets(buf: bytes) -> tuple[list[SourceEvent], bytes]:
 
         payload_start = i + HEADER_SIZE
         payload_end = payload_start + payload_size
+        stats.packets += 1
+        stats.in_sync = True
 
         # Emit one signal_quality event per packet so the UI can show link
         # health independently of frame rate. ts_ms left as None — this is
         # a basestation-side measurement, not a CAN-bus timestamp.
-        events.append(SourceEvent(kind="signal_quality", rssi=rssi, snr=snr))
+        events.append(SourceEvent(kind="signal_quality", port=port, rssi=rssi, snr=snr))
 
-        # Split the payload into 18-byte CanFrame records. Any trailing
-        # bytes shorter than FRAME_SIZE are ignored (would indicate the
-        # basestation sent an unaligned payload — log via desync recovery).
+        # Split the payload into 18-byte CanFrame records.
         off = payload_start
         while off + FRAME_SIZE <= payload_end:
             ts_ms, frame_id, dlc = struct.unpack_from("<IIH", buf, off)
@@ -104,6 +177,7 @@ def _parse_packets(buf: bytes) -> tuple[list[SourceEvent], bytes]:
             events.append(
                 SourceEvent(
                     kind="frame",
+                    port=port,
                     ts_ms=ts_ms,
                     frame_id=frame_id,
                     data=data,
@@ -116,35 +190,248 @@ def _parse_packets(buf: bytes) -> tuple[list[SourceEvent], bytes]:
     return events, buf[i:]
 
 
-def serial_events(
-    port: str, baud: int = 9600, idle_timeout: float = IDLE_TIMEOUT
-) -> Iterator[SourceEvent]:
+class SerialReader:
+    """Drains a serial port on a background thread.
+
+    The thread only reads: each read fills the preallocated buffer with up
+    to `read_size` bytes and returns after `INTER_BYTE_TIMEOUT` of silence,
+    so a burst costs one call instead of one per byte. Chunks go onto a
+    deque (append / popleft are atomic, no lock needed); the consumer takes
+    everything queued with `get`. Byte counters are each written by one
+    thread only, which keeps the queue-depth high-water mark exact.
+    """
+
+    def __init__(self, ser, *, read_size: int = READ_SIZE) -> None:
+        self._ser = ser
+        self._buf = bytearray(read_size)
+        self._view = memoryview(self._buf)
+        self._chunks: deque[bytes] = deque()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self.error: BaseException | None = None
+        self.bytes_read = 0  # reader thread only
+        self.reads = 0  # reader thread only
+        self.bytes_taken = 0  # consumer only
+        self.high_water = 0  # most bytes ever queued at once
+        self._thread = threading.Thread(target=self._run, name="serial-reader", daemon=True)
+
+    def start(self) -> SerialReader:
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        try:
+            while not self._stop.is_set():
+                n = self._ser.readinto(self._buf)
+                self.reads += 1
+                if not n:
+                    continue
+                self._chunks.append(bytes(self._view[:n]))
+                self.bytes_read += n
+                queued = self.bytes_read - self.bytes_taken
+                if queued > self.high_water:
+                    self.high_water = queued
+                self._ready.set()
+        except BaseException as err:  # noqa: BLE001 — handed to the consumer
+            self.error = err
+            self._ready.set()
+
+    def get(self, timeout: float) -> bytes:
+        """Everything read since the last call, waiting up to `timeout` for
+        data; b"" on timeout. Raises the reader thread's error, if any."""
+        if not self._chunks:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        parts = []
+        while self._chunks:
+            parts.append(self._chunks.popleft())
+        if not parts and self.error is not None:
+            raise self.error
+        data = b"".join(parts)
+        self.bytes_taken += len(data)
+        return data
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=max(1.0, READ_TIMEOUT * 10))
+
+
+class _Rates:
+    """Per-interval rates from a reader's running counters."""
+
+    def __init__(self, reader: SerialReader, now: float) -> None:
+        self._reader = reader
+        self._at = now
+        self._bytes = 0
+        self._reads = 0
+
+    def snapshot(self, now: float) -> dict[str, float]:
+        r = self._reader
+        elapsed = max(now - self._at, 1e-9)
+        stats = {
+            "bytes_per_s": round((r.bytes_read - self._bytes) / elapsed, 1),
+            "reads_per_s": round((r.reads - self._reads) / elapsed, 1),
+            "bytes_total": r.bytes_read,
+            "queue_high_water": r.high_water,
+        }
+        self._at, self._bytes, self._reads = now, r.bytes_read, r.reads
+        return stats
+
+
+def open_serial(port: str, baud: int):
+    ser = serial.Serial(
+        port, baud, timeout=READ_TIMEOUT, inter_byte_timeout=INTER_BYTE_TIMEOUT
+    )
+    if hasattr(ser, "set_buffer_size"):  # Windows only
+        ser.set_buffer_size(rx_size=DRIVER_BUFFER)
+    return ser
+
+
+def _port_batches(
+    port: str, baud: int, idle_timeout: float, stats_interval: float
+) -> Iterator[list[SourceEvent]]:
+    """The events of one port, reconnecting forever, one list per read."""
     while True:
         try:
-            ser = serial.Serial(port, baud, timeout=1)
+            ser = open_serial(port, baud)
         except serial.SerialException:
             time.sleep(RECONNECT_INTERVAL)
             continue
 
-        yield SourceEvent(kind="connected", port=port)
+        yield [SourceEvent(kind="connected", port=port)]
 
+        reader = SerialReader(ser).start()
         buf = b""
-        last_data = time.time()
+        last_data = time.monotonic()
+        rates = _Rates(reader, last_data)
+        sync = SyncStats()
+        next_stats = last_data + stats_interval
         try:
             while True:
-                chunk = ser.read(max(1, ser.in_waiting))
-                now = time.time()
+                chunk = reader.get(READ_TIMEOUT)
+                now = time.monotonic()
                 if chunk:
                     last_data = now
                     buf += chunk
-                    events, buf = _parse_packets(buf)
-                    for ev in events:
-                        yield ev
+                    events, buf = _parse_packets(buf, sync, port=port)
+                    if events:
+                        yield events
                 elif now - last_data > idle_timeout:
                     raise TimeoutError
+                if now >= next_stats:
+                    stats = rates.snapshot(now)
+                    stats.update(
+                        packets=sync.packets,
+                        desyncs=sync.desyncs,
+                        bytes_discarded=sync.bytes_discarded,
+                    )
+                    yield [SourceEvent(kind="serial_stats", port=port, stats=stats)]
+                    next_stats = now + stats_interval
         except (serial.SerialException, OSError, TimeoutError):
-            yield SourceEvent(kind="disconnected")
+            yield [SourceEvent(kind="disconnected", port=port)]
+        finally:
+            reader.stop()
             try:
                 ser.close()
             except Exception:  # noqa: BLE001
                 pass
+
+
+def serial_events(
+    port: str,
+    baud: int = 9600,
+    idle_timeout: float = IDLE_TIMEOUT,
+    *,
+    stats_interval: float = STATS_INTERVAL,
+) -> Iterator[SourceEvent]:
+    with closing(_port_batches(port, baud, idle_timeout, stats_interval)) as batches:
+        for batch in batches:
+            yield from batch
+
+
+class FrameDeduper:
+    """Drops a frame already received on another port.
+
+    Every basestation forwards the same CanFrame records, so a frame heard
+    by two radios arrives twice with the same (frame_id, ts_ms, data). A
+    key is remembered for `window` seconds after it was first seen; one
+    dict lookup per frame keeps the cost independent of the port count.
+    """
+
+    def __init__(self, window: float = DEDUP_WINDOW) -> None:
+        self.window = window
+        self._seen: dict[tuple, str] = {}
+        self._order: deque[tuple[float, tuple]] = deque()
+        self.dropped: dict[str, int] = {}
+
+    def accept(self, ev: SourceEvent, now: float) -> bool:
+        order = self._order
+        while order and order[0][0] <= now:
+            del self._seen[order.popleft()[1]]
+        key = (ev.frame_id, ev.ts_ms, ev.data)
+        first = self._seen.get(key)
+        if first is None:
+            self._seen[key] = ev.port
+            order.append((now + self.window, key))
+            return True
+        if first == ev.port:
+            return True  # a genuine repeat on the same link
+        self.dropped[ev.port] = self.dropped.get(ev.port, 0) + 1
+        return False
+
+
+def merged_serial_events(
+    ports: list[str],
+    baud: int = 9600,
+    idle_timeout: float = IDLE_TIMEOUT,
+    *,
+    stats_interval: float = STATS_INTERVAL,
+    dedup_window: float = DEDUP_WINDOW,
+) -> Iterator[SourceEvent]:
+    """One SourceEvent stream from several basestations.
+
+    Each port is read and parsed on its own thread; the threads hand whole
+    per-read batches to this generator through one queue. The merged
+    stream is "connected" while any port is and "disconnected" once all
+    are; frames heard on more than one port are passed on once
+    (`FrameDeduper`). signal_quality and serial_stats events keep their
+    port, and serial_stats also counts that port's dropped duplicates.
+    """
+    batches: queue.SimpleQueue[list[SourceEvent]] = queue.SimpleQueue()
+    stop = threading.Event()
+
+    def pump(port: str) -> None:
+        with closing(_port_batches(port, baud, idle_timeout, stats_interval)) as source:
+            for batch in source:
+                if stop.is_set():
+                    return
+                batches.put(batch)
+
+    for port in ports:
+        threading.Thread(target=pump, args=(port,), name=f"serial-{port}", daemon=True).start()
+
+    dedup = FrameDeduper(dedup_window)
+    up: set[str] = set()
+    try:
+        while True:
+            batch = batches.get()
+            now = time.monotonic()
+            for ev in batch:
+                if ev.kind == "frame":
+                    if dedup.accept(ev, now):
+                        yield ev
+                elif ev.kind == "connected":
+                    if not up:
+                        yield ev
+                    up.add(ev.port)
+                elif ev.kind == "disconnected":
+                    up.discard(ev.port)
+                    if not up:
+                        yield ev
+                elif ev.kind == "serial_stats":
+                    stats = dict(ev.stats or {}, duplicates=dedup.dropped.get(ev.port, 0))
+                    yield SourceEvent(kind="serial_stats", port=ev.port, stats=stats)
+                else:
+                    yield ev
+    finally:
+        stop.set()
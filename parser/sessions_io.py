@@ -0,0 +1,358 @@
+"""Fast NumPy read API for stored sessions.
+
+For analysis scripts and notebooks that want whole signals, not HTTP-sized
+windows:
+
+    import psycopg, sessions_io
+    with psycopg.connect(dsn) as conn:
+        ids = sessions_io.resolve_signal_ids(conn, ["BMS_SOC", "PDM.bus_v"])
+        data = sessions_io.load_signals(conn, session_id, ids.values())
+        ts_us, soc = data[ids["BMS_SOC"]]
+
+Rows leave Postgres as `COPY ... TO STDOUT (FORMAT BINARY)`, and each block
+is parsed with a single `np.frombuffer` over a fixed 26-byte record dtype —
+no per-row Python, no text parsing. `iter_signal_chunks` streams bounded
+chunks (constant memory); `load_signal` fills one preallocated array sized
+from `session_signal_stats` when it can.
+
+Levels:
+  "raw" — every sample. Read from sd_segments when the session stores the
+          signal there (decode is cheaper than shipping rows), otherwise
+          from sd_readings.
+  "1s"  — the sd_rollup_1s mean per second (value_sum / sample_n), stamped
+          at the bucket start.
+
+Timestamps come back as int64 microseconds since the Unix epoch.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, Sequence
+from uuid import UUID
+
+import numpy as np
+import psycopg
+
+from columns import to_epoch_us
+from segments import iter_segment_window, read_segment_window
+
+LEVELS = ("raw", "1s")
+DEFAULT_CHUNK_ROWS = 1 << 20
+
+# Postgres binary timestamps count microseconds from 2000-01-01 UTC.
+PG_EPOCH_OFFSET_US = 946_684_800 * 1_000_000
+
+# Binary COPY framing: 11-byte signature, int32 flags, int32 extension length.
+_COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+_COPY_HEADER_SIZE = len(_COPY_SIGNATURE) + 8
+# One (timestamptz, float8) tuple: int16 field count, then per field an
+# int32 length and the 8-byte big-endian payload.
+_ROW_DTYPE = np.dtype(
+    [
+        ("nfields", ">i2"),
+        ("ts_len", ">i4"),
+        ("ts", ">i8"),
+        ("value_len", ">i4"),
+        ("value", ">f8"),
+    ]
+)
+_TRAILER = b"\xff\xff"
+
+
+def resolve_signal_ids(
+    conn: psycopg.Connection, names: Iterable[str]
+) -> dict[str, int]:
+    """Map "signal_name" or "source.signal_name" to signal_definitions ids.
+
+    Bare names must be unambiguous across sources.
+    """
+    rows = conn.execute(
+        "SELECT id, source, signal_name FROM signal_definitions"
+    ).fetchall()
+    by_qualified = {f"{src}.{name}": sid for sid, src, name in rows}
+    by_name: dict[str, list[int]] = {}
+    for sid, _src, name in rows:
+        by_name.setdefault(name, []).append(sid)
+    out: dict[str, int] = {}
+    for name in names:
+        if name in by_qualified:
+            out[name] = by_qualified[name]
+            continue
+        matches = by_name.get(name, [])
+        if len(matches) != 1:
+            raise KeyError(
+                f"{name!r} matches {len(matches)} signals; use source.signal_name"
+            )
+        out[name] = matches[0]
+    return out
+
+
+def _parse_rows(rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    ts = rows["ts"].astype(np.int64) + PG_EPOCH_OFFSET_US
+    return ts, rows["value"].astype(np.float64)
+
+
+def _copy_query(level: str, start: datetime | None, end: datetime | None) -> str:
+    if level == "raw":
+        table, ts_col, value_expr = "sd_readings", "ts", "value"
+    else:
+        table, ts_col, value_expr = "sd_rollup_1s", "ts_bucket", "value_sum / sample_n"
+    where = "session_id = %(session)s AND signal_id = %(signal)s"
+    if start is not None:
+        where += f" AND {ts_col} >= %(start)s"
+    if end is not None:
+        where += f" AND {ts_col} < %(end)s"
+    return (
+        f"COPY (SELECT {ts_col}, ({value_expr})::float8 FROM {table} "
+        f"WHERE {where} ORDER BY {ts_col}) TO STDOUT (FORMAT BINARY)"
+    )
+
+
+def _has_segments(conn: psycopg.Connection, session_id: UUID, signal_id: int) -> bool:
+    row = conn.execute(
+        "SELECT EXISTS (SELECT 1 FROM sd_segments "
+        "WHERE session_id = %s AND signal_id = %s)",
+        (str(session_id), signal_id),
+    ).fetchone()
+    return bool(row[0])
+
+
+def iter_copy_records(
+    conn: psycopg.Connection,
+    query: str,
+    params: object,
+    dtype: np.dtype,
+    *,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[np.ndarray]:
+    """Run a `COPY (...) TO STDOUT (FORMAT BINARY)` and yield record arrays.
+
+    `dtype` must describe one fixed-width tuple as it appears on the wire
+    (int16 field count, then int32 length + big-endian payload per field;
+    no NULLs). Yields arrays of at most `chunk_rows` records.
+    """
+    row_size = dtype.itemsize
+    pending = bytearray()
+    header_done = False
+    target = chunk_rows * row_size
+    with conn.cursor() as cur:
+        with cur.copy(query, params) as copy:
+            for block in copy:
+                pending += block
+                if not header_done:
+                    if len(pending) < _COPY_HEADER_SIZE:
+                        continue
+                    if bytes(pending[: len(_COPY_SIGNATURE)]) != _COPY_SIGNATURE:
+                        raise ValueError("unexpected COPY BINARY header")
+                    ext_len = int.from_bytes(
+                        pending[_COPY_HEADER_SIZE - 4 : _COPY_HEADER_SIZE], "big"
+                    )
+                    if len(pending) < _COPY_HEADER_SIZE + ext_len:
+                        continue
+                    del pending[: _COPY_HEADER_SIZE + ext_len]
+                    header_done = True
+                while len(pending) >= target:
+                    yield np.frombuffer(bytes(pending[:target]), dtype=dtype)
+                    del pending[:target]
+    if pending.endswith(_TRAILER):
+        del pending[-len(_TRAILER) :]
+    if len(pending) % row_size:
+        raise ValueError("truncated COPY BINARY stream")
+    if pending:
+        yield np.frombuffer(bytes(pending), dtype=dtype)
+
+
+def _rechunk(
+    parts: Iterable[tuple[np.ndarray, np.ndarray]], chunk_rows: int
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Re-cut a stream of (ts_us, value) pieces into chunks of `chunk_rows`."""
+    pending: list[tuple[np.ndarray, np.ndarray]] = []
+    held = 0
+    for ts, values in parts:
+        if not ts.size:
+            continue
+        pending.append((ts, values))
+        held += ts.size
+        if held < chunk_rows:
+            continue
+        ts = np.concatenate([p[0] for p in pending])
+        values = np.concatenate([p[1] for p in pending])
+        cut = ts.size - ts.size % chunk_rows
+        for lo in range(0, cut, chunk_rows):
+            yield ts[lo : lo + chunk_rows], values[lo : lo + chunk_rows]
+        pending = [(ts[cut:], values[cut:])] if cut < ts.size else []
+        held = ts.size - cut
+    if held:
+        yield (
+            np.concatenate([p[0] for p in pending]),
+            np.concatenate([p[1] for p in pending]),
+        )
+
+
+def iter_signal_chunks(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    signal_id: int,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    level: str = "raw",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream one signal as (ts_us, value) chunks of at most `chunk_rows`.
+
+    Memory stays bounded by one chunk regardless of session length. Segment
+    storage is decoded one segment at a time and re-cut into chunks, so it
+    holds at most one chunk plus one segment.
+    """
+    if level not in LEVELS:
+        raise ValueError(f"invalid level: {level!r}")
+    if level == "raw" and _has_segments(conn, session_id, signal_id):
+        yield from _rechunk(
+            (
+                (ts, values)
+                for _sid, ts, values in iter_segment_window(
+                    conn, session_id, [signal_id], start, end
+                )
+            ),
+            chunk_rows,
+        )
+        return
+
+    params = {"session": str(session_id), "signal": signal_id, "start": start, "end": end}
+    for rows in iter_copy_records(
+        conn, _copy_query(level, start, end), params, _ROW_DTYPE, chunk_rows=chunk_rows
+    ):
+        yield _parse_rows(rows)
+
+
+def neighbour_samples(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    signal_id: int,
+    at: datetime,
+) -> tuple[tuple[int, float] | None, tuple[int, float] | None]:
+    """The last sample before `at` and the first sample at or after it, as
+    (ts_us, value) pairs (None past either end of the signal).
+
+    Lets windowed readers (resampling, interpolation) see across a window
+    edge without fetching the neighbouring window.
+    """
+    sid = str(session_id)
+    if _has_segments(conn, session_id, signal_id):
+        before = conn.execute(
+            "SELECT ts_start FROM sd_segments WHERE session_id = %s AND signal_id = %s "
+            "AND ts_start < %s ORDER BY ts_start DESC LIMIT 1",
+            (sid, signal_id, at),
+        ).fetchone()
+        after = conn.execute(
+            "SELECT ts_end FROM sd_segments WHERE session_id = %s AND signal_id = %s "
+            "AND ts_end >= %s ORDER BY ts_start LIMIT 1",
+            (sid, signal_id, at),
+        ).fetchone()
+        prev = nxt = None
+        if before is not None:
+            ts, values = read_segment_window(
+                conn, session_id, [signal_id], start=before[0], end=at
+            )[signal_id]
+            if ts.size:
+                prev = (int(ts[-1]), float(values[-1]))
+        if after is not None:
+            ts, values = read_segment_window(
+                conn, session_id, [signal_id], start=at,
+                end=after[0] + timedelta(microseconds=1),
+            )[signal_id]
+            if ts.size:
+                nxt = (int(ts[0]), float(values[0]))
+        return prev, nxt
+
+    def one(query: str) -> tuple[int, float] | None:
+        row = conn.execute(query, (sid, signal_id, at)).fetchone()
+        return (to_epoch_us(row[0]), float(row[1])) if row is not None else None
+
+    return (
+        one(
+            "SELECT ts, value FROM sd_readings WHERE session_id = %s "
+            "AND signal_id = %s AND ts < %s ORDER BY ts DESC LIMIT 1"
+        ),
+        one(
+            "SELECT ts, value FROM sd_readings WHERE session_id = %s "
+            "AND signal_id = %s AND ts >= %s ORDER BY ts LIMIT 1"
+        ),
+    )
+
+
+def _expected_rows(
+    conn: psycopg.Connection, session_id: UUID, signal_id: int
+) -> int | None:
+    row = conn.execute(
+        "SELECT sample_n FROM session_signal_stats "
+        "WHERE session_id = %s AND signal_id = %s",
+        (str(session_id), signal_id),
+    ).fetchone()
+    return int(row[0]) if row is not None else None
+
+
+def load_signal(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    signal_id: int,
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    level: str = "raw",
+) -> tuple[np.ndarray, np.ndarray]:
+    """Load one signal into contiguous (ts_us, value) arrays."""
+    expected = None
+    if level == "raw" and start is None and end is None:
+        expected = _expected_rows(conn, session_id, signal_id)
+
+    if expected is not None:
+        # Exact size known from session_signal_stats: fill in place, no
+        # intermediate list of chunks and no final concatenate copy.
+        ts_out = np.empty(expected, dtype=np.int64)
+        value_out = np.empty(expected, dtype=np.float64)
+        filled = 0
+        overflow: list[tuple[np.ndarray, np.ndarray]] = []
+        for ts, values in iter_signal_chunks(conn, session_id, signal_id, level=level):
+            take = min(ts.size, expected - filled)
+            ts_out[filled : filled + take] = ts[:take]
+            value_out[filled : filled + take] = values[:take]
+            filled += take
+            if take < ts.size:
+                overflow.append((ts[take:], values[take:]))
+        if filled == expected and not overflow:
+            return ts_out, value_out
+        # Stats were stale; fall through to the general path's result shape.
+        parts = [(ts_out[:filled], value_out[:filled]), *overflow]
+    else:
+        parts = list(
+            iter_signal_chunks(
+                conn, session_id, signal_id, start=start, end=end, level=level
+            )
+        )
+
+    if not parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    return (
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+    )
+
+
+def load_signals(
+    conn: psycopg.Connection,
+    session_id: UUID,
+    signal_ids: Sequence[int] | Iterable[int],
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    level: str = "raw",
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    """Load several signals; returns {signal_id: (ts_us, value)}."""
+    return {
+        int(sid): load_signal(
+            conn, session_id, int(sid), start=start, end=end, level=level
+        )
+        for sid in signal_ids
+    }
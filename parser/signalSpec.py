@@ -51,3 +51,44 @@ class MessageSpec:
             f"MessageSpec(frame_id=0x{self.frame_id:X}, "
             f"name={self.name}, signals={len(self.signals)})"
         )
+
+
+# Describes a channel computed from other signals (see derived.py).
+class DerivedSpec:
+    def __init__(self, name, source, expression, unit=None):
+        if not name:
+            raise ValueError("DerivedSpec must have a name")
+
+        self.name = name
+        self.source = source
+        # A parsed derived.Expression
+        self.expression = expression
+        self.unit = unit
+
+    def __repr__(self):
+        return (
+            f"DerivedSpec(source={self.source}, name={self.name}, "
+            f"expression={self.expression.text!r})"
+        )
+
+
+# Describes one event-index rule over a signal (see events.py).
+class EventRule:
+    def __init__(self, signal, kind, param=None, hysteresis=0.0):
+        if not signal:
+            raise ValueError("EventRule must name a signal")
+
+        self.signal = signal
+        self.kind = kind
+        self.param = param
+        self.hysteresis = hysteresis
+
+    @property
+    def label(self):
+        # Stored as session_events.kind, e.g. "below:0.2", "bit:3", "change".
+        if self.param is None:
+            return self.kind
+        return f"{self.kind}:{self.param:g}"
+
+    def __repr__(self):
+        return f"EventRule(signal={self.signal}, kind={self.label})"
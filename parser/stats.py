@@ -0,0 +1,202 @@
+"""Per-session, per-signal summary statistics (`session_signal_stats`).
+
+Computed by the batch importer from the decoded columns, so the session
+picker, signal list and distribution widgets read one small row per signal
+instead of scanning sd_readings. Live sessions get the same rows from the
+SQL twin `populate_session_signal_stats` when they are flushed.
+
+Non-finite values (NaN/±inf from IEEE float signals) count towards
+`sample_n` but are excluded from min/max/mean and the histogram, matching
+the SQL implementation.
+
+Imports that don't keep the decoded columns use `StatsAccumulator`, which
+produces the same row from the stream in constant memory per signal.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from columns import SignalColumns
+
+# Equal-width bins spanning [value_min, value_max]; the last bin is closed so
+# value_max lands in it. Keep in sync with populate_session_signal_stats.
+HISTOGRAM_BINS = 32
+
+
+@dataclass(frozen=True)
+class SignalStats:
+    signal_id: int
+    sample_n: int
+    value_min: float
+    value_max: float
+    value_mean: float
+    first_ts_us: int
+    last_ts_us: int
+    histogram: list[int]
+
+
+def histogram(values: np.ndarray, vmin: float, vmax: float) -> np.ndarray:
+    """Bin finite `values` into HISTOGRAM_BINS equal-width bins."""
+    if values.size == 0:
+        return np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    if not vmax > vmin:
+        out = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+        out[0] = values.size
+        return out
+    idx = ((values - vmin) / (vmax - vmin) * HISTOGRAM_BINS).astype(np.int64)
+    np.clip(idx, 0, HISTOGRAM_BINS - 1, out=idx)
+    return np.bincount(idx, minlength=HISTOGRAM_BINS)
+
+
+def compute_signal_stats(
+    signal_id: int, ts_us: np.ndarray, values: np.ndarray
+) -> SignalStats:
+    finite = values[np.isfinite(values)]
+    if finite.size:
+        vmin, vmax = float(finite.min()), float(finite.max())
+        mean = float(finite.mean())
+    else:
+        vmin = vmax = mean = float("nan")
+    return SignalStats(
+        signal_id=signal_id,
+        sample_n=int(values.size),
+        value_min=vmin,
+        value_max=vmax,
+        value_mean=mean,
+        first_ts_us=int(ts_us[0]),
+        last_ts_us=int(ts_us[-1]),
+        histogram=histogram(finite, vmin, vmax).tolist(),
+    )
+
+
+def compute_session_stats(columns: SignalColumns) -> list[SignalStats]:
+    return [
+        compute_signal_stats(signal_id, ts_us, values)
+        for signal_id, ts_us, values in columns.items()
+        if ts_us.size
+    ]
+
+
+class StatsAccumulator:
+    """Streaming `compute_signal_stats` for one signal.
+
+    The finite value range [vmin, vmax] must be known up front (the batch
+    importer's first pass collects it) so each sample can be binned as it
+    arrives; samples outside it are clipped into the end bins.
+    """
+
+    __slots__ = ("signal_id", "vmin", "vmax", "sample_n", "finite_n", "total",
+                 "first_ts_us", "last_ts_us", "hist")
+
+    def __init__(self, signal_id: int, vmin: float, vmax: float) -> None:
+        self.signal_id = signal_id
+        self.vmin = vmin
+        self.vmax = vmax
+        self.sample_n = 0
+        self.finite_n = 0
+        self.total = 0.0
+        self.first_ts_us: int | None = None
+        self.last_ts_us: int | None = None
+        self.hist = [0] * HISTOGRAM_BINS
+
+    def add(self, ts_us: int, value: float) -> None:
+        self.sample_n += 1
+        if self.first_ts_us is None or ts_us < self.first_ts_us:
+            self.first_ts_us = ts_us
+        if self.last_ts_us is None or ts_us > self.last_ts_us:
+            self.last_ts_us = ts_us
+        if not math.isfinite(value):
+            return
+        self.finite_n += 1
+        self.total += value
+        if self.vmax > self.vmin:
+            b = int((value - self.vmin) / (self.vmax - self.vmin) * HISTOGRAM_BINS)
+            self.hist[min(max(b, 0), HISTOGRAM_BINS - 1)] += 1
+        else:
+            self.hist[0] += 1
+
+    def extend(self, ts_us: np.ndarray, values: np.ndarray) -> None:
+        """Add whole arrays at once (e.g. a vectorised decode)."""
+        if ts_us.size == 0:
+            return
+        self.sample_n += int(values.size)
+        lo, hi = int(ts_us.min()), int(ts_us.max())
+        self.first_ts_us = lo if self.first_ts_us is None else min(self.first_ts_us, lo)
+        self.last_ts_us = hi if self.last_ts_us is None else max(self.last_ts_us, hi)
+        finite = values[np.isfinite(values)]
+        self.finite_n += int(finite.size)
+        self.total += float(finite.sum())
+        self.hist = (
+            np.asarray(self.hist) + histogram(finite, self.vmin, self.vmax)
+        ).tolist()
+
+    def result(self) -> SignalStats | None:
+        if self.first_ts_us is None or self.last_ts_us is None:
+            return None
+        if self.finite_n:
+            vmin, vmax, mean = self.vmin, self.vmax, self.total / self.finite_n
+        else:
+            vmin = vmax = mean = float("nan")
+        return SignalStats(
+            signal_id=self.signal_id,
+            sample_n=self.sample_n,
+            value_min=vmin,
+            value_max=vmax,
+            value_mean=mean,
+            first_ts_us=self.first_ts_us,
+            last_ts_us=self.last_ts_us,
+            histogram=list(self.hist),
+        )
+
+
+def _rebin(hist: np.ndarray, vmin: float, vmax: float, new_min: float, new_max: float) -> np.ndarray:
+    """Move a histogram's counts onto a wider range by bin centre."""
+    if not vmax > vmin:
+        centres = np.full(HISTOGRAM_BINS, vmin)
+    else:
+        width = (vmax - vmin) / HISTOGRAM_BINS
+        centres = vmin + (np.arange(HISTOGRAM_BINS) + 0.5) * width
+    out = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    if not new_max > new_min:
+        out[0] = hist.sum()
+        return out
+    idx = ((centres - new_min) / (new_max - new_min) * HISTOGRAM_BINS).astype(np.int64)
+    np.clip(idx, 0, HISTOGRAM_BINS - 1, out=idx)
+    np.add.at(out, idx, hist)
+    return out
+
+
+def merge_signal_stats(old: SignalStats, new: SignalStats) -> SignalStats:
+    """Combine stats of a signal's earlier and later samples (append import).
+
+    Count, min, max, mean and first/last timestamps are exact. When the
+    value range grows, the earlier histogram is re-binned by bin centre,
+    so it is approximate to within one old bin width.
+    """
+    old_hist = np.asarray(old.histogram, dtype=np.int64)
+    new_hist = np.asarray(new.histogram, dtype=np.int64)
+    old_n, new_n = int(old_hist.sum()), int(new_hist.sum())  # finite samples
+    if old_n == 0 or new_n == 0:
+        finite = old if new_n == 0 else new
+        vmin, vmax, mean = finite.value_min, finite.value_max, finite.value_mean
+        hist = old_hist + new_hist
+    else:
+        vmin = min(old.value_min, new.value_min)
+        vmax = max(old.value_max, new.value_max)
+        mean = (old.value_mean * old_n + new.value_mean * new_n) / (old_n + new_n)
+        hist = _rebin(old_hist, old.value_min, old.value_max, vmin, vmax) + _rebin(
+            new_hist, new.value_min, new.value_max, vmin, vmax
+        )
+    return SignalStats(
+        signal_id=old.signal_id,
+        sample_n=old.sample_n + new.sample_n,
+        value_min=vmin,
+        value_max=vmax,
+        value_mean=mean,
+        first_ts_us=min(old.first_ts_us, new.first_ts_us),
+        last_ts_us=max(old.last_ts_us, new.last_ts_us),
+        histogram=hist.tolist(),
+    )
@@ -0,0 +1,95 @@
+"""Signal subscriptions: emit (and optionally decode) only what is on screen.
+
+Live mode emits every decoded signal as `frames` on stdout even when the
+dock shows six widgets. The desktop can instead tell the parser which
+signal_ids the UI displays, one JSON command per line on stdin:
+
+    {"type": "subscribe", "signal_ids": [3, 17, 42]}
+    {"type": "subscribe", "signal_ids": null}    # everything again
+
+`run_live` then builds a decode plan (`plan_for`): the DBC restricted to
+the subscribed signals, so unsubscribed messages are skipped without
+decoding. What goes to the database is a policy (`DB_SIGNALS`):
+
+  "all"        — keep full coverage in the database; every frame is
+                 decoded with the full table, only subscribed signals
+                 are emitted (default). This saves IPC, not decode CPU.
+  "subscribed" — decode, store and emit just the subscribed signals, so
+                 CPU and IPC scale with what is displayed.
+
+Until the first command everything is decoded and emitted, as before.
+"""
+from __future__ import annotations
+
+import json
+import sys
+import threading
+from typing import Iterable, TextIO
+
+from signalSpec import MessageSpec
+
+DB_SIGNALS = ("all", "subscribed")
+
+
+class Subscriptions:
+    """The current selection, swapped atomically; safe to set from the
+    command-reader thread while the live loop reads it."""
+
+    def __init__(self, signal_ids: Iterable[int] | None = None) -> None:
+        self._state: tuple[int, frozenset[int] | None] = (
+            0,
+            None if signal_ids is None else frozenset(signal_ids),
+        )
+
+    @property
+    def state(self) -> tuple[int, frozenset[int] | None]:
+        """(version, selected signal_ids or None for everything)."""
+        return self._state
+
+    def set(self, signal_ids: Iterable[int] | None) -> None:
+        selected = None if signal_ids is None else frozenset(int(i) for i in signal_ids)
+        self._state = (self._state[0] + 1, selected)
+
+
+def plan_for(
+    decode_table: dict,
+    signal_ids: dict[tuple[int, str], int],
+    selected: frozenset[int] | None,
+) -> dict:
+    """`decode_table` restricted to the signals in `selected`
+    (`signal_ids` maps (frame_id, signal_name) to signal_id). Messages
+    keep their required_bytes, so a short frame is rejected exactly as by
+    the full table."""
+    if selected is None:
+        return decode_table
+    plan = {}
+    for frame_id, msg in decode_table.items():
+        signals = [s for s in msg.signals if signal_ids.get((frame_id, s.name)) in selected]
+        if signals:
+            plan[frame_id] = MessageSpec(
+                frame_id, msg.name, signals, msg.required_bytes, sender=msg.sender
+            )
+    return plan
+
+
+def read_commands(stream: TextIO, subscriptions: Subscriptions) -> None:
+    """Apply commands from `stream` until it closes. Bad lines are
+    reported on stderr (stdout belongs to the protocol) and skipped."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            command = json.loads(line)
+            if command.get("type") != "subscribe":
+                raise ValueError(f"unknown command {command.get('type')!r}")
+            subscriptions.set(command["signal_ids"])
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            print(f"ignoring command {line.strip()!r}: {err}", file=sys.stderr, flush=True)
+
+
+def start_command_reader(stream: TextIO, subscriptions: Subscriptions) -> threading.Thread:
+    thread = threading.Thread(
+        target=read_commands, args=(stream, subscriptions), name="stdin-commands", daemon=True
+    )
+    thread.start()
+    return thread
@@ -3,13 +3,17 @@
 `scratch_db` creates a throwaway Postgres database, applies the
 `desktop/migrations/*.sql` files in order, yields a connection URL, and
 drops the database on teardown. Mirrors the TS test harness in Plan 1.
+
+`write_nfr` builds a synthetic .nfr log from (ts_ms, frame_id, data)
+tuples; tests import it with `from tests.conftest import write_nfr`.
 """
 from __future__ import annotations
 
 import os
 import secrets
+import struct
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 from urllib.parse import urlparse, urlunparse
 
 import psycopg
@@ -23,6 +27,36 @@ MIGRATIONS_DIR = (
 )
 
 
+def nfr_header(*, month: int = 4, day: int = 22) -> bytes:
+    """20-byte .nfr header: 9 filler bytes + (weekday, month, day, year)
+    + (hours=12, minutes=0, seconds=0, subseconds=0)."""
+    return bytes(9) + struct.pack("<BBBB", 3, month, day, 26) + struct.pack("<BBBI", 12, 0, 0, 0)
+
+
+NFR_HEADER = nfr_header()
+
+
+def nfr_frames(frames: Iterable[tuple[int, int, bytes]], *, pad: bytes = b"\x00") -> bytes:
+    """18-byte records (4 ts + 4 id + 2 dlc + 8 data); dlc is len(data)
+    and the rest of the data slot is filled with `pad`."""
+    body = bytearray()
+    for ts_ms, frame_id, data in frames:
+        body += struct.pack("<IIH", ts_ms, frame_id, len(data))
+        body += data + pad * (8 - len(data))
+    return bytes(body)
+
+
+def write_nfr(
+    path: Path,
+    frames: Iterable[tuple[int, int, bytes]],
+    *,
+    header: bytes = NFR_HEADER,
+    pad: bytes = b"\x00",
+) -> Path:
+    path.write_bytes(header + nfr_frames(frames, pad=pad))
+    return path
+
+
 def _with_database(url: str, name: str) -> str:
     parsed = urlparse(url)
     return urlunparse(parsed._replace(path=f"/{name}"))
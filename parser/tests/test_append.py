@@ -0,0 +1,161 @@
+"""Tests for parser.append — incremental import of a growing .nfr."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import psycopg
+import pytest
+
+import append
+from append import run_append_import
+from batch import run_batch_import, session_id_from_file
+from protocol import ProtocolEmitter
+from sessions_io import load_signal
+from tests.conftest import NFR_HEADER, nfr_frames
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x150,BMS_Current,BMS,Battery_Current,0,16,0.1,0,A,uint16
+0x151,BMS_Voltage,BMS,Battery_Voltage,0,16,0.1,0,V,uint16
+,BMS_Voltage,,Fault_Bits,16,8,1,0,,uint8
+"""
+DERIVED_CSV = "Source,Signal Name,Expression,Unit\nDerived,Pack_Power,Battery_Voltage * Battery_Current,W\n"
+EVENTS_CSV = "Signal,Kind,Param,Hysteresis\nFault_Bits,bit,0,\nPack_Power,above,600,\n"
+
+
+def _frames(n: int) -> bytes:
+    frames = []
+    for i in range(n):
+        frames.append((i * 40, 0x150, struct.pack("<H", 100 + i % 37)))
+        if i % 3 == 0:
+            frames.append((i * 40 + 7, 0x151, struct.pack("<HB", 400 + i % 200, (i // 30) % 2)))
+    return nfr_frames(frames)
+
+
+def _summary(conn: psycopg.Connection, session_id) -> dict:
+    q = lambda sql: conn.execute(sql, (session_id,)).fetchall()  # noqa: E731
+    return {
+        "ended": q("SELECT ended_at, row_count FROM sessions WHERE id = %s"),
+        "stats": q(
+            "SELECT d.signal_name, s.sample_n, s.value_min, s.value_max, "
+            "round(s.value_mean::numeric, 9), s.first_ts, s.last_ts "
+            "FROM session_signal_stats s JOIN signal_definitions d ON d.id = s.signal_id "
+            "WHERE s.session_id = %s ORDER BY 1"
+        ),
+        "rollup": q(
+            "SELECT signal_id, ts_bucket, value_min, value_max, round(value_sum::numeric, 6), "
+            "sample_n FROM sd_rollup_1s WHERE session_id = %s ORDER BY 1, 2"
+        ),
+        "events": q(
+            "SELECT ts, signal_name, kind, value FROM list_session_events(%s) ORDER BY 1, 2"
+        ),
+        "samples": {
+            sid: (ts.tolist(), values.tolist())
+            for (sid,) in q("SELECT signal_id FROM session_signal_stats WHERE session_id = %s")
+            for ts, values in [load_signal(conn, session_id, sid)]
+        },
+    }
+
+
+@pytest.mark.parametrize("layout", ["rows", "segments"])
+def test_append_matches_a_full_import(scratch_db: str, tmp_path: Path, layout: str) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    (tmp_path / "dbc.derived.csv").write_text(DERIVED_CSV)
+    (tmp_path / "dbc.events.csv").write_text(EVENTS_CSV)
+    log = tmp_path / "LOG_0040.NFR"
+    full = _frames(900)
+    # A copy taken mid-day ends part-way through a frame.
+    log.write_bytes(NFR_HEADER + full[: len(full) // 2 + 5])
+    first = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+    )
+
+    log.write_bytes(NFR_HEADER + full)
+    appended = run_append_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    assert appended == first
+    # Nothing new: a no-op.
+    assert run_append_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    ) == first
+
+    fresh = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+    )
+    assert fresh != first
+    with psycopg.connect(scratch_db) as conn:
+        got, want = _summary(conn, first), _summary(conn, fresh)
+    assert got == want
+    assert len(want["events"]) > 2
+
+
+def test_failed_append_leaves_the_session_untouched(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    (tmp_path / "dbc.derived.csv").write_text(DERIVED_CSV)
+    log = tmp_path / "LOG_0042.NFR"
+    full = _frames(600)
+    log.write_bytes(NFR_HEADER + full[: len(full) // 2])
+    first = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    count = "SELECT count(*) FROM sd_readings WHERE session_id = %s"
+    with psycopg.connect(scratch_db) as conn:
+        rows_before = conn.execute(count, (first,)).fetchone()[0]
+
+    log.write_bytes(NFR_HEADER + full)
+
+    def fail(*args, **kwargs) -> None:
+        raise RuntimeError("crash before the checkpoint")
+
+    with monkeypatch.context() as m:
+        m.setattr(append, "write_import_checkpoint", fail)
+        with pytest.raises(RuntimeError):
+            run_append_import(
+                dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+                emitter=ProtocolEmitter(io.StringIO()),
+            )
+    with psycopg.connect(scratch_db) as conn:
+        assert conn.execute(count, (first,)).fetchone()[0] == rows_before
+
+    # Running it again appends the tail exactly once.
+    assert run_append_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    ) == first
+    fresh = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    with psycopg.connect(scratch_db) as conn:
+        assert conn.execute(count, (first,)).fetchone()[0] == conn.execute(
+            count, (fresh,)
+        ).fetchone()[0]
+
+
+def test_append_falls_back_to_full_import(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = tmp_path / "LOG_0041.NFR"
+    body = _frames(200)
+    log.write_bytes(NFR_HEADER + body[:1800])
+    first = run_append_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    assert first == session_id_from_file(log)
+
+    # Same header, but the imported bytes were rewritten: not a prefix.
+    changed = bytearray(body)
+    changed[1000] ^= 0xFF
+    log.write_bytes(NFR_HEADER + bytes(changed))
+    second = run_append_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    assert second == session_id_from_file(log) != first
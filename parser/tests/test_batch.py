@@ -11,6 +11,7 @@ import pytest
 
 from batch import run_batch_import
 from protocol import ProtocolEmitter
+from tests.conftest import write_nfr
 
 
 DBC_CSV = """\
@@ -138,3 +139,163 @@ def test_run_batch_import_rejects_missing_file(
     emitter = ProtocolEmitter(buf)
     with pytest.raises(FileNotFoundError):
         run_batch_import(dsn=scratch_db, dbc_csv=dbc, nfr_file=missing, emitter=emitter)
+
+
+def test_partial_import_is_a_separate_session(scratch_db: str, tmp_path: Path) -> None:
+    dbc = _write_dbc(tmp_path)
+    log = _write_log(tmp_path)
+    full = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    tail = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), from_ms=50,
+    )
+    assert tail != full
+    with psycopg.connect(scratch_db) as conn:
+        counts = dict(
+            conn.execute(
+                "SELECT session_id, count(*) FROM sd_readings "
+                "WHERE session_id = ANY(%s) GROUP BY session_id",
+                ([full, tail],),
+            ).fetchall()
+        )
+        (full_start,), (tail_start,) = (
+            conn.execute("SELECT started_at FROM sessions WHERE id = %s", (s,)).fetchone()
+            for s in (full, tail)
+        )
+    # ts >= 50: the soc frame and the second PDM frame.
+    assert counts == {full: 5, tail: 3}
+    assert (tail_start - full_start).total_seconds() == 0.05
+
+
+def test_interrupted_import_resumes_from_checkpoint(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import batch
+
+    dbc = _write_dbc(tmp_path)
+    frames = []
+    for i in range(1000):
+        frames.append((i * 10, 0x123, struct.pack("<HB", 1000 + i, i % 3)))
+        if i % 4 == 0:
+            frames.append((i * 10 + 5, 0x456, bytes([i % 200])))
+    log = write_nfr(tmp_path / "LOG_0002.NFR", frames)
+
+    real_iter_frames = batch.iter_frames
+    starts: list[int] = []
+    crash_at: list[int] = [600]
+
+    def iter_frames(path, start=0, stop=None):
+        starts.append(start)
+        if crash_at and start >= crash_at[0]:
+            raise RuntimeError("cancelled")
+        return real_iter_frames(path, start, stop)
+
+    real_read_records = batch.read_records
+    prefix_reads: list[tuple[int, int]] = []
+
+    def read_records(path, start=0, stop=None):
+        prefix_reads.append((start, stop))
+        return real_read_records(path, start, stop)
+
+    def no_full_pass(*args, **kwargs):
+        raise AssertionError("resumed import re-ran pass 1")
+
+    monkeypatch.setattr(batch, "iter_frames", iter_frames)
+    monkeypatch.setattr(batch, "read_records", read_records)
+    with pytest.raises(RuntimeError, match="cancelled"):
+        run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+            emitter=ProtocolEmitter(io.StringIO()), commit_frames=300,
+        )
+    with psycopg.connect(scratch_db) as conn:
+        listed = conn.execute("SELECT count(*) FROM list_sessions()").fetchone()[0]
+        resume = conn.execute("SELECT frames_done, rows_done FROM import_resume").fetchone()
+        (committed,) = conn.execute("SELECT count(*) FROM sd_readings").fetchone()
+    assert listed == 0  # half-imported: not listed
+    assert resume == (600, committed)
+
+    starts.clear()
+    crash_at.clear()
+    with monkeypatch.context() as m:
+        m.setattr(batch, "iter_frames_between", no_full_pass)
+        session_id = run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+            emitter=ProtocolEmitter(io.StringIO()), commit_frames=300,
+        )
+    assert starts == [600, 900, 1200]  # only the uncommitted frames are re-read
+    assert prefix_reads == [(0, 300), (300, 600)]  # prefix rebuilt per chunk
+
+    def summary() -> tuple:
+        with psycopg.connect(scratch_db) as conn:
+            return (
+                conn.execute("SELECT count(*) FROM list_sessions()").fetchone(),
+                conn.execute("SELECT count(*) FROM import_resume").fetchone(),
+                conn.execute(
+                    "SELECT ended_at, row_count, signal_count FROM sessions WHERE id = %s",
+                    (session_id,),
+                ).fetchone(),
+                conn.execute(
+                    "SELECT signal_id, count(*), round(sum(value)::numeric, 6) FROM sd_readings "
+                    "WHERE session_id = %s GROUP BY 1 ORDER BY 1",
+                    (session_id,),
+                ).fetchall(),
+                conn.execute(
+                    "SELECT signal_id, sample_n, value_min, value_max, histogram "
+                    "FROM session_signal_stats WHERE session_id = %s ORDER BY 1",
+                    (session_id,),
+                ).fetchall(),
+                conn.execute(
+                    "SELECT count(*), sum(sample_n) FROM sd_rollup_1s WHERE session_id = %s",
+                    (session_id,),
+                ).fetchone(),
+            )
+
+    resumed = summary()
+    run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    assert resumed == summary()
+    assert resumed[0] == (1,) and resumed[1] == (0,)
+
+
+def test_crash_after_the_last_chunk_does_not_duplicate_derived_rows(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import batch
+
+    dbc = _write_dbc(tmp_path)
+    (tmp_path / "dbc.derived.csv").write_text(
+        "Source,Signal Name,Expression,Unit\nDerived,Bus_Power,bus_v * soc,W\n"
+    )
+    frames = []
+    for i in range(400):
+        frames.append((i * 10, 0x123, struct.pack("<HB", 1000 + i, i % 3)))
+        if i % 4 == 0:
+            frames.append((i * 10 + 5, 0x456, bytes([i % 200])))
+    log = write_nfr(tmp_path / "LOG_0003.NFR", frames)
+
+    def fail(*args, **kwargs) -> None:
+        raise RuntimeError("crash after the frame loop")
+
+    with monkeypatch.context() as m:
+        m.setattr(batch, "write_session_events", fail)
+        with pytest.raises(RuntimeError, match="frame loop"):
+            run_batch_import(
+                dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+                emitter=ProtocolEmitter(io.StringIO()), commit_frames=200,
+            )
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), commit_frames=200,
+    )
+    with psycopg.connect(scratch_db) as conn:
+        per_signal = conn.execute(
+            "SELECT d.signal_name, count(*), count(DISTINCT r.ts) FROM sd_readings r "
+            "JOIN signal_definitions d ON d.id = r.signal_id "
+            "WHERE r.session_id = %s GROUP BY 1",
+            (session_id,),
+        ).fetchall()
+    assert {name: n for name, n, _ in per_signal}["Bus_Power"] > 0
+    assert all(n == distinct for _name, n, distinct in per_signal)
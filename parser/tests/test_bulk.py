@@ -0,0 +1,189 @@
+"""Tests for parser.bulk — multi-file bulk load through sd_readings_staging."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import psycopg
+import pytest
+
+import bulk
+from batch import run_batch_import
+from bulk import flush_staging, run_bulk_import
+from protocol import ProtocolEmitter
+from tests.conftest import nfr_header, write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def _logs(tmp_path: Path, n: int) -> list[Path]:
+    out = []
+    for k in range(n):
+        frames = []
+        for i in range(300 + 50 * k):
+            frames.append((i * 20, 0x123, struct.pack("<HB", 1100 + i, i % 2)))
+            if i % 5 == 0:
+                frames.append((i * 20 + 3, 0x456, bytes([100 + k])))
+        out.append(
+            write_nfr(tmp_path / f"LOG_{k:04d}.NFR", frames, header=nfr_header(month=4 + k))
+        )
+    return out
+
+
+def _state(conn: psycopg.Connection, session_ids) -> tuple:
+    ids = [str(s) for s in session_ids]
+    return (
+        conn.execute(
+            "SELECT id, ended_at, row_count, signal_count FROM sessions "
+            "WHERE id = ANY(%s::uuid[]) ORDER BY id",
+            (ids,),
+        ).fetchall(),
+        conn.execute(
+            "SELECT session_id, signal_id, count(*), round(sum(value)::numeric, 6) "
+            "FROM sd_readings WHERE session_id = ANY(%s::uuid[]) GROUP BY 1, 2 ORDER BY 1, 2",
+            (ids,),
+        ).fetchall(),
+        conn.execute(
+            "SELECT session_id, signal_id, ts_bucket, value_min, value_max, "
+            "round(value_sum::numeric, 6), sample_n FROM sd_rollup_1s "
+            "WHERE session_id = ANY(%s::uuid[]) ORDER BY 1, 2, 3",
+            (ids,),
+        ).fetchall(),
+    )
+
+
+@pytest.mark.parametrize("rebuild_fraction", [0.0, 1e9])
+def test_bulk_import_matches_file_by_file(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, rebuild_fraction: float
+) -> None:
+    # 0.0 always drops and rebuilds the index; 1e9 never does.
+    monkeypatch.setattr(bulk, "REBUILD_FRACTION", rebuild_fraction)
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    logs = _logs(tmp_path, 5)
+
+    out = io.StringIO()
+    ids = run_bulk_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_files=logs, emitter=ProtocolEmitter(out), flush_every=2
+    )
+    assert len(set(ids)) == 5
+    # Three flushes (2 + 2 + 1 files) plus the recovery check at the start.
+    assert out.getvalue().count('"file":"sd_readings","pct":100') == 4
+    with psycopg.connect(scratch_db) as conn:
+        bulk_state = _state(conn, ids)
+        listed = conn.execute("SELECT count(*) FROM list_sessions()").fetchone()[0]
+        leftovers = conn.execute(
+            "SELECT (SELECT count(*) FROM sd_readings_staging), (SELECT count(*) FROM import_resume)"
+        ).fetchone()
+        index = conn.execute(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = 'sd_readings_lookup_idx'"
+        ).fetchone()
+    assert listed == 5
+    assert leftovers == (0, 0)
+    assert index is not None
+
+    for log in logs:
+        run_batch_import(dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO()))
+    with psycopg.connect(scratch_db) as conn:
+        assert _state(conn, ids) == bulk_state
+
+
+def test_interrupted_bulk_load_stays_hidden_then_recovers(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import batch
+
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    logs = _logs(tmp_path, 3)
+    first = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=logs[0],
+        emitter=ProtocolEmitter(io.StringIO()), staging=True,
+    )
+
+    # The second file is cancelled half-way through its staging.
+    real = batch.compute_session_stats
+
+    def cancelled(columns):
+        raise RuntimeError("cancelled")
+
+    monkeypatch.setattr(batch, "compute_session_stats", cancelled)
+    with pytest.raises(RuntimeError):
+        run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=logs[1],
+            emitter=ProtocolEmitter(io.StringIO()), staging=True,
+        )
+    monkeypatch.setattr(batch, "compute_session_stats", real)
+
+    with psycopg.connect(scratch_db) as conn:
+        assert conn.execute("SELECT count(*) FROM list_sessions()").fetchone()[0] == 0
+        assert conn.execute("SELECT count(*) FROM sd_readings").fetchone()[0] == 0
+        assert set(bulk.staged_sessions(conn)) == {first}
+
+    # The next bulk load publishes the complete file first, then imports
+    # its own files (re-importing the cancelled one).
+    ids = run_bulk_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_files=logs[1:], emitter=ProtocolEmitter(io.StringIO())
+    )
+    with psycopg.connect(scratch_db) as conn:
+        listed = {r[0] for r in conn.execute("SELECT id FROM list_sessions()").fetchall()}
+        assert flush_staging(conn, ProtocolEmitter(io.StringIO())) == 0
+    assert listed == {first, *ids}
+
+
+def test_flush_keeps_rows_still_being_staged(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import batch
+
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    logs = _logs(tmp_path, 2)
+    done = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=logs[0],
+        emitter=ProtocolEmitter(io.StringIO()), staging=True,
+    )
+    # The second file's rows are staged but its import hasn't finished
+    # (rows_done -1), as while another bulk load is still working on it.
+    def cancelled(columns):
+        raise RuntimeError("cancelled")
+
+    with monkeypatch.context() as m:
+        m.setattr(batch, "compute_session_stats", cancelled)
+        with pytest.raises(RuntimeError):
+            run_batch_import(
+                dsn=scratch_db, dbc_csv=dbc, nfr_file=logs[1],
+                emitter=ProtocolEmitter(io.StringIO()), staging=True,
+            )
+    staged = "SELECT session_id, count(*) FROM sd_readings_staging GROUP BY 1"
+    with psycopg.connect(scratch_db) as conn:
+        before = dict(conn.execute(staged).fetchall())
+        assert flush_staging(conn, ProtocolEmitter(io.StringIO())) == before.pop(done)
+        assert dict(conn.execute(staged).fetchall()) == before
+    assert len(before) == 1
+
+
+def test_bulk_load_takes_signal_ids_past_smallint(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute(
+            "SELECT setval(pg_get_serial_sequence('signal_definitions', 'id'), 40000)"
+        )
+    (session_id,) = run_bulk_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_files=_logs(tmp_path, 1),
+        emitter=ProtocolEmitter(io.StringIO()),
+    )
+    with psycopg.connect(scratch_db) as conn:
+        low = conn.execute(
+            "SELECT min(signal_id) FROM sd_readings WHERE session_id = %s", (session_id,)
+        ).fetchone()[0]
+    assert low > 40000
+
@@ -0,0 +1,105 @@
+"""Tests for parser.capture — raw .nfr capture of live frames."""
+from __future__ import annotations
+
+import io
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg
+
+from batch import run_batch_import
+from capture import RawCapture, nfr_header
+from live import SourceEvent, run_live
+from nfr_reader import FRAME_SIZE, HEADER_SIZE, iter_frames, read_header
+from protocol import ProtocolEmitter
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+"""
+
+T0 = datetime(2026, 4, 22, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def test_header_round_trips_to_the_millisecond(tmp_path: Path) -> None:
+    log = tmp_path / "h.nfr"
+    log.write_bytes(nfr_header(T0))
+    assert read_header(log).start_time == T0.replace(microsecond=123000)
+
+
+def test_capture_writes_readable_frames_and_rotates(tmp_path: Path) -> None:
+    with RawCapture(tmp_path, max_bytes=HEADER_SIZE + 3 * FRAME_SIZE) as capture:
+        capture.write(T0, 0x1, b"\x01")  # before start: dropped
+        capture.start(T0)
+        for i in range(5):
+            capture.write(T0 + timedelta(milliseconds=10 * i), 0x100 + i, bytes([i] * (i + 1)))
+        # A wall-clock step backwards never makes ts_ms decrease.
+        capture.write(T0 + timedelta(milliseconds=5), 0x200, b"")
+    assert len(capture.paths) == 2
+    first, second = capture.paths
+    assert first.name.startswith("LIVE_") and second.name.startswith("LIVE_")
+
+    assert list(iter_frames(first)) == [
+        (0, 0x100, b"\x00"),
+        (10, 0x101, b"\x01\x01"),
+        (20, 0x102, b"\x02\x02\x02"),
+    ]
+    # The rotated file starts at its first frame.
+    assert read_header(second).start_time == (T0 + timedelta(milliseconds=30)).replace(
+        microsecond=153000
+    )
+    assert list(iter_frames(second)) == [
+        (0, 0x103, b"\x03" * 4),
+        (10, 0x104, b"\x04" * 5),
+        (10, 0x200, b""),
+    ]
+
+
+def test_live_capture_reimports_to_the_same_values(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    t0 = T0.replace(microsecond=0)
+    events = [SourceEvent(kind="connected", port="/dev/ttyFAKE")]
+    for i in range(20):
+        events.append(
+            SourceEvent(
+                kind="frame",
+                ts_ms=i * 10,
+                frame_id=0x123,
+                data=struct.pack("<H", 1200 + i) + b"\x00" * 6,
+            )
+        )
+    # Not in the DBC: still captured for a later re-decode.
+    events.append(SourceEvent(kind="frame", ts_ms=200, frame_id=0x7FF, data=b"\xff"))
+    events.append(SourceEvent(kind="disconnected"))
+
+    captures = tmp_path / "captures"
+    run_live(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        source=iter(events),
+        emitter=ProtocolEmitter(io.StringIO()),
+        connect_time=t0,
+        capture_dir=captures,
+    )
+    (log,) = captures.iterdir()
+    frames = list(iter_frames(log))
+    assert len(frames) == 21 and frames[-1] == (200, 0x7FF, b"\xff")
+
+    with psycopg.connect(scratch_db) as conn:
+        live_rows = conn.execute(
+            "SELECT ts, value FROM sd_readings r JOIN sessions s ON s.id = r.session_id "
+            "WHERE s.source = 'live' ORDER BY ts"
+        ).fetchall()
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    with psycopg.connect(scratch_db) as conn:
+        imported = conn.execute(
+            "SELECT ts, value FROM sd_readings WHERE session_id = %s ORDER BY ts",
+            (str(session_id),),
+        ).fetchall()
+    assert len(live_rows) == 20
+    assert imported == live_rows
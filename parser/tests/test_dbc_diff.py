@@ -0,0 +1,70 @@
+"""Tests for parser.dbc_diff — DBC snapshots and their diff."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from compile import compile_csv, compile_derived, compile_events
+from dbc_diff import diff_snapshots, snapshot_dbc, snapshot_sha256
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x150,BMS_Current,BMS,Battery_Current,0,16,0.1,0,A,uint16
+0x151,BMS_Voltage,BMS,Battery_Voltage,0,16,0.1,0,V,uint16
+,BMS_Voltage,,Fault_Bits,16,8,1,0,,uint8
+0x152,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+"""
+DERIVED_CSV = """\
+Source,Signal Name,Expression,Unit
+Derived,Pack_Power,Battery_Voltage * Battery_Current,W
+Derived,Pack_kW,Pack_Power / 1000,kW
+Derived,Bus_mV,bus_v * 1000,mV
+"""
+EVENTS_CSV = "Signal,Kind,Param,Hysteresis\nFault_Bits,bit,0,\n"
+
+
+def _snapshot(tmp_path: Path, dbc: str, derived: str = DERIVED_CSV, events: str = EVENTS_CSV) -> dict:
+    path = tmp_path / "dbc.csv"
+    path.write_text(dbc)
+    (tmp_path / "dbc.derived.csv").write_text(derived)
+    (tmp_path / "dbc.events.csv").write_text(events)
+    table = compile_csv(str(path))
+    specs = compile_derived(path, table)
+    return snapshot_dbc(table, specs, compile_events(path, table, specs))
+
+
+def test_identical_dbc_has_empty_diff(tmp_path: Path) -> None:
+    a = _snapshot(tmp_path, DBC_CSV)
+    b = _snapshot(tmp_path, DBC_CSV)
+    assert snapshot_sha256(a) == snapshot_sha256(b)
+    assert diff_snapshots(a, b).empty
+
+
+def test_scale_change_follows_derived_chain(tmp_path: Path) -> None:
+    old = _snapshot(tmp_path, DBC_CSV)
+    new = _snapshot(tmp_path, DBC_CSV.replace("Battery_Voltage,0,16,0.1", "Battery_Voltage,0,16,0.01"))
+    diff = diff_snapshots(old, new)
+    assert diff.decode == {("BMS", "Battery_Voltage")}
+    assert diff.derived == {("Derived", "Pack_Power"), ("Derived", "Pack_kW")}
+    assert not diff.events and not diff.removed
+
+
+def test_units_are_metadata_only(tmp_path: Path) -> None:
+    old = _snapshot(tmp_path, DBC_CSV)
+    new = _snapshot(tmp_path, DBC_CSV.replace("0.1,0,V,", "0.1,0,volts,"))
+    assert snapshot_sha256(old) != snapshot_sha256(new)
+    assert diff_snapshots(old, new).empty
+
+
+def test_removed_signals_and_changed_rules(tmp_path: Path) -> None:
+    old = _snapshot(tmp_path, DBC_CSV)
+    new = _snapshot(
+        tmp_path,
+        DBC_CSV.replace("0x152,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16\n", ""),
+        derived=DERIVED_CSV.replace("Derived,Bus_mV,bus_v * 1000,mV\n", ""),
+        events="Signal,Kind,Param,Hysteresis\nFault_Bits,bit,1,\n",
+    )
+    diff = diff_snapshots(old, new)
+    assert diff.removed == {("PDM", "bus_v"), ("Derived", "Bus_mV")}
+    assert diff.events == {("BMS", "Fault_Bits")}
+    assert not diff.decode and not diff.derived
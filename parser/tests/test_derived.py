@@ -0,0 +1,128 @@
+"""Tests for parser.derived — derived channels computed at import."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from compile import compile_csv, compile_derived
+from derived import Expression, align_zoh
+from protocol import ProtocolEmitter
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x150,BMS_Current,BMS,Battery_Current,0,16,0.1,0,A,uint16
+0x151,BMS_Voltage,BMS,Battery_Voltage,0,16,0.1,0,V,uint16
+,BMS_Voltage,,Max_Cell_Voltage,16,16,0.001,0,V,uint16
+,BMS_Voltage,,Min_Cell_Voltage,32,16,0.001,0,V,uint16
+0x28B,FR_Status,Front-Right-Inverter,FR_RPM,0,16,1,0,RPM,int16
+"""
+
+DERIVED_CSV = """\
+Source,Signal Name,Expression,Unit
+Derived,Pack_Power,Battery_Voltage * Battery_Current,W
+Derived,Cell_Spread,Max_Cell_Voltage - Min_Cell_Voltage,V
+Derived,Spread_mV,Cell_Spread * 1000,mV
+Derived,FR_Speed_Abs,abs([Front-Right-Inverter.FR_RPM]),RPM
+"""
+
+
+def test_expression_rejects_unsafe_syntax() -> None:
+    for text in ("__import__('os')", "a.b", "x if y else z", "max(a, key=b)", "sqrt(a, b)"):
+        with pytest.raises(ValueError):
+            Expression(text)
+    expr = Expression("max(a, [Front-Right-Inverter.FR_RPM]) - -2 ** 2")
+    assert expr.refs == ["a", "Front-Right-Inverter.FR_RPM"]
+    out = expr.evaluate(
+        {"a": np.array([1.0, 5.0]), "Front-Right-Inverter.FR_RPM": np.array([3.0, 4.0])}
+    )
+    assert out.tolist() == [7.0, 9.0]
+
+
+def test_align_zoh_starts_when_every_input_has_a_value() -> None:
+    a = (np.array([0, 10, 20]), np.array([1.0, 2.0, 3.0]))
+    b = (np.array([5, 20]), np.array([10.0, 20.0]))
+    ts, (av, bv) = align_zoh([a, b])
+    assert ts.tolist() == [5, 10, 20]
+    assert av.tolist() == [1.0, 2.0, 3.0]
+    assert bv.tolist() == [10.0, 10.0, 20.0]
+
+
+def test_compile_derived_validates_references(tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    table = compile_csv(str(dbc))
+    assert compile_derived(dbc, table) == []
+
+    (tmp_path / "dbc.derived.csv").write_text(DERIVED_CSV)
+    specs = compile_derived(dbc, table)
+    assert [s.name for s in specs] == ["Pack_Power", "Cell_Spread", "Spread_mV", "FR_Speed_Abs"]
+
+    (tmp_path / "dbc.derived.csv").write_text(
+        "Source,Signal Name,Expression,Unit\nDerived,Bad,Nope * 2,\n"
+    )
+    with pytest.raises(ValueError, match="Nope"):
+        compile_derived(dbc, table)
+
+
+def _write_log(tmp_path: Path) -> Path:
+    frames = []
+    for i in range(100):
+        frames.append((i * 10, 0x150, struct.pack("<H", 100 + i)))
+        if i % 2 == 0:
+            frames.append((i * 10 + 5, 0x151, struct.pack("<HHH", 4000, 3600 + i, 3500)))
+    return write_nfr(tmp_path / "LOG_0010.NFR", frames)
+
+
+@pytest.mark.parametrize("layout", ["rows", "segments"])
+def test_batch_import_stores_derived_channels(
+    scratch_db: str, tmp_path: Path, layout: str
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    (tmp_path / "dbc.derived.csv").write_text(DERIVED_CSV)
+    log = _write_log(tmp_path)
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+    )
+
+    with psycopg.connect(scratch_db) as conn:
+        defs = dict(
+            conn.execute(
+                "SELECT signal_name, unit FROM signal_definitions WHERE source = 'Derived'"
+            ).fetchall()
+        )
+        stats = {
+            name: (n, vmin, vmax)
+            for name, n, vmin, vmax in conn.execute(
+                "SELECT d.signal_name, s.sample_n, s.value_min, s.value_max "
+                "FROM session_signal_stats s JOIN signal_definitions d ON d.id = s.signal_id "
+                "WHERE s.session_id = %s AND d.source = 'Derived'",
+                (session_id,),
+            ).fetchall()
+        }
+        rollup_n = conn.execute(
+            "SELECT sum(r.sample_n) FROM sd_rollup_1s r "
+            "JOIN signal_definitions d ON d.id = r.signal_id "
+            "WHERE r.session_id = %s AND d.signal_name = 'Pack_Power'",
+            (session_id,),
+        ).fetchone()[0]
+
+    # FR_RPM never appears in the log, so FR_Speed_Abs is skipped.
+    assert set(stats) == {"Pack_Power", "Cell_Spread", "Spread_mV"}
+    assert defs["Pack_Power"] == "W"
+    # Pack_Power starts at the first voltage frame (5 ms) and then ticks on
+    # every current or voltage sample: 99 current + 50 voltage timestamps.
+    assert stats["Pack_Power"][0] == 149 == rollup_n
+    assert stats["Pack_Power"][1] == pytest.approx(400.0 * 10.0)
+    assert stats["Cell_Spread"][0] == 50
+    assert stats["Spread_mV"][1] == pytest.approx(100.0)
+    assert stats["Spread_mV"][2] == pytest.approx(198.0)
@@ -0,0 +1,112 @@
+"""Tests for parser.events — event / threshold index built at import."""
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from compile import compile_csv, compile_derived, compile_events
+from events import detect
+from protocol import ProtocolEmitter
+from signalSpec import EventRule
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x152,BMS_Status,BMS,SOC,0,8,0.01,0,,uint8
+,BMS_Status,BMS,BMS_State,8,8,1,0,,uint8
+,BMS_Status,BMS,Fault_Bits,16,8,1,0,,uint8
+"""
+
+EVENTS_CSV = """\
+Signal,Kind,Param,Hysteresis
+SOC,below,0.2,0.05
+BMS_State,change,,
+Fault_Bits,bit,2,
+"""
+
+
+def _ts(n: int) -> np.ndarray:
+    return np.arange(n, dtype=np.int64) * 1000
+
+
+def test_threshold_hysteresis_fires_once_per_crossing() -> None:
+    values = np.array([0.5, 0.19, 0.21, 0.18, 0.3, 0.1, np.nan, 0.1, 0.3])
+    rule = EventRule("SOC", "below", 0.2, 0.05)
+    # 0.21 is inside the hysteresis band, so the dip to 0.18 is the same event.
+    assert detect(rule, _ts(values.size), values).tolist() == [1, 5]
+    above = EventRule("SOC", "above", 0.2, 0.0)
+    assert detect(above, _ts(values.size), values).tolist() == [2, 4, 8]
+    # Starting below the threshold is not a crossing.
+    assert detect(rule, _ts(3), np.array([0.1, 0.1, 0.0])).tolist() == []
+
+
+def test_change_and_bit_rules() -> None:
+    values = np.array([0.0, 0.0, 1.0, 1.0, np.nan, np.nan, 4.0, 5.0, 1.0])
+    assert detect(EventRule("s", "change"), _ts(9), values).tolist() == [2, 4, 6, 7, 8]
+    # bit 2 (value 4) rises at 4.0; 5.0 keeps it set; 1.0 clears it.
+    assert detect(EventRule("s", "bit", 2), _ts(9), values).tolist() == [6]
+
+
+def test_compile_events_validates_rules(tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    table = compile_csv(str(dbc))
+    assert compile_events(dbc, table) == []
+
+    (tmp_path / "dbc.events.csv").write_text(EVENTS_CSV)
+    rules = compile_events(dbc, table, compile_derived(dbc, table))
+    assert [r.label for r in rules] == ["below:0.2", "change", "bit:2"]
+
+    for bad, match in (
+        ("Nope,change,,", "Nope"),
+        ("SOC,sometimes,,", "kind"),
+        ("SOC,above,,", "Param"),
+        ("Fault_Bits,bit,1.5,", "bit index"),
+    ):
+        (tmp_path / "dbc.events.csv").write_text("Signal,Kind,Param,Hysteresis\n" + bad + "\n")
+        with pytest.raises(ValueError, match=match):
+            compile_events(dbc, table)
+
+
+def test_batch_import_indexes_events(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    (tmp_path / "dbc.events.csv").write_text(EVENTS_CSV)
+    samples = [(50, 1, 0), (30, 1, 0), (10, 2, 4), (22, 2, 4), (18, 3, 0), (40, 3, 4)]
+    log = write_nfr(
+        tmp_path / "LOG_0012.NFR",
+        [(i * 100, 0x152, bytes(sample)) for i, sample in enumerate(samples)],
+    )
+
+    for _ in range(2):  # re-import replaces the index
+        session_id = run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+        )
+    with psycopg.connect(scratch_db) as conn:
+        started = conn.execute(
+            "SELECT started_at FROM sessions WHERE id = %s", (session_id,)
+        ).fetchone()[0]
+        rows = conn.execute(
+            "SELECT ts, signal_name, kind, value FROM list_session_events(%s)",
+            (session_id,),
+        ).fetchall()
+        below = conn.execute(
+            "SELECT count(*) FROM list_session_events(%s, NULL, 'below')", (session_id,)
+        ).fetchone()[0]
+
+    got = [((ts - started).total_seconds() * 1000, name, kind, value) for ts, name, kind, value in rows]
+    assert [g[0] for g in got] == sorted(g[0] for g in got)
+    assert sorted(got, key=lambda g: (g[0], g[1])) == [
+        (200, "BMS_State", "change", 2.0),
+        (200, "Fault_Bits", "bit:2", 4.0),
+        (200, "SOC", "below:0.2", pytest.approx(0.10)),
+        (400, "BMS_State", "change", 3.0),
+        (500, "Fault_Bits", "bit:2", 4.0),
+    ]
+    assert below == 1
@@ -0,0 +1,129 @@
+"""Tests for parser.export — streaming CSV / Parquet export."""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import struct
+from pathlib import Path
+
+import pytest
+
+from batch import run_batch_import
+from export import run_export
+from protocol import ProtocolEmitter
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+0x789,Unused,Unused,never,0,8,1,0,,uint8
+"""
+
+
+def _write_inputs(tmp_path: Path) -> tuple[Path, Path]:
+    frames = []
+    for i in range(300):
+        frames.append((i * 10, 0x123, struct.pack("<HB", i, i % 3)))
+        if i % 2 == 0:
+            # Same timestamp as the PDM frame: shares a csv-wide row.
+            frames.append((i * 10, 0x456, bytes([i % 200])))
+    log = write_nfr(tmp_path / "LOG_0007.NFR", frames)
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    return log, dbc
+
+
+def _events(stream: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_export_nfr_csv_long_and_wide(tmp_path: Path) -> None:
+    log, dbc = _write_inputs(tmp_path)
+    out = io.StringIO()
+    long_path = tmp_path / "long.csv"
+    n = run_export(
+        out_path=long_path, fmt="csv-long", emitter=ProtocolEmitter(out),
+        nfr_file=log, dbc_csv=dbc, chunk_frames=64,
+    )
+    with long_path.open(newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["timestamp", "source", "signal_name", "value"]
+    assert n == len(rows) - 1 == 300 * 2 + 150
+    assert rows[1][1:3] == ["PDM", "bus_v"] and float(rows[1][3]) == 0.0
+    assert rows[1][0].endswith("Z")
+    timestamps = [r[0] for r in rows[1:]]
+    assert timestamps == sorted(timestamps)
+    events = _events(out)
+    assert events[0]["pct"] == 0 and events[-1]["pct"] == 100
+    assert all(e["type"] == "import_progress" for e in events)
+
+    wide_path = tmp_path / "wide.csv"
+    n = run_export(
+        out_path=wide_path, fmt="csv-wide", emitter=ProtocolEmitter(io.StringIO()),
+        nfr_file=log, dbc_csv=dbc, chunk_frames=7,
+    )
+    with wide_path.open(newline="") as f:
+        wide = list(csv.DictReader(f))
+    assert n == len(wide) == 300
+    assert "Unused.never" not in wide[0]
+    assert float(wide[2]["PDM.bus_v"]) == pytest.approx(0.02)
+    assert float(wide[2]["BMS_SOE.soc"]) == 1.0
+    assert wide[3]["BMS_SOE.soc"] == ""
+
+
+def test_export_session_matches_nfr(scratch_db: str, tmp_path: Path) -> None:
+    log, dbc = _write_inputs(tmp_path)
+    emitter = ProtocolEmitter(io.StringIO())
+    from_nfr = tmp_path / "nfr.csv"
+    run_export(out_path=from_nfr, fmt="csv-long", emitter=emitter, nfr_file=log, dbc_csv=dbc)
+    wide_nfr = tmp_path / "nfr-wide.csv"
+    run_export(out_path=wide_nfr, fmt="csv-wide", emitter=emitter, nfr_file=log, dbc_csv=dbc)
+
+    def wide(path: Path) -> list[dict[str, str]]:
+        with path.open(newline="") as f:
+            return list(csv.DictReader(f))
+
+    for layout in ("rows", "segments"):
+        session_id = run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=emitter, layout=layout
+        )
+        from_db = tmp_path / f"session-{layout}.csv"
+        run_export(
+            out_path=from_db, fmt="csv-long", emitter=emitter,
+            dsn=scratch_db, session_id=session_id, chunk_rows=100,
+        )
+
+        def rows(path: Path) -> list[tuple[str, str, str, float]]:
+            with path.open(newline="") as f:
+                body = list(csv.reader(f))[1:]
+            return sorted((r[0], r[1], r[2], float(r[3])) for r in body)
+
+        assert rows(from_db) == rows(from_nfr)
+        with from_db.open(newline="") as f:
+            stamps = [r[0] for r in list(csv.reader(f))[1:]]
+        assert stamps == sorted(stamps)
+
+        wide_db = tmp_path / f"session-{layout}-wide.csv"
+        run_export(
+            out_path=wide_db, fmt="csv-wide", emitter=emitter,
+            dsn=scratch_db, session_id=session_id, chunk_rows=100,
+        )
+        assert wide(wide_db) == wide(wide_nfr)
+
+
+def test_export_parquet(tmp_path: Path) -> None:
+    pq = pytest.importorskip("pyarrow.parquet")
+    log, dbc = _write_inputs(tmp_path)
+    path = tmp_path / "out.parquet"
+    n = run_export(
+        out_path=path, fmt="parquet", emitter=ProtocolEmitter(io.StringIO()),
+        nfr_file=log, dbc_csv=dbc, chunk_frames=100,
+    )
+    table = pq.read_table(path)
+    assert table.num_rows == n == 750
+    assert table.column_names == ["timestamp", "source", "signal_name", "value"]
+    assert set(table.column("signal_name").to_pylist()) == {"bus_v", "fault", "soc"}
@@ -6,7 +6,6 @@ import time
 from pathlib import Path
 
 from file_source import file_events
-from nfr_reader import HEADER_SIZE
 
 
 def _build_log(tmp_path: Path, frames: list[tuple[int, int, bytes]]) -> Path:
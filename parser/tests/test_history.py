@@ -0,0 +1,116 @@
+"""Tests for parser.history — in-memory live history and its socket."""
+from __future__ import annotations
+
+import json
+import socket
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg
+import pytest
+
+from columns import from_epoch_us, to_epoch_us
+from db import Reading, SignalDef, copy_live_today, upsert_signal_definitions
+from history import HistoryServer, LiveHistory
+
+T0 = datetime(2026, 5, 28, 5, 0, tzinfo=timezone.utc)
+T0_US = to_epoch_us(T0)
+
+
+def _iso(ts: datetime) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def _normalise(rows) -> list[tuple]:
+    return [
+        (
+            to_epoch_us(
+                datetime.fromisoformat(r["ts"]) if isinstance(r["ts"], str) else r["ts"]
+            ),
+            r["signal_id"], r["signal_name"], r["unit"],
+            round(r["value_min"], 9), round(r["value_max"], 9), round(r["value_avg"], 9),
+            r["sample_n"],
+        )
+        for r in rows
+    ]
+
+
+def test_buckets_match_get_live_today_window(scratch_db: str) -> None:
+    with psycopg.connect(scratch_db) as conn:
+        ids = upsert_signal_definitions(
+            conn,
+            [SignalDef(source="PDM", signal_name="bus_v", unit="V"),
+             SignalDef(source="BMS", signal_name="soc", unit="%")],
+        )
+        a, b = ids[("PDM", "bus_v")], ids[("BMS", "soc")]
+        history = LiveHistory({a: ("bus_v", "V"), b: ("soc", "%")}, started_us=T0_US)
+        readings = []
+        for i in range(400):
+            ts_us = T0_US + i * 7_000
+            for sid, value in ((a, 12.0 + (i % 13) * 0.01), (b, float(i % 7))):
+                if sid == b and i % 3:
+                    continue
+                history.append(sid, ts_us, value)
+                readings.append(Reading(ts=from_epoch_us(ts_us), signal_id=sid, value=value))
+        copy_live_today(conn, readings)
+
+        start, end = T0 + timedelta(milliseconds=500), T0 + timedelta(seconds=2)
+        for bucket in (0.25, 1.0):
+            expected = conn.execute(
+                "SELECT * FROM get_live_today_window(%s, %s, %s, %s)",
+                ([a, b], start, end, bucket),
+            ).fetchall()
+            got = history.window([a, b], to_epoch_us(start), to_epoch_us(end), bucket)
+            cols = ["ts", "signal_id", "signal_name", "unit",
+                    "value_min", "value_max", "value_avg", "sample_n"]
+            want = _normalise([dict(zip(cols, row)) for row in expected])
+            assert sorted(_normalise(got["rows"])) == sorted(want)
+            assert [r["ts"] for r in got["rows"]] == sorted(r["ts"] for r in got["rows"])
+
+    raw = history.window([a], to_epoch_us(start), to_epoch_us(end))["rows"]
+    assert len(raw) == sum(1 for r in readings if r.signal_id == a and start <= r.ts < end)
+    assert raw[0] == {
+        "ts": "2026-05-28T05:00:00.504Z", "signal_id": a, "signal_name": "bus_v", "unit": "V",
+        "value_min": raw[0]["value_avg"], "value_max": raw[0]["value_avg"],
+        "value_avg": pytest.approx(12.0 + (72 % 13) * 0.01), "sample_n": 1,
+    }
+
+
+def test_covered_from_moves_once_the_ring_wraps() -> None:
+    history = LiveHistory({1: ("x", ""), 2: ("y", "")}, samples=4, started_us=T0_US)
+    for i in range(3):
+        history.append(1, T0_US + i * 1000, float(i))
+    reply = history.window([1, 2], T0_US, T0_US + 10_000, 1.0)
+    assert reply["covered_from"] == "2026-05-28T05:00:00.000Z"
+    for i in range(3, 10):
+        history.append(1, T0_US + i * 1000, float(i))
+    history.append(3, T0_US, 0.0)  # unknown signal: ignored
+    reply = history.window([1, 2, 3], T0_US, T0_US + 20_000)
+    assert reply["covered_from"] == "2026-05-28T05:00:00.006Z"
+    assert [r["value_avg"] for r in reply["rows"]] == [6.0, 7.0, 8.0, 9.0]
+
+
+def test_socket_answers_requests_and_reports_errors(tmp_path: Path) -> None:
+    history = LiveHistory({1: ("x", "V")}, started_us=T0_US)
+    for i in range(10):
+        history.append(1, T0_US + i * 100_000, float(i))
+    path = tmp_path / "history.sock"
+    with HistoryServer(path, history):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(path))
+            stream = client.makefile("rwb")
+            for request in (
+                {"ids": [1], "start": _iso(T0), "end": _iso(T0 + timedelta(seconds=1)),
+                 "bucket": 0.5},
+                {"ids": [1], "start": _iso(T0), "end": _iso(T0 + timedelta(seconds=1))},
+            ):
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline())
+                if "bucket" in request:
+                    assert [(r["value_avg"], r["sample_n"]) for r in reply["rows"]] == [
+                        (2.0, 5), (7.0, 5)
+                    ]
+                else:
+                    assert reply == {"error": "bucket must be > 0 unless raw is set"}
+    assert not path.exists()
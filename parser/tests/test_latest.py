@@ -0,0 +1,101 @@
+"""Tests for parser.latest — the shared-memory latest-value table."""
+from __future__ import annotations
+
+import io
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import psycopg
+import pytest
+
+from latest import HEADER_SIZE, SLOT_SIZE, LatestReader, LatestWriter
+from live import SourceEvent, run_live
+from protocol import ProtocolEmitter
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+"""
+
+
+def test_reader_sees_the_newest_value_per_slot(tmp_path: Path) -> None:
+    path = tmp_path / "latest.bin"
+    with LatestWriter(path, 4) as writer:
+        assert path.stat().st_size == HEADER_SIZE + 4 * SLOT_SIZE
+        with LatestReader(path) as reader:
+            assert reader.writer_active
+            assert reader.read(1) is None
+            assert reader.snapshot() == {}
+
+            writer.update(1, 1_000, 1.5)
+            writer.update(1, 2_000, 2.5)
+            writer.update(3, 3_000, -7.0)
+            writer.update(9, 4_000, 9.0)  # beyond the table: ignored
+            assert reader.read(1) == (2_000, 2.5, 4)
+            assert reader.read(9) is None
+            assert reader.snapshot() == {1: (2_000, 2.5, 4), 3: (3_000, -7.0, 2)}
+    with LatestReader(path) as reader:
+        assert not reader.writer_active
+        assert reader.read(3) == (3_000, -7.0, 2)
+
+
+def test_reader_never_returns_a_slot_mid_write(tmp_path: Path) -> None:
+    path = tmp_path / "latest.bin"
+    with LatestWriter(path, 2) as writer, LatestReader(path) as reader:
+        writer.update(0, 1_000, 1.0)
+        # Freeze the writer half-way: odd seq, new data already in place.
+        struct.pack_into("<Q", writer._mm, HEADER_SIZE, 3)
+        struct.pack_into("<qd", writer._mm, HEADER_SIZE + 8, 2_000, 2.0)
+        with pytest.raises(TimeoutError):
+            reader.read(0)
+        with pytest.raises(TimeoutError):
+            reader.snapshot()
+        struct.pack_into("<Q", writer._mm, HEADER_SIZE, 4)
+        assert reader.read(0) == (2_000, 2.0, 4)
+
+
+def test_new_run_replaces_the_file_and_marks_old_readers_stale(tmp_path: Path) -> None:
+    path = tmp_path / "latest.bin"
+    with LatestWriter(path, 2) as first:
+        first.update(0, 1, 1.0)
+    reader = LatestReader(path)
+    assert not reader.stale
+    with LatestWriter(path, 2):
+        assert reader.stale
+        # The old reader still reads its own (previous) table safely.
+        assert reader.read(0) == (1, 1.0, 2)
+    reader.close()
+
+
+def test_run_live_publishes_latest_values(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    t0 = datetime(2026, 4, 22, 12, 0, tzinfo=timezone.utc)
+    events = [SourceEvent(kind="connected", port="/dev/ttyFAKE")]
+    for i in range(3):
+        data = struct.pack("<HB", 1200 + i, i) + b"\x00" * 5
+        events.append(SourceEvent(kind="frame", ts_ms=i * 10, frame_id=0x123, data=data))
+    events.append(SourceEvent(kind="disconnected"))
+
+    path = tmp_path / "latest.bin"
+    run_live(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        source=iter(events),
+        emitter=ProtocolEmitter(io.StringIO()),
+        connect_time=t0,
+        latest_path=path,
+    )
+    with psycopg.connect(scratch_db) as conn:
+        ids = dict(
+            conn.execute("SELECT signal_name, id FROM signal_definitions").fetchall()
+        )
+    t0_us = int(t0.timestamp()) * 1_000_000
+    with LatestReader(path) as reader:
+        assert not reader.writer_active
+        values = reader.snapshot()
+    assert values[ids["bus_v"]] == (t0_us + 20_000, pytest.approx(12.02), 6)
+    assert values[ids["fault"]] == (t0_us + 20_000, 2.0, 6)
@@ -0,0 +1,103 @@
+"""Tests for parser.lttb — LTTB overview series written at import."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+import psycopg
+
+from batch import run_batch_import
+from columns import SignalColumns
+from lttb import compute_lttb, lttb_many
+from protocol import ProtocolEmitter
+from tests.conftest import write_nfr
+
+
+def _reference_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> list[int]:
+    """Textbook single-series LTTB with the same bucket boundaries."""
+    n, m = x.size, n_out - 2
+    x = x.astype(np.float64) - x[0]
+    lo = [i * (n - 2) // m + 1 for i in range(m + 1)]
+    out, a = [0], 0
+    for i in range(m):
+        if i + 1 < m:
+            nx, ny = x[lo[i + 1] : lo[i + 2]].mean(), y[lo[i + 1] : lo[i + 2]].mean()
+        else:
+            nx, ny = x[-1], y[-1]
+        b = slice(lo[i], lo[i + 1])
+        area = np.abs((x[a] - nx) * (y[b] - y[a]) - (x[a] - x[b]) * (ny - y[a]))
+        a = lo[i] + int(np.argmax(area))
+        out.append(a)
+    return out + [n - 1]
+
+
+def test_lttb_many_matches_single_series_reference() -> None:
+    rng = np.random.default_rng(11)
+    series = []
+    for n in (41, 97, 500, 5000):
+        x = np.cumsum(rng.integers(1, 50, n))
+        series.append((x, np.cumsum(rng.normal(size=n))))
+    for (x, y), got in zip(series, lttb_many(series, 40)):
+        assert got.tolist() == _reference_lttb(x, y, 40)
+
+
+def test_compute_lttb_stores_short_signals_once() -> None:
+    columns = SignalColumns()
+    for i in range(5000):
+        columns.append(1, i * 1000, float(np.sin(i / 50)))
+    for i in range(10):
+        columns.append(2, i * 1000, float(i))
+    columns.append(2, 10_000, float("nan"))
+
+    out = {(s.signal_id, s.budget): s for s in compute_lttb(columns, budgets=(100, 1000, 10000))}
+    assert sorted(out) == [(1, 100), (1, 1000), (1, 10000), (2, 100)]
+    assert out[(1, 100)].ts_us.size == 100
+    assert out[(1, 10000)].ts_us.size == 5000
+    assert out[(2, 100)].values.tolist() == [float(i) for i in range(10)]
+
+
+def test_batch_import_serves_overview(scratch_db: str, tmp_path: Path) -> None:
+    log = write_nfr(
+        tmp_path / "LOG_0011.NFR",
+        [(i, 0x123, struct.pack("<H", i % 1000)) for i in range(6000)],
+    )
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(
+        "Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type\n"
+        "0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16\n"
+    )
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    with psycopg.connect(scratch_db) as conn:
+        sig_id = conn.execute(
+            "SELECT id FROM signal_definitions WHERE signal_name = 'bus_v'"
+        ).fetchone()[0]
+        budgets = conn.execute(
+            "SELECT budget, cardinality(ts_us) FROM sd_lttb WHERE session_id = %s "
+            "ORDER BY budget",
+            (session_id,),
+        ).fetchall()
+        small = conn.execute(
+            "SELECT ts, signal_id, signal_name, value_min, value_max, sample_n "
+            "FROM get_signals_overview(%s, %s, 800)",
+            (session_id, [sig_id]),
+        ).fetchall()
+        large = conn.execute(
+            "SELECT count(*) FROM get_signals_overview(%s, %s, 50000)",
+            (session_id, [sig_id]),
+        ).fetchone()[0]
+        started = conn.execute(
+            "SELECT started_at FROM sessions WHERE id = %s", (session_id,)
+        ).fetchone()[0]
+
+    assert budgets == [(800, 800), (2000, 2000), (10000, 6000)]
+    assert len(small) == 800
+    assert small[0][0] == started
+    assert [r[0] for r in small] == sorted(r[0] for r in small)
+    assert all(r[2] == "bus_v" and r[3] == r[4] and r[5] == 1 for r in small)
+    # Peaks of the sawtooth survive the 7.5x reduction.
+    assert max(r[3] for r in small) == 9.99
+    assert large == 6000
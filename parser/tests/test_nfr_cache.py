@@ -0,0 +1,84 @@
+"""Tests for parser.nfr_cache and the vectorised decode it is built on."""
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from columns import to_epoch_us
+from compile import compile_csv
+from decode import decode_frame, decode_records
+from nfr_cache import cache_path_for, load_nfr_arrays
+from nfr_reader import iter_frames, read_header, read_records
+from tests.conftest import write_nfr
+
+REPO_DBC = Path(__file__).resolve().parents[2] / "NFR26DBC.csv"
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,temp,16,12,0.5,-40,C,int16
+0x456,IMU,IMU,yaw,0,32,1,0,deg,float
+"""
+
+
+def test_decode_records_matches_decode_frame_on_repo_dbc(tmp_path: Path) -> None:
+    decode_table = compile_csv(str(REPO_DBC))
+    rng = np.random.default_rng(7)
+    ids = list(decode_table)
+    frames = []
+    for i in range(3000):
+        frame_id = ids[rng.integers(len(ids))] if i % 10 else 0x7FF
+        dlc = int(rng.integers(0, 9))
+        frames.append((i, frame_id, rng.bytes(dlc)))
+    log = write_nfr(tmp_path / "LOG_0001.NFR", frames, pad=b"\xaa")
+
+    got = decode_records(read_records(log), decode_table)
+
+    expected: dict[int, list[tuple[int, dict]]] = {}
+    for ts_ms, frame_id, data in iter_frames(log):
+        decoded = decode_frame(frame_id, data, decode_table)
+        if decoded:
+            expected.setdefault(frame_id, []).append((ts_ms, decoded))
+
+    assert set(got) == set(expected)
+    for frame_id, rows in expected.items():
+        ts_ms, values = got[frame_id]
+        assert ts_ms.tolist() == [r[0] for r in rows]
+        for name, column in values.items():
+            want = np.array([r[1][name] for r in rows], dtype=np.float64)
+            assert np.array_equal(column, want, equal_nan=True), name
+
+
+def test_load_nfr_arrays_decodes_and_caches(tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    frames = [
+        (0, 0x123, struct.pack("<HH", 1234, 0xFFF)),
+        (5, 0x456, struct.pack("<f", 1.5)),
+        (10, 0x123, struct.pack("<HH", 1300, 100)),
+        (20, 0x123, b"\x01"),  # shorter than required_bytes: dropped
+    ]
+    log = write_nfr(tmp_path / "LOG_0002.NFR", frames, pad=b"\xaa")
+    start_us = to_epoch_us(read_header(log).start_time)
+
+    arrays = load_nfr_arrays(log, dbc)
+    assert sorted(arrays) == ["IMU.yaw", "PDM.bus_v", "PDM.temp"]
+    ts, bus_v = arrays["PDM.bus_v"]
+    assert ts.tolist() == [start_us, start_us + 10_000]
+    assert np.allclose(bus_v, [12.34, 13.0])
+    assert arrays["PDM.temp"][1].tolist() == [-40.5, 10.0]
+    assert arrays["IMU.yaw"][1].tolist() == [1.5]
+
+    cache = cache_path_for(log)
+    assert cache.is_file()
+    mtime = cache.stat().st_mtime_ns
+    again = load_nfr_arrays(log, dbc)
+    assert cache.stat().st_mtime_ns == mtime
+    assert again["PDM.bus_v"][1].tolist() == bus_v.tolist()
+
+    # A DBC change invalidates the cache.
+    dbc.write_text(DBC_CSV.replace("0.01,0,V", "0.1,0,V"))
+    rescaled = load_nfr_arrays(log, dbc)
+    assert np.allclose(rescaled["PDM.bus_v"][1], [123.4, 130.0])
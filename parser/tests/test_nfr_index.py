@@ -0,0 +1,105 @@
+"""Tests for parser.nfr_index — per-frame-ID record index."""
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from compile import compile_csv
+from nfr_index import (
+    build_index,
+    index_path_for,
+    iter_selected_frames,
+    load_index,
+    resolve_filter,
+)
+from nfr_reader import iter_frames
+from protocol import ProtocolEmitter
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+0x789,IMU_Accel,IMU,accel_x,0,16,0.001,0,g,int16
+"""
+
+
+def _write_log(tmp_path: Path, n: int = 3000) -> Path:
+    rng = np.random.default_rng(7)
+    ids = rng.choice([0x123, 0x456, 0x789, 0x7FF], size=n)
+    frames = [
+        (i * 2, fid, bytes(rng.integers(0, 256, 3, dtype=np.uint8)))
+        for i, fid in enumerate(ids.tolist())
+    ]
+    return write_nfr(tmp_path / "LOG_0030.NFR", frames)
+
+
+def test_selected_frames_match_a_full_scan(tmp_path: Path) -> None:
+    log = _write_log(tmp_path)
+    index = build_index(log, chunk_frames=257)
+    assert index.frame_ids.tolist() == [0x123, 0x456, 0x789, 0x7FF]
+    assert int(index.bounds[-1]) == 3000
+
+    every = list(iter_frames(log))
+    want = {0x456, 0x7FF}
+    got = list(iter_selected_frames(log, want, index=index, chunk_frames=100))
+    assert got == [f for f in every if f[1] in want]
+    ranged = list(iter_selected_frames(log, want, 1000, 3000, index=index))
+    assert ranged == [f for f in every if f[1] in want and 1000 <= f[0] < 3000]
+    assert list(iter_selected_frames(log, {0x999}, index=index)) == []
+
+
+def test_index_is_cached_and_rebuilt_when_the_log_changes(tmp_path: Path) -> None:
+    log = _write_log(tmp_path)
+    first = load_index(log)
+    assert index_path_for(log).is_file()
+    assert np.array_equal(load_index(log).positions, first.positions)
+
+    _write_log(tmp_path, n=10)
+    assert int(load_index(log).bounds[-1]) == 10
+
+
+def test_resolve_filter(tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    table = compile_csv(str(dbc))
+    msgs = resolve_filter(table, ["PDM_Status", "0x456"])
+    assert msgs.frame_ids == {0x123, 0x456} and msgs.signals is None
+    sigs = resolve_filter(table, ["IMU.accel_x", "fault"])
+    assert sigs.frame_ids == {0x123, 0x789}
+    assert sigs.keeps(0x123, "fault") and not sigs.keeps(0x123, "bus_v")
+    with pytest.raises(ValueError, match="nope"):
+        resolve_filter(table, ["nope"])
+
+
+def test_batch_import_only_selected_signals(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _write_log(tmp_path)
+    n_bms = sum(1 for f in iter_frames(log) if f[1] == 0x456)
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), only=["BMS_SOE", "PDM.fault"],
+    )
+    assert session_id != run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), only=["BMS_SOE"],
+    )
+    with psycopg.connect(scratch_db) as conn:
+        counts = dict(
+            conn.execute(
+                "SELECT d.signal_name, count(*) FROM sd_readings r "
+                "JOIN signal_definitions d ON d.id = r.signal_id "
+                "WHERE r.session_id = %s GROUP BY d.signal_name",
+                (session_id,),
+            ).fetchall()
+        )
+    n_pdm = sum(1 for f in iter_frames(log) if f[1] == 0x123)
+    assert counts == {"soc": n_bms, "fault": n_pdm}
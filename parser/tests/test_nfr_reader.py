@@ -5,7 +5,16 @@ import struct
 from datetime import datetime, timezone
 from pathlib import Path
 
-from nfr_reader import HEADER_SIZE, FRAME_SIZE, iter_frames, read_header
+from nfr_reader import (
+    HEADER_SIZE,
+    FRAME_SIZE,
+    frame_range,
+    iter_frames,
+    iter_frames_between,
+    prefix_fingerprint,
+    prefix_hash,
+    read_header,
+)
 
 
 def _build_log(tmp_path: Path, frames: list[tuple[int, int, bytes]]) -> Path:
@@ -71,3 +80,41 @@ def test_iter_frames_stops_on_partial_trailing_frame(tmp_path: Path) -> None:
         f.write(b"\x00" * 5)
     frames = list(iter_frames(log))
     assert len(frames) == 1
+
+
+def test_frame_range_bisects_sorted_logs(tmp_path: Path) -> None:
+    log = _build_log(tmp_path, [(t, 0x100, b"\x01") for t in (0, 10, 10, 20, 30, 40, 50)])
+    assert frame_range(log, 10, 40) == (1, 5)
+    assert frame_range(log, 15, None) == (3, 7)
+    assert frame_range(log, None, 0) == (0, 0)
+    # Negative bounds count back from the last frame (50 ms).
+    assert frame_range(log, -20, None) == (4, 7)
+    assert [f[0] for f in iter_frames(log, 2, 4)] == [10, 20]
+    assert [f[0] for f in iter_frames_between(log, 10, 40)] == [10, 10, 20, 30]
+
+
+def test_iter_frames_between_scans_when_timestamps_go_backwards(tmp_path: Path) -> None:
+    # RTC reset half way through: bisection would be meaningless.
+    log = _build_log(tmp_path, [(t, 0x100, b"\x01") for t in (100, 200, 300, 5, 150, 250)])
+    assert frame_range(log, 120, 260) is None
+    assert [f[0] for f in iter_frames_between(log, 120, 260)] == [200, 150, 250]
+
+
+def test_prefix_fingerprint_covers_the_whole_prefix(tmp_path: Path) -> None:
+    frames = [(i, 0x100 + i % 7, bytes([i % 256]) * 8) for i in range(20_000)]
+    log = _build_log(tmp_path, frames)
+    prefix = HEADER_SIZE + 15_000 * FRAME_SIZE
+    before = prefix_fingerprint(log, prefix)
+
+    # A grown copy with the same prefix matches; resuming a shorter hash
+    # gives the same digest as hashing from scratch.
+    short = prefix_hash(log, HEADER_SIZE + 5_000 * FRAME_SIZE)
+    resumed = prefix_hash(log, prefix, resume=(short, HEADER_SIZE + 5_000 * FRAME_SIZE))
+    assert resumed.hexdigest() == before
+
+    # A rewrite far from both the header and the end of the prefix is seen.
+    data = bytearray(log.read_bytes())
+    data[HEADER_SIZE + 100 * FRAME_SIZE + 10] ^= 0xFF
+    log.write_bytes(bytes(data))
+    assert prefix_fingerprint(log, prefix) != before
+
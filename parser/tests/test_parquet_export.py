@@ -0,0 +1,86 @@
+"""Tests for parser.parquet_export — Parquet written during batch import."""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import struct
+from pathlib import Path
+
+import psycopg
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from batch import run_batch_import  # noqa: E402
+from parquet_export import INDEX_FILE, safe_source_name  # noqa: E402
+from protocol import ProtocolEmitter  # noqa: E402
+from tests.conftest import write_nfr  # noqa: E402
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS/SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def _write_log(tmp_path: Path) -> Path:
+    frames = []
+    for i in range(20):
+        frames.append((i * 100, 0x123, struct.pack("<HB", 1000 + i, i % 2)))
+        frames.append((i * 100 + 50, 0x456, bytes([i])))
+    return write_nfr(tmp_path / "LOG_0003.NFR", frames)
+
+
+def test_batch_import_writes_per_source_parquet(
+    scratch_db: str, tmp_path: Path
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _write_log(tmp_path)
+    out = tmp_path / "parquet"
+
+    session_id = run_batch_import(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()),
+        parquet_dir=out,
+    )
+
+    index = json.loads((out / INDEX_FILE).read_text())
+    assert [f["source"] for f in index] == ["BMS/SOE", "PDM"]
+    assert safe_source_name("BMS/SOE") == "BMS_SOE"
+
+    with psycopg.connect(scratch_db) as conn:
+        for entry in index:
+            path = Path(entry["localPath"])
+            assert path.name == f"{safe_source_name(entry['source'])}.parquet"
+            assert entry["bytes"] == path.stat().st_size
+            assert entry["sha256"] == hashlib.sha256(path.read_bytes()).hexdigest()
+
+            table = pq.read_table(path)
+            assert table.schema.names == ["timestamp", "signal_id", "value"]
+            assert str(table.schema.field("signal_id").type) == "int32"
+            assert str(table.schema.field("timestamp").type) == "timestamp[us, tz=UTC]"
+            assert entry["rowCount"] == table.num_rows
+            meta = pq.ParquetFile(path).metadata
+            assert meta.row_group(0).column(0).compression == "ZSTD"
+
+            expected = conn.execute(
+                "SELECT r.ts, r.signal_id, r.value FROM sd_readings r "
+                "JOIN signal_definitions sd ON sd.id = r.signal_id "
+                "WHERE r.session_id = %s AND sd.source = %s "
+                "ORDER BY r.signal_id, r.ts",
+                (session_id, entry["source"]),
+            ).fetchall()
+            got = list(
+                zip(
+                    table.column("timestamp").to_pylist(),
+                    table.column("signal_id").to_pylist(),
+                    table.column("value").to_pylist(),
+                )
+            )
+            assert got == expected
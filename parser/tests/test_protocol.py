@@ -82,6 +82,30 @@ def test_emits_error_message_without_trailing_whitespace() -> None:
     assert buf.getvalue() == '{"type":"error","msg":"something broke"}\n'
 
 
+def test_emits_serial_stats_flattened() -> None:
+    buf = io.StringIO()
+    ProtocolEmitter(buf).serial_stats(
+        port="/dev/ttyX",
+        stats={"bytes_per_s": 1800.0, "reads_per_s": 40.0,
+               "bytes_total": 9000, "queue_high_water": 512},
+    )
+    assert json.loads(buf.getvalue()) == {
+        "type": "serial_stats", "port": "/dev/ttyX", "bytes_per_s": 1800.0,
+        "reads_per_s": 40.0, "bytes_total": 9000, "queue_high_water": 512,
+    }
+
+
+def test_signal_quality_names_the_port_when_known() -> None:
+    buf = io.StringIO()
+    emitter = ProtocolEmitter(buf)
+    emitter.signal_quality(rssi=-70, snr=4.5)
+    emitter.signal_quality(rssi=-90, snr=-2.0, port="/dev/ttyB")
+    assert [json.loads(line) for line in buf.getvalue().splitlines()] == [
+        {"type": "signal_quality", "rssi": -70, "snr": 4.5},
+        {"type": "signal_quality", "rssi": -90, "snr": -2.0, "port": "/dev/ttyB"},
+    ]
+
+
 def test_flushes_after_every_emit() -> None:
     class FakeStream:
         def __init__(self) -> None:
@@ -0,0 +1,169 @@
+"""Tests for parser.redecode — re-decode only what a DBC fix changed."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from protocol import ProtocolEmitter
+import redecode
+from redecode import run_redecode
+from sessions_io import load_signal
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x150,BMS_Current,BMS,Battery_Current,0,16,0.1,0,A,uint16
+0x151,BMS_Voltage,BMS,Battery_Voltage,0,16,0.1,0,V,uint16
+,BMS_Voltage,,Fault_Bits,16,8,1,0,,uint8
+0x152,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+"""
+DERIVED_CSV = "Source,Signal Name,Expression,Unit\nDerived,Pack_Power,Battery_Voltage * Battery_Current,W\n"
+EVENTS_CSV = "Signal,Kind,Param,Hysteresis\nFault_Bits,bit,0,\nPack_Power,above,600,\n"
+# The fix: Battery_Voltage was logged in 0.01 V, not 0.1 V.
+FIXED_CSV = DBC_CSV.replace("Battery_Voltage,0,16,0.1", "Battery_Voltage,0,16,0.01")
+
+
+def _log(path: Path) -> Path:
+    frames = []
+    for i in range(600):
+        frames.append((i * 40, 0x150, struct.pack("<H", 100 + i % 37)))
+        frames.append((i * 40 + 3, 0x152, struct.pack("<H", 1200 + i % 50)))
+        if i % 3 == 0:
+            frames.append((i * 40 + 7, 0x151, struct.pack("<HB", 4000 + i % 2000, (i // 30) % 2)))
+    return write_nfr(path, frames)
+
+
+def _summary(conn: psycopg.Connection, session_id) -> dict:
+    q = lambda sql: conn.execute(sql, (session_id,)).fetchall()  # noqa: E731
+    return {
+        "session": q("SELECT ended_at, row_count, signal_count FROM sessions WHERE id = %s"),
+        "stats": q(
+            "SELECT d.signal_name, s.sample_n, s.value_min, s.value_max, "
+            "round(s.value_mean::numeric, 9), s.first_ts, s.last_ts, s.histogram "
+            "FROM session_signal_stats s JOIN signal_definitions d ON d.id = s.signal_id "
+            "WHERE s.session_id = %s ORDER BY 1"
+        ),
+        "rollup": q(
+            "SELECT signal_id, ts_bucket, value_min, value_max, round(value_sum::numeric, 6), "
+            "sample_n FROM sd_rollup_1s WHERE session_id = %s ORDER BY 1, 2"
+        ),
+        "lttb": q("SELECT signal_id, budget, ts_us, value FROM sd_lttb WHERE session_id = %s ORDER BY 1, 2"),
+        "events": q(
+            "SELECT ts, signal_name, kind, value FROM list_session_events(%s) ORDER BY 1, 2"
+        ),
+        "samples": {
+            sid: (ts.tolist(), values.tolist())
+            for (sid,) in q("SELECT signal_id FROM session_signal_stats WHERE session_id = %s")
+            for ts, values in [load_signal(conn, session_id, sid)]
+        },
+    }
+
+
+@pytest.mark.parametrize("layout", ["rows", "segments"])
+def test_redecode_matches_a_full_reimport(scratch_db: str, tmp_path: Path, layout: str) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    (tmp_path / "dbc.derived.csv").write_text(DERIVED_CSV)
+    (tmp_path / "dbc.events.csv").write_text(EVENTS_CSV)
+    log = _log(tmp_path / "LOG_0050.NFR")
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+    )
+    table = "sd_readings" if layout == "rows" else "sd_segments"
+    untouched_sql = (
+        f"SELECT count(*) FROM {table} r JOIN signal_definitions d ON d.id = r.signal_id "
+        "WHERE r.session_id = %s AND d.signal_name IN ('bus_v', 'Battery_Current', 'Fault_Bits') "
+        "AND r.xmin::text::bigint < %s"
+    )
+
+    # Same DBC: nothing to do.
+    assert run_redecode(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    ) == session_id
+
+    dbc.write_text(FIXED_CSV)
+    with psycopg.connect(scratch_db) as conn:
+        xid = conn.execute("SELECT txid_current()").fetchone()[0]
+        untouched = conn.execute(untouched_sql, (session_id, xid)).fetchone()[0]
+    out = io.StringIO()
+    assert run_redecode(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(out)
+    ) == session_id
+    with psycopg.connect(scratch_db) as conn:
+        # Signals the fix didn't touch keep their original rows.
+        assert conn.execute(untouched_sql, (session_id, xid)).fetchone()[0] == untouched > 0
+        got = _summary(conn, session_id)
+    # Only Battery_Voltage and the Pack_Power derived from it were rewritten.
+    rewritten = sum(r[1] for r in got["stats"] if r[0] in ("Battery_Voltage", "Pack_Power"))
+    assert f'"row_count":{rewritten}}}' in out.getvalue()
+
+    run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+    )
+    with psycopg.connect(scratch_db) as conn:
+        want = _summary(conn, session_id)
+    assert got == want
+    assert any(e[2] == "above:600" for e in want["events"])
+
+
+def test_redecode_drops_removed_signals(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _log(tmp_path / "LOG_0051.NFR")
+    # Never imported: falls back to a full import.
+    session_id = run_redecode(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    dbc.write_text(DBC_CSV.replace("0x152,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16\n", ""))
+    run_redecode(dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO()))
+    with psycopg.connect(scratch_db) as conn:
+        names = [
+            r[0]
+            for r in conn.execute(
+                "SELECT d.signal_name FROM session_signal_stats s JOIN signal_definitions d "
+                "ON d.id = s.signal_id WHERE s.session_id = %s ORDER BY 1",
+                (session_id,),
+            ).fetchall()
+        ]
+        left = conn.execute(
+            "SELECT count(*) FROM sd_readings r JOIN signal_definitions d ON d.id = r.signal_id "
+            "WHERE r.session_id = %s AND d.signal_name = 'bus_v'",
+            (session_id,),
+        ).fetchone()[0]
+    assert names == ["Battery_Current", "Battery_Voltage", "Fault_Bits"]
+    assert left == 0
+
+
+def test_failed_redecode_keeps_the_old_session(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _log(tmp_path / "LOG_0052.NFR")
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+    with psycopg.connect(scratch_db) as conn:
+        before = _summary(conn, session_id)
+
+    dbc.write_text(FIXED_CSV)
+
+    def fail(*args, **kwargs) -> None:
+        raise RuntimeError("crash before the snapshot")
+
+    monkeypatch.setattr(redecode, "write_session_decode_table", fail)
+    with pytest.raises(RuntimeError):
+        run_redecode(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+        )
+    with psycopg.connect(scratch_db) as conn:
+        assert _summary(conn, session_id) == before
+
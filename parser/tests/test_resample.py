@@ -0,0 +1,93 @@
+"""Tests for parser.resample — fixed-rate multi-signal alignment."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from nfr_cache import load_nfr_arrays
+from protocol import ProtocolEmitter
+from resample import array_fetcher, iter_resampled, resample, resample_session
+from sessions_io import resolve_signal_ids
+from tests.conftest import write_nfr
+
+
+def test_modes_on_known_samples() -> None:
+    a = (np.array([0, 10, 20], dtype=np.int64), np.array([1.0, 2.0, 4.0]))
+    b = (np.array([5, 15], dtype=np.int64), np.array([10.0, 20.0]))
+
+    grid, zoh = resample([a, b], rate_hz=200_000, mode="zoh", start_us=0, end_us=20)
+    assert grid.tolist() == [0, 5, 10, 15, 20]
+    assert zoh[:, 0].tolist() == [1.0, 1.0, 2.0, 2.0, 4.0]
+    assert np.isnan(zoh[0, 1]) and zoh[1:, 1].tolist() == [10.0, 10.0, 20.0, 20.0]
+
+    _, lin = resample([a, b], rate_hz=200_000, mode="linear", start_us=0, end_us=20)
+    assert lin[:, 0].tolist() == [1.0, 1.5, 2.0, 3.0, 4.0]
+    assert np.isnan(lin[0, 1]) and lin[1:4, 1].tolist() == [10.0, 15.0, 20.0]
+    assert np.isnan(lin[4, 1])
+
+    _, mean = resample([a, b], rate_hz=100_000, mode="mean", start_us=0, end_us=20)
+    assert mean[:, 0].tolist() == [1.0, 2.0, 4.0]
+    assert mean[:, 1].tolist()[:2] == [10.0, 20.0] and np.isnan(mean[2, 1])
+
+
+@pytest.mark.parametrize("mode", ["zoh", "linear", "mean"])
+def test_chunking_does_not_change_results(mode: str) -> None:
+    rng = np.random.default_rng(3)
+    signals = []
+    for n in (500, 37, 1200):
+        ts = np.sort(rng.integers(0, 1_000_000, n)).astype(np.int64)
+        signals.append((ts, rng.normal(size=n)))
+    whole_grid, whole = resample(signals, rate_hz=1000, mode=mode)
+    chunks = list(
+        iter_resampled(
+            array_fetcher(signals),
+            rate_hz=1000,
+            mode=mode,
+            start_us=int(whole_grid[0]),
+            end_us=int(whole_grid[-1]),
+            chunk_points=7,
+        )
+    )
+    assert np.array_equal(np.concatenate([c[0] for c in chunks]), whole_grid)
+    assert np.array_equal(np.concatenate([c[1] for c in chunks]), whole, equal_nan=True)
+
+
+def test_resample_session_matches_in_memory(scratch_db: str, tmp_path: Path) -> None:
+    frames = []
+    for i in range(400):
+        frames.append((i * 7, 0x123, struct.pack("<H", i)))
+        if i % 3 == 0:
+            frames.append((i * 7 + 2, 0x456, bytes([i % 250])))
+    log = write_nfr(tmp_path / "LOG_0009.NFR", frames)
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(
+        "Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type\n"
+        "0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16\n"
+        "0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8\n"
+    )
+    arrays = load_nfr_arrays(log, dbc)
+    _, expected = resample(
+        [arrays["PDM.bus_v"], arrays["BMS_SOE.soc"]], rate_hz=100, mode="linear"
+    )
+
+    for layout in ("rows", "segments"):
+        session_id = run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+            emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+        )
+        with psycopg.connect(scratch_db) as conn:
+            ids = resolve_signal_ids(conn, ["bus_v", "soc"])
+            chunks = list(
+                resample_session(
+                    conn, session_id, [ids["bus_v"], ids["soc"]],
+                    rate_hz=100, mode="linear", chunk_points=50,
+                )
+            )
+        got = np.concatenate([c[1] for c in chunks])
+        assert np.allclose(got, expected, equal_nan=True)
@@ -0,0 +1,122 @@
+"""Tests for parser.season — aggregates across many sessions."""
+from __future__ import annotations
+
+import io
+import struct
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from protocol import ProtocolEmitter
+from season import check_aggs, raw_aggregate, season_aggregate, write_season_csv
+from tests.conftest import nfr_header, write_nfr
+
+
+def test_raw_aggregates() -> None:
+    ts = np.array([0, 1_000_000, 3_000_000, 4_000_000, 5_000_000], dtype=np.int64)
+    values = np.array([1.0, 5.0, np.nan, 2.0, 9.0])
+    assert raw_aggregate("count", ts, values) == 4
+    assert raw_aggregate("max", ts, values) == 9.0
+    assert raw_aggregate("p50", ts, values) == 3.5
+    # 5.0 is held from 1 s until the next finite sample at 4 s.
+    assert raw_aggregate("above:4", ts, values) == 3.0
+    assert raw_aggregate("below:4", ts, values) == 2.0
+    assert raw_aggregate("min", ts[:0], values[:0]) is None
+    assert check_aggs(["max", "p99.9", "max", "above:-3"]) == ["max", "p99.9", "above:-3"]
+    for bad in ("median", "p101", "above:x"):
+        with pytest.raises(ValueError):
+            check_aggs([bad])
+
+
+def _write_log(path: Path, values: list[int]) -> None:
+    write_nfr(path, [(i * 500, 0x123, struct.pack("<H", v)) for i, v in enumerate(values)])
+
+
+def test_season_aggregate_across_layouts(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(
+        "Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type\n"
+        "0x123,PDM_Status,PDM,bus_v,0,16,0.5,0,V,uint16\n"
+    )
+    rng = np.random.default_rng(5)
+    raw = {}
+    for n, layout in ((0, "rows"), (1, "segments"), (2, "rows")):
+        values = rng.integers(0, 200, 300 + 50 * n).tolist()
+        log = tmp_path / f"LOG_00{20 + n}.NFR"
+        _write_log(log, values)
+        session_id = run_batch_import(
+            dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+            emitter=ProtocolEmitter(io.StringIO()), layout=layout,
+        )
+        raw[session_id] = np.array(values) * 0.5
+    with psycopg.connect(scratch_db) as conn:
+        # Distinct start times so the date-range filter has something to cut.
+        for n, session_id in enumerate(raw):
+            conn.execute(
+                "UPDATE sessions SET started_at = '2026-03-01'::timestamptz + %s * interval '1 day' "
+                "WHERE id = %s",
+                (n, session_id),
+            )
+
+    done = []
+    rows = season_aggregate(
+        scratch_db, ["PDM.bus_v"], ["max", "mean", "p90", "above:50"],
+        workers=2, progress=done.append,
+    )
+    assert done[-1] == 100
+    assert [r.session_id for r in rows[::4]] == list(raw)
+    by_key = {(r.session_id, r.agg): r.value for r in rows}
+    for session_id, values in raw.items():
+        assert by_key[(session_id, "max")] == values.max()
+        assert by_key[(session_id, "mean")] == pytest.approx(values.mean())
+        assert by_key[(session_id, "p90")] == pytest.approx(np.percentile(values, 90))
+        assert by_key[(session_id, "above:50")] == pytest.approx(
+            0.5 * np.count_nonzero(values[:-1] > 50)
+        )
+
+    cut = season_aggregate(
+        scratch_db, ["bus_v"], ["count"],
+        start=datetime(2026, 3, 2, tzinfo=timezone.utc), workers=1,
+    )
+    assert [r.value for r in cut] == [350.0, 400.0]
+    out = io.StringIO()
+    assert write_season_csv(out, iter(cut)) == 2
+    assert out.getvalue().splitlines()[0] == "session_id,started_at,source,signal_name,agg,value"
+
+
+def test_season_skips_unfinished_and_ignores_nan(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(
+        "Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type\n"
+        "0x123,PDM_Status,PDM,temp,0,32,1,0,C,float\n"
+    )
+    values = [1.5, float("nan"), 7.25, 3.0]
+    ids = []
+    for n in range(3):
+        log = write_nfr(
+            tmp_path / f"LOG_00{30 + n}.NFR",
+            [(i * 500, 0x123, struct.pack("<f", v)) for i, v in enumerate(values)],
+            header=nfr_header(month=4 + n),
+        )
+        ids.append(
+            run_batch_import(
+                dsn=scratch_db, dbc_csv=dbc, nfr_file=log,
+                emitter=ProtocolEmitter(io.StringIO()),
+            )
+        )
+    with psycopg.connect(scratch_db) as conn:
+        conn.execute("UPDATE sessions SET ended_at = NULL WHERE id = %s", (ids[1],))
+        conn.execute(
+            "INSERT INTO import_resume (session_id, dbc_sha256, layout, frames_done, rows_done) "
+            "VALUES (%s, '', 'rows', 0, 0)",
+            (ids[2],),
+        )
+
+    rows = season_aggregate(scratch_db, ["temp"], ["min", "max", "mean", "count"])
+    assert {r.session_id for r in rows} == {ids[0]}
+    by_agg = {r.agg: r.value for r in rows}
+    assert by_agg == {"min": 1.5, "max": 7.25, "mean": pytest.approx(11.75 / 3), "count": 3.0}
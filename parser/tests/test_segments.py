@@ -0,0 +1,169 @@
+"""Tests for parser.segments — sd_segments codecs and window reader."""
+from __future__ import annotations
+
+import io
+import struct
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import psycopg
+
+from batch import run_batch_import
+from columns import from_epoch_us
+from protocol import ProtocolEmitter
+from segments import (
+    CODEC_SCALED,
+    CODEC_XOR,
+    decode_segment,
+    decode_timestamps,
+    decode_values,
+    encode_segments,
+    encode_timestamps,
+    encode_values,
+    read_segment_window,
+)
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def test_timestamps_round_trip_with_jitter_and_gaps() -> None:
+    base = 1_776_000_000_000_000
+    ts = base + np.cumsum(np.r_[0, np.full(500, 10_000), 3_000_000, np.full(50, 9_000)])
+    blob = encode_timestamps(ts)
+    assert np.array_equal(decode_timestamps(int(ts[0]), blob), ts)
+    # Single-sample segments carry everything in the header.
+    assert np.array_equal(decode_timestamps(base, encode_timestamps(np.array([base]))), [base])
+
+
+def test_scaled_codec_is_bit_exact_and_compact() -> None:
+    raw = np.arange(1000) % 400 + 1000
+    values = raw * 0.01 + 0.0
+    codec, blob = encode_values(values, scale=0.01, offset=0.0)
+    assert codec == CODEC_SCALED
+    assert len(blob) < values.nbytes // 4
+    out = decode_values(codec, blob, 0.01, 0.0)
+    assert out.tobytes() == values.tobytes()
+
+
+def test_values_fall_back_to_xor_for_floats_and_nan() -> None:
+    values = np.array([1.5, np.nan, -2.25, 1e300, 0.1])
+    codec, blob = encode_values(values, scale=1.0, offset=0.0)
+    assert codec == CODEC_XOR
+    assert decode_values(codec, blob).tobytes() == values.tobytes()
+
+
+def test_encode_segments_splits_on_chunk_boundaries() -> None:
+    base = 1_776_000_000_000_000 - (1_776_000_000_000_000 % 60_000_000)
+    ts = np.array([base, base + 30_000_000, base + 60_000_000, base + 61_000_000])
+    values = np.array([1.0, 2.0, 3.0, 4.0])
+    segs = encode_segments(7, ts, values, scale=1.0, offset=0.0)
+    assert [s.sample_n for s in segs] == [2, 2]
+    assert [(s.value_min, s.value_max, s.value_sum) for s in segs] == [
+        (1.0, 2.0, 3.0),
+        (3.0, 4.0, 7.0),
+    ]
+    got_ts, got_values = decode_segment(segs[1])
+    assert np.array_equal(got_ts, ts[2:])
+    assert np.array_equal(got_values, values[2:])
+
+
+def _write_log(tmp_path: Path) -> Path:
+    frames = []
+    for i in range(300):
+        ts_ms = i * 250
+        frames.append((ts_ms, 0x123, struct.pack("<HB", 1200 + i, i % 3)))
+        if i % 4 == 0:
+            frames.append((ts_ms + 5, 0x456, bytes([i % 200])))
+    return write_nfr(tmp_path / "LOG_0002.NFR", frames)
+
+
+def test_segment_layout_matches_row_layout(scratch_db: str, tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _write_log(tmp_path)
+
+    seg_session = run_batch_import(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()),
+        layout="segments",
+    )
+
+    with psycopg.connect(scratch_db) as conn:
+        raw_rows = conn.execute(
+            "SELECT count(*) FROM sd_readings WHERE session_id = %s", (seg_session,)
+        ).fetchone()[0]
+        n_segments, n_samples = conn.execute(
+            "SELECT count(*), sum(sample_n) FROM sd_segments WHERE session_id = %s",
+            (seg_session,),
+        ).fetchone()
+        seg_rollup = conn.execute(
+            "SELECT signal_id, ts_bucket, value_min, value_max, sample_n "
+            "FROM sd_rollup_1s WHERE session_id = %s ORDER BY 1, 2",
+            (seg_session,),
+        ).fetchall()
+        ids = dict(
+            conn.execute(
+                "SELECT signal_name, id FROM signal_definitions"
+            ).fetchall()
+        )
+        ended_at = conn.execute(
+            "SELECT ended_at FROM sessions WHERE id = %s", (seg_session,)
+        ).fetchone()[0]
+        window = read_segment_window(conn, seg_session, [ids["bus_v"], ids["soc"]])
+        signal_ids = [
+            r[0]
+            for r in conn.execute(
+                "SELECT signal_id FROM get_session_signal_ids(%s)", (seg_session,)
+            ).fetchall()
+        ]
+
+    assert raw_rows == 0
+    assert n_segments >= 3
+    assert n_samples == 300 * 2 + 75
+    assert sorted(signal_ids) == sorted(ids.values())
+    assert ended_at is not None
+
+    ts, values = window[ids["bus_v"]]
+    assert ts.size == 300
+    assert np.allclose(values, (1200 + np.arange(300)) * 0.01)
+    assert np.all(np.diff(ts) == 250_000)
+
+    # Re-import the same file as plain rows and compare rollups + values.
+    row_session = run_batch_import(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()),
+        layout="both",
+    )
+    assert row_session == seg_session
+    with psycopg.connect(scratch_db) as conn:
+        row_rollup = conn.execute(
+            "SELECT signal_id, ts_bucket, value_min, value_max, sample_n "
+            "FROM sd_rollup_1s WHERE session_id = %s ORDER BY 1, 2",
+            (row_session,),
+        ).fetchall()
+        raw = conn.execute(
+            "SELECT ts, value FROM sd_readings "
+            "WHERE session_id = %s AND signal_id = %s ORDER BY ts",
+            (row_session, ids["soc"]),
+        ).fetchall()
+        start = raw[10][0]
+        end = raw[20][0]
+        windowed = read_segment_window(
+            conn, row_session, [ids["soc"]], start=start, end=end
+        )[ids["soc"]]
+    assert row_rollup == seg_rollup
+    assert [from_epoch_us(t) for t in windowed[0]] == [r[0] for r in raw[10:20]]
+    assert list(windowed[1]) == [r[1] for r in raw[10:20]]
+    assert end - start == timedelta(seconds=10)
@@ -1,9 +1,26 @@
-"""Tests for the LoRa→USB wire-format parser in serial_source._parse_packets."""
+"""Tests for the LoRa→USB wire-format parser in serial_source._parse_packets
+and the reader thread that feeds it."""
 from __future__ import annotations
 
 import struct
+import threading
+import time
 
-from serial_source import _parse_packets
+import pytest
+import serial
+
+import serial_source
+from live import SourceEvent
+from serial_source import (
+    HEADER_SIZE,
+    FrameDeduper,
+    SerialReader,
+    SyncStats,
+    _header_candidates,
+    _parse_packets,
+    merged_serial_events,
+    serial_events,
+)
 
 
 def _can_frame(ts_ms: int, frame_id: int, data: bytes) -> bytes:
@@ -95,3 +112,152 @@ def test_partial_header_carryover() -> None:
     events, rest = _parse_packets(partial)
     assert events == []
     assert rest == partial
+
+
+def test_desync_counters_span_calls() -> None:
+    """A garbage burst split across reads is one desync; every skipped
+    byte is counted once."""
+    a = _packet(-10, 1.0, [_can_frame(1, 0x111, b"\x01")])
+    b = _packet(-20, 2.0, [_can_frame(2, 0x222, b"\x02")])
+    junk = b"\xff" * 100
+    stats = SyncStats()
+    events, rest = _parse_packets(a + junk[:60], stats)
+    assert len(rest) == HEADER_SIZE - 1  # could still start a header
+    assert stats.desyncs == 1 and not stats.in_sync
+    events2, rest = _parse_packets(rest + junk[60:] + b, stats)
+    assert rest == b""
+    assert [e.frame_id for e in events + events2 if e.kind == "frame"] == [0x111, 0x222]
+    assert stats == SyncStats(packets=2, desyncs=1, bytes_discarded=100, in_sync=True)
+
+
+def test_header_candidates_match_the_scalar_checks() -> None:
+    pkt = _packet(-42, 7.5, [_can_frame(123, 0x100, b"\x01")])
+    junk = bytes(range(256)) + struct.pack("<hfB", -42, float("nan"), 18)
+    buf = junk + pkt + struct.pack("<hfB", 21, 0.0, 18) + struct.pack("<hfB", 0, 31.0, 18)
+    assert _header_candidates(buf, 0).tolist() == [len(junk)]
+    assert _header_candidates(buf, len(junk) + 1).tolist() == []
+    assert _header_candidates(b"\x00" * 3, 0).size == 0
+
+
+class _FakeSerial:
+    """Hands out `chunks` one per read call, then fails like an unplugged
+    port."""
+
+    def __init__(self, chunks: list[bytes]) -> None:
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def readinto(self, buf: bytearray) -> int:
+        if not self.chunks:
+            raise serial.SerialException("device disconnected")
+        chunk = self.chunks.pop(0)
+        buf[: len(chunk)] = chunk
+        return len(chunk)
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_reader_drains_while_consumer_is_busy() -> None:
+    chunks = [bytes([i]) * 100 for i in range(10)] + [b""]
+    reader = SerialReader(_FakeSerial(chunks), read_size=128).start()
+    deadline = time.monotonic() + 5
+    while reader.bytes_read < 1000 and time.monotonic() < deadline:
+        time.sleep(0.01)  # the consumer is "stuck in Postgres"
+    assert reader.bytes_read == 1000
+    assert reader.get(0.1) == b"".join(chunks)
+    assert reader.high_water == 1000
+    with pytest.raises(serial.SerialException):
+        while True:
+            reader.get(0.1)
+    assert reader.reads == 11  # ten chunks and one empty read
+    reader.stop()
+
+
+def test_serial_events_reports_reader_stats(monkeypatch: pytest.MonkeyPatch) -> None:
+    pkt = _packet(-60, 5.0, [_can_frame(10, 0x100, b"\x01")])
+    fake = _FakeSerial([pkt[:5], pkt[5:]])
+    monkeypatch.setattr(serial_source, "open_serial", lambda port, baud: fake)
+
+    events = serial_events("/dev/ttyFAKE", stats_interval=0)
+    kinds = []
+    for ev in events:
+        kinds.append(ev.kind)
+        if ev.kind == "serial_stats":
+            stats = ev.stats
+        if ev.kind == "disconnected":
+            break
+    events.close()
+
+    assert kinds[0] == "connected"
+    assert [k for k in kinds if k != "serial_stats"] == [
+        "connected", "signal_quality", "frame", "disconnected"
+    ]
+    assert stats["bytes_total"] == len(pkt)
+    assert set(stats) == {
+        "bytes_per_s", "reads_per_s", "bytes_total", "queue_high_water",
+        "packets", "desyncs", "bytes_discarded",
+    }
+    assert stats["packets"] == 1
+    assert fake.closed
+
+
+def _frame(port: str, ts_ms: int, frame_id: int = 0x100, data: bytes = b"\x01") -> SourceEvent:
+    return SourceEvent(kind="frame", port=port, ts_ms=ts_ms, frame_id=frame_id, data=data)
+
+
+def test_deduper_drops_cross_port_copies_within_the_window() -> None:
+    dedup = FrameDeduper(window=1.0)
+    assert dedup.accept(_frame("A", 10), now=0.0)
+    assert not dedup.accept(_frame("B", 10), now=0.5)
+    assert dedup.accept(_frame("A", 10), now=0.6)  # same link: not a copy
+    assert dedup.accept(_frame("B", 10, data=b"\x02"), now=0.7)
+    assert dedup.accept(_frame("B", 10), now=1.5)  # forgotten
+    assert dedup.dropped == {"B": 1}
+
+
+def test_deduper_drops_parsed_copies_from_another_port() -> None:
+    pkt = _packet(-50, 4.0, [_can_frame(77, 0x200, b"\x05\x06")])
+    from_a, _ = _parse_packets(pkt, port="A")
+    from_b, _ = _parse_packets(pkt, port="B")
+    frames_a = [e for e in from_a if e.kind == "frame"]
+    frames_b = [e for e in from_b if e.kind == "frame"]
+    assert [e.port for e in frames_a + frames_b] == ["A", "B"]
+
+    dedup = FrameDeduper(window=1.0)
+    assert dedup.accept(frames_a[0], now=0.0)
+    assert not dedup.accept(frames_b[0], now=0.1)
+    assert dedup.dropped == {"B": 1}
+
+
+def test_merged_ports_share_one_connection(monkeypatch: pytest.MonkeyPatch) -> None:
+    b_done = threading.Event()
+
+    def fake_batches(port, baud, idle_timeout, stats_interval):
+        yield [SourceEvent(kind="connected", port=port)]
+        if port == "A":
+            yield [_frame("A", 1), _frame("A", 2)]
+            b_done.wait(5)
+        else:
+            yield [_frame("B", 1), _frame("B", 2), _frame("B", 3)]
+            yield [SourceEvent(kind="signal_quality", port="B", rssi=-70, snr=3.0)]
+            b_done.set()
+            yield [SourceEvent(kind="serial_stats", port="B", stats={"packets": 2})]
+        yield [SourceEvent(kind="disconnected", port=port)]
+
+    monkeypatch.setattr(serial_source, "_port_batches", fake_batches)
+    events = []
+    for ev in merged_serial_events(["A", "B"]):
+        events.append(ev)
+        if ev.kind == "disconnected":
+            break
+
+    kinds = [e.kind for e in events]
+    assert kinds[0] == "connected" and kinds.count("connected") == 1
+    assert kinds.count("disconnected") == 1
+    assert sorted(e.ts_ms for e in events if e.kind == "frame") == [1, 2, 3]
+    (quality,) = [e for e in events if e.kind == "signal_quality"]
+    assert quality.port == "B"
+    (stats,) = [e for e in events if e.kind == "serial_stats"]
+    assert stats.port == "B" and stats.stats["packets"] == 2
+    assert "duplicates" in stats.stats
@@ -0,0 +1,121 @@
+"""Tests for parser.sessions_io — binary COPY → NumPy session reads."""
+from __future__ import annotations
+
+import io
+import struct
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+import segments
+from batch import run_batch_import
+from columns import from_epoch_us, to_epoch_us
+from protocol import ProtocolEmitter
+from sessions_io import iter_signal_chunks, load_signal, load_signals, resolve_signal_ids
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def _import(
+    scratch_db: str, tmp_path: Path, layout: str = "rows", step_ms: int = 10
+):
+    log = write_nfr(
+        tmp_path / "LOG_0005.NFR",
+        [(i * step_ms, 0x123, struct.pack("<HB", i, i % 5)) for i in range(2000)],
+    )
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    return run_batch_import(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        nfr_file=log,
+        emitter=ProtocolEmitter(io.StringIO()),
+        layout=layout,
+    )
+
+
+def test_load_signal_matches_sql_rows(scratch_db: str, tmp_path: Path) -> None:
+    session_id = _import(scratch_db, tmp_path)
+    with psycopg.connect(scratch_db) as conn:
+        ids = resolve_signal_ids(conn, ["bus_v", "PDM.fault"])
+        ts, values = load_signal(conn, session_id, ids["bus_v"])
+        expected = conn.execute(
+            "SELECT ts, value FROM sd_readings WHERE session_id = %s "
+            "AND signal_id = %s ORDER BY ts",
+            (session_id, ids["bus_v"]),
+        ).fetchall()
+
+        chunks = list(
+            iter_signal_chunks(conn, session_id, ids["PDM.fault"], chunk_rows=300)
+        )
+
+        start, end = expected[100][0], expected[200][0]
+        windowed = load_signals(
+            conn, session_id, [ids["bus_v"]], start=start, end=end
+        )[ids["bus_v"]]
+        rollup_ts, rollup_values = load_signal(
+            conn, session_id, ids["bus_v"], level="1s"
+        )
+
+    assert ts.dtype == np.int64 and values.dtype == np.float64
+    assert [from_epoch_us(t) for t in ts] == [r[0] for r in expected]
+    assert values.tolist() == [r[1] for r in expected]
+
+    assert all(c[0].size <= 300 for c in chunks)
+    assert sum(c[0].size for c in chunks) == 2000
+
+    assert windowed[0].size == 100
+    assert windowed[0][0] == to_epoch_us(start)
+
+    assert rollup_ts.size == 20
+    assert np.all(rollup_ts % 1_000_000 == 0)
+    assert np.isclose(rollup_values[0], np.mean(np.arange(100) * 0.01))
+
+
+def test_load_signal_reads_segment_sessions(scratch_db: str, tmp_path: Path) -> None:
+    session_id = _import(scratch_db, tmp_path, layout="segments")
+    with psycopg.connect(scratch_db) as conn:
+        ids = resolve_signal_ids(conn, ["bus_v"])
+        ts, values = load_signal(conn, session_id, ids["bus_v"])
+    assert ts.size == 2000
+    assert np.allclose(values, np.arange(2000) * 0.01)
+
+
+def test_segment_chunks_stream_one_segment_at_a_time(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # 2000 frames 100 ms apart span four 60 s segments.
+    session_id = _import(scratch_db, tmp_path, layout="segments", step_ms=100)
+    monkeypatch.setattr(
+        segments, "read_segment_window", lambda *a, **k: pytest.fail("buffered")
+    )
+    with psycopg.connect(scratch_db) as conn:
+        ids = resolve_signal_ids(conn, ["bus_v"])
+        n_segments = conn.execute(
+            "SELECT count(*) FROM sd_segments WHERE session_id = %s AND signal_id = %s",
+            (session_id, ids["bus_v"]),
+        ).fetchone()[0]
+        chunks = list(
+            iter_signal_chunks(conn, session_id, ids["bus_v"], chunk_rows=700)
+        )
+    assert n_segments > 1
+    assert [c[0].size for c in chunks] == [700, 700, 600]
+    ts = np.concatenate([c[0] for c in chunks])
+    values = np.concatenate([c[1] for c in chunks])
+    assert np.all(np.diff(ts) == 100_000)
+    assert np.allclose(values, np.arange(2000) * 0.01)
+
+
+def test_resolve_signal_ids_rejects_unknown(scratch_db: str) -> None:
+    with psycopg.connect(scratch_db) as conn:
+        with pytest.raises(KeyError):
+            resolve_signal_ids(conn, ["nope"])
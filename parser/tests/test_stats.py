@@ -0,0 +1,168 @@
+"""Tests for parser.stats — session_signal_stats computed at import/flush."""
+from __future__ import annotations
+
+import io
+import math
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import psycopg
+import pytest
+
+from batch import run_batch_import
+from columns import SignalColumns
+from db import (
+    Reading,
+    SignalDef,
+    end_session_and_flush,
+    insert_rt_batch,
+    open_session,
+    upsert_signal_definitions,
+)
+from protocol import ProtocolEmitter
+from stats import HISTOGRAM_BINS, StatsAccumulator, compute_signal_stats, histogram
+from tests.conftest import write_nfr
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def test_histogram_puts_max_in_last_bin_and_handles_constant() -> None:
+    h = histogram(np.array([0.0, 0.5, 1.0]), 0.0, 1.0)
+    assert h.sum() == 3
+    assert h[0] == 1 and h[HISTOGRAM_BINS // 2] == 1 and h[-1] == 1
+    flat = histogram(np.array([2.0, 2.0]), 2.0, 2.0)
+    assert flat[0] == 2 and flat.sum() == 2
+
+
+def test_compute_signal_stats_ignores_non_finite_values() -> None:
+    ts = np.array([10, 20, 30, 40], dtype=np.int64)
+    values = np.array([1.0, np.nan, 3.0, np.inf])
+    s = compute_signal_stats(5, ts, values)
+    assert s.sample_n == 4
+    assert (s.value_min, s.value_max, s.value_mean) == (1.0, 3.0, 2.0)
+    assert (s.first_ts_us, s.last_ts_us) == (10, 40)
+    assert sum(s.histogram) == 2
+
+
+def _write_log(tmp_path: Path) -> Path:
+    frames = [(i * 20, 0x123, struct.pack("<HB", 1000 + 7 * i, i % 4)) for i in range(50)]
+    frames.append((500, 0x456, bytes([180])))
+    return write_nfr(tmp_path / "LOG_0004.NFR", frames)
+
+
+def test_accumulator_matches_compute_signal_stats() -> None:
+    rng = np.random.default_rng(3)
+    ts = np.arange(1000, dtype=np.int64) * 1000
+    values = rng.normal(5.0, 2.0, ts.size)
+    values[[10, 500]] = [np.nan, np.inf]
+    finite = values[np.isfinite(values)]
+
+    acc = StatsAccumulator(7, float(finite.min()), float(finite.max()))
+    for t, v in zip(ts[:600].tolist(), values[:600].tolist()):
+        acc.add(t, v)
+    acc.extend(ts[600:], values[600:])
+    got, want = acc.result(), compute_signal_stats(7, ts, values)
+    assert got is not None
+    assert got.histogram == want.histogram
+    assert (got.sample_n, got.value_min, got.value_max) == (
+        want.sample_n, want.value_min, want.value_max
+    )
+    assert (got.first_ts_us, got.last_ts_us) == (want.first_ts_us, want.last_ts_us)
+    assert math.isclose(got.value_mean, want.value_mean)
+    assert StatsAccumulator(8, math.nan, math.nan).result() is None
+
+
+def test_batch_import_writes_stats_matching_sql(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    log = _write_log(tmp_path)
+
+    def no_buffering(*args: object) -> None:
+        raise AssertionError("a rows import without sidecars kept its readings in memory")
+
+    monkeypatch.setattr(SignalColumns, "append", no_buffering)
+    session_id = run_batch_import(
+        dsn=scratch_db, dbc_csv=dbc, nfr_file=log, emitter=ProtocolEmitter(io.StringIO())
+    )
+
+    query = (
+        "SELECT d.signal_name, s.sample_n, s.value_min, s.value_max, s.value_mean, "
+        "s.first_ts, s.last_ts, s.histogram "
+        "FROM session_signal_stats s JOIN signal_definitions d ON d.id = s.signal_id "
+        "WHERE s.session_id = %s ORDER BY d.signal_name"
+    )
+    with psycopg.connect(scratch_db) as conn:
+        from_python = conn.execute(query, (session_id,)).fetchall()
+        counts = conn.execute(
+            "SELECT row_count, signal_count FROM sessions WHERE id = %s", (session_id,)
+        ).fetchone()
+        listed = conn.execute(
+            "SELECT row_count, signal_count FROM list_sessions(10)"
+        ).fetchone()
+        ids = conn.execute(
+            "SELECT signal_id FROM get_session_signal_ids(%s)", (session_id,)
+        ).fetchall()
+
+        conn.execute("SELECT populate_session_signal_stats(%s)", (session_id,))
+        from_sql = conn.execute(query, (session_id,)).fetchall()
+
+    assert counts == (101, 3)
+    assert listed == (101, 3)
+    assert len(ids) == 3
+    by_name = {r[0]: r for r in from_python}
+    assert by_name["bus_v"][1] == 50
+    assert math.isclose(by_name["bus_v"][2], 10.0)
+    assert math.isclose(by_name["bus_v"][3], 13.43)
+    assert by_name["soc"][7][0] == 1 and sum(by_name["soc"][7]) == 1
+
+    assert len(from_python) == len(from_sql)
+    for py, sql in zip(from_python, from_sql):
+        assert py[0] == sql[0]
+        assert py[1] == sql[1]
+        assert py[2:4] == sql[2:4]
+        assert math.isclose(py[4], sql[4])
+        assert py[5:7] == sql[5:7]
+        assert py[7] == sql[7]
+
+
+def test_live_flush_populates_stats(scratch_db: str) -> None:
+    with psycopg.connect(scratch_db) as conn:
+        ids = upsert_signal_definitions(
+            conn, [SignalDef(source="PDM", signal_name="v", unit="V")]
+        )
+        sig_id = ids[("PDM", "v")]
+        session_id = open_session(conn, source="live")
+        t0 = datetime.now(timezone.utc)
+        insert_rt_batch(
+            conn,
+            session_id,
+            [
+                Reading(ts=t0 + timedelta(milliseconds=i), signal_id=sig_id, value=float(i))
+                for i in range(10)
+            ],
+        )
+        end_session_and_flush(conn, session_id)
+
+        row = conn.execute(
+            "SELECT sample_n, value_min, value_max, value_mean, histogram "
+            "FROM session_signal_stats WHERE session_id = %s",
+            (session_id,),
+        ).fetchone()
+        counts = conn.execute(
+            "SELECT row_count, signal_count FROM sessions WHERE id = %s",
+            (session_id,),
+        ).fetchone()
+
+    assert row[:4] == (10, 0.0, 9.0, 4.5)
+    assert sum(row[4]) == 10 and row[4][-1] == 1
+    assert counts == (10, 1)
@@ -0,0 +1,111 @@
+"""Tests for parser.subscriptions — emitting only subscribed signals."""
+from __future__ import annotations
+
+import io
+import json
+import struct
+from pathlib import Path
+
+import psycopg
+import pytest
+
+from compile import compile_csv
+from live import SourceEvent, run_live
+from protocol import ProtocolEmitter
+from subscriptions import Subscriptions, plan_for, read_commands
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+,PDM_Status,,fault,16,8,1,0,,uint8
+0x456,BMS_SOE,BMS_SOE,soc,0,8,0.5,0,%,uint8
+"""
+
+
+def test_plan_keeps_only_selected_signals(tmp_path: Path) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    table = compile_csv(str(dbc))
+    ids = {(0x123, "bus_v"): 1, (0x123, "fault"): 2, (0x456, "soc"): 3}
+
+    assert plan_for(table, ids, None) is table
+    plan = plan_for(table, ids, frozenset({2}))
+    assert list(plan) == [0x123]
+    assert [s.name for s in plan[0x123].signals] == ["fault"]
+    assert plan[0x123].required_bytes == table[0x123].required_bytes
+    assert plan_for(table, ids, frozenset()) == {}
+
+
+def test_commands_update_the_selection(capsys: pytest.CaptureFixture[str]) -> None:
+    subs = Subscriptions()
+    assert subs.state == (0, None)
+    read_commands(
+        io.StringIO(
+            '{"type": "subscribe", "signal_ids": [3, 1]}\n'
+            "\n"
+            "not json\n"
+            '{"type": "unsubscribe"}\n'
+        ),
+        subs,
+    )
+    assert subs.state == (1, frozenset({1, 3}))
+    read_commands(io.StringIO('{"type": "subscribe", "signal_ids": null}\n'), subs)
+    assert subs.state == (2, None)
+    assert capsys.readouterr().err.count("ignoring command") == 2
+
+
+@pytest.mark.parametrize("db_signals", ["all", "subscribed"])
+def test_run_live_emits_subscribed_signals(
+    scratch_db: str, tmp_path: Path, db_signals: str
+) -> None:
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    subs = Subscriptions()
+
+    def source():
+        yield SourceEvent(kind="connected", port="/dev/ttyFAKE")
+        for i in range(4):
+            if i == 2:
+                with psycopg.connect(scratch_db) as conn:
+                    (soc,) = conn.execute(
+                        "SELECT id FROM signal_definitions WHERE signal_name = 'soc'"
+                    ).fetchone()
+                subs.set([soc])
+            yield SourceEvent(
+                kind="frame", ts_ms=i * 10, frame_id=0x123,
+                data=struct.pack("<HB", 1200 + i, 0) + b"\x00" * 5,
+            )
+            yield SourceEvent(
+                kind="frame", ts_ms=i * 10 + 5, frame_id=0x456, data=bytes([100 + i])
+            )
+        yield SourceEvent(kind="disconnected")
+
+    out = io.StringIO()
+    run_live(
+        dsn=scratch_db,
+        dbc_csv=dbc,
+        source=source(),
+        emitter=ProtocolEmitter(out),
+        subscriptions=subs,
+        db_signals=db_signals,
+    )
+    with psycopg.connect(scratch_db) as conn:
+        names = dict(conn.execute("SELECT id, signal_name FROM signal_definitions").fetchall())
+        stored = conn.execute(
+            "SELECT signal_id, count(*) FROM sd_readings GROUP BY 1"
+        ).fetchall()
+
+    emitted = [
+        names[row["signal_id"]]
+        for line in out.getvalue().splitlines()
+        if (event := json.loads(line))["type"] == "frames"
+        for row in event["rows"]
+    ]
+    # Everything until the subscription arrives, then only soc.
+    assert emitted == ["bus_v", "fault", "soc"] * 2 + ["soc"] * 2
+    counts = {names[sid]: n for sid, n in stored}
+    if db_signals == "all":
+        assert counts == {"bus_v": 4, "fault": 4, "soc": 4}
+    else:
+        assert counts == {"bus_v": 2, "fault": 2, "soc": 4}
@@ -0,0 +1,147 @@
+"""Tests for parser.watch — settled-file detection and the import loop."""
+from __future__ import annotations
+
+import io
+import json
+import struct
+import threading
+import time
+from pathlib import Path
+
+import psycopg
+import pytest
+
+import append
+from batch import session_id_from_file
+from protocol import ProtocolEmitter
+from tests.conftest import NFR_HEADER, nfr_frames
+from watch import SettleTracker, run_watch, scan
+
+
+DBC_CSV = """\
+Message ID,Message Name,Sender,Signal Name,Start Bit,Size (bits),Factor,Offset,Unit,Data Type
+0x123,PDM_Status,PDM,bus_v,0,16,0.01,0,V,uint16
+"""
+
+
+def _frames(start: int, n: int) -> bytes:
+    return nfr_frames((i * 10, 0x123, struct.pack("<H", 1000 + i)) for i in range(start, start + n))
+
+
+def test_scan_finds_logs_recursively_and_skips_shadow_files(tmp_path: Path) -> None:
+    (tmp_path / "day2").mkdir()
+    (tmp_path / "LOG_0001.NFR").write_bytes(NFR_HEADER)
+    (tmp_path / "day2" / "log_0002.nfr").write_bytes(NFR_HEADER + _frames(0, 1))
+    (tmp_path / "._LOG_0001.NFR").write_bytes(b"resource fork")
+    (tmp_path / "LOG_0001.NFR.idx.npz").write_bytes(b"")
+
+    listing = scan(tmp_path)
+    assert sorted(p.name for p in listing) == ["LOG_0001.NFR", "log_0002.nfr"]
+    assert listing[tmp_path / "day2" / "log_0002.nfr"][0] == len(NFR_HEADER) + 18
+    assert scan(tmp_path / "missing") == {}
+
+
+def test_settle_tracker_waits_for_size_to_stop_changing() -> None:
+    tracker = SettleTracker(settle_seconds=2.0)
+    old, new, partial = Path("old.nfr"), Path("new.nfr"), Path("partial.nfr")
+
+    assert tracker.update({old: (100, 5), new: (100, 9), partial: (3, 9)}, now=0.0) == []
+    # Still growing: the clock restarts at every change.
+    assert tracker.update({old: (100, 5), new: (200, 10), partial: (3, 9)}, now=1.5) == []
+    # Newest first; a file smaller than a header is never ready.
+    assert tracker.update({old: (100, 5), new: (200, 10), partial: (3, 9)}, now=2.0) == [old]
+    assert tracker.update({old: (100, 5), new: (200, 10)}, now=3.5) == [new, old]
+
+    tracker.mark_done(new, (200, 10))
+    tracker.mark_done(old, (999, 5))  # changed since; stays pending
+    assert tracker.update({old: (100, 5), new: (200, 10)}, now=4.0) == [old]
+    # A done file that grows is pending again once settled.
+    tracker.mark_done(old, (100, 5))
+    assert tracker.update({old: (100, 5), new: (300, 11)}, now=5.0) == []
+    assert tracker.update({old: (100, 5), new: (300, 11)}, now=7.0) == [new]
+
+
+def _events(out: io.StringIO) -> list[dict]:
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def _wait_for(out: io.StringIO, ended: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if sum(e["type"] == "session_ended" for e in _events(out)) >= ended:
+            return
+        time.sleep(0.05)
+    raise AssertionError(f"timed out waiting for {ended} imports: {out.getvalue()}")
+
+
+def test_watch_imports_new_and_grown_logs(
+    scratch_db: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # The watcher matches checkpoints itself and hands the match (and its
+    # prefix hash) to the append, which must not hash the prefix again.
+    lookups: list[Path] = []
+    real_match = append.match_checkpoint
+
+    def counting_match(conn, nfr_file, dbc_csv):
+        lookups.append(nfr_file)
+        return real_match(conn, nfr_file, dbc_csv)
+
+    monkeypatch.setattr(append, "match_checkpoint", counting_match)
+    dbc = tmp_path / "dbc.csv"
+    dbc.write_text(DBC_CSV)
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    log = inbox / "LOG_0001.NFR"
+    log.write_bytes(NFR_HEADER + _frames(0, 100))
+
+    out = io.StringIO()
+    stop = threading.Event()
+
+    def watch() -> None:
+        run_watch(
+            dsn=scratch_db,
+            dbc_csv=dbc,
+            directory=inbox,
+            emitter=ProtocolEmitter(out),
+            poll_seconds=0.05,
+            settle_seconds=0.2,
+            stop=stop,
+        )
+
+    thread = threading.Thread(target=watch)
+    thread.start()
+    try:
+        _wait_for(out, 1)
+        first = next(e for e in _events(out) if e["type"] == "session_started")["session_id"]
+        assert first == str(session_id_from_file(log))
+
+        # The card is copied off again later in the day: same log, longer.
+        with open(log, "ab") as f:
+            f.write(_frames(100, 50))
+        _wait_for(out, 2)
+    finally:
+        stop.set()
+        thread.join(timeout=30)
+    assert not thread.is_alive()
+
+    ended = [e for e in _events(out) if e["type"] == "session_ended"]
+    assert [e["session_id"] for e in ended] == [first, first]
+    assert [e["row_count"] for e in ended] == [100, 50]
+    assert not any(e["type"] == "error" for e in _events(out))
+    assert lookups == []
+
+    with psycopg.connect(scratch_db) as conn:
+        (count,) = conn.execute(
+            "SELECT count(*) FROM sd_readings WHERE session_id = %s", (first,)
+        ).fetchone()
+    assert count == 150
+
+    # A restarted watcher skips what is already imported.
+    out = io.StringIO()
+    stop = threading.Event()
+    thread = threading.Thread(target=watch)
+    thread.start()
+    time.sleep(1.0)
+    stop.set()
+    thread.join(timeout=30)
+    assert out.getvalue() == ""
@@ -0,0 +1,173 @@
+"""Watch mode: import .nfr logs as they land in a folder or on an SD card.
+
+`run_watch` polls a directory (an SD card mount or an inbox folder)
+and imports each log once it has settled, in one long-running process:
+
+  1. Every `poll_seconds` the tree is listed for *.nfr files with their
+     size and mtime. A file counts as settled once neither has changed
+     for `settle_seconds`, so a log that is still being copied (or still
+     being written by the car) is left alone. macOS "._" shadow files are
+     ignored.
+  2. Settled files are taken newest first, one per poll, so the log just
+     pulled off the car is ready before an older backlog — a newer file
+     arriving during a long import jumps the queue.
+  3. A file whose bytes are already in the database is skipped: a
+     checkpoint covering the whole file (header hash, then a sha256 of the
+     stored prefix), or else the content-hash session id of a finished
+     session. Anything else is appended to the session of a grown log
+     (`append_from_checkpoint`, reusing the prefix hash just computed, so
+     the old bytes are read once) or imported in full with a resumable
+     `run_batch_import`.
+
+The process stays warm between files: modules and NumPy are loaded once,
+the DBC is compiled once (`batch.compile_dbc`, recompiled only when the
+CSV or its sidecars change) and the lookups in step 3 share one
+connection. Imports emit the usual session_started / import_progress /
+session_ended events; a file that fails emits `error` and is retried only
+after it changes.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import psycopg
+
+from append import append_from_checkpoint, match_checkpoint
+from batch import compile_dbc, session_id_from_file
+from db import ImportCheckpoint
+from nfr_reader import FRAME_SIZE, HEADER_SIZE, frame_count
+from protocol import ProtocolEmitter
+
+POLL_SECONDS = 1.0
+SETTLE_SECONDS = 3.0  # unchanged size + mtime for this long = copy finished
+SUFFIX = ".nfr"
+
+Stat = tuple[int, int]  # (size, mtime_ns)
+
+
+def scan(directory: Path) -> dict[Path, Stat]:
+    """Every .nfr file under `directory` with its size and mtime. A card
+    pulled mid-scan yields what was listed so far."""
+    found: dict[Path, Stat] = {}
+    stack = [directory]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.name.lower().endswith(SUFFIX) and not entry.name.startswith("._"):
+                    st = entry.stat()
+                    found[Path(entry.path)] = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                continue
+    return found
+
+
+@dataclass
+class _Tracked:
+    stat: Stat
+    since: float  # when `stat` was first seen
+    done: bool = False  # imported (or failed) at this stat
+
+
+class SettleTracker:
+    """Which files have stopped changing and still need importing."""
+
+    def __init__(self, settle_seconds: float = SETTLE_SECONDS) -> None:
+        self.settle_seconds = settle_seconds
+        self._files: dict[Path, _Tracked] = {}
+
+    def update(self, listing: dict[Path, Stat], now: float) -> list[Path]:
+        """Record a `scan` taken at `now`; returns the settled files not
+        yet handled, newest mtime first."""
+        for path in set(self._files) - set(listing):
+            del self._files[path]
+        for path, stat in listing.items():
+            tracked = self._files.get(path)
+            if tracked is None or tracked.stat != stat:
+                self._files[path] = _Tracked(stat, now)
+        ready = [
+            path
+            for path, t in self._files.items()
+            if not t.done
+            and t.stat[0] >= HEADER_SIZE
+            and now - t.since >= self.settle_seconds
+        ]
+        ready.sort(key=lambda p: self._files[p].stat[1], reverse=True)
+        return ready
+
+    def mark_done(self, path: Path, stat: Stat) -> None:
+        """`path` was handled as it was at `stat`; a later change makes it
+        pending again."""
+        tracked = self._files.get(path)
+        if tracked is not None and tracked.stat == stat:
+            tracked.done = True
+
+
+def already_imported(
+    conn: psycopg.Connection, nfr_file: Path, cp: ImportCheckpoint | None
+) -> bool:
+    """True if every frame of `nfr_file` is already in a finished session.
+    `cp` is the file's `match_checkpoint` result, if any."""
+    if cp is not None:
+        # Shorter checkpoint: the log grew and the tail needs appending.
+        return cp.prefix_bytes >= HEADER_SIZE + frame_count(nfr_file) * FRAME_SIZE
+    row = conn.execute(
+        "SELECT s.ended_at IS NOT NULL AND NOT EXISTS "
+        "(SELECT 1 FROM import_resume r WHERE r.session_id = s.id) "
+        "FROM sessions s WHERE s.id = %s",
+        (str(session_id_from_file(nfr_file)),),
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def run_watch(
+    *,
+    dsn: str,
+    dbc_csv: Path,
+    directory: Path,
+    emitter: ProtocolEmitter,
+    layout: str = "rows",
+    poll_seconds: float = POLL_SECONDS,
+    settle_seconds: float = SETTLE_SECONDS,
+    stop: threading.Event | None = None,
+) -> None:
+    """Import logs from `directory` until `stop` is set; see the module
+    docstring."""
+    if not directory.is_dir():
+        raise NotADirectoryError(directory)
+    # Fail on a bad DBC now, not on the first log.
+    compile_dbc(dbc_csv)
+    stop = stop or threading.Event()
+    tracker = SettleTracker(settle_seconds)
+
+    with psycopg.connect(dsn, autocommit=True) as conn:
+        while not stop.is_set():
+            listing = scan(directory)
+            ready = tracker.update(listing, time.monotonic())
+            if not ready:
+                stop.wait(poll_seconds)
+                continue
+            path = ready[0]
+            stat = listing[path]
+            try:
+                match = match_checkpoint(conn, path, dbc_csv)
+                cp = match[0] if match is not None else None
+                if not already_imported(conn, path, cp):
+                    append_from_checkpoint(
+                        dsn=dsn, dbc_csv=dbc_csv, nfr_file=path, emitter=emitter,
+                        match=match, layout=layout,
+                    )
+            except (OSError, ValueError, psycopg.Error) as err:
+                if conn.closed:
+                    raise
+                emitter.error(f"{path}: {err}")
+            tracker.mark_done(path, stat)